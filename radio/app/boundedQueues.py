@@ -0,0 +1,281 @@
+import time
+from collections import deque
+from pathlib import Path
+from queue import Empty
+from threading import Condition
+from typing import IO, Any, Callable, Deque, List, Optional
+
+from app.customTypes import QueueStats
+
+# Lines are read back from the spill file in batches of this size
+SPILL_READ_LINES = 1000
+SPILL_FILE_SUFFIX = ".spill"
+
+
+class BoundedQueue:
+    def __init__(
+        self,
+        capacity: int,
+        is_essential: Optional[Callable[[Any], bool]] = None,
+        max_size: Optional[int] = None,
+    ) -> None:
+        """
+        A queue with a fixed capacity which drops the oldest item once full, so
+        a stalled consumer cannot use up all of the memory.
+
+        Items which are essential are not dropped, the oldest item which is
+        not essential is dropped instead. If every item is essential then the
+        queue is allowed to grow past its capacity, up to max_size, after
+        which the oldest essential item is dropped too.
+
+        Args:
+            capacity (int): The number of items the queue holds before dropping items
+            is_essential (Optional[Callable[[Any], bool]], optional): Returns whether an item should not be dropped. Defaults to None.
+            max_size (Optional[int], optional): The number of items the queue can grow to with essential items, None for twice the capacity. Defaults to None.
+        """
+        if capacity < 1:
+            raise ValueError(f"Queue capacity must be at least 1, got {capacity}")
+        if max_size is not None and max_size < capacity:
+            raise ValueError(
+                f"Queue max size must be at least the capacity {capacity}, got {max_size}"
+            )
+
+        self.capacity = capacity
+        self.is_essential = is_essential
+        self.max_size = max_size if max_size is not None else capacity * 2
+        self.high_water = 0
+        self.dropped = 0
+
+        self._items: Deque[Any] = deque()
+        self._condition = Condition()
+
+    def put(self, item: Any) -> None:
+        """
+        Add an item to the queue, this never blocks.
+
+        Args:
+            item (Any): The item to add
+        """
+        with self._condition:
+            if len(self._items) >= self.capacity:
+                self._dropOldest()
+            self._items.append(item)
+            self.high_water = max(self.high_water, len(self._items))
+            self._condition.notify()
+
+    def _dropOldest(self) -> None:
+        if self.is_essential is not None:
+            for index, queued_item in enumerate(self._items):
+                if not self.is_essential(queued_item):
+                    del self._items[index]
+                    self.dropped += 1
+                    return
+            if len(self._items) < self.max_size:
+                return
+
+        self._items.popleft()
+        self.dropped += 1
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """
+        Remove and return the oldest item in the queue.
+
+        Args:
+            timeout (Optional[float], optional): How long to wait for an item, None to wait forever. Defaults to None.
+
+        Raises:
+            Empty: If no item was added before the timeout
+
+        Returns:
+            Any: The oldest item
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: len(self._items) > 0, timeout):
+                raise Empty
+            return self._items.popleft()
+
+    def empty(self) -> bool:
+        with self._condition:
+            return len(self._items) == 0
+
+    def qsize(self) -> int:
+        with self._condition:
+            return len(self._items)
+
+    def clear(self) -> None:
+        """Remove every item from the queue."""
+        with self._condition:
+            self._items.clear()
+
+    def getStats(self) -> QueueStats:
+        """
+        Returns:
+            QueueStats: The size, capacity, high water mark and drop count of the queue
+        """
+        with self._condition:
+            return {
+                "size": len(self._items),
+                "capacity": self.capacity,
+                "high_water": self.high_water,
+                "dropped": self.dropped,
+                "spilled": 0,
+            }
+
+
+def removeSpillFiles(spill_directory: Path) -> List[Path]:
+    """
+    Remove the spill files left in a directory by queues which were never
+    closed, e.g. because the app crashed.
+
+    Args:
+        spill_directory (Path): The directory the spill files were written to
+
+    Returns:
+        List[Path]: The spill files which were removed
+    """
+    removed = []
+    for spill_file in spill_directory.glob(f"*{SPILL_FILE_SUFFIX}"):
+        try:
+            spill_file.unlink()
+        except OSError:
+            continue
+        removed.append(spill_file)
+    return removed
+
+
+class SpillQueue:
+    def __init__(self, capacity: int, spill_file: Path) -> None:
+        """
+        A queue of lines which keeps up to capacity lines in memory and writes
+        any more to a spill file, so nothing is lost if the consumer stalls
+        and memory use stays bounded.
+
+        Once lines have been spilled, every new line is spilled until the
+        spill file has been read back, so lines always come out in the order
+        they were added. The spill file is removed once it has been read.
+
+        Args:
+            capacity (int): The number of lines held in memory
+            spill_file (Path): The file to write lines to once the memory is full
+        """
+        if capacity < 1:
+            raise ValueError(f"Queue capacity must be at least 1, got {capacity}")
+
+        self.capacity = capacity
+        self.spill_file = spill_file
+        self.high_water = 0
+        self.dropped = 0
+        self.spilled = 0
+
+        self._items: Deque[str] = deque()
+        self._condition = Condition()
+        self._spill_writer: Optional[IO[str]] = None
+        self._spill_reader: Optional[IO[str]] = None
+        self._spill_pending = 0
+
+    def put(self, line: str) -> None:
+        """
+        Add a line to the queue, spilling it to disk if the memory is full.
+
+        Args:
+            line (str): The line to add, without a newline
+        """
+        with self._condition:
+            if self._spill_writer is None and len(self._items) < self.capacity:
+                self._items.append(line)
+                self.high_water = max(self.high_water, len(self._items))
+            else:
+                self._spill(line)
+            self._condition.notify()
+
+    def _spill(self, line: str) -> None:
+        try:
+            if self._spill_writer is None:
+                self._spill_writer = open(self.spill_file, "w", encoding="utf-8")
+                self._spill_reader = open(self.spill_file, encoding="utf-8")
+            self._spill_writer.write(line + "\n")
+        except OSError:
+            self.dropped += 1
+            return
+
+        self.spilled += 1
+        self._spill_pending += 1
+
+    def _readSpill(self) -> None:
+        """Move the next batch of spilled lines back into memory."""
+        assert self._spill_writer is not None and self._spill_reader is not None
+
+        try:
+            self._spill_writer.flush()
+            for _ in range(min(SPILL_READ_LINES, self._spill_pending)):
+                self._items.append(self._spill_reader.readline().rstrip("\n"))
+                self._spill_pending -= 1
+        except OSError:
+            self.dropped += self._spill_pending
+            self._spill_pending = 0
+
+        if self._spill_pending == 0:
+            self._removeSpill()
+
+    def _removeSpill(self) -> None:
+        for handle in (self._spill_writer, self._spill_reader):
+            if handle is not None:
+                handle.close()
+        self._spill_writer = None
+        self._spill_reader = None
+        self.spill_file.unlink(missing_ok=True)
+
+    def get(self, timeout: Optional[float] = None) -> str:
+        """
+        Remove and return the oldest line in the queue.
+
+        Args:
+            timeout (Optional[float], optional): How long to wait for a line, None to wait forever. Defaults to None.
+
+        Raises:
+            Empty: If no line was added before the timeout
+
+        Returns:
+            str: The oldest line
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while not self._items:
+                if self._spill_pending:
+                    self._readSpill()
+                    continue
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise Empty
+                self._condition.wait(remaining)
+            return self._items.popleft()
+
+    def empty(self) -> bool:
+        with self._condition:
+            return len(self._items) == 0 and self._spill_pending == 0
+
+    def qsize(self) -> int:
+        with self._condition:
+            return len(self._items) + self._spill_pending
+
+    def close(self) -> None:
+        """Remove every line from the queue and delete the spill file."""
+        with self._condition:
+            self._items.clear()
+            self._spill_pending = 0
+            self._removeSpill()
+
+    def getStats(self) -> QueueStats:
+        """
+        Returns:
+            QueueStats: The size, capacity, high water mark, drop and spill counts of the queue
+        """
+        with self._condition:
+            return {
+                "size": len(self._items) + self._spill_pending,
+                "capacity": self.capacity,
+                "high_water": self.high_water,
+                "dropped": self.dropped,
+                "spilled": self.spilled,
+            }
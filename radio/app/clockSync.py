@@ -0,0 +1,337 @@
+import time
+from collections import deque
+from logging import Logger, getLogger
+from threading import Lock
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from app.customTypes import ClockSyncStats
+
+CLOCK_SYNC_MAX_SAMPLES = 60
+# Round trips much longer than the shortest were held up in a radio buffer,
+# so their midpoint is not when the autopilot answered
+CLOCK_SYNC_RTT_FILTER_FACTOR = 2.0
+CLOCK_SYNC_RTT_FILTER_SLACK_SECS = 0.002
+# Drift is only estimated once the samples cover this much boot time
+CLOCK_SYNC_MIN_DRIFT_SPAN_SECS = 30.0
+# Any more than this is not crystal drift, e.g. a sample from a reboot
+CLOCK_SYNC_MAX_DRIFT_PPM = 500.0
+# The autopilot rebooted if its boot time goes back by more than this
+CLOCK_SYNC_REBOOT_THRESHOLD_SECS = 1.0
+# A message is left with its receive time if aligning it moves it by more
+# than this, as the estimate is stale
+CLOCK_SYNC_MAX_CORRECTION_SECS = 2.0
+# time_usec fields above this are already unix time, not time since boot
+UNIX_EPOCH_THRESHOLD_USEC = 10**15
+
+SOURCE_TIMESYNC = "timesync"
+SOURCE_SYSTEM_TIME = "system_time"
+
+
+class ClockSample(NamedTuple):
+    boot_secs: float
+    offset_secs: float
+    uncertainty_secs: float
+
+
+class ClockSync:
+    def __init__(self, logger: Logger = getLogger("fgcs")) -> None:
+        """
+        Estimates the offset and drift between the autopilot's time since
+        boot and the clock of this computer, so messages can be timestamped
+        with when the autopilot sent them instead of when they were received,
+        which includes the jitter of buffering in the radio.
+
+        The estimate comes from TIMESYNC round trips, where the autopilot
+        answers with its boot time which is taken to be half way through the
+        round trip. Only the fastest round trips are used and a line is fitted
+        through them to get the drift. If the autopilot never answers TIMESYNC
+        the boot time in SYSTEM_TIME is used, assuming the least delayed
+        message arrived straight away. SYSTEM_TIME also gives the offset to
+        the autopilot's GPS time, which dataflash logs are in.
+
+        Args:
+            logger (Logger, optional): The logger to use. Defaults to getLogger("fgcs").
+        """
+        self.logger = logger
+        self._lock = Lock()
+
+        self._timesync_samples: Deque[ClockSample] = deque(
+            maxlen=CLOCK_SYNC_MAX_SAMPLES
+        )
+        self._system_time_samples: Deque[ClockSample] = deque(
+            maxlen=CLOCK_SYNC_MAX_SAMPLES
+        )
+        self._last_boot_secs: Optional[float] = None
+        # The last timestamp given to each message type, so timestamps never
+        # go back when the estimate changes
+        self._last_timestamps: Dict[str, float] = {}
+
+        self.source: Optional[str] = None
+        self.offset_secs: Optional[float] = None
+        self.drift = 0.0
+        self.uncertainty_secs: Optional[float] = None
+        self.gps_offset_secs: Optional[float] = None
+        self.resets = 0
+        self.messages_aligned = 0
+
+    def addTimesyncResponse(self, ts1: int, tc1: int, receive_time: float) -> None:
+        """
+        Add the response to a TIMESYNC request sent by this computer.
+
+        Args:
+            ts1 (int): The time.monotonic_ns() when the request was sent
+            tc1 (int): The boot time of the autopilot when it answered in nanoseconds
+            receive_time (float): The time.time() when the response was received
+        """
+        send_time = ts1 / 1e9 + (time.time() - time.monotonic())
+        self.addRoundTrip(send_time, tc1 / 1e9, receive_time)
+
+    def addRoundTrip(
+        self, send_time: float, boot_secs: float, receive_time: float
+    ) -> None:
+        """
+        Add a round trip to the autopilot.
+
+        Args:
+            send_time (float): The time.time() when the request was sent
+            boot_secs (float): The boot time of the autopilot when it answered
+            receive_time (float): The time.time() when the response was received
+        """
+        rtt = receive_time - send_time
+        if rtt < 0:
+            return
+
+        midpoint = send_time + rtt / 2
+        self._addSample(
+            self._timesync_samples,
+            ClockSample(boot_secs, midpoint - boot_secs, rtt / 2),
+        )
+
+    def addSystemTime(self, msg: Any) -> None:
+        """
+        Add a SYSTEM_TIME message from the autopilot.
+
+        Args:
+            msg (MAVLink_system_time_message): The SYSTEM_TIME message, with its receive time in _timestamp
+        """
+        boot_secs = msg.time_boot_ms / 1e3
+        self._addSample(
+            self._system_time_samples,
+            ClockSample(boot_secs, msg._timestamp - boot_secs, 0.0),
+        )
+
+        if msg.time_unix_usec != 0:
+            aligned_time = self.toWallTime(boot_secs)
+            if aligned_time is not None:
+                self.gps_offset_secs = msg.time_unix_usec / 1e6 - aligned_time
+
+    def _addSample(self, samples: Deque[ClockSample], sample: ClockSample) -> None:
+        with self._lock:
+            if (
+                self._last_boot_secs is not None
+                and sample.boot_secs
+                < self._last_boot_secs - CLOCK_SYNC_REBOOT_THRESHOLD_SECS
+            ):
+                self.logger.info("Autopilot boot time went back, resetting clock sync")
+                self._reset()
+
+            self._last_boot_secs = sample.boot_secs
+            samples.append(sample)
+            self._updateEstimate()
+
+    def _reset(self) -> None:
+        self._timesync_samples.clear()
+        self._system_time_samples.clear()
+        self.source = None
+        self.offset_secs = None
+        self.drift = 0.0
+        self.uncertainty_secs = None
+        self.gps_offset_secs = None
+        self.resets += 1
+
+    def _updateEstimate(self) -> None:
+        """Fit the offset and drift to the samples, the lock must be held."""
+        if self._timesync_samples:
+            min_uncertainty = min(
+                sample.uncertainty_secs for sample in self._timesync_samples
+            )
+            max_uncertainty = (
+                min_uncertainty * CLOCK_SYNC_RTT_FILTER_FACTOR
+                + CLOCK_SYNC_RTT_FILTER_SLACK_SECS
+            )
+            samples = [
+                sample
+                for sample in self._timesync_samples
+                if sample.uncertainty_secs <= max_uncertainty
+            ]
+            self.offset_secs, self.drift = fitOffsetAndDrift(samples)
+            self.source = SOURCE_TIMESYNC
+            self.uncertainty_secs = min_uncertainty
+        elif self._system_time_samples:
+            # Messages are only ever delayed, so the smallest offset is the
+            # message which was delayed least
+            self.offset_secs = min(
+                sample.offset_secs for sample in self._system_time_samples
+            )
+            self.drift = 0.0
+            self.source = SOURCE_SYSTEM_TIME
+            self.uncertainty_secs = None
+
+    def toWallTime(self, boot_secs: float) -> Optional[float]:
+        """
+        Args:
+            boot_secs (float): A time since the autopilot booted
+
+        Returns:
+            Optional[float]: The time on this computer's clock, None if there is no estimate yet
+        """
+        with self._lock:
+            offset_secs = self.offset_secs
+            drift = self.drift
+        if offset_secs is None:
+            return None
+        return boot_secs + offset_secs + drift * boot_secs
+
+    def getMessageTime(self, msg: Any) -> Optional[float]:
+        """
+        Get when the autopilot sent a message from its time_boot_ms or
+        time_usec field.
+
+        Args:
+            msg (MAVLink_message): The message
+
+        Returns:
+            Optional[float]: The time on this computer's clock, None if the message has no time since boot or there is no estimate
+        """
+        boot_secs = getBootSecs(msg)
+        if boot_secs is None:
+            return None
+        return self.toWallTime(boot_secs)
+
+    def retimestamp(self, msg: Any) -> bool:
+        """
+        Replace the receive time of a message with when the autopilot sent it,
+        the receive time is kept in _receive_timestamp.
+
+        The timestamps of each message type never go back, as the telemetry
+        history and logs expect them in order, so a message is given the
+        previous timestamp of its type if the estimate moved back since.
+
+        Args:
+            msg (MAVLink_message): The message, with its receive time in _timestamp
+
+        Returns:
+            bool: True if the message was given an aligned timestamp
+        """
+        if getBootSecs(msg) is None:
+            return False
+
+        receive_time = msg._timestamp
+        aligned_time = self.getMessageTime(msg)
+        # A message which would move by more than the maximum correction is
+        # left with its receive time, as the estimate is stale
+        aligned = False
+        timestamp = receive_time
+        if (
+            aligned_time is not None
+            and abs(aligned_time - receive_time) <= CLOCK_SYNC_MAX_CORRECTION_SECS
+        ):
+            aligned = True
+            timestamp = aligned_time
+
+        msg_name = msg.get_type()
+        with self._lock:
+            last_timestamp = self._last_timestamps.get(msg_name)
+            if last_timestamp is not None and timestamp < last_timestamp:
+                timestamp = last_timestamp
+            self._last_timestamps[msg_name] = timestamp
+            if aligned:
+                self.messages_aligned += 1
+
+        if timestamp != receive_time:
+            msg._receive_timestamp = receive_time
+            msg._timestamp = timestamp
+        return aligned
+
+    def getStats(self) -> ClockSyncStats:
+        """
+        Returns:
+            ClockSyncStats: The current estimate of the autopilot's clock
+        """
+        with self._lock:
+            return {
+                "synced": self.offset_secs is not None,
+                "source": self.source,
+                "offset_secs": self.offset_secs,
+                "drift_ppm": round(self.drift * 1e6, 3),
+                "uncertainty_ms": (
+                    None
+                    if self.uncertainty_secs is None
+                    else round(self.uncertainty_secs * 1000, 3)
+                ),
+                "gps_offset_ms": (
+                    None
+                    if self.gps_offset_secs is None
+                    else round(self.gps_offset_secs * 1000, 3)
+                ),
+                "samples": len(self._timesync_samples) + len(self._system_time_samples),
+                "resets": self.resets,
+                "messages_aligned": self.messages_aligned,
+            }
+
+
+def getBootSecs(msg: Any) -> Optional[float]:
+    """
+    Args:
+        msg (MAVLink_message): The message
+
+    Returns:
+        Optional[float]: The time since boot in the time_boot_ms or time_usec field of the message, None if it has neither
+    """
+    time_boot_ms = getattr(msg, "time_boot_ms", None)
+    time_usec = getattr(msg, "time_usec", None)
+    if time_boot_ms is not None:
+        return time_boot_ms / 1e3
+    if time_usec and time_usec < UNIX_EPOCH_THRESHOLD_USEC:
+        return time_usec / 1e6
+    return None
+
+
+def fitOffsetAndDrift(samples: List[ClockSample]) -> Tuple[float, float]:
+    """
+    Fit offset = intercept + drift * boot time through the samples, weighting
+    each sample by how precise it is.
+
+    Args:
+        samples (List[ClockSample]): The samples to fit, there must be at least one
+
+    Returns:
+        Tuple[float, float]: The offset at boot and the drift as a fraction
+    """
+    weights = [1 / (sample.uncertainty_secs + 0.0005) ** 2 for sample in samples]
+    total_weight = sum(weights)
+    mean_boot = (
+        sum(w * sample.boot_secs for w, sample in zip(weights, samples)) / total_weight
+    )
+    mean_offset = (
+        sum(w * sample.offset_secs for w, sample in zip(weights, samples))
+        / total_weight
+    )
+
+    drift = 0.0
+    span = max(sample.boot_secs for sample in samples) - min(
+        sample.boot_secs for sample in samples
+    )
+    if span >= CLOCK_SYNC_MIN_DRIFT_SPAN_SECS:
+        covariance = sum(
+            w * (sample.boot_secs - mean_boot) * (sample.offset_secs - mean_offset)
+            for w, sample in zip(weights, samples)
+        )
+        variance = sum(
+            w * (sample.boot_secs - mean_boot) ** 2
+            for w, sample in zip(weights, samples)
+        )
+        max_drift = CLOCK_SYNC_MAX_DRIFT_PPM / 1e6
+        drift = max(-max_drift, min(max_drift, covariance / variance))
+
+    return mean_offset - drift * mean_boot, drift
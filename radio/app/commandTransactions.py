@@ -0,0 +1,476 @@
+import heapq
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from logging import Logger
+from threading import Condition, Lock, Thread
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from pymavlink import mavutil
+
+from app.customTypes import CommandLatencyStats
+
+# How long to wait for an ACK before the command is sent again
+COMMAND_ACK_TIMEOUT_SECS = 1.5
+# How many times a command is sent again if no ACK is received. The
+# confirmation field is incremented each time so the autopilot can tell that
+# the command is a retry
+COMMAND_MAX_RETRIES = 1
+# Once the autopilot has said a command is in progress it is not sent again,
+# instead the final ACK is waited for as long as progress updates keep arriving
+COMMAND_IN_PROGRESS_TIMEOUT_SECS = 5.0
+
+# Upper bounds of the command latency histogram buckets, anything slower goes
+# into a final overflow bucket
+COMMAND_LATENCY_BUCKETS_MS: List[float] = [25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class CommandLatencyHistogram:
+    def __init__(self, buckets_ms: List[float] = COMMAND_LATENCY_BUCKETS_MS) -> None:
+        """
+        Counts how long a command takes to be acknowledged, from the first time
+        it is sent to its final ACK.
+
+        Args:
+            buckets_ms (List[float], optional): The upper bound of each bucket in milliseconds. Defaults to COMMAND_LATENCY_BUCKETS_MS.
+        """
+        self.buckets_ms = buckets_ms
+        self.bucket_counts = [0] * (len(buckets_ms) + 1)
+        self.count = 0
+        self.timeouts = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, latency_ms: float) -> None:
+        """
+        Add the latency of an acknowledged command.
+
+        Args:
+            latency_ms (float): The time taken to receive the final ACK
+        """
+        bucket = next(
+            (
+                index
+                for index, upper_bound in enumerate(self.buckets_ms)
+                if latency_ms <= upper_bound
+            ),
+            len(self.buckets_ms),
+        )
+        self.bucket_counts[bucket] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def recordTimeout(self) -> None:
+        """Count a command which was never acknowledged."""
+        self.timeouts += 1
+
+    def toDict(self) -> CommandLatencyStats:
+        return {
+            "count": self.count,
+            "timeouts": self.timeouts,
+            "mean_ms": self.total_ms / self.count if self.count else None,
+            "max_ms": self.max_ms if self.count else None,
+            "buckets_ms": list(self.buckets_ms),
+            "bucket_counts": list(self.bucket_counts),
+        }
+
+
+class CommandTransaction:
+    def __init__(
+        self,
+        command: int,
+        send_func: Callable[[int], None],
+        timeout: float,
+        retries: int,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        """
+        A single command which is waiting for its final COMMAND_ACK.
+
+        Args:
+            command (int): The MAV_CMD to send
+            send_func (Callable[[int], None]): Sends the command, called with the confirmation number of the attempt
+            timeout (float): How long to wait for an ACK for each attempt
+            retries (int): How many times to send the command again
+            progress_callback (Optional[Callable[[int], None]], optional): Called with the progress percentage of each MAV_RESULT_IN_PROGRESS ACK. Defaults to None.
+        """
+        self.command = command
+        self.send_func = send_func
+        self.timeout = timeout
+        self.retries = retries
+        self.progress_callback = progress_callback
+
+        self.future: Future = Future()
+        self.attempts = 0
+        self.first_sent_time: Optional[float] = None
+        self.last_sent_time: Optional[float] = None
+        self.deadline = 0.0
+        self.in_progress = False
+        self.progress: Optional[int] = None
+        self.last_progress_time: Optional[float] = None
+
+    def complete(self, result: Optional[Any]) -> bool:
+        """
+        Complete the transaction, if it has not been completed already.
+
+        Args:
+            result: The final COMMAND_ACK, or None if the command timed out or was cancelled
+
+        Returns:
+            bool: True if this call completed the transaction
+        """
+        try:
+            self.future.set_result(result)
+            return True
+        except InvalidStateError:
+            return False
+
+    def fail(self, exception: BaseException) -> None:
+        """
+        Complete the transaction with an exception raised while sending it.
+
+        Args:
+            exception (BaseException): The exception to raise from the future
+        """
+        try:
+            self.future.set_exception(exception)
+        except InvalidStateError:
+            pass
+
+
+class CommandTransactionManager:
+    def __init__(self, logger: Logger) -> None:
+        """
+        Routes each COMMAND_ACK to the command which is waiting for it, so that
+        commands with different command ids can be outstanding at the same time.
+        Each command is represented by a future, resends and timeouts are
+        handled by a single timer thread so no thread is blocked per command.
+
+        COMMAND_ACK only identifies the command, not the request, so commands
+        with the same command id are queued and sent one at a time. Commands
+        sent with sendOnce are not queued, so each ACK goes to whichever
+        command with its id was sent longest ago.
+
+        Args:
+            logger (Logger): The drone's logger
+        """
+        self.logger = logger
+
+        self.pending: Dict[int, CommandTransaction] = {}
+        self.queued: Dict[int, Deque[CommandTransaction]] = {}
+        self.unqueued: Dict[int, Deque[CommandTransaction]] = {}
+        self.latency_stats: Dict[int, CommandLatencyHistogram] = {}
+        self.condition = Condition()
+        self.send_lock = Lock()
+
+        # Heap of (deadline, sequence, transaction), entries for transactions
+        # which have since completed or been resent are skipped
+        self._deadlines: List[Tuple[float, int, CommandTransaction]] = []
+        self._deadline_sequence = 0
+        self._is_running = True
+        self._timer_thread = Thread(target=self._checkDeadlines, daemon=True)
+        self._timer_thread.start()
+
+    def submit(
+        self,
+        command: int,
+        send_func: Callable[[int], None],
+        timeout: float = COMMAND_ACK_TIMEOUT_SECS,
+        retries: int = COMMAND_MAX_RETRIES,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> Future:
+        """
+        Send a command without waiting for its ACK. If another command with the
+        same id is outstanding then this command is sent once it completes.
+
+        Args:
+            command (int): The MAV_CMD being sent
+            send_func (Callable[[int], None]): Sends the command, called with the confirmation number of the attempt
+            timeout (float, optional): How long to wait for an ACK for each attempt. Defaults to COMMAND_ACK_TIMEOUT_SECS.
+            retries (int, optional): How many times to send the command again. Defaults to COMMAND_MAX_RETRIES.
+            progress_callback (Optional[Callable[[int], None]], optional): Called with the progress of the command if the autopilot reports it. Defaults to None.
+
+        Returns:
+            Future: Resolves to the final COMMAND_ACK, or None if the command timed
+            out. If sending the command raised an exception then it is raised
+            from the future instead. Callbacks added to the future are run on
+            the thread which completes it, so they should not block.
+        """
+        transaction = CommandTransaction(
+            command, send_func, timeout, retries, progress_callback
+        )
+
+        with self.condition:
+            if not self._is_running:
+                transaction.complete(None)
+                return transaction.future
+
+            if command in self.pending:
+                self.queued.setdefault(command, deque()).append(transaction)
+                return transaction.future
+
+            self.pending[command] = transaction
+
+        self._send(transaction)
+        return transaction.future
+
+    def sendOnce(
+        self,
+        command: int,
+        send_func: Callable[[int], None],
+        timeout: float = COMMAND_ACK_TIMEOUT_SECS,
+    ) -> Future:
+        """
+        Send a command straight away without retrying it or waiting for other
+        commands with the same id, e.g. for live adjustments sent at a fixed
+        rate. Its ACK is still tracked so it is not taken by another command.
+
+        Args:
+            command (int): The MAV_CMD being sent
+            send_func (Callable[[int], None]): Sends the command, called with the confirmation number
+            timeout (float, optional): How long to wait for an ACK. Defaults to COMMAND_ACK_TIMEOUT_SECS.
+
+        Returns:
+            Future: Resolves to the COMMAND_ACK, or None if the command timed out
+        """
+        transaction = CommandTransaction(command, send_func, timeout, retries=0)
+
+        with self.condition:
+            if not self._is_running:
+                transaction.complete(None)
+                return transaction.future
+
+            self.unqueued.setdefault(command, deque()).append(transaction)
+
+        self._send(transaction)
+        return transaction.future
+
+    def execute(
+        self,
+        command: int,
+        send_func: Callable[[int], None],
+        timeout: float = COMMAND_ACK_TIMEOUT_SECS,
+        retries: int = COMMAND_MAX_RETRIES,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> Optional[Any]:
+        """
+        Send a command and block until its final ACK is received. See submit.
+
+        Returns:
+            The final COMMAND_ACK message, or None if the command timed out
+        """
+        return self.submit(
+            command, send_func, timeout, retries, progress_callback
+        ).result()
+
+    def _send(self, transaction: CommandTransaction) -> None:
+        # The deadline is set before sending as the ACK can arrive before the
+        # send function returns
+        with self.condition:
+            now = time.monotonic()
+            if transaction.first_sent_time is None:
+                transaction.first_sent_time = now
+            transaction.last_sent_time = now
+            confirmation = transaction.attempts
+            transaction.attempts += 1
+            self._scheduleDeadline(transaction, now + transaction.timeout)
+
+        try:
+            with self.send_lock:
+                transaction.send_func(confirmation)
+        except Exception as e:
+            transaction.fail(e)
+            self._finish(transaction)
+
+    def _scheduleDeadline(
+        self, transaction: CommandTransaction, deadline: float
+    ) -> None:
+        # Must be called with the condition held
+        transaction.deadline = deadline
+        self._deadline_sequence += 1
+        heapq.heappush(
+            self._deadlines, (deadline, self._deadline_sequence, transaction)
+        )
+        self.condition.notify()
+
+    def _finish(self, transaction: CommandTransaction) -> None:
+        """Remove a completed transaction and send the next one queued behind it."""
+        next_transaction = None
+        with self.condition:
+            unqueued = self.unqueued.get(transaction.command)
+            if unqueued is not None and transaction in unqueued:
+                unqueued.remove(transaction)
+                if not unqueued:
+                    del self.unqueued[transaction.command]
+                return
+
+            if self.pending.get(transaction.command) is transaction:
+                del self.pending[transaction.command]
+
+            queue = self.queued.get(transaction.command)
+            if queue:
+                next_transaction = queue.popleft()
+                self.pending[transaction.command] = next_transaction
+            if queue is not None and not queue:
+                del self.queued[transaction.command]
+
+        if next_transaction is not None:
+            self._send(next_transaction)
+
+    def _checkDeadlines(self) -> None:
+        while True:
+            with self.condition:
+                while self._is_running and (
+                    not self._deadlines or self._deadlines[0][0] > time.monotonic()
+                ):
+                    wait_secs = (
+                        self._deadlines[0][0] - time.monotonic()
+                        if self._deadlines
+                        else None
+                    )
+                    self.condition.wait(wait_secs)
+
+                if not self._is_running:
+                    return
+
+                deadline, _, transaction = heapq.heappop(self._deadlines)
+                if transaction.future.done() or deadline != transaction.deadline:
+                    continue
+
+                action = self._expire(transaction)
+
+            if action == "resend":
+                self.logger.debug(
+                    f"No ACK for command {transaction.command} (attempt {transaction.attempts}/{transaction.retries + 1})"
+                )
+                self._send(transaction)
+            elif action == "timeout":
+                if transaction.complete(None):
+                    self._recordLatency(transaction.command, None)
+                self._finish(transaction)
+
+    def _expire(self, transaction: CommandTransaction) -> Optional[str]:
+        # Must be called with the condition held
+        now = time.monotonic()
+
+        if transaction.in_progress:
+            last_progress_time = transaction.last_progress_time or 0
+            if now - last_progress_time < COMMAND_IN_PROGRESS_TIMEOUT_SECS:
+                self._scheduleDeadline(
+                    transaction, last_progress_time + COMMAND_IN_PROGRESS_TIMEOUT_SECS
+                )
+                return None
+
+            self.logger.warning(
+                f"Command {transaction.command} stopped reporting progress at {transaction.progress}%"
+            )
+            return "timeout"
+
+        if transaction.attempts <= transaction.retries:
+            return "resend"
+
+        self.logger.warning(
+            f"Command {transaction.command} timed out after {transaction.attempts} attempts"
+        )
+        return "timeout"
+
+    def handleAck(self, msg: Any) -> bool:
+        """
+        Pass a COMMAND_ACK to the command waiting for it.
+
+        Args:
+            msg: The COMMAND_ACK message
+
+        Returns:
+            bool: True if a command was waiting for the ACK, False otherwise
+        """
+        with self.condition:
+            transaction = self._getOldestSent(msg.command)
+            if transaction is None:
+                return False
+
+            if msg.result == mavutil.mavlink.MAV_RESULT_IN_PROGRESS:
+                transaction.in_progress = True
+                transaction.progress = msg.progress
+                transaction.last_progress_time = time.monotonic()
+
+        if msg.result == mavutil.mavlink.MAV_RESULT_IN_PROGRESS:
+            if transaction.progress_callback is not None:
+                # This is called on the thread receiving messages, which must
+                # keep running whatever the callback does
+                try:
+                    transaction.progress_callback(msg.progress)
+                except Exception:
+                    self.logger.error(
+                        f"Progress callback of command {transaction.command} failed",
+                        exc_info=True,
+                    )
+            return True
+
+        if transaction.complete(msg):
+            first_sent_time = transaction.first_sent_time or time.monotonic()
+            self._recordLatency(
+                transaction.command, (time.monotonic() - first_sent_time) * 1000
+            )
+            self._finish(transaction)
+        return True
+
+    def _getOldestSent(self, command: int) -> Optional[CommandTransaction]:
+        # Must be called with the condition held. ACKs arrive in the order
+        # commands were sent, so the oldest command is the one being answered
+        transactions = list(self.unqueued.get(command, ()))
+        if command in self.pending:
+            transactions.append(self.pending[command])
+        if not transactions:
+            return None
+        return min(
+            transactions, key=lambda transaction: transaction.last_sent_time or 0
+        )
+
+    def _recordLatency(self, command: int, latency_ms: Optional[float]) -> None:
+        with self.condition:
+            if command not in self.latency_stats:
+                self.latency_stats[command] = CommandLatencyHistogram()
+
+            if latency_ms is None:
+                self.latency_stats[command].recordTimeout()
+            else:
+                self.latency_stats[command].record(latency_ms)
+
+    def getLatencyStats(self) -> Dict[str, CommandLatencyStats]:
+        """
+        Returns:
+            Dict[str, CommandLatencyStats]: The latency histogram of each command which has been sent, keyed by its MAV_CMD name
+        """
+        command_names = mavutil.mavlink.enums["MAV_CMD"]
+        with self.condition:
+            return {
+                (
+                    command_names[command].name
+                    if command in command_names
+                    else str(command)
+                ): histogram.toDict()
+                for command, histogram in self.latency_stats.items()
+            }
+
+    def cancelAll(self) -> None:
+        """Stop waiting for every outstanding and queued command, they will resolve to None."""
+        with self.condition:
+            transactions = list(self.pending.values())
+            for queue in [*self.queued.values(), *self.unqueued.values()]:
+                transactions.extend(queue)
+            self.pending.clear()
+            self.queued.clear()
+            self.unqueued.clear()
+            self._deadlines.clear()
+
+        for transaction in transactions:
+            transaction.complete(None)
+
+    def close(self) -> None:
+        """Cancel every command and stop the timer thread."""
+        with self.condition:
+            self._is_running = False
+            self.condition.notify()
+        self.cancelAll()
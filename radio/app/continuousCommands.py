@@ -0,0 +1,252 @@
+import time
+from concurrent.futures import Future
+from logging import Logger
+from threading import Condition, Thread
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from app.customTypes import ContinuousChannelStats
+from app.linkStats import RingBuffer
+
+CONTINUOUS_COMMAND_RATE_HZ = 10
+# The sending thread stops once nothing has been sent for this long, it is
+# started again by the next target
+CONTINUOUS_COMMAND_IDLE_SECS = 2.0
+CONTINUOUS_COMMAND_RATE_SAMPLES = 50
+
+ResultCallback = Callable[[Hashable, Any, Optional[Any]], None]
+
+
+class ContinuousCommandChannel:
+    def __init__(
+        self,
+        name: str,
+        logger: Logger,
+        send_func: Callable[[Hashable, Any], Optional[Future]],
+        confirm_func: Optional[Callable[[Hashable, Any], Future]] = None,
+        rate_hz: float = CONTINUOUS_COMMAND_RATE_HZ,
+    ) -> None:
+        """
+        Sends live adjustments, such as a servo slider being dragged, at a
+        fixed rate without waiting for each one to be acknowledged.
+
+        Each key, e.g. a servo number, has a single target slot. Setting a
+        target replaces any value which has not been sent yet, so only the
+        newest value is ever sent and the vehicle never lags behind the UI.
+        Values are sent with send_func, which must not wait for an ACK but may
+        return a Future of it.
+
+        Once a key's target has stopped changing for one period the result
+        callback given with the target is called with the ACK of its final
+        value. The value is not sent again if send_func returned a Future of
+        its ACK, otherwise, or if that ACK was lost, the value is sent again
+        with confirm_func, which returns a Future of the ACK. Superseded values
+        are never waited on.
+
+        Args:
+            name (str): The name of the channel, used in logs and stats
+            logger (Logger): The logger to use
+            send_func (Callable[[Hashable, Any], Optional[Future]]): Sends a value for a key without waiting for an ACK, optionally returning a Future of its ACK
+            confirm_func (Optional[Callable[[Hashable, Any], Future]], optional): Sends the settled value for a key and returns a Future of its ACK. Defaults to None.
+            rate_hz (float, optional): How often targets are sent. Defaults to CONTINUOUS_COMMAND_RATE_HZ.
+        """
+        self.name = name
+        self.logger = logger
+        self.send_func = send_func
+        self.confirm_func = confirm_func
+        self.rate_hz = rate_hz
+
+        self.updates_received = 0
+        self.updates_sent = 0
+        self.updates_superseded = 0
+        self.send_errors = 0
+
+        self._pending: Dict[Hashable, Tuple[Any, Optional[ResultCallback]]] = {}
+        self._unconfirmed: Dict[Hashable, Tuple[Any, Optional[ResultCallback]]] = {}
+        # The newest target of each key, so results of older targets are dropped
+        self._latest: Dict[Hashable, Tuple[Any, Optional[ResultCallback]]] = {}
+        # The ACK of the value last sent for each key
+        self._sent_acks: Dict[Hashable, Future] = {}
+        self._send_intervals = RingBuffer(CONTINUOUS_COMMAND_RATE_SAMPLES)
+        self._last_send_time: Optional[float] = None
+        self._condition = Condition()
+        self._thread: Optional[Thread] = None
+        self._is_closed = False
+
+    def setTarget(
+        self, key: Hashable, value: Any, on_result: Optional[ResultCallback] = None
+    ) -> None:
+        """
+        Set the newest target for a key, this never blocks.
+
+        Args:
+            key (Hashable): What the value is for, e.g. the servo number
+            value (Any): The target value
+            on_result (Optional[ResultCallback], optional): Called with the key, value and ACK once the value has settled and been confirmed. Defaults to None.
+        """
+        with self._condition:
+            if self._is_closed:
+                return
+
+            self.updates_received += 1
+            if key in self._pending:
+                self.updates_superseded += 1
+            self._pending[key] = (value, on_result)
+            self._latest[key] = self._pending[key]
+            # A newer value means the previous one no longer needs confirming
+            self._unconfirmed.pop(key, None)
+
+            if self._thread is None:
+                self._thread = Thread(target=self._sendTargets, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _sendTargets(self) -> None:
+        """Send the pending targets once per period until the channel is idle."""
+        period = 1 / self.rate_hz
+        next_send_time = time.monotonic()
+        idle_since = time.monotonic()
+
+        while True:
+            with self._condition:
+                if self._is_closed:
+                    self._thread = None
+                    return
+
+                if not self._pending and not self._unconfirmed:
+                    if time.monotonic() - idle_since >= CONTINUOUS_COMMAND_IDLE_SECS:
+                        self._thread = None
+                        return
+                    self._condition.wait(CONTINUOUS_COMMAND_IDLE_SECS)
+                    next_send_time = max(next_send_time, time.monotonic())
+                    continue
+
+                delay = next_send_time - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+
+                # Targets sent last period which have not changed since have settled
+                settled = self._unconfirmed
+                self._unconfirmed = dict(self._pending)
+                targets = self._pending
+                self._pending = {}
+
+            for key, (value, _) in targets.items():
+                self._send(key, value)
+            for key, target in settled.items():
+                self._confirm(key, target)
+
+            now = time.monotonic()
+            if targets:
+                with self._condition:
+                    if self._last_send_time is not None:
+                        self._send_intervals.push(now - self._last_send_time)
+                    self._last_send_time = now
+            idle_since = now
+            # Keep to the fixed rate, but do not try to catch up after a stall
+            next_send_time = max(next_send_time + period, now)
+
+    def _send(self, key: Hashable, value: Any) -> None:
+        self._sent_acks.pop(key, None)
+        try:
+            ack = self.send_func(key, value)
+        except Exception as e:
+            self.send_errors += 1
+            self.logger.error(f"Failed to send {self.name} target {key}={value}: {e}")
+            return
+        self.updates_sent += 1
+        if ack is not None:
+            self._sent_acks[key] = ack
+
+    def _isSuperseded(
+        self, key: Hashable, target: Tuple[Any, Optional[ResultCallback]]
+    ) -> bool:
+        with self._condition:
+            return self._is_closed or self._latest.get(key) is not target
+
+    def _confirm(
+        self, key: Hashable, target: Tuple[Any, Optional[ResultCallback]]
+    ) -> None:
+        value, on_result = target
+        sent_ack = self._sent_acks.pop(key, None)
+        if sent_ack is None:
+            self._sendConfirm(key, value, on_result)
+            return
+
+        def onSentAck(done: Future) -> None:
+            ack = done.result() if done.exception() is None else None
+            if self._isSuperseded(key, target):
+                return
+            if ack is None:
+                # The ACK was lost, so send the value again and wait for it
+                self._sendConfirm(key, value, on_result)
+            elif on_result is not None:
+                on_result(key, value, ack)
+
+        sent_ack.add_done_callback(onSentAck)
+
+    def _sendConfirm(
+        self, key: Hashable, value: Any, on_result: Optional[ResultCallback]
+    ) -> None:
+        if self.confirm_func is None:
+            if on_result is not None:
+                on_result(key, value, None)
+            return
+
+        try:
+            future = self.confirm_func(key, value)
+        except Exception as e:
+            self.send_errors += 1
+            self.logger.error(
+                f"Failed to confirm {self.name} target {key}={value}: {e}"
+            )
+            return
+
+        if on_result is not None:
+            future.add_done_callback(
+                lambda done: on_result(
+                    key, value, done.result() if done.exception() is None else None
+                )
+            )
+
+    def getAchievedRate(self) -> Optional[float]:
+        """
+        Returns:
+            Optional[float]: The rate targets have recently been sent at in hertz, None if not enough have been sent
+        """
+        with self._condition:
+            mean_interval = self._send_intervals.mean()
+        if not mean_interval:
+            return None
+        return 1 / mean_interval
+
+    def getStats(self) -> ContinuousChannelStats:
+        """
+        Returns:
+            ContinuousChannelStats: The target and achieved rates and how many updates were sent or superseded
+        """
+        achieved_rate_hz = self.getAchievedRate()
+        with self._condition:
+            return {
+                "rate_hz": self.rate_hz,
+                "achieved_rate_hz": achieved_rate_hz,
+                "updates_received": self.updates_received,
+                "updates_sent": self.updates_sent,
+                "updates_superseded": self.updates_superseded,
+                "send_errors": self.send_errors,
+                "pending": len(self._pending),
+            }
+
+    def close(self) -> None:
+        """Stop sending, any targets which have not been sent are dropped."""
+        with self._condition:
+            self._is_closed = True
+            self._pending.clear()
+            self._unconfirmed.clear()
+            self._latest.clear()
+            self._sent_acks.clear()
+            thread = self._thread
+            self._condition.notify()
+
+        if thread is not None:
+            thread.join(timeout=1)
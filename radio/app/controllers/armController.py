@@ -1,16 +1,19 @@
 from __future__ import annotations
 
-import time
 from threading import current_thread
 from typing import TYPE_CHECKING
 
 from app.customTypes import Response
-from app.utils import commandAccepted, sendingCommandLock
+from app.utils import commandAccepted
 from pymavlink import mavutil
 
 if TYPE_CHECKING:
     from app.drone import Drone
 
+# How long to wait for the heartbeat to show the new armed state once the
+# command has been accepted
+ARM_STATE_TIMEOUT_SECS = 5
+
 
 class ArmController:
     def __init__(self, drone: Drone) -> None:
@@ -23,7 +26,6 @@ class ArmController:
         self.controller_id = f"arm_{current_thread().ident}"
         self.drone = drone
 
-    @sendingCommandLock
     def arm(self, force: bool = False) -> Response:
         """
         Arm the drone.
@@ -43,33 +45,26 @@ class ArmController:
         if self.drone.armed:
             return {"success": False, "message": "Already armed", "data": return_data}
 
-        if not self.drone.reserve_message_type("COMMAND_ACK", self.controller_id):
-            return {
-                "success": False,
-                "message": "Could not reserve COMMAND_ACK messages",
-                "data": return_data,
-            }
-
         try:
-            self.drone.sendCommand(
+            self.drone.logger.info(f"Arming, force: {force}")
+            response = self.drone.sendCommandAndWait(
                 mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM,
                 param1=1,  # 0=disarm, 1=arm
                 param2=21196 if force else 0,  # force arm/disarm
             )
-            self.drone.logger.info(f"Arming, force: {force}")
-
-            response = self.drone.wait_for_message(
-                "COMMAND_ACK",
-                self.controller_id,
-                condition_func=lambda msg: msg.command
-                == mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM,
-            )
 
             if commandAccepted(response, mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM):
                 # Wait for the drone to be armed fully after the command has been accepted
                 self.drone.logger.debug("Waiting for arm")
-                while not self.drone.armed:
-                    time.sleep(0.05)
+                if not self.drone.vehicle_state.waitUntil(
+                    ARM_STATE_TIMEOUT_SECS, armed=True
+                ):
+                    self.drone.logger.error("Arm accepted but drone did not arm")
+                    return {
+                        "success": False,
+                        "message": "Could not arm, drone did not report being armed",
+                        "data": return_data,
+                    }
 
                 return {
                     "success": True,
@@ -94,10 +89,7 @@ class ArmController:
                 "message": "Could not arm, serial exception",
                 "data": return_data,
             }
-        finally:
-            self.drone.release_message_type("COMMAND_ACK", self.controller_id)
 
-    @sendingCommandLock
     def disarm(self, force: bool = False) -> Response:
         """
         Disarm the drone.
@@ -121,34 +113,26 @@ class ArmController:
                 "data": return_data,
             }
 
-        if not self.drone.reserve_message_type("COMMAND_ACK", self.controller_id):
-            return {
-                "success": False,
-                "message": "Could not reserve COMMAND_ACK messages",
-                "data": return_data,
-            }
-
         try:
-            self.drone.sendCommand(
+            self.drone.logger.info(f"Disarming, force: {force}")
+            response = self.drone.sendCommandAndWait(
                 mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM,
                 param1=0,  # 0=disarm, 1=arm
                 param2=21196 if force else 0,  # force arm/disarm
             )
 
-            self.drone.logger.info(f"Disarming, force: {force}")
-
-            response = self.drone.wait_for_message(
-                "COMMAND_ACK",
-                self.controller_id,
-                condition_func=lambda msg: msg.command
-                == mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM,
-            )
-
             if commandAccepted(response, mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM):
                 # Wait for the drone to be disarmed fully after the command has been accepted
                 self.drone.logger.debug("Waiting for disarm")
-                while self.drone.armed:
-                    time.sleep(0.05)
+                if not self.drone.vehicle_state.waitUntil(
+                    ARM_STATE_TIMEOUT_SECS, armed=False
+                ):
+                    self.drone.logger.error("Disarm accepted but drone did not disarm")
+                    return {
+                        "success": False,
+                        "message": "Could not disarm, drone did not report being disarmed",
+                        "data": return_data,
+                    }
 
                 return {
                     "success": True,
@@ -173,5 +157,3 @@ class ArmController:
                 "message": "Could not disarm, serial exception",
                 "data": return_data,
             }
-        finally:
-            self.drone.release_message_type("COMMAND_ACK", self.controller_id)
@@ -1,18 +1,21 @@
 from __future__ import annotations
 
-import time
 from threading import current_thread
 from typing import TYPE_CHECKING, List, Union
 
 import serial
 from app.customTypes import Number, Response
-from app.utils import commandAccepted, sendingCommandLock
+from app.utils import commandAccepted
 from pymavlink import mavutil
 
 if TYPE_CHECKING:
     from app.drone import Drone
 
 
+# How long to wait for the heartbeat to show the new flight mode once the
+# command has been accepted
+MODE_CHANGE_TIMEOUT_SECS = 3
+
 FLIGHT_MODES = [
     "FLTMODE1",
     "FLTMODE2",
@@ -158,7 +161,6 @@ class FlightModesController:
                 "message": f"Failed to set flight mode channel to {channel}",
             }
 
-    @sendingCommandLock
     def setCurrentFlightMode(self, flightMode: int) -> Response:
         """
         Sends a Mavlink message to the drone for setting its current flight mode
@@ -168,15 +170,8 @@ class FlightModesController:
         Returns:
             A message to show if the drone received the message and successfully set the new mode
         """
-        if not self.drone.reserve_message_type("COMMAND_ACK", self.controller_id):
-            return {
-                "success": False,
-                "message": "Could not reserve COMMAND_ACK messages",
-            }
-        time.sleep(0.3)
-
         try:
-            self.drone.sendCommand(
+            response = self.drone.sendCommandAndWait(
                 message=mavutil.mavlink.MAV_CMD_DO_SET_MODE,
                 param1=1,
                 param2=flightMode,
@@ -187,14 +182,19 @@ class FlightModesController:
                 param7=0,
             )
 
-            response = self.drone.wait_for_message(
-                "COMMAND_ACK",
-                self.controller_id,
-                condition_func=lambda msg: msg.command
-                == mavutil.mavlink.MAV_CMD_DO_SET_MODE,
-            )
-
             if commandAccepted(response, mavutil.mavlink.MAV_CMD_DO_SET_MODE):
+                # Return as soon as the heartbeat shows the new mode
+                if not self.drone.vehicle_state.waitForMode(
+                    flightMode, MODE_CHANGE_TIMEOUT_SECS
+                ):
+                    self.drone.logger.error(
+                        f"Flight mode {flightMode} accepted but not shown in heartbeat"
+                    )
+                    return {
+                        "success": False,
+                        "message": "Could not set flight mode, drone did not change mode",
+                    }
+
                 self.drone.logger.info("Flight mode set successfully")
                 return {"success": True, "message": "Flight mode set successfully"}
             else:
@@ -207,8 +207,6 @@ class FlightModesController:
                 "success": False,
                 "message": "Could not set flight mode, serial exception",
             }
-        finally:
-            self.drone.release_message_type("COMMAND_ACK", self.controller_id)
 
     def setGuidedMode(self) -> Response:
         """
@@ -4,7 +4,7 @@ import struct
 import time
 from io import BytesIO
 from threading import current_thread
-from typing import TYPE_CHECKING, List, Optional, Tuple
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
 
 from app.customTypes import Number, Response
 from pymavlink import mavftp, mavftp_op
@@ -43,6 +43,7 @@ class FtpController:
         self.remote_file_size: Optional[int] = None
         self.burst_size: int = 80  # Default burst size
         self.last_burst_read: Optional[float] = None
+        self.should_cancel_callback: Optional[Callable[[], bool]] = None
 
         self._sendFtpCommand(
             mavftp_op.FTP_OP(
@@ -119,6 +120,25 @@ class FtpController:
 
             # Continue listening until timeout expires
             while time.time() - last_response_time < timeout:
+                if self.should_cancel_callback and self.should_cancel_callback():
+                    self.drone.logger.info(f"FTP operation {op_name} cancelled")
+                    self._sendFtpCommand(
+                        mavftp_op.FTP_OP(
+                            self.seq,
+                            self.session,
+                            mavftp_op.OP_TerminateSession,
+                            0,
+                            0,
+                            0,
+                            0,
+                            None,
+                        )
+                    )
+                    return {
+                        "success": False,
+                        "message": f"FTP operation {op_name} cancelled",
+                    }
+
                 remaining_time = timeout - (time.time() - last_response_time)
 
                 # Wait for message with remaining timeout
@@ -587,6 +607,7 @@ class FtpController:
         size: Optional[int] = None,
         offset: int = 0,
         progress_callback=None,
+        should_cancel_callback: Optional[Callable[[], bool]] = None,
     ) -> Response:
         """
         Read/download a file from the drone using MAVFTP and optionally save it to disk.
@@ -597,6 +618,7 @@ class FtpController:
             size (Optional[int]): Number of bytes to read. If None, reads entire file.
             offset (int): Offset in bytes to start reading from.
             progress_callback: Optional callback function called with (bytes_downloaded, total_bytes, percentage)
+            should_cancel_callback (Optional[Callable[[], bool]]): Optional callback function which returns True to stop reading.
 
         Returns:
             Response: A response object containing success status and file info (not the data if saved to disk).
@@ -612,6 +634,7 @@ class FtpController:
             }
 
         self.progress_callback = progress_callback
+        self.should_cancel_callback = should_cancel_callback
 
         try:
             self.current_op = "read_file"
@@ -710,6 +733,7 @@ class FtpController:
                 }
         finally:
             self.progress_callback = None
+            self.should_cancel_callback = None
             self.current_op = None
 
     def _handleOpenFileReadOnlyResponse(self, response_op: mavftp_op.FTP_OP) -> bool:
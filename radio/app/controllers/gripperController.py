@@ -86,16 +86,8 @@ class GripperController:
                 "message": 'Gripper action must be either "release" or "grab"',
             }
 
-        if not self.drone.reserve_message_type("COMMAND_ACK", self.controller_id):
-            return {
-                "success": False,
-                "message": "Could not reserve COMMAND_ACK messages",
-            }
-
-        self.drone.sending_command_lock.acquire()
-
         try:
-            self.drone.sendCommand(
+            response = self.drone.sendCommandAndWait(
                 mavutil.mavlink.MAV_CMD_DO_GRIPPER,
                 0,
                 0 if action == "release" else 1,
@@ -106,15 +98,6 @@ class GripperController:
                 0,
             )
 
-            response = self.drone.wait_for_message(
-                "COMMAND_ACK",
-                self.controller_id,
-                condition_func=lambda msg: msg.command
-                == mavutil.mavlink.MAV_CMD_DO_GRIPPER,
-            )
-
-            self.drone.sending_command_lock.release()
-
             if commandAccepted(response, mavutil.mavlink.MAV_CMD_DO_GRIPPER):
                 return {
                     "success": True,
@@ -127,13 +110,10 @@ class GripperController:
                 }
 
         except serial.serialutil.SerialException:
-            self.drone.sending_command_lock.release()
             return {
                 "success": False,
                 "message": "Setting gripper failed, serial exception",
             }
-        finally:
-            self.drone.release_message_type("COMMAND_ACK", self.controller_id)
 
     def enableGripper(self) -> Response:
         """
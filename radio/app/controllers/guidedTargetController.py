@@ -0,0 +1,367 @@
+from __future__ import annotations
+
+import math
+import time
+from threading import Event, Lock, Thread, current_thread
+from typing import TYPE_CHECKING, Callable, Optional, Tuple
+
+from app.customTypes import GuidedTargetStats, Response
+from pymavlink import mavutil
+
+if TYPE_CHECKING:
+    from app.drone import Drone
+
+GUIDED_TARGET_MIN_RATE_HZ = 1
+GUIDED_TARGET_MAX_RATE_HZ = 20
+GUIDED_TARGET_DEFAULT_RATE_HZ = 10
+# The drone holds its position if no new target is received for this long
+GUIDED_TARGET_TIMEOUT_SECS = 3.0
+# A target is never interpolated towards for longer than this, so a target
+# sent after a pause is not crept up on
+GUIDED_TARGET_MAX_INTERPOLATION_SECS = 2.0
+
+# Position and velocity are used, acceleration and yaw are left to the autopilot
+GUIDED_TARGET_TYPE_MASK = (
+    mavutil.mavlink.POSITION_TARGET_TYPEMASK_AX_IGNORE
+    | mavutil.mavlink.POSITION_TARGET_TYPEMASK_AY_IGNORE
+    | mavutil.mavlink.POSITION_TARGET_TYPEMASK_AZ_IGNORE
+    | mavutil.mavlink.POSITION_TARGET_TYPEMASK_YAW_IGNORE
+    | mavutil.mavlink.POSITION_TARGET_TYPEMASK_YAW_RATE_IGNORE
+)
+EARTH_RADIUS_M = 6378137.0
+
+# Latitude, longitude and relative altitude in metres
+Position = Tuple[float, float, float]
+
+
+def getNedOffset(start: Position, end: Position) -> Tuple[float, float, float]:
+    """
+    Get the north, east and down distance between two nearby positions in
+    metres, using a flat earth approximation.
+
+    Args:
+        start (Position): The position to measure from
+        end (Position): The position to measure to
+
+    Returns:
+        Tuple[float, float, float]: The north, east and down offsets in metres
+    """
+    north = math.radians(end[0] - start[0]) * EARTH_RADIUS_M
+    east = (
+        math.radians(end[1] - start[1])
+        * EARTH_RADIUS_M
+        * math.cos(math.radians(start[0]))
+    )
+    return north, east, start[2] - end[2]
+
+
+class GuidedTargetController:
+    def __init__(self, drone: Drone) -> None:
+        """
+        The guided target controller streams a moving position target, e.g.
+        for follow-me or dragging the target on the map, to the drone in
+        guided mode using SET_POSITION_TARGET_GLOBAL_INT.
+
+        The client only updates the latest target, the stream sends a target
+        at a fixed rate on its own thread without waiting for any reply. The
+        sent target moves smoothly from where the stream was towards the
+        newest target over the time since the previous target was received,
+        with the matching velocity so the drone does not stop between
+        updates. If no new target is received for the timeout the drone is
+        told to hold where the stream was and the stream stops.
+
+        Args:
+            drone (Drone): The main drone object
+        """
+        self.controller_id = f"guidedtarget_{current_thread().ident}"
+        self.drone = drone
+
+        self.rate_hz: float = GUIDED_TARGET_DEFAULT_RATE_HZ
+        self.timeout_secs = GUIDED_TARGET_TIMEOUT_SECS
+        self.hold_callback: Optional[Callable[[str], None]] = None
+
+        self.holds = 0
+        self._resetStats()
+
+        # The segment which the sent target is moving along
+        self._segment_start: Optional[Position] = None
+        self._segment_end: Optional[Position] = None
+        self._segment_start_time = 0.0
+        self._segment_duration = 0.0
+        self._last_target_time = 0.0
+        self._target_sent = True
+
+        self._lock = Lock()
+        self._thread: Optional[Thread] = None
+        self._stop_event = Event()
+
+    def _resetStats(self) -> None:
+        self.targets_received = 0
+        self.targets_coalesced = 0
+        self.messages_sent = 0
+        self.send_errors = 0
+
+    def isActive(self) -> bool:
+        return self._thread is not None
+
+    def start(
+        self,
+        rate_hz: float = GUIDED_TARGET_DEFAULT_RATE_HZ,
+        timeout_secs: float = GUIDED_TARGET_TIMEOUT_SECS,
+        hold_callback: Optional[Callable[[str], None]] = None,
+    ) -> Response:
+        """
+        Switch the drone to guided mode and start streaming targets, any stream
+        which is already running is stopped first. Nothing is sent until the
+        first target is received.
+
+        Args:
+            rate_hz (float, optional): How often the target is sent, between GUIDED_TARGET_MIN_RATE_HZ and GUIDED_TARGET_MAX_RATE_HZ. Defaults to GUIDED_TARGET_DEFAULT_RATE_HZ.
+            timeout_secs (float, optional): How long without a new target before the drone holds its position. Defaults to GUIDED_TARGET_TIMEOUT_SECS.
+            hold_callback (Optional[Callable[[str], None]], optional): Called with a message when the timeout stops the stream. Defaults to None.
+
+        Returns:
+            Response: The response from starting the stream
+        """
+        if self.drone.aircraft_type == 1:
+            return {
+                "success": False,
+                "message": "Guided target streaming is only supported on multirotors",
+            }
+        if not (GUIDED_TARGET_MIN_RATE_HZ <= rate_hz <= GUIDED_TARGET_MAX_RATE_HZ):
+            return {
+                "success": False,
+                "message": f"Rate must be between {GUIDED_TARGET_MIN_RATE_HZ} and {GUIDED_TARGET_MAX_RATE_HZ}Hz",
+            }
+        if timeout_secs <= 0:
+            return {"success": False, "message": "Timeout must be positive"}
+
+        if self.isActive():
+            self.stop()
+
+        guided_mode_result = self.drone.flightModesController.setGuidedMode()
+        if not guided_mode_result["success"]:
+            return guided_mode_result
+
+        with self._lock:
+            self.rate_hz = rate_hz
+            self.timeout_secs = timeout_secs
+            self.hold_callback = hold_callback
+            self._resetStats()
+
+            self._segment_start = None
+            self._segment_end = None
+            self._target_sent = True
+            self._last_target_time = time.monotonic()
+
+            self._stop_event = Event()
+            self._thread = Thread(
+                target=self._streamTargets, args=(self._stop_event,), daemon=True
+            )
+            self._thread.start()
+
+        self.drone.logger.info(f"Started guided target streaming at {rate_hz}Hz")
+        return {
+            "success": True,
+            "message": f"Started guided target streaming at {rate_hz}Hz",
+        }
+
+    def setTarget(self, lat: float, lon: float, alt: float) -> Response:
+        """
+        Update the latest target, this never waits for the target to be sent.
+
+        Args:
+            lat (float): The latitude of the target
+            lon (float): The longitude of the target
+            alt (float): The altitude of the target relative to home in metres
+
+        Returns:
+            Response: Whether the target was valid
+        """
+        if not self.isActive():
+            return {
+                "success": False,
+                "message": "Guided target streaming is not started",
+            }
+        if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
+            return {"success": False, "message": "Invalid target latitude or longitude"}
+        if alt < 0:
+            return {"success": False, "message": "Target altitude must be positive"}
+
+        now = time.monotonic()
+        with self._lock:
+            if self._segment_end is None:
+                # The first target is flown to directly
+                self._segment_start = (lat, lon, alt)
+                duration = 0.0
+            else:
+                self._segment_start = self._getInterpolatedTarget(now)[0]
+                duration = min(
+                    now - self._last_target_time, GUIDED_TARGET_MAX_INTERPOLATION_SECS
+                )
+
+            self._segment_end = (lat, lon, alt)
+            self._segment_start_time = now
+            self._segment_duration = duration
+            self._last_target_time = now
+
+            self.targets_received += 1
+            if not self._target_sent:
+                self.targets_coalesced += 1
+            self._target_sent = False
+
+        return {"success": True}
+
+    def _getInterpolatedTarget(
+        self, now: float
+    ) -> Tuple[Position, Tuple[float, float, float]]:
+        """
+        Get the target to send at a point in time, the lock must be held.
+
+        Returns:
+            Tuple[Position, Tuple[float, float, float]]: The target position and its north, east and down velocity in metres per second
+        """
+        assert self._segment_start is not None and self._segment_end is not None
+        start, end = self._segment_start, self._segment_end
+
+        elapsed = now - self._segment_start_time
+        if self._segment_duration <= 0 or elapsed >= self._segment_duration:
+            return end, (0.0, 0.0, 0.0)
+
+        fraction = elapsed / self._segment_duration
+        position = (
+            start[0] + (end[0] - start[0]) * fraction,
+            start[1] + (end[1] - start[1]) * fraction,
+            start[2] + (end[2] - start[2]) * fraction,
+        )
+        north, east, down = getNedOffset(start, end)
+        velocity = (
+            north / self._segment_duration,
+            east / self._segment_duration,
+            down / self._segment_duration,
+        )
+        return position, velocity
+
+    def _streamTargets(self, stop_event: Event) -> None:
+        """Send the target once per period until stopped or timed out."""
+        period = 1 / self.rate_hz
+        next_send_time = time.monotonic()
+
+        while not stop_event.is_set() and self.drone.is_active.is_set():
+            delay = next_send_time - time.monotonic()
+            if delay > 0 and stop_event.wait(delay):
+                return
+
+            now = time.monotonic()
+            with self._lock:
+                timed_out = now - self._last_target_time > self.timeout_secs
+                target = None
+                if self._segment_end is not None:
+                    target = self._getInterpolatedTarget(now)
+                self._target_sent = True
+
+            if timed_out:
+                self._hold(stop_event)
+                return
+
+            if target is not None:
+                self._sendTarget(*target)
+
+            # Keep to the fixed rate, but do not try to catch up after a stall
+            next_send_time = max(next_send_time + period, now)
+
+    def _sendTarget(
+        self, position: Position, velocity: Tuple[float, float, float]
+    ) -> None:
+        # The sending command lock is not used as it is held for whole mission
+        # uploads, the outbound scheduler already sends one message at a time
+        try:
+            self.drone.master.mav.set_position_target_global_int_send(
+                0,
+                self.drone.target_system,
+                self.drone.target_component,
+                mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT_INT,
+                GUIDED_TARGET_TYPE_MASK,
+                int(position[0] * 1e7),
+                int(position[1] * 1e7),
+                position[2],
+                velocity[0],
+                velocity[1],
+                velocity[2],
+                0,
+                0,
+                0,
+                0,
+                0,
+            )
+            self.messages_sent += 1
+        except Exception as e:
+            self.send_errors += 1
+            self.drone.logger.error(f"Failed to send guided target: {e}")
+
+    def _holdPosition(self) -> None:
+        """Send the target the stream is currently at with no velocity."""
+        with self._lock:
+            if self._segment_end is None:
+                return
+            position = self._getInterpolatedTarget(time.monotonic())[0]
+            self._segment_start = self._segment_end = position
+            self._segment_duration = 0.0
+        self._sendTarget(position, (0.0, 0.0, 0.0))
+
+    def _hold(self, stop_event: Event) -> None:
+        with self._lock:
+            if stop_event.is_set():
+                return
+            stop_event.set()
+            self._thread = None
+            self.holds += 1
+            hold_callback = self.hold_callback
+
+        message = f"No guided target for {self.timeout_secs}s, holding position"
+        self.drone.logger.warning(message)
+        self._holdPosition()
+        if hold_callback is not None:
+            hold_callback(message)
+
+    def stop(self) -> Response:
+        """
+        Stop streaming and hold the position the stream was at.
+
+        Returns:
+            Response: The response from stopping the stream
+        """
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            self._stop_event.set()
+
+        if thread is None:
+            return {
+                "success": False,
+                "message": "Guided target streaming is not started",
+            }
+
+        if thread is not current_thread():
+            thread.join(timeout=1)
+        self._holdPosition()
+
+        self.drone.logger.info("Stopped guided target streaming")
+        return {"success": True, "message": "Stopped guided target streaming"}
+
+    def getStats(self) -> GuidedTargetStats:
+        """
+        Returns:
+            GuidedTargetStats: The rate of the stream and how many targets were sent or coalesced
+        """
+        with self._lock:
+            return {
+                "active": self._thread is not None,
+                "rate_hz": self.rate_hz,
+                "timeout_secs": self.timeout_secs,
+                "holds": self.holds,
+                "targets_received": self.targets_received,
+                "targets_coalesced": self.targets_coalesced,
+                "messages_sent": self.messages_sent,
+                "send_errors": self.send_errors,
+            }
@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from threading import Event, Lock, Thread, current_thread
+from typing import TYPE_CHECKING, Callable, Deque, Dict, List, Optional
+
+from app.customTypes import ManualControlInput, ManualControlStats, Response
+
+if TYPE_CHECKING:
+    from app.drone import Drone
+
+MANUAL_CONTROL_MODES = ["rc_override", "manual_control"]
+MANUAL_CONTROL_MIN_RATE_HZ = 25
+MANUAL_CONTROL_MAX_RATE_HZ = 50
+MANUAL_CONTROL_DEFAULT_RATE_HZ = 25
+# Streaming stops and the sticks are released if no input is received for this long
+MANUAL_CONTROL_FAILSAFE_TIMEOUT_SECS = 0.5
+# Clients resend their current input at this rate even when it has not changed,
+# so the failsafe only triggers when several inputs in a row are lost
+MANUAL_CONTROL_INPUT_RATE_HZ = 20
+MANUAL_CONTROL_MIN_FAILSAFE_TIMEOUT_SECS = 3 / MANUAL_CONTROL_INPUT_RATE_HZ
+MANUAL_CONTROL_JITTER_SAMPLES = 250
+
+RC_OVERRIDE_CHANNELS = 18
+RC_OVERRIDE_PWM_RANGE = (800, 2200)
+# UINT16_MAX leaves a channel as it is
+RC_OVERRIDE_IGNORE = 65535
+# Hands every channel back to the RC receiver, channels 9 to 18 use UINT16_MAX - 1
+# to release because 0 means ignore for them
+RC_OVERRIDE_RELEASE = [0] * 8 + [65534] * (RC_OVERRIDE_CHANNELS - 8)
+
+MANUAL_CONTROL_AXES = ["x", "y", "z", "r"]
+MANUAL_CONTROL_AXIS_RANGE = (-1000, 1000)
+# Centred sticks with the throttle at its mid point
+MANUAL_CONTROL_NEUTRAL = {"x": 0, "y": 0, "z": 500, "r": 0, "buttons": 0}
+
+
+class ManualControlController:
+    def __init__(self, drone: Drone) -> None:
+        """
+        The manual control controller streams pilot input, e.g. from a gamepad,
+        to the drone as RC_CHANNELS_OVERRIDE or MANUAL_CONTROL messages.
+
+        Input from the client only updates the latest input state, the stream
+        sends that state at a fixed rate on its own thread. Inputs received
+        between two sends are coalesced so the drone always flies the newest
+        sticks. The client resends its input at MANUAL_CONTROL_INPUT_RATE_HZ
+        whether or not it has changed. If no input is received for the
+        failsafe timeout the sticks are released and streaming stops until it
+        is started again.
+
+        Args:
+            drone (Drone): The main drone object
+        """
+        self.controller_id = f"manualcontrol_{current_thread().ident}"
+        self.drone = drone
+
+        self.mode: Optional[str] = None
+        self.rate_hz: float = MANUAL_CONTROL_DEFAULT_RATE_HZ
+        self.failsafe_timeout_secs = MANUAL_CONTROL_FAILSAFE_TIMEOUT_SECS
+        self.failsafe_callback: Optional[Callable[[str], None]] = None
+
+        self.failsafes = 0
+        self._resetStats()
+
+        self._channels: List[int] = [RC_OVERRIDE_IGNORE] * RC_OVERRIDE_CHANNELS
+        self._sticks: Dict[str, int] = dict(MANUAL_CONTROL_NEUTRAL)
+        self._has_input = False
+        self._input_sent = True
+        self._last_input_time = 0.0
+
+        self._lock = Lock()
+        self._thread: Optional[Thread] = None
+        self._stop_event = Event()
+
+    def _resetStats(self) -> None:
+        self.inputs_received = 0
+        self.inputs_coalesced = 0
+        self.messages_sent = 0
+        self.send_errors = 0
+        self.missed_deadlines = 0
+        self._jitter_ms: Deque[float] = deque(maxlen=MANUAL_CONTROL_JITTER_SAMPLES)
+
+    def isActive(self) -> bool:
+        return self._thread is not None
+
+    def start(
+        self,
+        mode: str,
+        rate_hz: float = MANUAL_CONTROL_DEFAULT_RATE_HZ,
+        failsafe_timeout_secs: float = MANUAL_CONTROL_FAILSAFE_TIMEOUT_SECS,
+        failsafe_callback: Optional[Callable[[str], None]] = None,
+    ) -> Response:
+        """
+        Start streaming pilot input, any stream which is already running is
+        stopped first. Nothing is sent until the first input is received.
+
+        Args:
+            mode (str): Either "rc_override" or "manual_control"
+            rate_hz (float, optional): How often the input is sent, between MANUAL_CONTROL_MIN_RATE_HZ and MANUAL_CONTROL_MAX_RATE_HZ. Defaults to MANUAL_CONTROL_DEFAULT_RATE_HZ.
+            failsafe_timeout_secs (float, optional): How long without input before the sticks are released, at least MANUAL_CONTROL_MIN_FAILSAFE_TIMEOUT_SECS. Defaults to MANUAL_CONTROL_FAILSAFE_TIMEOUT_SECS.
+            failsafe_callback (Optional[Callable[[str], None]], optional): Called with a message when the failsafe stops the stream. Defaults to None.
+
+        Returns:
+            Response: The response from starting the stream, with the rate
+                the client must send input at
+        """
+        if mode not in MANUAL_CONTROL_MODES:
+            return {"success": False, "message": f"Invalid manual control mode: {mode}"}
+        if not (MANUAL_CONTROL_MIN_RATE_HZ <= rate_hz <= MANUAL_CONTROL_MAX_RATE_HZ):
+            return {
+                "success": False,
+                "message": f"Rate must be between {MANUAL_CONTROL_MIN_RATE_HZ} and {MANUAL_CONTROL_MAX_RATE_HZ}Hz",
+            }
+        if failsafe_timeout_secs < MANUAL_CONTROL_MIN_FAILSAFE_TIMEOUT_SECS:
+            return {
+                "success": False,
+                "message": f"Failsafe timeout must be at least {MANUAL_CONTROL_MIN_FAILSAFE_TIMEOUT_SECS}s",
+            }
+
+        if self.isActive():
+            self.stop()
+
+        with self._lock:
+            self.mode = mode
+            self.rate_hz = rate_hz
+            self.failsafe_timeout_secs = failsafe_timeout_secs
+            self.failsafe_callback = failsafe_callback
+            self._resetStats()
+
+            self._channels = [RC_OVERRIDE_IGNORE] * RC_OVERRIDE_CHANNELS
+            self._sticks = dict(MANUAL_CONTROL_NEUTRAL)
+            self._has_input = False
+            self._input_sent = True
+            self._last_input_time = time.monotonic()
+
+            self._stop_event = Event()
+            self._thread = Thread(
+                target=self._streamInput, args=(self._stop_event,), daemon=True
+            )
+            self._thread.start()
+
+        self.drone.logger.info(f"Started {mode} streaming at {rate_hz}Hz")
+        return {
+            "success": True,
+            "message": f"Started {mode} streaming at {rate_hz}Hz",
+            "data": {"input_rate_hz": MANUAL_CONTROL_INPUT_RATE_HZ},
+        }
+
+    def setInput(self, data: ManualControlInput) -> Response:
+        """
+        Update the latest input, this never waits for the input to be sent.
+        Input with no channels or axes keeps the stream alive without changing
+        the sticks.
+
+        Args:
+            data (ManualControlInput): The PWM of each RC channel, keyed by
+                channel number, or the x, y, z, r and buttons values for
+                MANUAL_CONTROL. Channels and axes which are not given keep
+                their previous value.
+
+        Returns:
+            Response: Whether the input was valid
+        """
+        if not self.isActive():
+            return {"success": False, "message": "Manual control is not started"}
+
+        channel_updates: Dict[int, int] = {}
+        stick_updates: Dict[str, int] = {}
+        if self.mode == "rc_override":
+            channels = data.get("channels")
+            if not isinstance(channels, dict):
+                return {"success": False, "message": "Channels must be specified"}
+
+            for channel, pwm in channels.items():
+                try:
+                    channel_number = int(channel)
+                except ValueError:
+                    return {"success": False, "message": f"Invalid channel {channel}"}
+                if not (1 <= channel_number <= RC_OVERRIDE_CHANNELS):
+                    return {"success": False, "message": f"Invalid channel {channel}"}
+                if not isinstance(pwm, int) or not (
+                    RC_OVERRIDE_PWM_RANGE[0] <= pwm <= RC_OVERRIDE_PWM_RANGE[1]
+                ):
+                    return {
+                        "success": False,
+                        "message": f"Invalid PWM value for channel {channel}",
+                    }
+                channel_updates[channel_number - 1] = pwm
+        else:
+            for axis in MANUAL_CONTROL_AXES:
+                value = data.get(axis)
+                if value is None:
+                    continue
+                if not isinstance(value, int) or not (
+                    MANUAL_CONTROL_AXIS_RANGE[0]
+                    <= value
+                    <= MANUAL_CONTROL_AXIS_RANGE[1]
+                ):
+                    return {"success": False, "message": f"Invalid value for {axis}"}
+                stick_updates[axis] = value
+
+            buttons = data.get("buttons")
+            if buttons is not None:
+                if not isinstance(buttons, int) or not (0 <= buttons <= 0xFFFF):
+                    return {"success": False, "message": "Invalid value for buttons"}
+                stick_updates["buttons"] = buttons
+
+        with self._lock:
+            for index, pwm in channel_updates.items():
+                self._channels[index] = pwm
+            self._sticks.update(stick_updates)
+
+            self.inputs_received += 1
+            if not self._input_sent:
+                self.inputs_coalesced += 1
+            self._input_sent = False
+            self._has_input = True
+            self._last_input_time = time.monotonic()
+
+        return {"success": True}
+
+    def _streamInput(self, stop_event: Event) -> None:
+        """Send the latest input once per period until stopped or the failsafe triggers."""
+        period = 1 / self.rate_hz
+        next_deadline = time.monotonic()
+
+        while not stop_event.is_set() and self.drone.is_active.is_set():
+            delay = next_deadline - time.monotonic()
+            if delay > 0 and stop_event.wait(delay):
+                return
+
+            now = time.monotonic()
+            lateness = now - next_deadline
+            # Deadlines which passed whilst the thread was held up are skipped
+            # instead of being sent in a burst
+            missed = int(lateness // period)
+
+            with self._lock:
+                self._jitter_ms.append(lateness * 1000)
+                self.missed_deadlines += missed
+                timed_out = now - self._last_input_time > self.failsafe_timeout_secs
+                channels = list(self._channels)
+                sticks = dict(self._sticks)
+                has_input = self._has_input
+                self._input_sent = True
+
+            if timed_out:
+                self._triggerFailsafe(stop_event)
+                return
+
+            if has_input:
+                if self.mode == "rc_override":
+                    self._sendRcOverride(channels)
+                else:
+                    self._sendManualControl(sticks)
+
+            next_deadline += period * (missed + 1)
+
+    def _sendRcOverride(self, channels: List[int]) -> None:
+        # The sending command lock is not used as it is held for whole mission
+        # uploads, the outbound scheduler already sends one message at a time
+        try:
+            self.drone.master.mav.rc_channels_override_send(
+                self.drone.target_system, self.drone.target_component, *channels
+            )
+            self.messages_sent += 1
+        except Exception as e:
+            self.send_errors += 1
+            self.drone.logger.error(f"Failed to send RC override: {e}")
+
+    def _sendManualControl(self, sticks: Dict[str, int]) -> None:
+        try:
+            self.drone.master.mav.manual_control_send(
+                self.drone.target_system,
+                sticks["x"],
+                sticks["y"],
+                sticks["z"],
+                sticks["r"],
+                sticks["buttons"],
+            )
+            self.messages_sent += 1
+        except Exception as e:
+            self.send_errors += 1
+            self.drone.logger.error(f"Failed to send manual control: {e}")
+
+    def _releaseSticks(self, mode: Optional[str]) -> None:
+        """Hand control back to the RC receiver, or centre the sticks for MANUAL_CONTROL."""
+        if mode == "rc_override":
+            self._sendRcOverride(RC_OVERRIDE_RELEASE)
+        elif mode == "manual_control":
+            self._sendManualControl(MANUAL_CONTROL_NEUTRAL)
+
+    def _triggerFailsafe(self, stop_event: Event) -> None:
+        with self._lock:
+            if stop_event.is_set():
+                return
+            stop_event.set()
+            self._thread = None
+            self.failsafes += 1
+            mode = self.mode
+            failsafe_callback = self.failsafe_callback
+
+        message = (
+            f"No manual control input for {self.failsafe_timeout_secs}s, "
+            "releasing the sticks"
+        )
+        self.drone.logger.warning(message)
+        self._releaseSticks(mode)
+        if failsafe_callback is not None:
+            failsafe_callback(message)
+
+    def stop(self) -> Response:
+        """
+        Stop streaming and release the sticks.
+
+        Returns:
+            Response: The response from stopping the stream
+        """
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            self._stop_event.set()
+            mode = self.mode
+
+        if thread is None:
+            return {"success": False, "message": "Manual control is not started"}
+
+        if thread is not current_thread():
+            thread.join(timeout=1)
+        self._releaseSticks(mode)
+
+        self.drone.logger.info(f"Stopped {mode} streaming")
+        return {"success": True, "message": f"Stopped {mode} streaming"}
+
+    def getStats(self) -> ManualControlStats:
+        """
+        Returns:
+            ManualControlStats: The timing of the stream and how many inputs were sent or coalesced
+        """
+        with self._lock:
+            jitter_ms = list(self._jitter_ms)
+            return {
+                "mode": self.mode,
+                "active": self._thread is not None,
+                "rate_hz": self.rate_hz,
+                "failsafe_timeout_secs": self.failsafe_timeout_secs,
+                "failsafes": self.failsafes,
+                "inputs_received": self.inputs_received,
+                "inputs_coalesced": self.inputs_coalesced,
+                "messages_sent": self.messages_sent,
+                "send_errors": self.send_errors,
+                "missed_deadlines": self.missed_deadlines,
+                "jitter_mean_ms": (
+                    sum(jitter_ms) / len(jitter_ms) if jitter_ms else None
+                ),
+                "jitter_max_ms": max(jitter_ms) if jitter_ms else None,
+            }
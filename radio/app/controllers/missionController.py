@@ -7,6 +7,7 @@ from typing import TYPE_CHECKING, Any, Callable, List, Optional
 
 import serial
 from app.customTypes import Number, Response
+from app.messageConverter import messageToDict
 from app.utils import commandAccepted, sendingCommandLock
 from pymavlink import mavutil, mavwp
 
@@ -70,13 +71,13 @@ def _wp_to_dict(
     to a fixed number of decimal places to avoid floating-point noise.
 
     Args:
-        wp: A MAVLink mission item object with a to_dict() method.
+        wp: A MAVLink mission item object.
         altitude_decimal_places (int): Number of decimal places to round z to.
 
     Returns:
         dict: The waypoint as a dictionary with z rounded.
     """
-    d = wp.to_dict()
+    d = messageToDict(wp)
     if "z" in d and isinstance(d["z"], float):
         d["z"] = round(d["z"], altitude_decimal_places)
     return d
@@ -615,6 +616,41 @@ class MissionController:
         finally:
             self.drone.release_message_type("MISSION_COUNT", self.controller_id)
 
+    @sendingCommandLock
+    def getMissionCount(self, mission_type: int = TYPE_MISSION) -> Optional[int]:
+        """
+        Get how many items of a mission type are on the drone without
+        downloading them.
+
+        Args:
+            mission_type (int, optional): The type of mission to count. 0=Mission,1=Fence,2=Rally. Defaults to TYPE_MISSION.
+
+        Returns:
+            Optional[int]: The number of mission items, None if the drone did not respond
+        """
+        if not self.drone.reserve_message_type("MISSION_COUNT", self.controller_id):
+            self.drone.logger.error("Could not reserve MISSION_COUNT messages")
+            return None
+
+        try:
+            self.drone.master.mav.mission_request_list_send(
+                self.drone.target_system,
+                mavutil.mavlink.MAV_COMP_ID_AUTOPILOT1,
+                mission_type=mission_type,
+            )
+            response = self.drone.wait_for_message(
+                "MISSION_COUNT",
+                self.controller_id,
+                timeout=2,
+                condition_func=lambda msg: msg.mission_type == mission_type,
+            )
+            return response.count if response else None
+        except (serial.serialutil.SerialException, TypeError) as e:
+            self.drone.logger.error(f"Could not get the mission count: {e}")
+            return None
+        finally:
+            self.drone.release_message_type("MISSION_COUNT", self.controller_id)
+
     def getItemDetails(
         self, item_number: int, mission_type: int, mission_count: int
     ) -> Response:
@@ -687,7 +723,6 @@ class MissionController:
         finally:
             self.drone.release_message_type("MISSION_ITEM_INT", self.controller_id)
 
-    @sendingCommandLock
     def startMission(self) -> Response:
         """
         Start the mission on the drone.
@@ -695,24 +730,11 @@ class MissionController:
         Returns:
             Dict: The response of the mission start request
         """
-        if not self.drone.reserve_message_type("COMMAND_ACK", self.controller_id):
-            return {
-                "success": False,
-                "message": "Could not reserve COMMAND_ACK messages",
-            }
-
         try:
-            self.drone.sendCommand(
+            response = self.drone.sendCommandAndWait(
                 mavutil.mavlink.MAV_CMD_MISSION_START,
             )
 
-            response = self.drone.wait_for_message(
-                "COMMAND_ACK",
-                self.controller_id,
-                condition_func=lambda msg: msg.command
-                == mavutil.mavlink.MAV_CMD_MISSION_START,
-            )
-
             if commandAccepted(response, mavutil.mavlink.MAV_CMD_MISSION_START):
                 return {
                     "success": True,
@@ -728,10 +750,7 @@ class MissionController:
                 "success": False,
                 "message": "Failed to start mission, serial exception",
             }
-        finally:
-            self.drone.release_message_type("COMMAND_ACK", self.controller_id)
 
-    @sendingCommandLock
     def restartMission(self) -> Response:
         """
         Restarts the mission on the drone.
@@ -739,24 +758,11 @@ class MissionController:
         Returns:
             Dict: The response of the mission restart request
         """
-        if not self.drone.reserve_message_type("COMMAND_ACK", self.controller_id):
-            return {
-                "success": False,
-                "message": "Could not reserve COMMAND_ACK messages",
-            }
-
         try:
-            self.drone.sendCommand(
+            response = self.drone.sendCommandAndWait(
                 mavutil.mavlink.MAV_CMD_DO_SET_MISSION_CURRENT, param2=1
             )
 
-            response = self.drone.wait_for_message(
-                "COMMAND_ACK",
-                self.controller_id,
-                condition_func=lambda msg: msg.command
-                == mavutil.mavlink.MAV_CMD_DO_SET_MISSION_CURRENT,
-            )
-
             if commandAccepted(
                 response, mavutil.mavlink.MAV_CMD_DO_SET_MISSION_CURRENT
             ):
@@ -774,8 +780,6 @@ class MissionController:
                 "success": False,
                 "message": "Failed to restart mission, serial exception",
             }
-        finally:
-            self.drone.release_message_type("COMMAND_ACK", self.controller_id)
 
     @sendingCommandLock
     def clearMission(self, mission_type: int) -> Response:
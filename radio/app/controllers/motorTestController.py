@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from threading import current_thread
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Any, Callable, Optional, Tuple
 
 import serial
 from app.customTypes import (
@@ -10,7 +10,7 @@ from app.customTypes import (
     MotorTestThrottleDurationAndNumber,
     Response,
 )
-from app.utils import commandAccepted, sendingCommandLock
+from app.utils import commandAccepted
 from pymavlink import mavutil
 
 if TYPE_CHECKING:
@@ -28,6 +28,27 @@ class MotorTestController:
         self.controller_id = f"motortest_{current_thread().ident}"
         self.drone = drone
 
+        # Live throttle adjustments for a motor test, keyed by the motor
+        # instance with a value of (throttle, duration)
+        self.throttle_channel = self.drone.createContinuousChannel(
+            "motor_test",
+            lambda motor_instance, value: self.drone.sendCommandOnce(
+                mavutil.mavlink.MAV_CMD_DO_MOTOR_TEST,
+                *self._getMotorTestParams(motor_instance, value),
+            ),
+            lambda motor_instance, value: self.drone.sendCommandAsync(
+                mavutil.mavlink.MAV_CMD_DO_MOTOR_TEST,
+                *self._getMotorTestParams(motor_instance, value),
+            ),
+        )
+
+    @staticmethod
+    def _getMotorTestParams(
+        motor_instance: int, value: Tuple[int, int]
+    ) -> Tuple[int, int, int, int, int, int]:
+        throttle, duration = value
+        return (motor_instance, 0, throttle, duration, 0, 0)
+
     def checkMotorTestValues(
         self, data: MotorTestThrottleAndDuration
     ) -> tuple[int, int, Optional[str]]:
@@ -57,7 +78,6 @@ class MotorTestController:
 
         return throttle, duration, None
 
-    @sendingCommandLock
     def testOneMotor(self, data: MotorTestAllValues) -> Response:
         """
         Test a single motor.
@@ -80,16 +100,10 @@ class MotorTestController:
             )
             return {"success": False, "message": "Invalid value for motorInstance"}
 
-        if not self.drone.reserve_message_type("COMMAND_ACK", self.controller_id):
-            return {
-                "success": False,
-                "message": "Could not reserve COMMAND_ACK messages",
-            }
-
         motor_letter = chr(64 + motor_instance)
 
         try:
-            self.drone.sendCommand(
+            response = self.drone.sendCommandAndWait(
                 mavutil.mavlink.MAV_CMD_DO_MOTOR_TEST,
                 param1=motor_instance,  # ID of the motor to be tested
                 param2=0,  # throttle type (PWM,% etc)
@@ -99,13 +113,6 @@ class MotorTestController:
                 param6=0,  # test order
             )
 
-            response = self.drone.wait_for_message(
-                "COMMAND_ACK",
-                self.controller_id,
-                condition_func=lambda msg: msg.command
-                == mavutil.mavlink.MAV_CMD_DO_MOTOR_TEST,
-            )
-
             if commandAccepted(response, mavutil.mavlink.MAV_CMD_DO_MOTOR_TEST):
                 self.drone.logger.info(f"Motor test started for motor {motor_instance}")
                 return {
@@ -129,10 +136,66 @@ class MotorTestController:
                 "success": False,
                 "message": f"Motor test for motor {motor_letter} not started, serial exception",
             }
-        finally:
-            self.drone.release_message_type("COMMAND_ACK", self.controller_id)
 
-    @sendingCommandLock
+    def setMotorThrottleTarget(
+        self,
+        data: MotorTestAllValues,
+        result_callback: Optional[Callable[[Response], None]] = None,
+    ) -> Response:
+        """
+        Set the latest throttle of a motor test, e.g. whilst a throttle slider
+        is being dragged. Only the newest throttle is sent and the throttle the
+        motor settles on is confirmed.
+
+        Args:
+            data (MotorTestAllValues): The data for the motor test
+            result_callback (Optional[Callable[[Response], None]], optional): Called with the response once the settled throttle has been acknowledged. Defaults to None.
+
+        Returns:
+            Response: Whether the throttle was valid, not whether it was accepted
+        """
+        throttle, duration, err = self.checkMotorTestValues(data)
+        if err:
+            return {"success": False, "message": err}
+
+        motor_instance = data.get("motorInstance", None)
+        if motor_instance is None or motor_instance < 1:
+            self.drone.logger.error(
+                f"Invalid value for motor instance, got {motor_instance}"
+            )
+            return {"success": False, "message": "Invalid value for motorInstance"}
+
+        motor_letter = chr(64 + motor_instance)
+
+        on_result = None
+        if result_callback is not None:
+            callback = result_callback
+
+            def on_result(key: Any, value: Any, response: Optional[Any]) -> None:
+                if commandAccepted(response, mavutil.mavlink.MAV_CMD_DO_MOTOR_TEST):
+                    callback(
+                        {
+                            "success": True,
+                            "message": f"Motor {motor_letter} throttle set to {value[0]}%",
+                        }
+                    )
+                else:
+                    self.drone.logger.error(
+                        f"Motor {motor_instance} throttle not set to {value[0]}%"
+                    )
+                    callback(
+                        {
+                            "success": False,
+                            "message": f"Motor {motor_letter} throttle not set to {value[0]}%",
+                        }
+                    )
+
+        self.throttle_channel.setTarget(motor_instance, (throttle, duration), on_result)
+        return {
+            "success": True,
+            "message": f"Setting motor {motor_letter} throttle to {throttle}%",
+        }
+
     def testMotorSequence(self, data: MotorTestThrottleDurationAndNumber) -> Response:
         """
         Test a sequence of motors.
@@ -154,14 +217,8 @@ class MotorTestController:
             )
             return {"success": False, "message": "Invalid value for number_of_motors"}
 
-        if not self.drone.reserve_message_type("COMMAND_ACK", self.controller_id):
-            return {
-                "success": False,
-                "message": "Could not reserve COMMAND_ACK messages",
-            }
-
         try:
-            self.drone.sendCommand(
+            response = self.drone.sendCommandAndWait(
                 mavutil.mavlink.MAV_CMD_DO_MOTOR_TEST,
                 param1=0,  # ID of the motor to be tested
                 param2=0,  # throttle type (PWM,% etc)
@@ -171,13 +228,6 @@ class MotorTestController:
                 param6=0,  # test order
             )
 
-            response = self.drone.wait_for_message(
-                "COMMAND_ACK",
-                self.controller_id,
-                condition_func=lambda msg: msg.command
-                == mavutil.mavlink.MAV_CMD_DO_MOTOR_TEST,
-            )
-
             if commandAccepted(response, mavutil.mavlink.MAV_CMD_DO_MOTOR_TEST):
                 self.drone.logger.info("Motor sequence test started")
                 return {"success": True, "message": "Motor sequence test started"}
@@ -191,10 +241,7 @@ class MotorTestController:
                 "success": False,
                 "message": "Motor sequence test not started, serial exception",
             }
-        finally:
-            self.drone.release_message_type("COMMAND_ACK", self.controller_id)
 
-    @sendingCommandLock
     def testAllMotors(self, data: MotorTestThrottleDurationAndNumber) -> Response:
         """
         Test all motors.
@@ -220,16 +267,12 @@ class MotorTestController:
             )
             return {"success": False, "message": "Invalid value for number_of_motors"}
 
-        if not self.drone.reserve_message_type("COMMAND_ACK", self.controller_id):
-            return {
-                "success": False,
-                "message": "Could not reserve COMMAND_ACK messages",
-            }
-
         try:
-            # Send all commands
-            for idx in range(1, num_motors + 1):
-                self.drone.sendCommand(
+            # Each ACK only identifies the command, not the motor, so the
+            # commands are queued and each motor is started once the previous
+            # one has been acknowledged
+            futures = [
+                self.drone.sendCommandAsync(
                     mavutil.mavlink.MAV_CMD_DO_MOTOR_TEST,
                     param1=idx,  # ID of the motor to be tested
                     param2=0,  # throttle type (PWM,% etc)
@@ -237,20 +280,16 @@ class MotorTestController:
                     param4=duration,  # duration of the test in seconds
                     param5=0,  # number of motors to test in a sequence
                     param6=0,  # test order
-                )
-
-            successful_responses = 0
-            # Attempt to gather all the command acknowledgements using the new system
-            for _ in range(num_motors):
-                response = self.drone.wait_for_message(
-                    "COMMAND_ACK",
-                    self.controller_id,
                     timeout=RESPONSE_TIMEOUT,
-                    condition_func=lambda msg: msg.command
-                    == mavutil.mavlink.MAV_CMD_DO_MOTOR_TEST,
+                    retries=0,
                 )
-                if commandAccepted(response, mavutil.mavlink.MAV_CMD_DO_MOTOR_TEST):
-                    successful_responses += 1
+                for idx in range(1, num_motors + 1)
+            ]
+
+            successful_responses = sum(
+                commandAccepted(future.result(), mavutil.mavlink.MAV_CMD_DO_MOTOR_TEST)
+                for future in futures
+            )
 
             # Return data based on the number of successful command acknowledgements
             if successful_responses == num_motors:
@@ -283,5 +322,3 @@ class MotorTestController:
                 "success": False,
                 "message": "All motor test not started, serial exception",
             }
-        finally:
-            self.drone.release_message_type("COMMAND_ACK", self.controller_id)
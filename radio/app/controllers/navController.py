@@ -6,7 +6,7 @@ from typing import TYPE_CHECKING
 
 import serial
 from app.customTypes import Response
-from app.utils import commandAccepted, sendingCommandLock
+from app.utils import commandAccepted
 from pymavlink import mavutil
 
 if TYPE_CHECKING:
@@ -31,13 +31,14 @@ class NavController:
         ):  # Copter doesn't have loiter radius, only Plane
             self.getLoiterRadius()
 
-    @sendingCommandLock
-    def getHomePosition(self) -> Response:
+    def getHomePosition(self, max_attempts: int = 3) -> Response:
         """
         Request the current home position from the drone.
         Retries up to 3 times with 1 second delay between attempts.
+
+        Args:
+            max_attempts (int, optional): How many times to request the home position. Defaults to 3.
         """
-        max_attempts = 3
         time_delay_between_attempts = 1
 
         if not self.drone.reserve_message_type("HOME_POSITION", self.controller_id):
@@ -96,7 +97,6 @@ class NavController:
             "message": f"Could not get home position after {max_attempts} attempts",
         }
 
-    @sendingCommandLock
     def setHomePosition(self, lat: float, lon: float, alt: float) -> Response:
         """
         Set the home point of the drone.
@@ -106,24 +106,11 @@ class NavController:
             lon (float): The longitude of the home point
             alt (float): The altitude of the home point
         """
-        if not self.drone.reserve_message_type("COMMAND_ACK", self.controller_id):
-            return {
-                "success": False,
-                "message": "Could not reserve COMMAND_ACK messages",
-            }
-
         try:
-            self.drone.sendCommandInt(
+            response = self.drone.sendCommandIntAndWait(
                 mavutil.mavlink.MAV_CMD_DO_SET_HOME, x=lat, y=lon, z=alt
             )
 
-            response = self.drone.wait_for_message(
-                "COMMAND_ACK",
-                self.controller_id,
-                condition_func=lambda msg: msg.command
-                == mavutil.mavlink.MAV_CMD_DO_SET_HOME,
-            )
-
             if commandAccepted(response, mavutil.mavlink.MAV_CMD_DO_SET_HOME):
                 return {
                     "success": True,
@@ -140,8 +127,6 @@ class NavController:
                 "success": False,
                 "message": "Could not set home point, serial exception",
             }
-        finally:
-            self.drone.release_message_type("COMMAND_ACK", self.controller_id)
 
     def takeoff(self, alt: float) -> Response:
         """
@@ -163,26 +148,11 @@ class NavController:
         if not guidedModeSetResult["success"]:
             return guidedModeSetResult
 
-        if not self.drone.reserve_message_type("COMMAND_ACK", self.controller_id):
-            return {
-                "success": False,
-                "message": "Could not reserve COMMAND_ACK messages",
-            }
-
-        self.drone.sending_command_lock.acquire()
-
         try:
-            self.drone.sendCommand(mavutil.mavlink.MAV_CMD_NAV_TAKEOFF, param7=alt)
-
-            response = self.drone.wait_for_message(
-                "COMMAND_ACK",
-                self.controller_id,
-                condition_func=lambda msg: msg.command
-                == mavutil.mavlink.MAV_CMD_NAV_TAKEOFF,
+            response = self.drone.sendCommandAndWait(
+                mavutil.mavlink.MAV_CMD_NAV_TAKEOFF, param7=alt
             )
 
-            self.drone.sending_command_lock.release()
-
             if commandAccepted(response, mavutil.mavlink.MAV_CMD_NAV_TAKEOFF):
                 self.drone.logger.info("Takeoff command send successfully")
                 return {"success": True, "message": "Takeoff command sent successfully"}
@@ -193,15 +163,11 @@ class NavController:
                 }
 
         except serial.serialutil.SerialException:
-            self.drone.sending_command_lock.release()
             return {
                 "success": False,
                 "message": "Could not takeoff, serial exception",
             }
-        finally:
-            self.drone.release_message_type("COMMAND_ACK", self.controller_id)
 
-    @sendingCommandLock
     def land(self) -> Response:
         """
         Tells the drone to land.
@@ -209,21 +175,8 @@ class NavController:
         Returns:
             Response: The response from the land command
         """
-        if not self.drone.reserve_message_type("COMMAND_ACK", self.controller_id):
-            return {
-                "success": False,
-                "message": "Could not reserve COMMAND_ACK messages",
-            }
-
         try:
-            self.drone.sendCommand(mavutil.mavlink.MAV_CMD_NAV_LAND)
-
-            response = self.drone.wait_for_message(
-                "COMMAND_ACK",
-                self.controller_id,
-                condition_func=lambda msg: msg.command
-                == mavutil.mavlink.MAV_CMD_NAV_LAND,
-            )
+            response = self.drone.sendCommandAndWait(mavutil.mavlink.MAV_CMD_NAV_LAND)
 
             if commandAccepted(response, mavutil.mavlink.MAV_CMD_NAV_LAND):
                 self.drone.logger.info("Land command send successfully")
@@ -239,8 +192,6 @@ class NavController:
                 "success": False,
                 "message": "Could not land, serial exception",
             }
-        finally:
-            self.drone.release_message_type("COMMAND_ACK", self.controller_id)
 
     def reposition(self, lat: float, lon: float, alt: float) -> Response:
         """
@@ -14,6 +14,10 @@ from typing_extensions import TypedDict
 if TYPE_CHECKING:
     from app.drone import Drone
 
+# Reading this parameter returns a hash of every parameter value, so a cached
+# list can be checked without fetching it again. Not all autopilots support it
+PARAM_HASH_CHECK_ID = "_HASH_CHECK"
+
 
 class CachedParam(TypedDict):
     param_id: str
@@ -36,6 +40,9 @@ class ParamsController:
         self.current_param_id: str = ""
         self.total_number_of_params: int = 0
         self.is_requesting_params: bool = False
+        # The hash of the params list, None if it is not known
+        self.param_hash: Optional[int] = None
+        self._awaiting_param_hash: bool = False
 
     def _resetFetchState(self) -> None:
         self.is_requesting_params = False
@@ -61,6 +68,8 @@ class ParamsController:
         self.current_param_id = ""
         self.total_number_of_params = 0
         self.params = []
+        self.param_hash = None
+        self._awaiting_param_hash = False
 
         # Wait so param_fetch_all does not silently return
         start = getattr(self.drone.master, "param_fetch_start", 0.0)
@@ -122,6 +131,9 @@ class ParamsController:
                 if not msg:
                     continue
 
+                if msg.param_id == PARAM_HASH_CHECK_ID:
+                    continue
+
                 self.saveParam(msg.param_id, msg.param_value, msg.param_type)
 
                 self.current_param_index = msg.param_index
@@ -140,6 +152,7 @@ class ParamsController:
                 if msg.param_index == msg.param_count - 1:
                     self.params = sorted(self.params, key=lambda k: k["param_id"])
                     self.drone.logger.info("Got all params")
+                    self.requestParamHash()
                     return {
                         "success": True,
                         "message": "Got all params",
@@ -165,12 +178,15 @@ class ParamsController:
         self,
         params_list: list[IncomingParam],
         progress_update_callback: Optional[Callable],
+        should_cancel_callback: Optional[Callable[[], bool]] = None,
     ) -> Response:
         """
         Sets multiple parameters on the drone.
 
         Args:
             params_list (list[IncomingParam]): The list of parameters to set
+            progress_update_callback (Optional[Callable]): Called after each parameter is written
+            should_cancel_callback (Optional[Callable[[], bool]]): Returns True to stop writing the remaining parameters
 
         Returns:
             bool: True if all parameters were set, False if any failed
@@ -178,42 +194,58 @@ class ParamsController:
         if not params_list:
             return {"success": False, "message": "No parameters to set"}
 
-        params_set_successfully = []
-        params_could_not_set = []
+        params_set_successfully: List[IncomingParam] = []
+        params_could_not_set: List[IncomingParam] = []
         total_num_of_params = len(params_list)
 
         try:
-            for idx, param in enumerate(params_list):
-                param_id = param.get("param_id", None)
-                param_value = param.get("param_value", None)
-                param_type = param.get("param_type", None)
-                param.pop("initial_value", None)  # Remove initial value if it exists
+            # A batch of writes must not hold up interactive messages such as a
+            # single parameter write from another page
+            with self.drone.outboundPriorityClass("bulk"):
+                for idx, param in enumerate(params_list):
+                    if should_cancel_callback and should_cancel_callback():
+                        self.drone.logger.info("Setting multiple parameters cancelled")
+                        return {
+                            "success": False,
+                            "message": f"Cancelled after setting {len(params_set_successfully)} parameters",
+                            "data": {
+                                "params_set_successfully": params_set_successfully,
+                                "params_could_not_set": params_could_not_set,
+                            },
+                        }
 
-                if param_id is None or param_value is None:
-                    self.drone.logger.error(
-                        f"Invalid parameter data: {param}, skipping"
-                    )
-                    continue
+                    param_id = param.get("param_id", None)
+                    param_value = param.get("param_value", None)
+                    param_type = param.get("param_type", None)
+                    param.pop(
+                        "initial_value", None
+                    )  # Remove initial value if it exists
 
-                done = self.setParam(param_id, param_value, param_type)
-                progress_update_callback_data = {
-                    "param_id": param_id,
-                    "current_index": idx + 1,
-                    "total_params": total_num_of_params,
-                }
-                if not done:
-                    params_could_not_set.append(param)
-                    progress_update_callback_data["message"] = (
-                        f"Failed to write {param_id}"
-                    )
-                else:
-                    params_set_successfully.append(param)
-                    progress_update_callback_data["message"] = (
-                        f"Wrote {param_id} successfully"
-                    )
+                    if param_id is None or param_value is None:
+                        self.drone.logger.error(
+                            f"Invalid parameter data: {param}, skipping"
+                        )
+                        continue
 
-                if progress_update_callback:
-                    progress_update_callback(progress_update_callback_data)
+                    done = self.setParam(param_id, param_value, param_type)
+                    progress_update_callback_data = {
+                        "param_id": param_id,
+                        "current_index": idx + 1,
+                        "total_params": total_num_of_params,
+                    }
+                    if not done:
+                        params_could_not_set.append(param)
+                        progress_update_callback_data["message"] = (
+                            f"Failed to write {param_id}"
+                        )
+                    else:
+                        params_set_successfully.append(param)
+                        progress_update_callback_data["message"] = (
+                            f"Wrote {param_id} successfully"
+                        )
+
+                    if progress_update_callback:
+                        progress_update_callback(progress_update_callback_data)
 
             response_message = "All parameters set successfully"
 
@@ -348,6 +380,8 @@ class ParamsController:
                             f"Got parameter saving ack for {param_name} for value {param_value}"
                         )
                         self.saveParam(ack.param_id, ack.param_value, ack.param_type)
+                        # The old hash no longer matches the params list
+                        self.param_hash = None
                         saved_param = True
                         break
 
@@ -363,6 +397,111 @@ class ParamsController:
         finally:
             self.drone.release_message_type("PARAM_VALUE", self.controller_id)
 
+    def getParamCount(self, timeout_secs: float = 1.5) -> Optional[int]:
+        """
+        Request the first parameter from the drone to get how many parameters
+        it has, without fetching them all.
+
+        Args:
+            timeout_secs (float, optional): How long to wait for the parameter. Defaults to 1.5.
+
+        Returns:
+            Optional[int]: The number of parameters on the drone, None if it did not respond
+        """
+        if self.is_requesting_params:
+            return None
+
+        if not self.drone.reserve_message_type("PARAM_VALUE", self.controller_id):
+            self.drone.logger.error("Could not reserve PARAM_VALUE messages")
+            return None
+
+        try:
+            self.drone.master.mav.param_request_read_send(
+                self.drone.target_system, self.drone.target_component, b"", 0
+            )
+            response = self.drone.wait_for_message(
+                "PARAM_VALUE", self.controller_id, timeout_secs
+            )
+            return response.param_count if response else None
+        except serial.serialutil.SerialException:
+            self.drone.logger.error("Serial exception getting the parameter count")
+            return None
+        finally:
+            self.drone.release_message_type("PARAM_VALUE", self.controller_id)
+
+    def requestParamHash(self) -> None:
+        """
+        Request the hash of the params list without waiting for it. The reply
+        is recorded by recordParamHash as the hash of the fetched params.
+        """
+        self._awaiting_param_hash = True
+        try:
+            self.drone.master.mav.param_request_read_send(
+                self.drone.target_system,
+                self.drone.target_component,
+                PARAM_HASH_CHECK_ID.encode("ascii"),
+                -1,
+            )
+        except serial.serialutil.SerialException:
+            self._awaiting_param_hash = False
+            self.drone.logger.error("Serial exception requesting the parameter hash")
+
+    def recordParamHash(self, msg) -> None:
+        """
+        Record the parameter hash after the params list has been fetched.
+
+        Args:
+            msg: The _HASH_CHECK PARAM_VALUE message
+        """
+        if not self._awaiting_param_hash:
+            return
+
+        self._awaiting_param_hash = False
+        self.param_hash = self._decodeParamHash(msg.param_value)
+        self.drone.logger.debug(f"Parameter hash is {self.param_hash:08x}")
+
+    def getParamHash(self, timeout_secs: float = 1.5) -> Optional[int]:
+        """
+        Request the hash of the params on the drone.
+
+        Args:
+            timeout_secs (float, optional): How long to wait for the hash. Defaults to 1.5.
+
+        Returns:
+            Optional[int]: The hash, None if the drone did not respond
+        """
+        if self.is_requesting_params:
+            return None
+
+        if not self.drone.reserve_message_type("PARAM_VALUE", self.controller_id):
+            self.drone.logger.error("Could not reserve PARAM_VALUE messages")
+            return None
+
+        try:
+            self.drone.master.mav.param_request_read_send(
+                self.drone.target_system,
+                self.drone.target_component,
+                PARAM_HASH_CHECK_ID.encode("ascii"),
+                -1,
+            )
+            response = self.drone.wait_for_message(
+                "PARAM_VALUE",
+                self.controller_id,
+                timeout_secs,
+                condition_func=lambda msg: msg.param_id == PARAM_HASH_CHECK_ID,
+            )
+            return self._decodeParamHash(response.param_value) if response else None
+        except serial.serialutil.SerialException:
+            self.drone.logger.error("Serial exception getting the parameter hash")
+            return None
+        finally:
+            self.drone.release_message_type("PARAM_VALUE", self.controller_id)
+
+    @staticmethod
+    def _decodeParamHash(param_value: float) -> int:
+        # The hash is sent as the bytes of the float value
+        return struct.unpack("<I", struct.pack("<f", param_value))[0]
+
     def saveParam(self, param_name: str, param_value: Number, param_type: int) -> None:
         """
         Save a parameter to the params list.
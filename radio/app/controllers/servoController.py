@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
 import serial
 from app.customTypes import Number, Response, SetConfigParam
@@ -23,6 +23,22 @@ class ServoController:
         self.params: dict = {}
         self.param_types: dict = {}
 
+        # Servo sliders send their latest value at a fixed rate instead of
+        # waiting for an ACK for every value
+        self.servo_channel = self.drone.createContinuousChannel(
+            "servo",
+            lambda servo_instance, pwm_value: self.drone.sendCommandOnce(
+                mavutil.mavlink.MAV_CMD_DO_SET_SERVO,
+                param1=servo_instance,
+                param2=pwm_value,
+            ),
+            lambda servo_instance, pwm_value: self.drone.sendCommandAsync(
+                mavutil.mavlink.MAV_CMD_DO_SET_SERVO,
+                param1=servo_instance,
+                param2=pwm_value,
+            ),
+        )
+
         self.fetchParams()
 
     def _getAndSetCachedParam(
@@ -130,6 +146,50 @@ class ServoController:
             "data": param_set_successes,
         }
 
+    def _getServoResponse(
+        self, servo_instance: int, pwm_value: int, response: Optional[Any]
+    ) -> Response:
+        """Get the response for the COMMAND_ACK of a servo set command."""
+        if commandAccepted(response, mavutil.mavlink.MAV_CMD_DO_SET_SERVO):
+            return {"success": True, "message": f"Setting servo to {pwm_value}"}
+
+        self.drone.logger.error(f"Failed to set servo {servo_instance} to {pwm_value}")
+        error_message = f"Failed to set servo {servo_instance} to {pwm_value}"
+        error_code = response.result if response else None
+
+        # Map specific error codes to user-friendly messages
+        if error_code == 4:  # MAV_RESULT_FAILED
+            error_message = f"Channel {servo_instance} is already in use"
+        elif error_code == 3:  # MAV_RESULT_UNSUPPORTED
+            error_message = f"Servo {servo_instance} is not supported"
+        elif error_code == 2:  # MAV_RESULT_DENIED
+            error_message = f"Permission denied to set servo {servo_instance}"
+
+        return {"success": False, "message": error_message}
+
+    def setServoTarget(
+        self,
+        servo_instance: int,
+        pwm_value: int,
+        result_callback: Optional[Callable[[Response], None]] = None,
+    ) -> None:
+        """Set the latest target PWM value of a servo, e.g. whilst a slider is
+        being dragged. This does not wait for an ACK, only the newest value is
+        sent and the value the servo settles on is confirmed.
+
+        Args:
+            servo_instance (int): The number of the servo to set
+            pwm_value (int): The PWM value to set the servo to
+            result_callback (Optional[Callable[[Response], None]], optional): Called with the response once the settled value has been acknowledged. Defaults to None.
+        """
+        on_result = None
+        if result_callback is not None:
+
+            def on_result(key: Any, value: Any, response: Optional[Any]) -> None:
+                result_callback(self._getServoResponse(key, value, response))
+
+        self.servo_channel.setTarget(servo_instance, pwm_value, on_result)
+
     def setServo(self, servo_instance: int, pwm_value: int) -> Response:
         """Set a servo to a specific PWM value.
 
@@ -140,49 +200,17 @@ class ServoController:
         Returns:
             Response: The response from the servo set command
         """
-        if not self.drone.reserve_message_type("COMMAND_ACK", self.drone.controller_id):
-            return {
-                "success": False,
-                "message": "Could not reserve COMMAND_ACK messages",
-            }
-
         try:
-            self.drone.sendCommand(
+            response = self.drone.sendCommandAndWait(
                 mavutil.mavlink.MAV_CMD_DO_SET_SERVO,
                 param1=servo_instance,  # Servo instance number
                 param2=pwm_value,  # PWM value
             )
 
-            response = self.drone.wait_for_message(
-                "COMMAND_ACK",
-                self.drone.controller_id,
-                condition_func=lambda msg: msg.command
-                == mavutil.mavlink.MAV_CMD_DO_SET_SERVO,
-            )
-
-            if commandAccepted(response, mavutil.mavlink.MAV_CMD_DO_SET_SERVO):
-                return {"success": True, "message": f"Setting servo to {pwm_value}"}
-            else:
-                self.drone.logger.error(
-                    f"Failed to set servo {servo_instance} to {pwm_value}"
-                )
-                error_message = f"Failed to set servo {servo_instance} to {pwm_value}"
-                error_code = response.result if response else None
-
-                # Map specific error codes to user-friendly messages
-                if error_code == 4:  # MAV_RESULT_FAILED
-                    error_message = f"Channel {servo_instance} is already in use"
-                elif error_code == 3:  # MAV_RESULT_UNSUPPORTED
-                    error_message = f"Servo {servo_instance} is not supported"
-                elif error_code == 2:  # MAV_RESULT_DENIED
-                    error_message = f"Permission denied to set servo {servo_instance}"
-
-                return {"success": False, "message": error_message}
+            return self._getServoResponse(servo_instance, pwm_value, response)
 
         except serial.serialutil.SerialException:
             return {
                 "success": False,
                 "message": "Setting servo failed, serial exception",
             }
-        finally:
-            self.drone.release_message_type("COMMAND_ACK", self.drone.controller_id)
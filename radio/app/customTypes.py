@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Any, Union
+from typing import Any, Dict, List, Optional, Union
 
 from typing_extensions import NotRequired, TypedDict
 
@@ -55,6 +55,217 @@ class TestServoPwm(TypedDict):
     pwm_value: int
 
 
+class LinkStatsWindow(TypedDict):
+    packets_sent_per_sec: float
+    bytes_sent_per_sec: float
+    packets_received_per_sec: float
+    bytes_received_per_sec: float
+    packets_lost: int
+    packet_loss_percent: float
+    rtt_ms: Optional[float]
+    jitter_ms: Optional[float]
+
+
+class LinkStatsSource(TypedDict):
+    sysid: int
+    compid: int
+    packets_received: int
+    packets_lost: int
+    packet_loss_percent: float
+
+
+class CommandLatencyStats(TypedDict):
+    count: int
+    timeouts: int
+    mean_ms: Optional[float]
+    max_ms: Optional[float]
+    buckets_ms: List[float]
+    bucket_counts: List[int]
+
+
+class OutboundClassStats(TypedDict):
+    queued: int
+    max_queued: int
+    packets_sent: int
+    bytes_sent: int
+    mean_latency_ms: Optional[float]
+    max_latency_ms: Optional[float]
+
+
+class ContinuousChannelStats(TypedDict):
+    rate_hz: float
+    achieved_rate_hz: Optional[float]
+    updates_received: int
+    updates_sent: int
+    updates_superseded: int
+    send_errors: int
+    pending: int
+
+
+class ManualControlStats(TypedDict):
+    mode: Optional[str]
+    active: bool
+    rate_hz: float
+    failsafe_timeout_secs: float
+    failsafes: int
+    inputs_received: int
+    inputs_coalesced: int
+    messages_sent: int
+    send_errors: int
+    missed_deadlines: int
+    jitter_mean_ms: Optional[float]
+    jitter_max_ms: Optional[float]
+
+
+class GuidedTargetStats(TypedDict):
+    active: bool
+    rate_hz: float
+    timeout_secs: float
+    holds: int
+    targets_received: int
+    targets_coalesced: int
+    messages_sent: int
+    send_errors: int
+
+
+class StartManualControl(TypedDict):
+    mode: str
+    rate_hz: NotRequired[float]
+    failsafe_timeout_secs: NotRequired[float]
+
+
+class ManualControlInput(TypedDict):
+    channels: NotRequired[Dict[str, int]]
+    x: NotRequired[int]
+    y: NotRequired[int]
+    z: NotRequired[int]
+    r: NotRequired[int]
+    buttons: NotRequired[int]
+
+
+class ClockSyncStats(TypedDict):
+    synced: bool
+    source: Optional[str]
+    offset_secs: Optional[float]
+    drift_ppm: float
+    uncertainty_ms: Optional[float]
+    gps_offset_ms: Optional[float]
+    samples: int
+    resets: int
+    messages_aligned: int
+
+
+class PhysicalLinkStats(TypedDict):
+    connection_string: str
+    active: bool
+    stale: bool
+    packets_received: int
+    packets_lost: int
+    duplicates: int
+    packets_sent: int
+    send_errors: int
+    receive_errors: int
+    loss_percent: float
+    rtt_ms: Optional[float]
+    last_error: Optional[str]
+
+
+class LinkResyncResult(TypedDict):
+    param_count: Optional[int]
+    params_changed: bool
+    mission_count: Optional[int]
+    mission_changed: bool
+    home: Optional[Dict[str, float]]
+
+
+class LinkStatus(TypedDict):
+    state: str
+    reason: Optional[str]
+    heartbeat_age_secs: float
+    losses: int
+    reopen_attempts: int
+    last_recovery_secs: Optional[float]
+    resync: Optional[LinkResyncResult]
+
+
+class QueueStats(TypedDict):
+    size: int
+    capacity: int
+    high_water: int
+    dropped: int
+    spilled: int
+
+
+class TelemetrySnapshot(TypedDict):
+    version: int
+    messages: Dict[str, Dict[str, Any]]
+
+
+class TelemetryHistorySeries(TypedDict):
+    time: List[float]
+    min: List[float]
+    max: List[float]
+    mean: List[float]
+
+
+class TelemetryHistory(TypedDict):
+    start: float
+    end: float
+    bucket_secs: float
+    series: Dict[str, TelemetryHistorySeries]
+
+
+class FTLogIndexBlock(TypedDict):
+    offset: int
+    length: int
+    start_time: float
+    end_time: float
+    counts: Dict[str, int]
+
+
+class FTLogIndexType(TypedDict):
+    version: int
+    compression: Optional[str]
+    size: int
+    blocks: List[FTLogIndexBlock]
+
+
+class LogRecoveryProgress(TypedDict):
+    recovered_bytes: int
+    total_bytes: int
+    progress: float
+
+
+class FTLogMessage(TypedDict):
+    timestamp: float
+    message_type: str
+    data: str
+
+
+class LogManifestEntry(TypedDict):
+    name: str
+    start_time: Optional[float]
+    end_time: Optional[float]
+    duration_secs: float
+    size: int
+    modified_time: float
+    compression: Optional[str]
+    vehicle_type: Optional[int]
+    system_id: Optional[int]
+
+
+class JobInfo(TypedDict):
+    id: str
+    type: str
+    resource: str
+    state: str
+    progress: Optional[float]
+    created_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+    result: Optional[Any]
+
+
 class VehicleType(Enum):
     UNKNOWN = 0
     FIXED_WING = 1
@@ -1,32 +1,86 @@
-import copy
 import os
 import re
 import time
 import traceback
+from concurrent.futures import Future
+from contextlib import nullcontext
 from logging import Logger, getLogger
 from pathlib import Path
-from queue import Empty, Queue
+from queue import Empty
 from secrets import token_hex
 from threading import Event, Lock, Thread, current_thread
-from typing import Callable, Dict, List, Optional, Set
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Set,
+    Type,
+    TypeVar,
+    overload,
+)
 
 import serial
 from pymavlink import mavutil
 from serial.serialutil import SerialException
 
+from app.boundedQueues import (
+    SPILL_FILE_SUFFIX,
+    BoundedQueue,
+    SpillQueue,
+    removeSpillFiles,
+)
+from app.clockSync import ClockSync
+from app.commandTransactions import (
+    COMMAND_ACK_TIMEOUT_SECS,
+    COMMAND_MAX_RETRIES,
+    CommandTransactionManager,
+)
+from app.continuousCommands import CONTINUOUS_COMMAND_RATE_HZ, ContinuousCommandChannel
 from app.controllers.armController import ArmController
 from app.controllers.flightModesController import FlightModesController
 from app.controllers.frameController import FrameController
 from app.controllers.ftpController import FtpController
 from app.controllers.gripperController import GripperController
+from app.controllers.guidedTargetController import GuidedTargetController
+from app.controllers.manualControlController import ManualControlController
 from app.controllers.missionController import MissionController
 from app.controllers.motorTestController import MotorTestController
 from app.controllers.navController import NavController
-from app.controllers.paramsController import ParamsController
+from app.controllers.paramsController import PARAM_HASH_CHECK_ID, ParamsController
 from app.controllers.rcController import RcController
 from app.controllers.serialPortsController import SerialPortsController
 from app.controllers.servoController import ServoController
-from app.customTypes import Number, Response, VehicleType
+from app.customTypes import (
+    LinkResyncResult,
+    Number,
+    QueueStats,
+    Response,
+    VehicleType,
+)
+from app.ftlog import (
+    FTLogWriter,
+    findLogChains,
+    getCompression,
+    getLogSuffix,
+    mergeLogs,
+    readFirstLine,
+    removeLog,
+    renameLog,
+)
+from app.linkStats import LinkStatsEngine
+from app.linkWatchdog import LinkWatchdog
+from app.logStorage import getLogStorageManager
+from app.messageConverter import message_converters
+from app.multiLink import MultiLinkConnection
+from app.outboundScheduler import OutboundScheduler
+from app.progressReporter import ProgressReporter
+from app.telemetryCache import TelemetryCache
+from app.telemetryHistory import TelemetryHistoryStore
+from app.tlogRecorder import TlogRecorder
 from app.utils import (
     commandAccepted,
     decodeFlightSwVersion,
@@ -35,11 +89,34 @@ from app.utils import (
     sendingCommandLock,
     sendMessage,
 )
+from app.vehicleState import VehicleState
 
 # Constants
 
 LOG_LINE_LIMIT = 50000
 CONNECT_STATUS_PARAM_THROTTLE_SECS = 0.2
+# Only one drone recovers temp log files at a time
+LOG_RECOVERY_LOCK = Lock()
+LINK_STATS_REFRESH_RATE_HZ = 2
+LINK_STATS_TIMESYNC_INTERVAL_SECS = 1.0
+# Telemetry for the message listeners is dropped oldest first if they fall
+# behind, log lines are spilled to disk and ACKs for controllers are only
+# dropped once the queue reaches its max size, which is more than the number
+# of parameters of a vehicle so a full parameter fetch fits
+MESSAGE_QUEUE_CAPACITY = 1000
+LOG_MESSAGE_QUEUE_CAPACITY = 10000
+CONTROLLER_QUEUE_CAPACITY = 1000
+CONTROLLER_QUEUE_MAX_SIZE = 5000
+CONTROLLER_QUEUE_ESSENTIAL_MESSAGES = {"COMMAND_ACK", "MISSION_ACK", "PARAM_VALUE"}
+
+# Controllers which are most likely to be used straight after connecting, these
+# are created in the background once the connection is complete
+CONTROLLER_WARMUP_NAMES = [
+    "armController",
+    "flightModesController",
+    "navController",
+    "missionController",
+]
 
 
 DATASTREAM_RATES = {
@@ -73,7 +150,57 @@ VALID_BAUDRATES = [
 ]
 
 
+ControllerT = TypeVar("ControllerT")
+
+
+class LazyController(Generic[ControllerT]):
+    def __init__(self, controller_class: Type[ControllerT]) -> None:
+        """
+        Descriptor which creates a drone controller the first time it is accessed.
+
+        Once created the controller is stored on the drone instance under the same
+        attribute name, so later accesses are plain attribute lookups and never go
+        back through the descriptor.
+
+        Args:
+            controller_class (Type[ControllerT]): The controller class to create, it
+                is called with the drone as its only argument
+        """
+        self.controller_class = controller_class
+        self.name = controller_class.__name__
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    @overload
+    def __get__(
+        self, drone: None, owner: Optional[type] = None
+    ) -> "LazyController[ControllerT]": ...
+
+    @overload
+    def __get__(self, drone: "Drone", owner: Optional[type] = None) -> ControllerT: ...
+
+    def __get__(self, drone: Any, owner: Optional[type] = None) -> Any:
+        if drone is None:
+            return self
+        return drone.getController(self.name)
+
+
 class Drone:
+    armController = LazyController(ArmController)
+    flightModesController = LazyController(FlightModesController)
+    motorTestController = LazyController(MotorTestController)
+    gripperController = LazyController(GripperController)
+    missionController = LazyController(MissionController)
+    frameController = LazyController(FrameController)
+    rcController = LazyController(RcController)
+    servoController = LazyController(ServoController)
+    serialPortsController = LazyController(SerialPortsController)
+    navController = LazyController(NavController)
+    ftpController = LazyController(FtpController)
+    manualControlController = LazyController(ManualControlController)
+    guidedTargetController = LazyController(GuidedTargetController)
+
     def __init__(
         self,
         port: str,
@@ -86,6 +213,15 @@ class Drone:
         linkDebugStatsCb: Optional[Callable] = None,
         fetchingParameterCb: Optional[Callable] = None,
         connectionCancelEvent: Optional[Event] = None,
+        log_compression: Optional[str] = None,
+        logRecoveryProgressCb: Optional[Callable] = None,
+        tlog_recording: bool = False,
+        tlog_compression: Optional[str] = None,
+        link_bandwidth: Optional[float] = None,
+        link_recovery: bool = True,
+        linkStatusCb: Optional[Callable] = None,
+        redundant_ports: Optional[List[str]] = None,
+        link_send_mode: str = "best",
     ) -> None:
         """
         The drone class interfaces with the UAS via MavLink.
@@ -99,6 +235,15 @@ class Drone:
             linkDebugStatsCb (Optional[Callable], optional): Callback function for link debug stats. Defaults to None.
             fetchingParameterCb (Optional[Callable], optional): Callback function for when parameters are being fetched. Defaults to None.
             connectionCancelEvent (Optional[Event], optional): Event to signal if the connection process should be cancelled. Defaults to None.
+            log_compression (Optional[str], optional): Compress the telemetry logs with "gzip" or "xz". Defaults to None.
+            logRecoveryProgressCb (Optional[Callable], optional): Callback function for the progress of recovering logs from a previous session. Defaults to None.
+            tlog_recording (bool, optional): Record every frame sent and received to a tlog, tlogs are not covered by the log retention budget so this is opt-in. Defaults to False.
+            tlog_compression (Optional[str], optional): Compress the tlogs with "gzip" or "xz". Defaults to None.
+            link_bandwidth (Optional[float], optional): The bandwidth of the link in bytes per second which outgoing messages are limited to, None to not limit them. Defaults to None.
+            link_recovery (bool, optional): Reopen the link in place if it is lost instead of disconnecting. Defaults to True.
+            linkStatusCb (Optional[Callable], optional): Callback function for when the link is lost or recovered. Defaults to None.
+            redundant_ports (Optional[List[str]], optional): Other ports or addresses of the same drone, e.g. an LTE modem as well as a radio, which are used as one connection. Defaults to None.
+            link_send_mode (str, optional): With redundant ports, either "best" to send on the healthiest link or "all". Defaults to "best".
         """
         self.port = port
         self.baud = baud
@@ -108,12 +253,38 @@ class Drone:
         self.droneConnectStatusCb = droneConnectStatusCb
         self.linkDebugStatsCb = linkDebugStatsCb
         self.fetchingParameterCb = fetchingParameterCb
+        self.logRecoveryProgressCb = logRecoveryProgressCb
         self.connection_cancel_event: Event = connectionCancelEvent or Event()
+        self.log_compression = log_compression
+        self.tlog_recording = tlog_recording
+        self.tlog_compression = tlog_compression
+        self.tlog_recorder: Optional[TlogRecorder] = None
+        self.link_bandwidth = link_bandwidth
+        self.outbound_scheduler: Optional[OutboundScheduler] = None
+        self.continuous_channels: Dict[str, ContinuousCommandChannel] = {}
+        self.link_recovery = link_recovery
+        self.redundant_ports = redundant_ports or []
+        self.link_send_mode = link_send_mode
+        self.linkStatusCb = linkStatusCb
+        self.link_watchdog: Optional[LinkWatchdog] = None
+        # Held whilst reading from the connection, so the connection is never
+        # swapped in the middle of a read
+        self.link_lock = Lock()
+        self.last_heartbeat_time = time.monotonic()
 
         self.connectionError: Optional[str] = None
         self._last_connect_progress: float = 0.0
-        self._last_param_progress_emit_time: float = 0.0
+        self._param_fetch_progress_reporter = ProgressReporter(
+            lambda status: self._emitConnectionStatus(**status),
+            min_interval_secs=CONNECT_STATUS_PARAM_THROTTLE_SECS,
+            min_percent_step=0,
+        )
         self._last_connect_status_payload: Optional[dict] = None
+        self._current_connection_phase: Optional[tuple[str, float]] = None
+        self.connection_phase_timings: Dict[str, float] = {}
+
+        self._controller_locks: Dict[str, Lock] = {}
+        self.controller_warmup_thread: Optional[Thread] = None
 
         self.connection_phases = [
             "Waiting for heartbeat",
@@ -133,13 +304,7 @@ class Drone:
 
         try:
             self.sendConnectionStatusUpdate(0)
-            # Source system and component set to GCS values
-            self.master: mavutil.mavserial = mavutil.mavlink_connection(
-                port,
-                baud=baud,
-                source_system=255,
-                source_component=mavutil.mavlink.MAV_COMP_ID_MISSIONPLANNER,
-            )
+            self.master: mavutil.mavserial = self._openConnection()
         except Exception as e:
             self.logger.exception(traceback.format_exc())
             self.master = None
@@ -153,6 +318,9 @@ class Drone:
                 self.connectionError = str(e)
             return
 
+        if self.tlog_recording:
+            self.startTlogRecording()
+
         if self._isConnectionCancelRequested():
             self._setCancelledConnectionErrorAndCloseMaster()
             return
@@ -203,8 +371,7 @@ class Drone:
                 self.logger.error(
                     f"No heartbeat received after {heartbeat_timeout_secs:.0f} seconds"
                 )
-                self.master.close()
-                self.master = None
+                self._closeMaster()
                 self.connectionError = (
                     f"No heartbeat received after {heartbeat_timeout_secs:.0f} seconds."
                 )
@@ -213,9 +380,7 @@ class Drone:
             self.logger.error(
                 "Error while waiting for heartbeat: " + str(e), exc_info=True
             )
-            if self.master is not None:
-                self.master.close()
-            self.master = None
+            self._closeMaster()
             self.connectionError = (
                 "An error occured while waiting for a heartbeat from the drone."
             )
@@ -227,8 +392,7 @@ class Drone:
             VehicleType.MULTIROTOR.value,
         ):
             self.logger.error("Aircraft not plane or quadcopter")
-            self.master.close()
-            self.master = None
+            self._closeMaster()
             self.connectionError = f"Could not connect to the drone. Aircraft not plane or quadcopter, got type {self.aircraft_type}"
             return
 
@@ -243,14 +407,26 @@ class Drone:
         )
 
         self.message_listeners: Dict[str, Callable] = {}
-        self.message_queue: Queue = Queue()
-        self.log_message_queue: Queue = Queue()
+        self.message_queue = BoundedQueue(MESSAGE_QUEUE_CAPACITY)
 
         self.log_directory = Path.home().joinpath("FGCS", "logs")
         self.log_directory.mkdir(parents=True, exist_ok=True)
+        # Spill files have their own directory so finding the ones left by a
+        # crash does not list every log, they are removed before this session
+        # can create one
+        spill_directory = self.log_directory.joinpath("spill")
+        spill_directory.mkdir(exist_ok=True)
+        for spill_file in removeSpillFiles(spill_directory):
+            self.logger.info(f"Removed stale log queue spill file {spill_file}")
+        self.log_message_queue = SpillQueue(
+            LOG_MESSAGE_QUEUE_CAPACITY,
+            spill_directory.joinpath(f"log_queue_{token_hex(8)}{SPILL_FILE_SUFFIX}"),
+        )
         self.current_log_file: Optional[Path] = None
         self.log_file_names: List[Path] = []
-        self.cleanTempLogs()
+        self.log_storage = getLogStorageManager(self.log_directory, self.logger)
+        self.log_recovery_thread = Thread(target=self.manageLogStorage, daemon=True)
+        self.log_recovery_thread.start()
 
         # To ensure that only one command is sent at a time and we wait for a
         # response before sending another command, a thread-safe lock is used
@@ -262,12 +438,28 @@ class Drone:
         self.is_active = Event()
         self.is_active.set()
 
+        self.link_stats = LinkStatsEngine(
+            sample_interval_secs=1 / LINK_STATS_REFRESH_RATE_HZ
+        )
+        self.clock_sync = ClockSync(self.logger)
+
+        # Every message sent from here on goes through the scheduler, so safety
+        # commands are never stuck behind bulk transfers
+        self.outbound_scheduler = OutboundScheduler(self.logger, self.link_bandwidth)
+        self.outbound_scheduler.attach(self.master.mav)
+
         self.reserved_messages: Set[str] = set()
-        self.controller_queues: Dict[str, Queue] = {}
+        self.controller_queues: Dict[str, BoundedQueue] = {}
         self.reservation_lock = Lock()
         self.controller_id = f"Drone_{current_thread().ident}"
 
-        self.armed = False
+        # COMMAND_ACKs are routed to the command waiting for them, so commands
+        # with different ids can be sent without waiting for each other
+        self.command_transactions = CommandTransactionManager(self.logger)
+
+        self.vehicle_state = VehicleState()
+        self.telemetry_cache = TelemetryCache()
+        self.telemetry_history = TelemetryHistoryStore()
         self.capabilities: Optional[list[str]] = None
         self.flight_sw_version: Optional[tuple[int, int, int, int]] = None
 
@@ -285,8 +477,7 @@ class Drone:
 
         if self.flight_sw_version is None:
             self.logger.error("Could not determine flight software version")
-            self.master.close()
-            self.master = None
+            self._closeMaster()
             self.connectionError = "Could not determine flight software version"
             return
 
@@ -296,8 +487,7 @@ class Drone:
 
         if self.flight_sw_version[0] != 4:
             self.logger.error("Unsupported flight software version")
-            self.master.close()
-            self.master = None
+            self._closeMaster()
             self.connectionError = f"Unsupported flight software version {getFlightSwVersionString(self.flight_sw_version)}. Only version 4.x.x is supported."
             return
 
@@ -323,6 +513,7 @@ class Drone:
             progress_update_callback=self.sendParamFetchConnectionStatusUpdate,
             should_cancel_callback=self._isConnectionCancelRequested,
         )
+        self._param_fetch_progress_reporter.flush()
 
         if not fetch_all_params_result.get("success"):
             self.is_active.clear()
@@ -331,8 +522,7 @@ class Drone:
                 "message", "Could not fetch all drone parameters"
             )
             self.logger.error(fetch_error_message)
-            self.master.close()
-            self.master = None
+            self._closeMaster()
             self.connectionError = fetch_error_message
             return
 
@@ -340,10 +530,26 @@ class Drone:
         self.setupControllers()
         self.sendConnectionStatusUpdate(4)
 
+        if self.link_recovery:
+            self.link_watchdog = LinkWatchdog(
+                self.logger,
+                self.getHeartbeatAge,
+                self.reopenLink,
+                self.resyncLink,
+                status_callback=self.linkStatusCb,
+                failed_callback=self.close,
+            )
+            self.link_watchdog.start()
+
         self.sendStatusTextMessage(
             mavutil.mavlink.MAV_SEVERITY_INFO, "FGCS connected to aircraft"
         )
 
+    @property
+    def armed(self) -> bool:
+        """Whether the drone was armed in its last heartbeat."""
+        return self.vehicle_state.armed
+
     def _isConnectionCancelRequested(self) -> bool:
         return self.connection_cancel_event.is_set()
 
@@ -357,29 +563,236 @@ class Drone:
         self.connectionError = "Connection cancelled by user."
         if getattr(self, "master", None) is not None:
             try:
-                self.master.close()
+                self._closeMaster()
             except Exception:
                 self.logger.exception("Failed to close connection during cancellation")
             self.master = None
 
-    def __getNextLogFilePath(self, line: str) -> str:
-        return line.split("==NEXT_FILE==")[-1].split("==END==")[0]
+    def _closeMaster(self) -> None:
+        """Send any queued messages and stop recording, then close the connection."""
+        outbound_scheduler = getattr(self, "outbound_scheduler", None)
+        if outbound_scheduler is not None:
+            self.outbound_scheduler = None
+            outbound_scheduler.close()
+
+        self.stopTlogRecording()
+
+        if getattr(self, "master", None) is not None:
+            try:
+                self.master.close()
+            finally:
+                self.master = None
+
+    def _openConnection(self) -> Any:
+        """
+        Open the connection to the drone, when there are redundant ports every
+        port is opened and used as one connection.
+
+        Returns:
+            mavutil.mavfile: The connection to the drone
+        """
+        # Source system and component set to GCS values
+        if self.redundant_ports:
+            return MultiLinkConnection(
+                [self.port, *self.redundant_ports],
+                baud=self.baud,
+                source_system=255,
+                source_component=mavutil.mavlink.MAV_COMP_ID_MISSIONPLANNER,
+                send_mode=self.link_send_mode,
+                logger=self.logger,
+            )
+        return mavutil.mavlink_connection(
+            self.port,
+            baud=self.baud,
+            source_system=255,
+            source_component=mavutil.mavlink.MAV_COMP_ID_MISSIONPLANNER,
+        )
+
+    def getHeartbeatAge(self) -> float:
+        """
+        Returns:
+            float: The seconds since the last heartbeat from the drone
+        """
+        return time.monotonic() - self.last_heartbeat_time
+
+    def reopenLink(self) -> bool:
+        """
+        Close the connection and open the same port or address again, keeping
+        everything else about the drone. Messages sent whilst the link is
+        down are dropped rather than sent late.
+
+        Returns:
+            bool: True if the connection was opened, not that the drone responded
+        """
+        if self.outbound_scheduler is not None:
+            self.outbound_scheduler.suspend()
+
+        with self.link_lock:
+            try:
+                self.master.close()
+            except Exception as e:
+                self.logger.debug(f"Failed to close the lost link: {e}")
+
+            try:
+                master = self._openConnection()
+            except Exception as e:
+                self.logger.warning(f"Could not reopen {self.port}: {e}")
+                return False
+
+            if self.outbound_scheduler is not None:
+                self.outbound_scheduler.reattach(master.mav)
+            if self.tlog_recorder is not None:
+                self.tlog_recorder.reattach(master)
+            self.master = master
+
+        # The heartbeat thread keeps sending on the new connection
+        return True
+
+    def resyncLink(self) -> LinkResyncResult:
+        """
+        Check what may have changed on the drone whilst the link was down,
+        instead of fetching everything again.
+
+        Returns:
+            LinkResyncResult: The parameter and mission counts and the home position
+        """
+        param_count = self.paramsController.getParamCount()
+        params_changed = False
+        if param_count is not None:
+            # Params can change without changing the count, so unless the
+            # hash shows nothing changed the params should be fetched again
+            params_changed = param_count != len(self.paramsController.params)
+            if not params_changed:
+                fetched_hash = self.paramsController.param_hash
+                params_changed = (
+                    fetched_hash is None
+                    or self.paramsController.getParamHash() != fetched_hash
+                )
+
+        mission_count = None
+        mission_changed = False
+        mission_controller = self.__dict__.get("missionController")
+        if mission_controller is not None:
+            mission_count = mission_controller.getMissionCount()
+            mission_changed = (
+                mission_count is not None
+                and mission_count != mission_controller.missionLoader.count()
+            )
+
+        home_result = self.navController.getHomePosition(max_attempts=1)
+
+        return {
+            "param_count": param_count,
+            "params_changed": params_changed,
+            "mission_count": mission_count,
+            "mission_changed": mission_changed,
+            "home": home_result.get("data") if home_result.get("success") else None,
+        }
+
+    def startTlogRecording(self) -> None:
+        """Start recording every frame sent and received to a tlog."""
+        if self.tlog_recorder is not None or self.master is None:
+            return
+
+        try:
+            tlog_recorder = TlogRecorder(
+                Path.home().joinpath("FGCS", "tlogs"),
+                self.logger,
+                compression=self.tlog_compression,
+            )
+            tlog_recorder.attach(self.master)
+        except (OSError, ValueError):
+            self.logger.error("Failed to start tlog recording", exc_info=True)
+            return
+
+        self.tlog_recorder = tlog_recorder
+
+    def stopTlogRecording(self) -> None:
+        """Stop recording to a tlog, writing any frames which are waiting."""
+        tlog_recorder = getattr(self, "tlog_recorder", None)
+        if tlog_recorder is None:
+            return
+
+        self.tlog_recorder = None
+        tlog_recorder.close()
 
     def __getCurrentDateTimeStr(self) -> str:
         return time.strftime("%Y-%m-%d_%H-%M-%S", time.localtime())
 
-    def setupControllers(self) -> None:
-        self.armController = ArmController(self)
-        self.flightModesController = FlightModesController(self)
-        self.motorTestController = MotorTestController(self)
-        self.gripperController = GripperController(self)
-        self.missionController = MissionController(self)
-        self.frameController = FrameController(self)
-        self.rcController = RcController(self)
-        self.servoController = ServoController(self)
-        self.serialPortsController = SerialPortsController(self)
-        self.navController = NavController(self)
-        self.ftpController = FtpController(self)
+    def setupControllers(self, warmup: bool = True) -> None:
+        """
+        Prepare the controllers for use. Controllers are created lazily the first
+        time they are accessed, so this only discards any previously created
+        controllers and optionally starts warming up the commonly used ones.
+
+        Args:
+            warmup (bool, optional): Create the controllers in CONTROLLER_WARMUP_NAMES
+                on a background thread. Defaults to True.
+        """
+        for name, attribute in vars(Drone).items():
+            if isinstance(attribute, LazyController):
+                self.__dict__.pop(name, None)
+
+        if warmup:
+            self.controller_warmup_thread = Thread(
+                target=self.warmupControllers,
+                args=(CONTROLLER_WARMUP_NAMES,),
+                daemon=True,
+            )
+            self.controller_warmup_thread.start()
+
+    def getController(self, name: str) -> Any:
+        """
+        Get a controller by its attribute name, creating it if it does not exist yet.
+
+        Creation is guarded by a lock per controller, so concurrent first accesses
+        from different threads only ever create the controller once.
+
+        Args:
+            name (str): The attribute name of the controller, e.g. "ftpController"
+
+        Returns:
+            The controller instance
+        """
+        controller = self.__dict__.get(name)
+        if controller is not None:
+            return controller
+
+        lazy_controller = vars(Drone).get(name)
+        if not isinstance(lazy_controller, LazyController):
+            raise AttributeError(f"Drone has no controller called {name}")
+
+        with self._controller_locks.setdefault(name, Lock()):
+            controller = self.__dict__.get(name)
+            if controller is None:
+                start_time = time.perf_counter()
+                controller = lazy_controller.controller_class(self)
+                self.__dict__[name] = controller
+                self.logger.debug(
+                    f"Created {name} in {time.perf_counter() - start_time:.3f}s"
+                )
+
+        return controller
+
+    def warmupControllers(self, names: List[str]) -> None:
+        """
+        Create controllers ahead of their first use. Any controller which fails to
+        be created is left to be created again on first access.
+
+        Args:
+            names (List[str]): The attribute names of the controllers to create
+        """
+        for name in names:
+            if not self.is_active.is_set():
+                return
+
+            try:
+                self.getController(name)
+            except Exception as e:
+                self.logger.warning(
+                    f"Failed to warm up {name}, it will be created on first use: {e}",
+                    exc_info=True,
+                )
 
     def _emitConnectionStatus(
         self, message: str, progress: float, sub_message: str = ""
@@ -419,21 +832,14 @@ class Drone:
         if current_param_id:
             sub_message = f"{sub_message}: {current_param_id}"
 
-        now = time.monotonic()
-        is_final_update = current_index >= total_params
-        if (
-            not is_final_update
-            and now - self._last_param_progress_emit_time
-            < CONNECT_STATUS_PARAM_THROTTLE_SECS
-        ):
-            return
-
-        self._emitConnectionStatus(
-            message="Fetching Params",
-            sub_message=sub_message,
-            progress=progress,
+        self._param_fetch_progress_reporter.update(
+            {
+                "message": "Fetching Params",
+                "sub_message": sub_message,
+                "progress": progress,
+            },
+            percent=progress,
         )
-        self._last_param_progress_emit_time = now
 
     def sendConnectionStatusUpdate(self, msg_index: int) -> None:
         total_msgs = len(self.connection_phases)
@@ -442,11 +848,36 @@ class Drone:
             return
 
         msg = self.connection_phases[msg_index]
+        self._recordConnectionPhase(msg)
 
         # Do not regress progress during non-fetch stages.
         progress = 100.0 if msg_index == total_msgs - 1 else self._last_connect_progress
         self._emitConnectionStatus(message=msg, sub_message="", progress=progress)
 
+    def _recordConnectionPhase(self, phase: str) -> None:
+        """
+        Record how long the previous connection phase took and start timing the
+        given phase. The timings are logged once the connection is complete.
+
+        Args:
+            phase (str): The connection phase that is starting
+        """
+        now = time.perf_counter()
+
+        if self._current_connection_phase is not None:
+            previous_phase, started_at = self._current_connection_phase
+            self.connection_phase_timings[previous_phase] = round(now - started_at, 3)
+
+        self._current_connection_phase = (phase, now)
+
+        if phase == self.connection_phases[-1]:
+            total_time = sum(self.connection_phase_timings.values())
+            phase_timings = ", ".join(
+                f"{name}: {duration:.3f}s"
+                for name, duration in self.connection_phase_timings.items()
+            )
+            self.logger.info(f"Connected in {total_time:.3f}s ({phase_timings})")
+
     @staticmethod
     def checkBaudrateValid(baud: int) -> bool:
         return baud in VALID_BAUDRATES
@@ -455,122 +886,150 @@ class Drone:
     def getValidBaudrates() -> list[int]:
         return VALID_BAUDRATES
 
-    def cleanTempLogs(self) -> None:
+    def findTempLogs(self) -> List[Path]:
         """
-        Clean up and try to recover any temporary log files that were not properly closed.
+        Find the temporary log files left by sessions which were not properly
+        closed. These are looked up in the log manifest so the log directory
+        is not listed, the temp log files of this session are never included.
+
+        Returns:
+            List[Path]: The temporary log files
         """
-        log_files = [
-            file
-            for file in self.log_directory.iterdir()
-            if file.is_file() and file.name.startswith("tmp_")
-        ]
-        first_recovered_log_files = [
-            file for file in log_files if file.name.startswith("tmp_first_")
+        session_log_files = getattr(self, "log_file_names", [])
+        return [
+            log_file
+            for log_file in self.log_storage.getTempLogs()
+            if log_file not in session_log_files
         ]
 
-        number_of_first_recovered_log_files = 0
+    def manageLogStorage(self, temp_log_files: Optional[List[Path]] = None) -> None:
+        """
+        Load the log manifest, recover any temporary log files that were not
+        properly closed, then compress or remove old logs so they stay within
+        the disk budget. This is run in the background when the drone is
+        created, as loading the manifest can read every log.
 
-        # Go through each first ("starting") log file
-        for first_recovered_log_file in first_recovered_log_files:
-            exif_date = None
-            final_recovered_log_file = self.log_directory.joinpath(
-                f"RECOVERED_TMP_{self.__getCurrentDateTimeStr()}.ftlog"
-            )
-            no_next_log_file_flag = False
-            next_log_file = None
-
-            with open(final_recovered_log_file, "a") as final_recovered_log_file_handle:
-                with open(first_recovered_log_file) as first_recovered_log_file_handle:
-                    lines = first_recovered_log_file_handle.readlines()
-                    first_line = lines[0]
-                    last_line = lines[-1]
-
-                    if first_line.startswith("==START_TIME=="):
-                        exif_date = first_line.split("==START_TIME==")[-1].split(
-                            "==END=="
-                        )[0]
-
-                    final_recovered_log_file_handle.writelines(lines)
-                    number_of_first_recovered_log_files += 1
-
-                    # Try and get the file name of the next log file
-                    # If the next file is not found, then the first log file is the only log file for this set of logs
-                    if last_line.startswith("==NEXT_FILE=="):
-                        next_log_file_name = self.__getNextLogFilePath(last_line)
-                        next_log_file = self.log_directory.joinpath(next_log_file_name)
-
-                        # If the next file is not found or doesn't exist in the list of log files, or if the file isn't a file, then stop the recovery
-                        if (
-                            not next_log_file
-                            or next_log_file not in log_files
-                            or not next_log_file.is_file()
-                        ):
-                            self.logger.error(
-                                f"Could not find the next log file {next_log_file_name}, stopping recovery"
-                            )
-                            no_next_log_file_flag = True
-                    else:
-                        no_next_log_file_flag = True
+        Args:
+            temp_log_files (Optional[List[Path]], optional): The temp log files to recover. Defaults to finding them.
+        """
+        self.log_storage.load()
+        self.cleanTempLogs(temp_log_files)
+        try:
+            self.log_storage.enforceRetention()
+        except OSError:
+            self.logger.error("Failed to remove old logs", exc_info=True)
 
-            os.remove(first_recovered_log_file)
+    def cleanTempLogs(self, temp_log_files: Optional[List[Path]] = None) -> None:
+        """
+        Clean up and try to recover any temporary log files that were not properly closed.
 
-            if no_next_log_file_flag:
-                continue
+        This is run in the background when the drone is created, so connecting
+        never waits for it.
 
-            # Go through each log file listed in the end of the previous log file whilst appending the messages to the final log file
-            while next_log_file is not None:
-                with open(
-                    final_recovered_log_file, "a"
-                ) as final_recovered_log_file_handle:
-                    with open(next_log_file) as next_log_file_handle:
-                        lines = next_log_file_handle.readlines()
-                        final_recovered_log_file_handle.writelines(lines)
-                        number_of_first_recovered_log_files += 1
-                        last_line = lines[-1]
-
-                        current_log_file = next_log_file
-
-                        # Try and get the file name of the next log file
-                        if last_line.startswith("==NEXT_FILE=="):
-                            next_log_file_name = self.__getNextLogFilePath(last_line)
-                            next_log_file = self.log_directory.joinpath(
-                                next_log_file_name
-                            )
-
-                            # If the next file is not found or doesn't exist in the list of log files, or if the file isn't a file, then stop the recovery
-                            if (
-                                not next_log_file
-                                or next_log_file not in log_files
-                                or not next_log_file.is_file()
-                            ):
-                                self.logger.error(
-                                    f"Could not find the next log file {next_log_file_name}, stopping recovery"
-                                )
-                                next_log_file = None
-                        else:
-                            next_log_file = None
-
-                    # Remove the current log file as we're done reading from it
-                    os.remove(current_log_file)
-
-            if exif_date is not None:
-                self.logger.debug(
-                    f"Recovered logs {number_of_first_recovered_log_files} from {exif_date}"
-                )
-                new_final_recovered_log_file_name = self.log_directory.joinpath(
-                    f"{exif_date}_RECOVERED.ftlog"
-                )
-                os.rename(
-                    final_recovered_log_file,
-                    new_final_recovered_log_file_name,
+        Args:
+            temp_log_files (Optional[List[Path]], optional): The temp log files to recover. Defaults to finding them.
+        """
+        with LOG_RECOVERY_LOCK:
+            if temp_log_files is None:
+                temp_log_files = self.findTempLogs()
+
+            # Another drone may have recovered some of the files already
+            temp_log_files = [file for file in temp_log_files if file.is_file()]
+
+            try:
+                log_chains, missing_log_files = findLogChains(temp_log_files)
+            except OSError:
+                self.logger.error("Failed to read temp log files", exc_info=True)
+                return
+
+            for missing_log_file in missing_log_files:
+                self.logger.error(
+                    f"Could not find the next log file {missing_log_file}, stopping recovery"
                 )
-            else:
-                new_final_recovered_log_file_name = final_recovered_log_file
 
-            self.logger.info(
-                f"Saved {number_of_first_recovered_log_files} recovered drone logs to: {str(new_final_recovered_log_file_name)}"
+            total_bytes = sum(
+                log_file.stat().st_size for chain in log_chains for log_file in chain
+            )
+            recovered_bytes = 0
+            progress_reporter = (
+                ProgressReporter(self.logRecoveryProgressCb)
+                if self.logRecoveryProgressCb
+                else None
             )
 
+            def reportProgress(chunk_bytes: int) -> None:
+                nonlocal recovered_bytes
+                recovered_bytes += chunk_bytes
+                if progress_reporter is not None:
+                    percent = (
+                        recovered_bytes / total_bytes * 100 if total_bytes else 100
+                    )
+                    progress_reporter.update(
+                        {
+                            "recovered_bytes": recovered_bytes,
+                            "total_bytes": total_bytes,
+                            "progress": percent,
+                        },
+                        percent,
+                    )
+
+            for log_chain in log_chains:
+                chain_bytes = sum(log_file.stat().st_size for log_file in log_chain)
+                chain_start_bytes = recovered_bytes
+                try:
+                    self._recoverLogChain(log_chain, reportProgress)
+                except OSError:
+                    self.logger.error(
+                        f"Failed to recover drone logs starting at {log_chain[0]}",
+                        exc_info=True,
+                    )
+
+                # Count anything which was not copied, such as an incomplete frame
+                skipped_bytes = chain_bytes - (recovered_bytes - chain_start_bytes)
+                if skipped_bytes > 0:
+                    reportProgress(skipped_bytes)
+
+            if progress_reporter is not None:
+                progress_reporter.flush()
+
+    def _recoverLogChain(
+        self, log_chain: List[Path], progress_callback: Callable[[int], None]
+    ) -> None:
+        """
+        Join a chain of temp log files into a recovered log file, named after the
+        start time of the first log file if it is known.
+
+        Args:
+            log_chain (List[Path]): The temp log files in the order they were written
+            progress_callback (Callable[[int], None]): Called with the number of bytes of each chunk copied
+        """
+        first_line = readFirstLine(log_chain[0])
+        exif_date = None
+        if first_line.startswith("==START_TIME=="):
+            exif_date = first_line.split("==START_TIME==")[-1].split("==END==")[0]
+
+        # Recovered logs are compressed the same way as the temp logs were
+        log_suffix = getLogSuffix(getCompression(log_chain[0]))
+        final_recovered_log_file = self.log_directory.joinpath(
+            f"RECOVERED_TMP_{self.__getCurrentDateTimeStr()}_{token_hex(4)}{log_suffix}"
+        )
+        mergeLogs(log_chain, final_recovered_log_file, progress_callback)
+        self.log_storage.removeTempLogs(log_chain)
+
+        if exif_date is not None:
+            self.logger.debug(f"Recovered logs {len(log_chain)} from {exif_date}")
+            new_final_recovered_log_file_name = self.log_directory.joinpath(
+                f"{exif_date}_RECOVERED{log_suffix}"
+            )
+            renameLog(final_recovered_log_file, new_final_recovered_log_file_name)
+        else:
+            new_final_recovered_log_file_name = final_recovered_log_file
+
+        self.log_storage.addLog(new_final_recovered_log_file_name)
+        self.logger.info(
+            f"Saved {len(log_chain)} recovered drone logs to: {str(new_final_recovered_log_file_name)}"
+        )
+
     def setupDataStreams(self) -> None:
         """
         Setups up data streams for the drone.
@@ -683,7 +1142,7 @@ class Drone:
 
             self.reserved_messages.add(message_type)
             if controller_id not in self.controller_queues:
-                self.controller_queues[controller_id] = Queue()
+                self.controller_queues[controller_id] = self._createControllerQueue()
 
             return True
 
@@ -699,7 +1158,15 @@ class Drone:
             # Clear any remaining messages in the controller's queue for this type
             # by creating a new, empty queue
             if controller_id in self.controller_queues:
-                self.controller_queues[controller_id] = Queue()
+                self.controller_queues[controller_id] = self._createControllerQueue()
+
+    @staticmethod
+    def _createControllerQueue() -> BoundedQueue:
+        return BoundedQueue(
+            CONTROLLER_QUEUE_CAPACITY,
+            is_essential=lambda item: item[0] in CONTROLLER_QUEUE_ESSENTIAL_MESSAGES,
+            max_size=CONTROLLER_QUEUE_MAX_SIZE,
+        )
 
     def wait_for_message(
         self,
@@ -720,7 +1187,7 @@ class Drone:
             The message object if received, None if timeout
         """
         if controller_id not in self.controller_queues:
-            self.controller_queues[controller_id] = Queue()
+            self.controller_queues[controller_id] = self._createControllerQueue()
 
         start_time = time.time()
         while time.time() - start_time < timeout:
@@ -745,11 +1212,21 @@ class Drone:
         )
         return None
 
+    def _isAckForUs(self, msg: Any) -> bool:
+        """Check if a COMMAND_ACK is from the drone and is a reply to this GCS."""
+        if msg.get_srcSystem() != self.target_system:
+            return False
+
+        # target_system is only sent in MAVLink 2, 0 means it was not set
+        target_system = getattr(msg, "target_system", 0)
+        return target_system in (0, self.master.source_system)
+
     def checkForMessages(self) -> None:
         """Check for messages from the drone and add them to the message queue."""
         while self.is_active.is_set():
             try:
-                msg = self.master.recv_msg()
+                with self.link_lock:
+                    msg = self.master.recv_msg()
             except mavutil.mavlink.MAVError as e:
                 self.logger.error(e, exc_info=True)
                 if self.droneErrorCb:
@@ -759,7 +1236,13 @@ class Drone:
                 self.logger.error(e, exc_info=True)
             except KeyboardInterrupt:
                 break
-            except (serial.serialutil.SerialException, ConnectionAbortedError):
+            except (serial.serialutil.SerialException, ConnectionAbortedError) as e:
+                if self.link_watchdog is not None and self.is_active.is_set():
+                    # Recover the link in place, the watchdog closes the drone
+                    # if that fails
+                    self.link_watchdog.reportLinkError(str(e))
+                    time.sleep(0.1)
+                    continue
                 self.logger.error("Autopilot disconnected", exc_info=True)
                 self.close()
                 break
@@ -775,6 +1258,18 @@ class Drone:
                 time.sleep(0.05)
                 continue
 
+            msg_name = msg.get_type()
+
+            # Undecodable frames have no real source or sequence number
+            if msg_name != "BAD_DATA":
+                self._runMessageHook(
+                    "Link stats",
+                    self.link_stats.recordSequence,
+                    msg.get_srcSystem(),
+                    msg.get_srcComponent(),
+                    msg.get_seq(),
+                )
+
             if self.forwarding_connection is not None:
                 try:
                     msg_buf = msg.get_msgbuf()
@@ -783,49 +1278,144 @@ class Drone:
                     self.logger.error(f"Failed to forward message: {e}", exc_info=True)
                     self.stopForwarding()
 
-            msg_name = msg.get_type()
-
             if msg_name == "HEARTBEAT":
                 if (
                     msg.autopilot == mavutil.mavlink.MAV_AUTOPILOT_INVALID
                 ):  # No valid autopilot, e.g. a GCS or other MAVLink component
                     continue
 
-                self.armed = bool(
-                    msg.base_mode & mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED
-                )
+                self.vehicle_state.updateFromHeartbeat(msg)
+                if msg.get_srcSystem() == self.target_system:
+                    self.last_heartbeat_time = time.monotonic()
+
+            if msg.get_srcSystem() == self.target_system:
+                if msg_name == "SYSTEM_TIME":
+                    self._runMessageHook(
+                        "Clock sync", self.clock_sync.addSystemTime, msg
+                    )
+                # Timestamp with when the autopilot sent the message, so it
+                # lines up with the onboard logs
+                self._runMessageHook("Clock sync", self.clock_sync.retimestamp, msg)
 
             if self.armed:
                 try:
                     self.log_message_queue.put(
-                        f"{msg._timestamp},{msg_name},{','.join([f'{message}:{msg.to_dict()[message]}' for message in msg.to_dict() if message != 'mavpackettype'])}"
+                        f"{msg._timestamp},{msg_name},{message_converters.toLogLine(msg)}"
                     )
                 except Exception as e:
                     self.log_message_queue.put(f"Writing message failed! {e}")
                     continue
 
             if msg_name == "TIMESYNC":
-                component_timestamp = msg.ts1
-                local_timestamp = time.time_ns()
-                self.master.mav.timesync_send(local_timestamp, component_timestamp)
+                if msg.tc1 == 0:
+                    # Request from the autopilot, respond with our timestamp
+                    component_timestamp = msg.ts1
+                    local_timestamp = time.time_ns()
+                    self._runMessageHook(
+                        "Timesync reply",
+                        self.master.mav.timesync_send,
+                        local_timestamp,
+                        component_timestamp,
+                    )
+                elif self._runMessageHook(
+                    "Link stats", self.link_stats.recordTimesyncResponse, msg.ts1
+                ):
+                    # Response to one of our link stats requests
+                    self._runMessageHook(
+                        "Clock sync",
+                        self.clock_sync.addTimesyncResponse,
+                        msg.ts1,
+                        msg.tc1,
+                        msg._timestamp,
+                    )
                 continue
             elif msg_name == "STATUSTEXT":
                 self.logger.info(msg.text)
+            elif msg_name == "PARAM_VALUE" and msg.param_id == PARAM_HASH_CHECK_ID:
+                self._runMessageHook(
+                    "Parameter hash", self.paramsController.recordParamHash, msg
+                )
+            elif msg_name == "COMMAND_ACK" and self._isAckForUs(msg):
+                if self.command_transactions.handleAck(msg):
+                    continue
+
+            if msg_name != "BAD_DATA" and msg.get_srcSystem() == self.target_system:
+                self._runMessageHook(
+                    "Telemetry cache", self.telemetry_cache.update, msg
+                )
+                self._runMessageHook(
+                    "Telemetry history", self.telemetry_history.update, msg
+                )
 
             with self.reservation_lock:
                 if msg_name in self.reserved_messages:
                     # Route to controller queues
                     for controller_id, queue in self.controller_queues.items():
-                        try:
-                            queue.put((msg_name, msg), block=False)
-                        except Exception:
-                            # Queue full
-                            pass
+                        queue.put((msg_name, msg))
                 else:
                     # Route to normal message listeners
                     if msg_name in self.message_listeners:
                         self.message_queue.put([msg_name, msg])
 
+    def _runMessageHook(self, name: str, hook: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run something which is done for every received message, logging any
+        exception so that it cannot stop the loop receiving messages.
+
+        Args:
+            name (str): What the hook is, used in the log
+            hook (Callable[..., Any]): The function to run
+            *args (Any): The arguments to run it with
+
+        Returns:
+            Any: What the hook returned, None if it raised an exception
+        """
+        try:
+            return hook(*args)
+        except Exception:
+            self.logger.error(f"{name} failed for a message", exc_info=True)
+            return None
+
+    def createContinuousChannel(
+        self,
+        name: str,
+        send_func: Callable[[Any, Any], Optional[Future]],
+        confirm_func: Optional[Callable[[Any, Any], Future]] = None,
+        rate_hz: float = CONTINUOUS_COMMAND_RATE_HZ,
+    ) -> ContinuousCommandChannel:
+        """
+        Create a channel for sending live adjustments at a fixed rate, it is
+        closed when the drone is closed. See ContinuousCommandChannel.
+
+        Args:
+            name (str): The name of the channel
+            send_func (Callable[[Any, Any], Optional[Future]]): Sends a value for a key without waiting for an ACK, optionally returning a Future of its ACK
+            confirm_func (Optional[Callable[[Any, Any], Future]], optional): Sends the settled value for a key and returns a Future of its ACK. Defaults to None.
+            rate_hz (float, optional): How often targets are sent. Defaults to CONTINUOUS_COMMAND_RATE_HZ.
+
+        Returns:
+            ContinuousCommandChannel: The channel
+        """
+        channel = ContinuousCommandChannel(
+            name, self.logger, send_func, confirm_func, rate_hz
+        )
+        self.continuous_channels[name] = channel
+        return channel
+
+    def getQueueStats(self) -> Dict[str, QueueStats]:
+        """
+        Returns:
+            Dict[str, QueueStats]: The size, high water mark and drop count of each internal queue
+        """
+        queue_stats = {
+            "message": self.message_queue.getStats(),
+            "log": self.log_message_queue.getStats(),
+        }
+        with self.reservation_lock:
+            for controller_id, queue in self.controller_queues.items():
+                queue_stats[f"controller/{controller_id}"] = queue.getStats()
+        return queue_stats
+
     def executeMessages(self) -> None:
         """Executes message listeners based on messages from the message queue."""
         while self.is_active.is_set():
@@ -841,78 +1431,73 @@ class Drone:
 
     def logMessages(self) -> None:
         """A thread to log messages into a temp FTLog file from the log queue."""
-        current_line_number = 0
+        log_writer: Optional[FTLogWriter] = None
 
-        while self.is_active.is_set():
-            try:
-                log_msg = self.log_message_queue.get(timeout=1)
-                if log_msg:
-                    # Check if a temp log file has been created yet, if not create one
-                    if self.current_log_file is None:
-                        self.current_log_file = self.log_directory.joinpath(
-                            f"tmp_first_{token_hex(8)}.ftlog"
-                        )
-                        self.log_file_names.append(self.current_log_file)
-                        with open(self.current_log_file, "w") as f:
-                            f.write(
-                                f"==START_TIME=={self.__getCurrentDateTimeStr()}==END==\n"
-                            )
-
-                    # Write the incoming telemetry message to the temp log file
-                    if current_line_number < LOG_LINE_LIMIT:
-                        with open(
-                            self.current_log_file, "a"
-                        ) as current_log_file_handler:
-                            current_log_file_handler.write(log_msg + "\n")
-                            current_line_number += 1
-                    else:
-                        # If the current log file has reached the line limit, create a new temp log file
-                        next_log_file_name = self.log_directory.joinpath(
-                            f"tmp_{token_hex(8)}.ftlog"
-                        )
-                        with open(
-                            self.current_log_file, "a"
-                        ) as current_log_file_handler:
-                            # Write the next file name to the current log file
-                            current_log_file_handler.write(
-                                f"==NEXT_FILE=={str(next_log_file_name)}==END==\n"
-                            )
-
-                        self.current_log_file = next_log_file_name
-                        self.log_file_names.append(self.current_log_file)
-
-                        with open(self.current_log_file, "w") as f:
-                            f.write(
-                                f"==START_TIME=={self.__getCurrentDateTimeStr()}==END==\n"
-                            )
-                            f.write(log_msg + "\n")
-                            current_line_number = 1
-            except Empty:
-                continue
+        try:
+            while self.is_active.is_set():
+                try:
+                    log_msg = self.log_message_queue.get(timeout=1)
+                except Empty:
+                    continue
+
+                if not log_msg:
+                    continue
+
+                # Check if a temp log file has been created yet, if not create one
+                if log_writer is None:
+                    self.current_log_file = self.log_directory.joinpath(
+                        f"tmp_first_{token_hex(8)}{getLogSuffix(self.log_compression)}"
+                    )
+                    self.log_file_names.append(self.current_log_file)
+                    self.log_storage.addTempLog(self.current_log_file)
+                    log_writer = FTLogWriter(
+                        self.current_log_file,
+                        self.__getCurrentDateTimeStr(),
+                        compression=self.log_compression,
+                    )
+                elif log_writer.line_count >= LOG_LINE_LIMIT:
+                    # If the current log file has reached the line limit, create a new temp log file
+                    next_log_file_name = self.log_directory.joinpath(
+                        f"tmp_{token_hex(8)}{getLogSuffix(self.log_compression)}"
+                    )
+                    log_writer.writeNextFile(next_log_file_name)
+                    log_writer.close()
+
+                    self.current_log_file = next_log_file_name
+                    self.log_file_names.append(self.current_log_file)
+                    self.log_storage.addTempLog(self.current_log_file)
+                    log_writer = FTLogWriter(
+                        self.current_log_file,
+                        self.__getCurrentDateTimeStr(),
+                        compression=self.log_compression,
+                    )
+
+                # Write the incoming telemetry message to the temp log file
+                log_writer.writeMessage(log_msg)
+                if self.log_message_queue.empty():
+                    log_writer.flush()
+        finally:
+            if log_writer is not None:
+                log_writer.close()
+            self.log_message_queue.close()
 
     def getLinkDebugData(self) -> None:
         """While active, get link debug data"""
-        refresh_rate_hz = 2
-
-        if not hasattr(self, "_sliding_window"):
-            self._sliding_window: dict[str, list] = {
-                "packets_sent": [],
-                "bytes_sent": [],
-                "packets_received": [],
-                "bytes_received": [],
-            }
-
-        if not hasattr(self, "_last_link_stats"):
-            self._last_link_stats: dict[str, Number] = {
-                "total_packets_sent": 0,
-                "total_bytes_sent": 0,
-                "total_packets_received": 0,
-                "total_bytes_received": 0,
-                "total_receive_errors": 0,
-                "uptime": 0,
-            }
+        refresh_interval_secs = 1 / LINK_STATS_REFRESH_RATE_HZ
+        next_timesync_time = time.monotonic()
 
         while self.is_active.is_set():
+            # TIMESYNC is always sent as the clock sync needs it too
+            now = time.monotonic()
+            if now >= next_timesync_time:
+                next_timesync_time = now + LINK_STATS_TIMESYNC_INTERVAL_SECS
+                try:
+                    self.master.mav.timesync_send(
+                        0, self.link_stats.createTimesyncRequest()
+                    )
+                except Exception as e:
+                    self.logger.error(e, exc_info=True)
+
             if self.linkDebugStatsCb:
                 try:
                     link_stats = {
@@ -923,51 +1508,58 @@ class Drone:
                         "total_receive_errors": self.master.mav.total_receive_errors,
                         "uptime": self.master.uptime,
                     }
-
-                    # Update sliding window
-                    self._sliding_window["packets_sent"].append(
-                        link_stats["total_packets_sent"]
-                        - self._last_link_stats["total_packets_sent"]
-                    )
-                    self._sliding_window["bytes_sent"].append(
-                        link_stats["total_bytes_sent"]
-                        - self._last_link_stats["total_bytes_sent"]
-                    )
-                    self._sliding_window["packets_received"].append(
-                        link_stats["total_packets_received"]
-                        - self._last_link_stats["total_packets_received"]
-                    )
-                    self._sliding_window["bytes_received"].append(
-                        link_stats["total_bytes_received"]
-                        - self._last_link_stats["total_bytes_received"]
+                    self.link_stats.update(link_stats)
+
+                    windows = self.link_stats.getStats()
+                    shortest_window = windows[f"{self.link_stats.windows_secs[0]}s"]
+                    longest_window = windows[f"{self.link_stats.windows_secs[-1]}s"]
+
+                    link_stats["avg_packets_sent_per_sec"] = shortest_window[
+                        "packets_sent_per_sec"
+                    ]
+                    link_stats["avg_bytes_sent_per_sec"] = shortest_window[
+                        "bytes_sent_per_sec"
+                    ]
+                    link_stats["avg_packets_received_per_sec"] = shortest_window[
+                        "packets_received_per_sec"
+                    ]
+                    link_stats["avg_bytes_received_per_sec"] = shortest_window[
+                        "bytes_received_per_sec"
+                    ]
+                    link_stats["packet_loss_percent"] = longest_window[
+                        "packet_loss_percent"
+                    ]
+                    link_stats["rtt_ms"] = self.link_stats.last_rtt_ms
+                    link_stats["jitter_ms"] = longest_window["jitter_ms"]
+                    link_stats["windows"] = windows
+                    link_stats["sources"] = self.link_stats.getSourceStats()
+                    link_stats["queues"] = self.getQueueStats()
+                    link_stats["command_latency"] = (
+                        self.command_transactions.getLatencyStats()
                     )
-
-                    # Keep only the last x readings
-                    for key in self._sliding_window:
-                        if len(self._sliding_window[key]) > refresh_rate_hz:
-                            self._sliding_window[key].pop(0)
-
-                    # Calculate averages over the last x readings
-                    link_stats["avg_packets_sent_per_sec"] = sum(
-                        self._sliding_window["packets_sent"]
-                    ) / len(self._sliding_window["packets_sent"])
-                    link_stats["avg_bytes_sent_per_sec"] = sum(
-                        self._sliding_window["bytes_sent"]
-                    ) / len(self._sliding_window["bytes_sent"])
-                    link_stats["avg_packets_received_per_sec"] = sum(
-                        self._sliding_window["packets_received"]
-                    ) / len(self._sliding_window["packets_received"])
-                    link_stats["avg_bytes_received_per_sec"] = sum(
-                        self._sliding_window["bytes_received"]
-                    ) / len(self._sliding_window["bytes_received"])
-
-                    self._last_link_stats = copy.deepcopy(link_stats)
+                    if self.outbound_scheduler is not None:
+                        link_stats["outbound"] = self.outbound_scheduler.getStats()
+                    link_stats["continuous_commands"] = {
+                        name: channel.getStats()
+                        for name, channel in list(self.continuous_channels.items())
+                    }
+                    manual_control = self.__dict__.get("manualControlController")
+                    if manual_control is not None:
+                        link_stats["manual_control"] = manual_control.getStats()
+                    guided_target = self.__dict__.get("guidedTargetController")
+                    if guided_target is not None:
+                        link_stats["guided_target"] = guided_target.getStats()
+                    if self.link_watchdog is not None:
+                        link_stats["link"] = self.link_watchdog.getStatus()
+                    if isinstance(self.master, MultiLinkConnection):
+                        link_stats["links"] = self.master.getLinkStats()
+                    link_stats["clock_sync"] = self.clock_sync.getStats()
 
                     self.linkDebugStatsCb(link_stats)
                 except Exception as e:
                     self.logger.error(e, exc_info=True)
 
-            time.sleep(1 / refresh_rate_hz)
+            time.sleep(refresh_interval_secs)
 
     def sendHeartbeatMessage(self) -> None:
         """Sends a heartbeat message to the drone every second."""
@@ -1029,6 +1621,7 @@ class Drone:
             getattr(self, "log_thread", None),
             getattr(self, "link_debug_data_thread", None),
             getattr(self, "heartbeat_thread", None),
+            getattr(self, "controller_warmup_thread", None),
         ]:
             if thread is not None and thread.is_alive() and thread is not this_thread:
                 thread.join(timeout=3)
@@ -1078,31 +1671,18 @@ class Drone:
         Returns:
             bool: True if the reboot command was successfully sent and accepted, False otherwise.
         """
-        if not self.reserve_message_type("COMMAND_ACK", self.controller_id):
-            self.logger.error("Could not reserve COMMAND_ACK messages for reboot")
-            return False
-
         try:
-            self.sending_command_lock.acquire()
-
-            self.sendCommand(
+            # Never retried, the autopilot may reboot before its ACK is received
+            response = self.sendCommandAndWait(
                 mavutil.mavlink.MAV_CMD_PREFLIGHT_REBOOT_SHUTDOWN,
                 param1=1,  #  Autopilot
                 param2=0,  #  Companion
                 param3=0,  # Component action
                 param4=0,  # Component ID
+                timeout=3,
+                retries=0,
             )
 
-            response = self.wait_for_message(
-                "COMMAND_ACK",
-                self.controller_id,
-                condition_func=lambda msg: msg.command
-                == mavutil.mavlink.MAV_CMD_PREFLIGHT_REBOOT_SHUTDOWN,
-            )
-
-            self.sending_command_lock.release()
-            self.release_message_type("COMMAND_ACK", self.controller_id)
-
             if commandAccepted(
                 response, mavutil.mavlink.MAV_CMD_PREFLIGHT_REBOOT_SHUTDOWN
             ):
@@ -1114,8 +1694,6 @@ class Drone:
                 return False
         except serial.serialutil.SerialException:
             self.logger.info("Rebooting autopilot")
-            self.sending_command_lock.release()
-            self.release_message_type("COMMAND_ACK", self.controller_id)
             self.close()
             return True
 
@@ -1129,6 +1707,7 @@ class Drone:
         param5: float = 0,
         param6: float = 0,
         param7: float = 0,
+        confirmation: int = 0,
     ) -> None:
         """Send a command long to the drone. COMMAND_LONG must be used for
         sending MAV_CMD commands that send float properties in parameters
@@ -1144,12 +1723,13 @@ class Drone:
             param5 (float, optional)
             param6 (float, optional)
             param7 (float, optional)
+            confirmation (int, optional): 0 for the first transmission, incremented for each retry
         """
         message = self.master.mav.command_long_encode(
             self.target_system,
             self.target_component,
             message,
-            0,  # Confirmation
+            confirmation,
             param1,  # param 1
             param2,  # param 2
             param3,  # param 3
@@ -1216,6 +1796,235 @@ class Drone:
             z,
         )
 
+    def sendCommandAsync(
+        self,
+        message: int,
+        param1: float = 0,
+        param2: float = 0,
+        param3: float = 0,
+        param4: float = 0,
+        param5: float = 0,
+        param6: float = 0,
+        param7: float = 0,
+        timeout: float = COMMAND_ACK_TIMEOUT_SECS,
+        retries: int = COMMAND_MAX_RETRIES,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> Future:
+        """Send a command long to the drone without waiting for its COMMAND_ACK.
+        If no ACK is received the command is sent again with the confirmation
+        number incremented. Commands with different ids can be outstanding at
+        the same time, commands with the same id are queued.
+
+        Args:
+            message (int): The command to send
+            param1 (float, optional)
+            param2 (float, optional)
+            param3 (float, optional)
+            param4 (float, optional)
+            param5 (float, optional)
+            param6 (float, optional)
+            param7 (float, optional)
+            timeout (float, optional): How long to wait for an ACK for each attempt. Defaults to COMMAND_ACK_TIMEOUT_SECS.
+            retries (int, optional): How many times to send the command again. Defaults to COMMAND_MAX_RETRIES.
+            progress_callback (Optional[Callable[[int], None]], optional): Called with the progress percentage if the drone reports the command as in progress. Defaults to None.
+
+        Returns:
+            Future: Resolves to the final COMMAND_ACK, or None if no ACK was received
+        """
+        return self.command_transactions.submit(
+            message,
+            lambda confirmation: self.sendCommand(
+                message,
+                param1,
+                param2,
+                param3,
+                param4,
+                param5,
+                param6,
+                param7,
+                confirmation=confirmation,
+            ),
+            timeout=timeout,
+            retries=retries,
+            progress_callback=progress_callback,
+        )
+
+    def sendCommandOnce(
+        self,
+        message: int,
+        param1: float = 0,
+        param2: float = 0,
+        param3: float = 0,
+        param4: float = 0,
+        param5: float = 0,
+        param6: float = 0,
+        param7: float = 0,
+        timeout: float = COMMAND_ACK_TIMEOUT_SECS,
+    ) -> Future:
+        """Send a command long to the drone once, without retrying it or
+        waiting for other commands with the same id. Its COMMAND_ACK is still
+        tracked so that it is not mistaken for the ACK of another command.
+
+        Args:
+            message (int): The command to send
+            param1 (float, optional)
+            param2 (float, optional)
+            param3 (float, optional)
+            param4 (float, optional)
+            param5 (float, optional)
+            param6 (float, optional)
+            param7 (float, optional)
+            timeout (float, optional): How long to wait for an ACK. Defaults to COMMAND_ACK_TIMEOUT_SECS.
+
+        Returns:
+            Future: Resolves to the COMMAND_ACK, or None if no ACK was received
+        """
+        return self.command_transactions.sendOnce(
+            message,
+            lambda confirmation: self.sendCommand(
+                message,
+                param1,
+                param2,
+                param3,
+                param4,
+                param5,
+                param6,
+                param7,
+                confirmation=confirmation,
+            ),
+            timeout=timeout,
+        )
+
+    def outboundPriorityClass(self, priority_class: str) -> ContextManager[None]:
+        """
+        Put every message sent by this thread inside the block into an
+        outbound priority class, e.g. "bulk" for a batch of parameter writes.
+
+        Args:
+            priority_class (str): The priority class, one of OUTBOUND_PRIORITY_CLASSES
+
+        Returns:
+            ContextManager[None]: The block to send the messages in
+        """
+        if self.outbound_scheduler is None:
+            return nullcontext()
+        return self.outbound_scheduler.priorityClass(priority_class)
+
+    def sendCommandIntAsync(
+        self,
+        message: int,
+        frame: int = 0,
+        param1: float = 0,
+        param2: float = 0,
+        param3: float = 0,
+        param4: float = 0,
+        x: Number = 0,
+        y: Number = 0,
+        z: float = 0,
+        timeout: float = COMMAND_ACK_TIMEOUT_SECS,
+        retries: int = COMMAND_MAX_RETRIES,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> Future:
+        """Send a command int to the drone without waiting for its COMMAND_ACK.
+        COMMAND_INT has no confirmation field, so retries are sent unchanged.
+
+        Args:
+            message (int): The command to send
+            frame (int, optional): The coordinate system of the command
+            param1 (float, optional)
+            param2 (float, optional)
+            param3 (float, optional)
+            param4 (float, optional)
+            x (Number, optional)
+            y (Number, optional)
+            z (float, optional)
+            timeout (float, optional): How long to wait for an ACK for each attempt. Defaults to COMMAND_ACK_TIMEOUT_SECS.
+            retries (int, optional): How many times to send the command again. Defaults to COMMAND_MAX_RETRIES.
+            progress_callback (Optional[Callable[[int], None]], optional): Called with the progress percentage if the drone reports the command as in progress. Defaults to None.
+
+        Returns:
+            Future: Resolves to the final COMMAND_ACK, or None if no ACK was received
+        """
+        return self.command_transactions.submit(
+            message,
+            lambda _: self.sendCommandInt(
+                message, frame, param1, param2, param3, param4, x, y, z
+            ),
+            timeout=timeout,
+            retries=retries,
+            progress_callback=progress_callback,
+        )
+
+    def sendCommandAndWait(
+        self,
+        message: int,
+        param1: float = 0,
+        param2: float = 0,
+        param3: float = 0,
+        param4: float = 0,
+        param5: float = 0,
+        param6: float = 0,
+        param7: float = 0,
+        timeout: float = COMMAND_ACK_TIMEOUT_SECS,
+        retries: int = COMMAND_MAX_RETRIES,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> Optional[Any]:
+        """Send a command long to the drone and block until its COMMAND_ACK is
+        received. See sendCommandAsync.
+
+        Returns:
+            The final COMMAND_ACK, or None if no ACK was received
+        """
+        return self.sendCommandAsync(
+            message,
+            param1,
+            param2,
+            param3,
+            param4,
+            param5,
+            param6,
+            param7,
+            timeout=timeout,
+            retries=retries,
+            progress_callback=progress_callback,
+        ).result()
+
+    def sendCommandIntAndWait(
+        self,
+        message: int,
+        frame: int = 0,
+        param1: float = 0,
+        param2: float = 0,
+        param3: float = 0,
+        param4: float = 0,
+        x: Number = 0,
+        y: Number = 0,
+        z: float = 0,
+        timeout: float = COMMAND_ACK_TIMEOUT_SECS,
+        retries: int = COMMAND_MAX_RETRIES,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> Optional[Any]:
+        """Send a command int to the drone and block until its COMMAND_ACK is
+        received. See sendCommandIntAsync.
+
+        Returns:
+            The final COMMAND_ACK, or None if no ACK was received
+        """
+        return self.sendCommandIntAsync(
+            message,
+            frame,
+            param1,
+            param2,
+            param3,
+            param4,
+            x,
+            y,
+            z,
+            timeout=timeout,
+            retries=retries,
+            progress_callback=progress_callback,
+        ).result()
+
     def sendStatusTextMessage(self, severity: int, text: str) -> None:
         """Send a status text message to the drone.
 
@@ -1278,21 +2087,33 @@ class Drone:
     def close(self) -> None:
         """Close the connection to the drone."""
         self.logger.info(f"Cleaning up resources for drone at {self}")
+        link_watchdog = getattr(self, "link_watchdog", None)
+        if link_watchdog is not None:
+            self.link_watchdog = None
+            link_watchdog.stop()
         self.clearAllMessageListeners()
 
         if self.droneDisconnectCb:
             self.droneDisconnectCb()
 
         self.is_active.clear()
+        if getattr(self, "command_transactions", None) is not None:
+            self.command_transactions.close()
+        for channel in getattr(self, "continuous_channels", {}).values():
+            channel.close()
+        manual_control = self.__dict__.get("manualControlController")
+        if manual_control is not None and manual_control.isActive():
+            manual_control.stop()
+        guided_target = self.__dict__.get("guidedTargetController")
+        if guided_target is not None and guided_target.isActive():
+            guided_target.stop()
 
         if getattr(self, "master", None) is not None:
             self.stopAllDataStreams()
         self.stopForwarding()
         self.stopAllThreads()
 
-        if getattr(self, "master", None) is not None:
-            self.master.close()
-            self.master = None
+        self._closeMaster()
 
         if len(self.log_file_names) == 0:
             self.logger.debug("No logs to save")
@@ -1300,26 +2121,30 @@ class Drone:
             len(self.log_file_names) == 1
             and os.stat(self.log_file_names[0]).st_size <= 0
         ):
-            os.remove(self.log_file_names[0])
+            removeLog(self.log_file_names[0])
+            self.log_storage.removeTempLogs(self.log_file_names)
             self.logger.debug("No logs to save")
         else:
             final_log_file = self.log_directory.joinpath(
-                f"{self.__getCurrentDateTimeStr()}.ftlog"
+                f"{self.__getCurrentDateTimeStr()}{getLogSuffix(self.log_compression)}"
             )
 
             try:
-                with open(final_log_file, "a") as final_log_file_handle:
-                    # Open all the log files that were written to in the current session and write their data to the final log file
-                    for log_file in self.log_file_names:
-                        if not log_file.is_file():
-                            self.logger.warning(f"Log file {log_file} is not a file.")
-                            continue
-
-                        with open(log_file) as log_file_handle:
-                            final_log_file_handle.writelines(
-                                log_file_handle.readlines()
-                            )
-                        os.remove(log_file)
+                log_files = []
+                for log_file in self.log_file_names:
+                    if not log_file.is_file():
+                        self.logger.warning(f"Log file {log_file} is not a file.")
+                        continue
+                    log_files.append(log_file)
+
+                # Join the log files that were written to in the current session into the final log file
+                mergeLogs(log_files, final_log_file)
+                self.log_storage.removeTempLogs(self.log_file_names)
+                self.log_storage.addLog(
+                    final_log_file,
+                    vehicle_type=self.aircraft_type,
+                    system_id=self.target_system,
+                )
             except Exception as e:
                 self.logger.error("Failed to save drone logs")
                 self.logger.error(e, exc_info=True)
@@ -6,7 +6,10 @@ imports this and access it, it can update the values and every other file will a
 from threading import Event, Lock
 from typing import List, Optional
 
+from app import logger, socketio
 from app.drone import Drone
+from app.jobManager import JobManager
+from app.telemetrySubscriptions import TelemetrySubscriptionManager
 
 correct_ports: List[str] = []
 drone: Optional[Drone] = None
@@ -14,3 +17,5 @@ state: Optional[str] = None
 connection_state_lock: Lock = Lock()
 connection_in_progress: bool = False
 connect_cancel_event: Optional[Event] = None
+telemetry_subscriptions: TelemetrySubscriptionManager = TelemetrySubscriptionManager()
+job_manager: JobManager = JobManager(logger, socketio.emit)
@@ -8,6 +8,8 @@ from . import flightMode as flightMode
 from . import frames as frames
 from . import ftp as ftp
 from . import gripper as gripper
+from . import jobs as jobs
+from . import manualControl as manualControl
 from . import mission as mission
 from . import motors as motors
 from . import nav as nav
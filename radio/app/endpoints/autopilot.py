@@ -23,7 +23,16 @@ def rebootAutopilot() -> None:
     droneConnectStatusCb = droneStatus.drone.droneConnectStatusCb
     linkDebugStatsCb = droneStatus.drone.linkDebugStatsCb
     fetchingParameterCb = droneStatus.drone.fetchingParameterCb
+    logRecoveryProgressCb = droneStatus.drone.logRecoveryProgressCb
     forwarding_address = droneStatus.drone.forwarding_address
+    log_compression = droneStatus.drone.log_compression
+    tlog_recording = droneStatus.drone.tlog_recording
+    tlog_compression = droneStatus.drone.tlog_compression
+    link_bandwidth = droneStatus.drone.link_bandwidth
+    redundant_ports = droneStatus.drone.redundant_ports
+    link_send_mode = droneStatus.drone.link_send_mode
+    link_recovery = droneStatus.drone.link_recovery
+    linkStatusCb = droneStatus.drone.linkStatusCb
 
     socketio.emit("disconnected_from_drone")
 
@@ -57,6 +66,15 @@ def rebootAutopilot() -> None:
             droneConnectStatusCb=droneConnectStatusCb,
             linkDebugStatsCb=linkDebugStatsCb,
             fetchingParameterCb=fetchingParameterCb,
+            logRecoveryProgressCb=logRecoveryProgressCb,
+            log_compression=log_compression,
+            tlog_recording=tlog_recording,
+            tlog_compression=tlog_compression,
+            link_bandwidth=link_bandwidth,
+            link_recovery=link_recovery,
+            linkStatusCb=linkStatusCb,
+            redundant_ports=redundant_ports,
+            link_send_mode=link_send_mode,
         )
         if droneStatus.drone.connectionError:
             tries += 1
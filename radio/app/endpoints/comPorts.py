@@ -1,20 +1,25 @@
 import sys
 import time
 from threading import Event
-from typing import Optional
+from typing import Dict, List, Optional
 
 from serial.tools import list_ports
-from typing_extensions import TypedDict
+from typing_extensions import NotRequired, TypedDict
 
 import app.droneStatus as droneStatus
 from app import logger, socketio
+from app.customTypes import LinkStatsSource, LinkStatsWindow, LinkStatus
 from app.drone import Drone
+from app.endpoints.states import applyTelemetrySubscriptions
+from app.ftlog import FTLOG_COMPRESSION_SUFFIXES
+from app.multiLink import MULTI_LINK_SEND_MODES
 from app.utils import (
     droneConnectStatusCb,
     droneErrorCb,
     fetchingParameterCb,
     getComPortNames,
     getFlightSwVersionString,
+    logRecoveryProgressCb,
 )
 
 
@@ -23,6 +28,13 @@ class ConnectionDataType(TypedDict):
     baud: int
     connectionType: str
     forwarding_address: Optional[str]
+    logCompression: NotRequired[Optional[str]]
+    tlogRecording: NotRequired[bool]
+    tlogCompression: NotRequired[Optional[str]]
+    linkBandwidth: NotRequired[Optional[float]]
+    linkRecovery: NotRequired[bool]
+    redundantPorts: NotRequired[List[str]]
+    linkSendMode: NotRequired[str]
 
 
 class LinkStatsType(TypedDict):
@@ -36,6 +48,11 @@ class LinkStatsType(TypedDict):
     avg_bytes_sent_per_sec: float
     avg_packets_received_per_sec: float
     avg_bytes_received_per_sec: float
+    packet_loss_percent: float
+    rtt_ms: Optional[float]
+    jitter_ms: Optional[float]
+    windows: Dict[str, LinkStatsWindow]
+    sources: List[LinkStatsSource]
 
 
 @socketio.on("get_com_ports")
@@ -70,6 +87,30 @@ def sendLinkDebugStats(link_stats: LinkStatsType) -> None:
     socketio.emit("link_debug_stats", link_stats)
 
 
+def sendLinkStatus(link_status: LinkStatus) -> None:
+    """
+    A callback function to send the state of the link when it is lost or
+    recovered. Once recovered the telemetry streams are requested again, as
+    the drone may have rebooted whilst the link was down.
+    """
+    socketio.emit("link_status", link_status)
+
+    resync = link_status["resync"]
+    if link_status["state"] != "connected" or resync is None:
+        return
+
+    applyTelemetrySubscriptions(reset=True)
+    if resync["home"] is not None:
+        socketio.emit(
+            "home_position_result",
+            {
+                "success": True,
+                "message": "Home position received",
+                "data": resync["home"],
+            },
+        )
+
+
 @socketio.on("connect_to_drone")
 def connectToDrone(data: ConnectionDataType) -> None:
     """
@@ -127,6 +168,102 @@ def connectToDrone(data: ConnectionDataType) -> None:
         droneStatus.drone = None
         return
 
+    log_compression = data.get("logCompression", None)
+    if (
+        log_compression is not None
+        and log_compression not in FTLOG_COMPRESSION_SUFFIXES
+    ):
+        socketio.emit(
+            "connection_error",
+            {
+                "message": f"Invalid log compression, expected one of {', '.join(FTLOG_COMPRESSION_SUFFIXES)}."
+            },
+        )
+        droneStatus.drone = None
+        return
+
+    # Tlogs are not covered by the log retention budget, so they are opt-in
+    tlog_recording = data.get("tlogRecording", False)
+    if not isinstance(tlog_recording, bool):
+        socketio.emit(
+            "connection_error",
+            {
+                "message": f"Expected boolean value for tlog recording, received {type(tlog_recording).__name__}."
+            },
+        )
+        droneStatus.drone = None
+        return
+
+    tlog_compression = data.get("tlogCompression", None)
+    if (
+        tlog_compression is not None
+        and tlog_compression not in FTLOG_COMPRESSION_SUFFIXES
+    ):
+        socketio.emit(
+            "connection_error",
+            {
+                "message": f"Invalid tlog compression, expected one of {', '.join(FTLOG_COMPRESSION_SUFFIXES)}."
+            },
+        )
+        droneStatus.drone = None
+        return
+
+    link_bandwidth = data.get("linkBandwidth", None)
+    if link_bandwidth is not None and (
+        isinstance(link_bandwidth, bool)
+        or not isinstance(link_bandwidth, (int, float))
+        or link_bandwidth <= 0
+    ):
+        socketio.emit(
+            "connection_error",
+            {
+                "message": "Link bandwidth must be a positive number of bytes per second."
+            },
+        )
+        droneStatus.drone = None
+        return
+
+    link_recovery = data.get("linkRecovery", True)
+    if not isinstance(link_recovery, bool):
+        socketio.emit(
+            "connection_error",
+            {
+                "message": f"Expected boolean value for link recovery, received {type(link_recovery).__name__}."
+            },
+        )
+        droneStatus.drone = None
+        return
+
+    redundant_ports = data.get("redundantPorts", [])
+    if not isinstance(redundant_ports, list) or not all(
+        isinstance(redundant_port, str) and redundant_port
+        for redundant_port in redundant_ports
+    ):
+        socketio.emit(
+            "connection_error",
+            {"message": "Redundant ports must be a list of ports or addresses."},
+        )
+        droneStatus.drone = None
+        return
+    if port in redundant_ports or len(set(redundant_ports)) != len(redundant_ports):
+        socketio.emit(
+            "connection_error",
+            {"message": "Each redundant port must be a different link to the drone."},
+        )
+        droneStatus.drone = None
+        return
+
+    link_send_mode = data.get("linkSendMode", "best")
+    if link_send_mode not in MULTI_LINK_SEND_MODES:
+        socketio.emit(
+            "connection_error",
+            {
+                "message": f"Invalid link send mode, expected one of {', '.join(MULTI_LINK_SEND_MODES)}."
+            },
+        )
+        droneStatus.drone = None
+        return
+
     old_drone = None
     with droneStatus.connection_state_lock:
         if droneStatus.connection_in_progress:
@@ -160,7 +297,16 @@ def connectToDrone(data: ConnectionDataType) -> None:
             droneConnectStatusCb=droneConnectStatusCb,
             linkDebugStatsCb=sendLinkDebugStats,
             fetchingParameterCb=fetchingParameterCb,
+            logRecoveryProgressCb=logRecoveryProgressCb,
             connectionCancelEvent=cancel_event,
+            log_compression=log_compression,
+            tlog_recording=tlog_recording,
+            tlog_compression=tlog_compression,
+            link_bandwidth=link_bandwidth,
+            link_recovery=link_recovery,
+            linkStatusCb=sendLinkStatus,
+            redundant_ports=redundant_ports,
+            link_send_mode=link_send_mode,
         )
 
         if drone.connectionError is not None:
@@ -219,6 +365,7 @@ def disconnectFromDrone() -> None:
         ):
             droneStatus.connect_cancel_event.set()
 
+    droneStatus.job_manager.cancelAll()
     if drone is not None:
         drone.close()
 
@@ -1,5 +1,6 @@
 import app.droneStatus as droneStatus
 from app import logger, socketio
+from app.endpoints.states import getClientId
 
 
 @socketio.on("connect")
@@ -15,6 +16,8 @@ def disconnect() -> None:
     """
     Handle client disconnection by reseting all global variables
     """
+    droneStatus.telemetry_subscriptions.removeClient(getClientId())
+    droneStatus.job_manager.cancelAll()
     if droneStatus.drone:
         droneStatus.drone.close()
     droneStatus.drone = None
@@ -1,7 +1,12 @@
+from typing import Optional
+
 from typing_extensions import NotRequired, TypedDict
 
 import app.droneStatus as droneStatus
 from app import socketio
+from app.customTypes import Response
+from app.jobManager import Job
+from app.progressReporter import ProgressReporter, socketioEmitter
 from app.utils import notConnectedError
 
 
@@ -14,6 +19,76 @@ class ReadFileType(TypedDict):
     save_path: NotRequired[str]
 
 
+def listFilesJob(job: Job, path: str = "/") -> Response:
+    """
+    List files in a directory on the drone's FTP server, run as a job.
+
+    Args:
+        job (Job): The job running the listing
+        path (str, optional): The directory path to list files from. Defaults to "/".
+    """
+    if not droneStatus.drone:
+        return {"success": False, "message": "Must be connected to the drone."}
+
+    return droneStatus.drone.ftpController.listFiles(path)
+
+
+def listLogFilesJob(job: Job) -> Response:
+    """
+    Find and list the log files on the drone's FTP server, run as a job.
+
+    Args:
+        job (Job): The job running the listing
+    """
+    if not droneStatus.drone:
+        return {"success": False, "message": "Must be connected to the drone."}
+
+    return droneStatus.drone.ftpController.listLogFiles()
+
+
+def readFileJob(job: Job, path: Optional[str], save_path: Optional[str]) -> Response:
+    """
+    Read/download a file from the drone's FTP server, run as a job so it can be
+    queued behind other FTP operations and cancelled.
+
+    Args:
+        job (Job): The job running the download
+        path (Optional[str]): The remote file path to read/download
+        save_path (Optional[str]): The local file path where to save the file
+    """
+    if not droneStatus.drone:
+        return {"success": False, "message": "Must be connected to the drone."}
+
+    if path is None:
+        return {"success": False, "message": "Missing file path"}
+
+    def progress_callback(bytes_downloaded, total_bytes, percentage):
+        job.updateProgress(
+            {
+                "bytes_downloaded": bytes_downloaded,
+                "total_bytes": total_bytes,
+                "percentage": round(percentage, 1),
+            },
+            percent=percentage,
+        )
+
+    result = droneStatus.drone.ftpController.readFile(
+        path,
+        save_path=save_path,
+        progress_callback=progress_callback,
+        should_cancel_callback=job.isCancelled,
+    )
+
+    # Convert bytes to list for SocketIO serialization if file_data is present
+    if result.get("success") and "data" in result:
+        data_dict = result["data"]
+        if isinstance(data_dict, dict) and "file_data" in data_dict:
+            if data_dict["file_data"] is not None:
+                data_dict["file_data"] = list(data_dict["file_data"])
+
+    return result
+
+
 @socketio.on("list_files")
 def listFiles(data: ListFilesType) -> None:
     """
@@ -27,7 +102,9 @@ def listFiles(data: ListFilesType) -> None:
 
     path = data.get("path", "/")
 
-    result = droneStatus.drone.ftpController.listFiles(path)
+    result = droneStatus.job_manager.run(
+        "list_files", "ftp", lambda job: listFilesJob(job, path)
+    )
 
     socketio.emit("list_files_result", result)
 
@@ -41,7 +118,7 @@ def listLogFiles() -> None:
     if not droneStatus.drone:
         return notConnectedError(action="list log files")
 
-    result = droneStatus.drone.ftpController.listLogFiles()
+    result = droneStatus.job_manager.run("list_log_files", "ftp", listLogFilesJob)
 
     socketio.emit("list_log_files_result", result)
 
@@ -68,25 +145,16 @@ def readFile(data: ReadFileType) -> None:
         )
         return
 
-    def progress_callback(bytes_downloaded, total_bytes, percentage):
-        socketio.emit(
-            "read_file_progress",
-            {
-                "bytes_downloaded": bytes_downloaded,
-                "total_bytes": total_bytes,
-                "percentage": round(percentage, 1),
-            },
-        )
-
-    result = droneStatus.drone.ftpController.readFile(
-        path, save_path=save_path, progress_callback=progress_callback
+    progress_reporter = ProgressReporter(socketioEmitter("read_file_progress"))
+    result = droneStatus.job_manager.run(
+        "read_file",
+        "ftp",
+        lambda job: readFileJob(job, path, save_path),
+        progress_callback=lambda data, percent: progress_reporter.update(
+            data, percent=percent
+        ),
+        cancellable=True,
     )
-
-    # Convert bytes to list for SocketIO serialization if file_data is present
-    if result.get("success") and "data" in result:
-        data_dict = result["data"]
-        if isinstance(data_dict, dict) and "file_data" in data_dict:
-            if data_dict["file_data"] is not None:
-                data_dict["file_data"] = list(data_dict["file_data"])
+    progress_reporter.flush()
 
     socketio.emit("read_file_result", result)
@@ -0,0 +1,147 @@
+from typing import Any, Callable, Dict, Tuple
+
+from typing_extensions import NotRequired, TypedDict
+
+import app.droneStatus as droneStatus
+from app import logger, socketio
+from app.endpoints.ftp import listFilesJob, listLogFilesJob, readFileJob
+from app.endpoints.mission import (
+    getCurrentMissionAllJob,
+    getCurrentMissionJob,
+    writeCurrentMissionJob,
+)
+from app.endpoints.params import refreshParamsJob, setMultipleParamsJob
+from app.jobManager import Job
+
+
+class StartJobType(TypedDict):
+    type: str
+    args: NotRequired[Dict[str, Any]]
+
+
+class JobIdType(TypedDict):
+    id: str
+
+
+# The resource each job type uses and a function which creates the job from
+# the arguments sent by the client
+JOB_TYPES: Dict[str, Tuple[str, Callable[[Dict[str, Any]], Callable[[Job], Any]]]] = {
+    "refresh_params": ("link", lambda args: refreshParamsJob),
+    "set_multiple_params": (
+        "link",
+        lambda args: lambda job: setMultipleParamsJob(job, args.get("params", [])),
+    ),
+    "list_files": (
+        "ftp",
+        lambda args: lambda job: listFilesJob(job, args.get("path", "/")),
+    ),
+    "list_log_files": ("ftp", lambda args: listLogFilesJob),
+    "read_file": (
+        "ftp",
+        lambda args: lambda job: readFileJob(
+            job, args.get("path"), args.get("save_path")
+        ),
+    ),
+    "get_current_mission": (
+        "mission",
+        lambda args: lambda job: getCurrentMissionJob(job, args.get("type", "")),
+    ),
+    "get_current_mission_all": ("mission", lambda args: getCurrentMissionAllJob),
+    "write_current_mission": (
+        "mission",
+        lambda args: lambda job: writeCurrentMissionJob(
+            job, args.get("type", ""), args.get("items", [])
+        ),
+    ),
+}
+# The jobs which stop when cancelled whilst running, the rest can only be
+# cancelled whilst queued
+CANCELLABLE_JOB_TYPES = {"refresh_params", "set_multiple_params", "read_file"}
+
+
+@socketio.on("start_job")
+def startJob(data: StartJobType) -> None:
+    """
+    Start a long running operation in the background. The client is sent the
+    job straight away, then job_update and job_progress events as it runs.
+
+    Args:
+        data: Contains the type of the job and the args for it
+    """
+    job_type = data.get("type")
+    args = data.get("args", {})
+
+    if job_type not in JOB_TYPES:
+        socketio.emit(
+            "start_job_result",
+            {"success": False, "message": f"Unknown job type: {job_type}"},
+        )
+        return
+    if not isinstance(args, dict):
+        socketio.emit(
+            "start_job_result", {"success": False, "message": "Invalid job args"}
+        )
+        return
+
+    if not droneStatus.drone:
+        socketio.emit(
+            "start_job_result",
+            {"success": False, "message": "Must be connected to the drone."},
+        )
+        return
+
+    resource, createJob = JOB_TYPES[job_type]
+    job = droneStatus.job_manager.submit(
+        job_type,
+        resource,
+        createJob(args),
+        cancellable=job_type in CANCELLABLE_JOB_TYPES,
+    )
+    logger.info(f"Started {job_type} job {job.id}")
+
+    socketio.emit("start_job_result", {"success": True, "data": job.toDict()})
+
+
+@socketio.on("cancel_job")
+def cancelJob(data: JobIdType) -> None:
+    """
+    Cancel a queued job, or a running job which can be cancelled.
+
+    Args:
+        data: Contains the id of the job to cancel
+    """
+    if not droneStatus.job_manager.cancel(data.get("id", "")):
+        socketio.emit(
+            "cancel_job_result",
+            {
+                "success": False,
+                "message": "Job is not queued or cannot be cancelled whilst running",
+            },
+        )
+        return
+
+    socketio.emit("cancel_job_result", {"success": True})
+
+
+@socketio.on("get_job")
+def getJob(data: JobIdType) -> None:
+    """
+    Send a job, including its result once it has finished.
+
+    Args:
+        data: Contains the id of the job
+    """
+    if (job := droneStatus.job_manager.getJob(data.get("id", ""))) is None:
+        socketio.emit("get_job_result", {"success": False, "message": "Unknown job"})
+        return
+
+    socketio.emit("get_job_result", {"success": True, "data": job.toDict()})
+
+
+@socketio.on("get_jobs")
+def getJobs() -> None:
+    """Send every queued, running and recently finished job."""
+    socketio.emit(
+        "get_jobs_result",
+        {"success": True, "data": droneStatus.job_manager.getJobs()},
+    )
@@ -0,0 +1,87 @@
+import app.droneStatus as droneStatus
+from app import socketio
+from app.controllers.manualControlController import (
+    MANUAL_CONTROL_DEFAULT_RATE_HZ,
+    MANUAL_CONTROL_FAILSAFE_TIMEOUT_SECS,
+)
+from app.customTypes import ManualControlInput, StartManualControl
+from app.utils import notConnectedError
+
+
+@socketio.on("start_manual_control")
+def startManualControl(data: StartManualControl) -> None:
+    """
+    Starts streaming pilot input to the drone. A manual_control_failsafe event
+    is sent if the stream is stopped because input stopped arriving.
+
+    Args:
+        data: Contains the mode ("rc_override" or "manual_control") and optionally the rate and failsafe timeout
+    """
+    if not droneStatus.drone:
+        return notConnectedError(action="start manual control")
+
+    rate_hz = data.get("rate_hz", MANUAL_CONTROL_DEFAULT_RATE_HZ)
+    failsafe_timeout_secs = data.get(
+        "failsafe_timeout_secs", MANUAL_CONTROL_FAILSAFE_TIMEOUT_SECS
+    )
+    if not isinstance(rate_hz, (int, float)) or not isinstance(
+        failsafe_timeout_secs, (int, float)
+    ):
+        socketio.emit(
+            "manual_control_result",
+            {"success": False, "message": "Rate and failsafe timeout must be numbers"},
+        )
+        return
+
+    result = droneStatus.drone.manualControlController.start(
+        data.get("mode", ""),
+        rate_hz,
+        failsafe_timeout_secs,
+        lambda message: socketio.emit("manual_control_failsafe", {"message": message}),
+    )
+    socketio.emit("manual_control_result", result)
+
+
+@socketio.on("manual_control_input")
+def manualControlInput(data: ManualControlInput) -> None:
+    """
+    Updates the latest pilot input. The client must resend its current input
+    at the input_rate_hz given when the stream was started, even when nothing
+    has changed, otherwise the failsafe releases the sticks. Nothing is sent
+    back unless the input is invalid.
+
+    Args:
+        data: The channel PWM values for RC override, or the x, y, z, r and buttons values for MANUAL_CONTROL
+    """
+    if not droneStatus.drone:
+        return notConnectedError(action="send manual control input")
+
+    result = droneStatus.drone.manualControlController.setInput(data)
+    if not result.get("success"):
+        socketio.emit("manual_control_result", result)
+
+
+@socketio.on("stop_manual_control")
+def stopManualControl() -> None:
+    """
+    Stops streaming pilot input and releases the sticks.
+    """
+    if not droneStatus.drone:
+        return notConnectedError(action="stop manual control")
+
+    result = droneStatus.drone.manualControlController.stop()
+    socketio.emit("manual_control_result", result)
+
+
+@socketio.on("get_manual_control_stats")
+def getManualControlStats() -> None:
+    """
+    Sends the timing statistics of the pilot input stream, including jitter
+    and missed send deadlines.
+    """
+    if not droneStatus.drone:
+        return notConnectedError(action="get manual control stats")
+
+    socketio.emit(
+        "manual_control_stats", droneStatus.drone.manualControlController.getStats()
+    )
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Callable, Dict, List
 
 from typing_extensions import TypedDict
 
@@ -10,8 +10,13 @@ from app.controllers.missionController import (
 from app.controllers.missionController import (
     importMissionFromFile as importMissionFromFileNotConnected,
 )
+from app.customTypes import Response
+from app.jobManager import Job
+from app.progressReporter import ProgressReporter, socketioEmitter
 from app.utils import notConnectedError
 
+MISSION_TYPES = ["mission", "fence", "rally"]
+
 
 class CurrentMissionType(TypedDict):
     type: str
@@ -37,13 +42,84 @@ class ControlMissionType(TypedDict):
     action: str
 
 
-def progressUpdateCallback(message: str, progress: float) -> None:
+def createJobProgressCallback(job: Job) -> Callable[[str, float], None]:
     """
-    Callback that is used to update the frontend with the current mission function progress.
+    Create a callback that reports the progress of a mission function to its job.
     """
-    socketio.emit(
-        "current_mission_progress", {"message": message, "progress": progress}
+
+    def progressUpdateCallback(message: str, progress: float) -> None:
+        job.updateProgress(
+            {"message": message, "progress": progress}, percent=progress * 100
+        )
+
+    return progressUpdateCallback
+
+
+def getCurrentMissionJob(job: Job, mission_type: str) -> Dict[str, Any]:
+    """
+    Download the current mission of a type from the drone, run as a job.
+
+    Args:
+        job (Job): The job downloading the mission
+        mission_type (str): Either "mission", "fence" or "rally"
+    """
+    if not droneStatus.drone:
+        return {"success": False, "message": "Must be connected to the drone."}
+
+    if mission_type not in MISSION_TYPES:
+        return {
+            "success": False,
+            "message": f"Invalid mission type. Must be 'mission', 'fence', or 'rally', got {mission_type}.",
+        }
+
+    result = droneStatus.drone.missionController.getCurrentMission(
+        MISSION_TYPES.index(mission_type), createJobProgressCallback(job)
+    )
+    if not result.get("success"):
+        logger.error(result.get("message"))
+        return dict(result)
+
+    return {"success": True, "mission_type": mission_type, "items": result.get("data")}
+
+
+def writeCurrentMissionJob(job: Job, mission_type: str, items: List[dict]) -> Response:
+    """
+    Upload a mission of a type to the drone, run as a job.
+
+    Args:
+        job (Job): The job uploading the mission
+        mission_type (str): Either "mission", "fence" or "rally"
+        items (List[dict]): The mission items to upload
+    """
+    if not droneStatus.drone:
+        return {"success": False, "message": "Must be connected to the drone."}
+
+    if mission_type not in MISSION_TYPES:
+        return {
+            "success": False,
+            "message": f"Invalid mission type. Must be 'mission', 'fence', or 'rally', got {mission_type}.",
+        }
+
+    result = droneStatus.drone.missionController.uploadMission(
+        MISSION_TYPES.index(mission_type), items, createJobProgressCallback(job)
     )
+    if not result.get("success"):
+        logger.error(result.get("message"))
+
+    return result
+
+
+def getCurrentMissionAllJob(job: Job) -> Response:
+    """
+    Download the current mission, fence and rally items from the drone, run as a job.
+
+    Args:
+        job (Job): The job downloading the missions
+    """
+    if not droneStatus.drone:
+        return {"success": False, "message": "Must be connected to the drone."}
+
+    return droneStatus.drone.missionController.getCurrentMissionAll()
 
 
 @socketio.on("get_current_mission")
@@ -65,9 +141,7 @@ def getCurrentMission(data: CurrentMissionType) -> None:
         return notConnectedError(action="get current mission")
 
     mission_type = data.get("type")
-    mission_type_array = ["mission", "fence", "rally"]
-
-    if mission_type not in mission_type_array:
+    if mission_type not in MISSION_TYPES:
         socketio.emit(
             "current_mission",
             {
@@ -78,19 +152,18 @@ def getCurrentMission(data: CurrentMissionType) -> None:
         logger.error(f"Could not get mission items for {mission_type} type.")
         return
 
-    result = droneStatus.drone.missionController.getCurrentMission(
-        mission_type_array.index(mission_type), progressUpdateCallback
+    progress_reporter = ProgressReporter(socketioEmitter("current_mission_progress"))
+    result = droneStatus.job_manager.run(
+        "get_current_mission",
+        "mission",
+        lambda job: getCurrentMissionJob(job, mission_type),
+        progress_callback=lambda data, percent: progress_reporter.update(
+            data, percent=percent
+        ),
     )
+    progress_reporter.flush()
 
-    if not result.get("success"):
-        logger.error(result.get("message"))
-        socketio.emit("current_mission", result)
-        return
-
-    socketio.emit(
-        "current_mission",
-        {"success": True, "mission_type": mission_type, "items": result.get("data")},
-    )
+    socketio.emit("current_mission", result)
 
 
 @socketio.on("get_current_mission_all")
@@ -111,7 +184,9 @@ def getCurrentMissionAll() -> None:
     if not droneStatus.drone:
         return notConnectedError(action="get current mission")
 
-    result = droneStatus.drone.missionController.getCurrentMissionAll()
+    result = droneStatus.job_manager.run(
+        "get_current_mission_all", "mission", getCurrentMissionAllJob
+    )
 
     if not result.get("success"):
         socketio.emit("current_mission_all", result)
@@ -151,9 +226,7 @@ def writeCurrentMission(data: WriteCurrentMissionType) -> None:
         return notConnectedError(action="write current mission")
 
     mission_type = data.get("type")
-    mission_type_array = ["mission", "fence", "rally"]
-
-    if mission_type not in mission_type_array:
+    if mission_type not in MISSION_TYPES:
         socketio.emit(
             "write_mission_result",
             {
@@ -168,11 +241,16 @@ def writeCurrentMission(data: WriteCurrentMissionType) -> None:
 
     items = data.get("items", [])
 
-    result = droneStatus.drone.missionController.uploadMission(
-        mission_type_array.index(mission_type), items, progressUpdateCallback
+    progress_reporter = ProgressReporter(socketioEmitter("current_mission_progress"))
+    result = droneStatus.job_manager.run(
+        "write_current_mission",
+        "mission",
+        lambda job: writeCurrentMissionJob(job, mission_type, items),
+        progress_callback=lambda data, percent: progress_reporter.update(
+            data, percent=percent
+        ),
     )
-    if not result.get("success"):
-        logger.error(result.get("message"))
+    progress_reporter.flush()
 
     socketio.emit("write_mission_result", result)
 
@@ -190,9 +268,7 @@ def importMissionFromFile(data: ImportMissionFileType) -> None:
         return
 
     mission_type = data.get("type")
-    mission_type_array = ["mission", "fence", "rally"]
-
-    if mission_type not in mission_type_array:
+    if mission_type not in MISSION_TYPES:
         socketio.emit(
             "import_mission_result",
             {
@@ -209,11 +285,11 @@ def importMissionFromFile(data: ImportMissionFileType) -> None:
 
     if droneStatus.drone is not None:
         result = droneStatus.drone.missionController.importMissionFromFile(
-            mission_type_array.index(mission_type), file_path
+            MISSION_TYPES.index(mission_type), file_path
         )
     else:
         result = importMissionFromFileNotConnected(
-            mission_type_array.index(mission_type), file_path
+            MISSION_TYPES.index(mission_type), file_path
         )
 
     if not result.get("success"):
@@ -244,9 +320,7 @@ def exportMissionToFile(data: ExportMissionFileType) -> None:
         return
 
     mission_type = data.get("type")
-    mission_type_array = ["mission", "fence", "rally"]
-
-    if mission_type not in mission_type_array:
+    if mission_type not in MISSION_TYPES:
         socketio.emit(
             "export_mission_result",
             {
@@ -264,11 +338,11 @@ def exportMissionToFile(data: ExportMissionFileType) -> None:
 
     if droneStatus.drone is not None:
         result = droneStatus.drone.missionController.exportMissionToFile(
-            mission_type_array.index(mission_type), file_path, items
+            MISSION_TYPES.index(mission_type), file_path, items
         )
     else:
         result = exportMissionToFileNotConnected(
-            mission_type_array.index(mission_type), file_path, items
+            MISSION_TYPES.index(mission_type), file_path, items
         )
 
     if not result.get("success"):
@@ -51,3 +51,24 @@ def testAllMotors(data: MotorTestThrottleDurationAndNumber) -> None:
 
     result = droneStatus.drone.motorTestController.testAllMotors(data)
     socketio.emit("motor_test_result", result)
+
+
+@socketio.on("set_motor_throttle_target")
+def setMotorThrottleTarget(data: MotorTestAllValues) -> None:
+    """
+    Sets the live throttle of a motor test, e.g. whilst a slider is being
+    dragged. Only invalid values are replied to straight away, the settled
+    throttle is confirmed with a motor_throttle_target_result event.
+
+    Args:
+        data: The data passed from the frontend, contains all motor tests values (motor, throttle, duration)
+    """
+    if not droneStatus.drone:
+        return notConnectedError(action="set the motor throttle")
+
+    result = droneStatus.drone.motorTestController.setMotorThrottleTarget(
+        data,
+        lambda response: socketio.emit("motor_throttle_target_result", response),
+    )
+    if not result.get("success"):
+        socketio.emit("motor_throttle_target_result", result)
@@ -1,7 +1,11 @@
-from typing_extensions import TypedDict
+from typing_extensions import NotRequired, TypedDict
 
 import app.droneStatus as droneStatus
 from app import logger, socketio
+from app.controllers.guidedTargetController import (
+    GUIDED_TARGET_DEFAULT_RATE_HZ,
+    GUIDED_TARGET_TIMEOUT_SECS,
+)
 from app.utils import notConnectedError
 
 
@@ -19,6 +23,17 @@ class LoiterRadiusDataType(TypedDict):
     radius: float
 
 
+class StartGuidedTargetDataType(TypedDict):
+    rate_hz: NotRequired[float]
+    timeout_secs: NotRequired[float]
+
+
+class GuidedTargetDataType(TypedDict):
+    lat: float
+    lon: float
+    alt: float
+
+
 @socketio.on("get_home_position")
 def getHomePosition() -> None:
     """
@@ -183,3 +198,97 @@ def setLoiterRadius(data: LoiterRadiusDataType) -> None:
     result = droneStatus.drone.navController.setLoiterRadius(radius)
 
     socketio.emit("nav_set_loiter_radius_result", result)
+
+
+@socketio.on("start_guided_target_stream")
+def startGuidedTargetStream(data: StartGuidedTargetDataType) -> None:
+    """
+    Switches the drone to guided mode and starts streaming position targets,
+    e.g. for follow-me, only works when the dashboard page is loaded. A
+    guided_target_hold event is sent if the drone is told to hold because new
+    targets stopped arriving.
+    """
+    if droneStatus.state != "dashboard":
+        socketio.emit(
+            "params_error",
+            {"message": "You must be on the dashboard screen to stream targets."},
+        )
+        logger.debug(f"Current state: {droneStatus.state}")
+        return
+
+    if not droneStatus.drone:
+        return notConnectedError(action="stream guided targets")
+
+    rate_hz = data.get("rate_hz", GUIDED_TARGET_DEFAULT_RATE_HZ)
+    timeout_secs = data.get("timeout_secs", GUIDED_TARGET_TIMEOUT_SECS)
+    if not isinstance(rate_hz, (int, float)) or not isinstance(
+        timeout_secs, (int, float)
+    ):
+        socketio.emit(
+            "guided_target_result",
+            {"success": False, "message": "Rate and timeout must be numbers"},
+        )
+        return
+
+    result = droneStatus.drone.guidedTargetController.start(
+        rate_hz,
+        timeout_secs,
+        lambda message: socketio.emit("guided_target_hold", {"message": message}),
+    )
+    socketio.emit("guided_target_result", result)
+
+
+@socketio.on("set_guided_target")
+def setGuidedTarget(data: GuidedTargetDataType) -> None:
+    """
+    Updates the latest guided target. This is sent by the client as often as
+    the target moves, so nothing is sent back unless the target is invalid.
+    """
+    if not droneStatus.drone:
+        return notConnectedError(action="set the guided target")
+
+    lat = data.get("lat", None)
+    lon = data.get("lon", None)
+    alt = data.get("alt", None)
+    if (
+        not isinstance(lat, (int, float))
+        or not isinstance(lon, (int, float))
+        or not isinstance(alt, (int, float))
+    ):
+        socketio.emit(
+            "guided_target_result",
+            {
+                "success": False,
+                "message": "Target latitude, longitude and altitude must be specified.",
+            },
+        )
+        return
+
+    result = droneStatus.drone.guidedTargetController.setTarget(lat, lon, alt)
+    if not result.get("success"):
+        socketio.emit("guided_target_result", result)
+
+
+@socketio.on("stop_guided_target_stream")
+def stopGuidedTargetStream() -> None:
+    """
+    Stops streaming guided targets, the drone holds the position it was sent last.
+    """
+    if not droneStatus.drone:
+        return notConnectedError(action="stop streaming guided targets")
+
+    result = droneStatus.drone.guidedTargetController.stop()
+    socketio.emit("guided_target_result", result)
+
+
+@socketio.on("get_guided_target_stats")
+def getGuidedTargetStats() -> None:
+    """
+    Sends how many guided targets have been received, coalesced and sent.
+    """
+    if not droneStatus.drone:
+        return notConnectedError(action="get guided target stats")
+
+    socketio.emit(
+        "guided_target_stats", droneStatus.drone.guidedTargetController.getStats()
+    )
@@ -1,14 +1,14 @@
-import time
 from typing import Any, List
 
 from typing_extensions import TypedDict
 
 import app.droneStatus as droneStatus
 from app import logger, socketio
+from app.customTypes import Response
+from app.jobManager import Job
+from app.progressReporter import ProgressReporter, socketioEmitter
 from app.utils import notConnectedError
 
-PARAM_REQUEST_UPDATE_THROTTLE_SECS = 0.2
-
 
 class ExportParamsFileType(TypedDict):
     file_path: str
@@ -21,13 +21,65 @@ class MultipleParamsProgressDataType(TypedDict):
     total_params: int
 
 
-def setMultipleParamsProgressUpdateCallback(
-    data: MultipleParamsProgressDataType,
-) -> None:
+def setMultipleParamsJob(job: Job, params_list: List[Any]) -> Response:
+    """
+    Set multiple parameters, run as a job.
+
+    Args:
+        job (Job): The job setting the parameters
+        params_list: The list of parameters to set
+    """
+    drone = droneStatus.drone
+    if drone is None:
+        return {"success": False, "message": "Must be connected to the drone."}
+
+    def setMultipleParamsProgressUpdateCallback(
+        data: MultipleParamsProgressDataType,
+    ) -> None:
+        """
+        Callback function to report progress when setting multiple parameters.
+        """
+        job.updateProgress(
+            data, percent=data["current_index"] / max(data["total_params"], 1) * 100
+        )
+
+    return drone.paramsController.setMultipleParams(
+        params_list,
+        setMultipleParamsProgressUpdateCallback,
+        should_cancel_callback=job.isCancelled,
+    )
+
+
+def refreshParamsJob(job: Job) -> Response:
     """
-    Callback function to emit progress updates when setting multiple parameters.
+    Fetch every parameter from the drone, run as a job.
+
+    Args:
+        job (Job): The job fetching the parameters
     """
-    socketio.emit("set_multiple_params_progress", data)
+    drone = droneStatus.drone
+    if drone is None:
+        return {"success": False, "message": "Must be connected to the drone."}
+
+    def send_param_request_update(progress_data: dict) -> None:
+        total_params = max(int(progress_data.get("total_number_of_params", 0)), 1)
+        current_index = int(progress_data.get("current_param_index", -1)) + 1
+        job.updateProgress(progress_data, percent=current_index / total_params * 100)
+
+    response = drone.paramsController.fetchAllParamsBlocking(
+        timeout_secs=120,
+        progress_update_callback=send_param_request_update,
+        should_cancel_callback=job.isCancelled,
+    )
+    if not response.get("success"):
+        return {
+            "success": False,
+            "message": response.get(
+                "message", "An error occurred while fetching parameters."
+            ),
+        }
+
+    return {"success": True, "data": drone.paramsController.params}
 
 
 @socketio.on("get_params")
@@ -72,10 +124,20 @@ def set_multiple_params(params_list: List[Any]) -> None:
     if drone is None:
         return
 
-    params_controller = drone.paramsController
-    response = params_controller.setMultipleParams(
-        params_list, setMultipleParamsProgressUpdateCallback
+    progress_reporter = ProgressReporter(
+        socketioEmitter("set_multiple_params_progress")
     )
+    response = droneStatus.job_manager.run(
+        "set_multiple_params",
+        "link",
+        lambda job: setMultipleParamsJob(job, params_list),
+        progress_callback=lambda data, percent: progress_reporter.update(
+            data, percent=percent
+        ),
+        cancellable=True,
+    )
+    progress_reporter.flush()
+
     if response.get("success"):
         socketio.emit("param_set_success", response)
     else:
@@ -99,51 +161,23 @@ def refresh_params() -> None:
     if drone is None:
         return
 
-    params_controller = drone.paramsController
-
-    last_index_sent = -1
-    last_progress_emit_time = 0.0
-
-    def send_param_request_update(progress_data: dict) -> None:
-        nonlocal last_index_sent, last_progress_emit_time
-        current_param_index = progress_data.get("current_param_index", -1)
-        if current_param_index <= last_index_sent:
-            return
-
-        total_params = max(int(progress_data.get("total_number_of_params", 0)), 1)
-        current_index = max(int(current_param_index) + 1, 1)
-        is_final_update = current_index >= total_params
-
-        now = time.monotonic()
-        if (
-            not is_final_update
-            and now - last_progress_emit_time < PARAM_REQUEST_UPDATE_THROTTLE_SECS
-        ):
-            return
-
-        socketio.emit("param_request_update", progress_data)
-        last_index_sent = current_param_index
-        last_progress_emit_time = now
-
-    response = params_controller.fetchAllParamsBlocking(
-        timeout_secs=120,
-        progress_update_callback=send_param_request_update,
+    progress_reporter = ProgressReporter(socketioEmitter("param_request_update"))
+    response = droneStatus.job_manager.run(
+        "refresh_params",
+        "link",
+        refreshParamsJob,
+        progress_callback=lambda data, percent: progress_reporter.update(
+            data, percent=percent
+        ),
+        cancellable=True,
     )
+    progress_reporter.flush()
 
     if not response.get("success"):
-        socketio.emit(
-            "params_error",
-            {
-                "message": response.get(
-                    "message", "An error occurred while fetching parameters."
-                )
-            },
-        )
+        socketio.emit("params_error", {"message": response.get("message")})
         return
 
-    socketio.emit(
-        "get_params_result", {"success": True, "data": drone.paramsController.params}
-    )
+    socketio.emit("get_params_result", response)
 
 
 @socketio.on("export_params_to_file")
@@ -129,3 +129,33 @@ def testServoPwm(data: TestServoPwm) -> None:
     result = droneStatus.drone.servoController.setServo(servo_instance, pwm_value)
 
     socketio.emit("test_servo_result", result)
+
+
+@socketio.on("set_servo_target")
+def setServoTarget(data: TestServoPwm) -> None:
+    """
+    Sets the live PWM value of a servo, e.g. whilst a slider is being dragged.
+    Only the newest value is sent and the value the servo settles on is
+    confirmed with a servo_target_result event.
+    """
+    if not droneStatus.drone:
+        return notConnectedError(action="set the servo target")
+
+    servo_instance = data.get("servo_instance", None)
+    pwm_value = data.get("pwm_value", None)
+
+    if servo_instance is None or pwm_value is None:
+        socketio.emit(
+            "servo_target_result",
+            {
+                "success": False,
+                "message": "Servo instance and PWM value must be specified.",
+            },
+        )
+        return
+
+    droneStatus.drone.servoController.setServoTarget(
+        servo_instance,
+        pwm_value,
+        lambda result: socketio.emit("servo_target_result", result),
+    )
@@ -1,11 +1,16 @@
 import copy
+from typing import Dict, Optional
 
-from pymavlink import mavutil
+from flask import request
 from typing_extensions import TypedDict
 
 import app.droneStatus as droneStatus
 from app import logger, socketio
-from app.drone import DATASTREAM_RATES
+from app.drone import DATASTREAM_RATES, Drone
+from app.telemetrySubscriptions import (
+    TELEMETRY_NAMESPACE,
+    getTelemetryRoom,
+)
 from app.utils import (
     missingParameterError,
     sendMessage,
@@ -21,127 +26,126 @@ class SetStreamRateType(TypedDict):
     rate: int
 
 
-GLOBAL_MESSAGE_LISTENERS = ["HEARTBEAT", "STATUSTEXT", "GLOBAL_POSITION_INT", "VFR_HUD"]
-
-STATES_MESSAGE_LISTENERS = {
-    "dashboard": [
-        "BATTERY_STATUS",
-        "ATTITUDE",
-        "ALTITUDE",
-        "NAV_CONTROLLER_OUTPUT",
-        "SYS_STATUS",
-        "GPS_RAW_INT",
-        "GPS2_RAW",
-        "RC_CHANNELS",
-        "ESC_TELEMETRY_1_TO_4",
-        "ESC_TELEMETRY_5_TO_8",
-        "MISSION_CURRENT",
-        "EKF_STATUS_REPORT",
-        "VIBRATION",
-    ],
-    "missions": [
-        "NAV_CONTROLLER_OUTPUT",
-    ],
-    "graphs": ["ATTITUDE", "SYS_STATUS"],
-    "config.flight_modes": [
-        "RC_CHANNELS",
-    ],
-    "config.rc": ["RC_CHANNELS"],
-    "config.servo": ["SERVO_OUTPUT_RAW"],
-}
+DASHBOARD_STREAM_RATES = copy.deepcopy(DATASTREAM_RATES)
 
+# The data stream rates last requested from the drone for the subscriptions,
+# and the drone they were requested from
+_applied_stream_rates: Dict[int, int] = {}
+_applied_drone: Optional[Drone] = None
 
-DASHBOARD_STREAM_RATES = copy.deepcopy(DATASTREAM_RATES)
 
+def getClientId(namespace: str = "/") -> str:
+    """
+    Get the id of the client which sent the current event. The default and
+    telemetry namespaces of a client share an engine.io session, so its id is
+    used to identify the client in both.
 
-def apply_dashboard_stream_rates() -> None:
-    if not droneStatus.drone:
-        return
+    Args:
+        namespace (str, optional): The namespace the event was sent to. Defaults to "/".
 
-    for stream, rate in DASHBOARD_STREAM_RATES.items():
-        droneStatus.drone.sendDataStreamRequestMessage(stream, rate)
+    Returns:
+        str: The id of the client
+    """
+    client_id = socketio.server.manager.eio_sid_from_sid(request.sid, namespace)  # type: ignore[attr-defined]
+    return client_id if client_id is not None else request.sid  # type: ignore[attr-defined]
 
 
-@socketio.on("set_state")
-def set_state(data: SetStateType) -> None:
+def syncTelemetryRooms(client_id: str) -> None:
     """
-    Set the state of the drone based on the file current page we are on
+    Make the telemetry connection of a client join the rooms of the message
+    types it is subscribed to, and leave the rest.
 
     Args:
-        data: The form data passed in from the frontend, this contains the state we wish to change to
+        client_id (str): The client to update the rooms of
     """
-    # Ensure that a state was actually sent
-    if (newState := data.get("state", None)) is None:
-        return missingParameterError("set_state", "state")
+    sid = socketio.server.manager.sid_from_eio_sid(client_id, TELEMETRY_NAMESPACE)
+    if sid is None:
+        return
 
-    logger.info(f"Changing state to {newState}")
+    wanted_rooms = {
+        getTelemetryRoom(message_type)
+        for message_type in droneStatus.telemetry_subscriptions.getMessageTypes(
+            client_id
+        )
+    }
+    current_rooms = {
+        room
+        for room in socketio.server.rooms(sid, namespace=TELEMETRY_NAMESPACE)
+        if room != sid and room.startswith(getTelemetryRoom(""))
+    }
 
-    droneStatus.state = newState
+    for room in wanted_rooms - current_rooms:
+        socketio.server.enter_room(sid, room, namespace=TELEMETRY_NAMESPACE)
+    for room in current_rooms - wanted_rooms:
+        socketio.server.leave_room(sid, room, namespace=TELEMETRY_NAMESPACE)
+
+
+def applyTelemetrySubscriptions(reset: bool = False) -> None:
+    """
+    Request the data streams and add the message listeners needed by the
+    subscriptions of every client.
+
+    Args:
+        reset (bool, optional): Stop every data stream and remove every message listener first. Defaults to False.
+    """
+    global _applied_drone
 
     if not droneStatus.drone:
         return
 
-    # Reset all data streams
-    droneStatus.drone.stopAllDataStreams()
+    if droneStatus.drone is not _applied_drone:
+        # Nothing has been requested from a newly connected drone yet
+        _applied_stream_rates.clear()
+        _applied_drone = droneStatus.drone
 
-    # Remove all existing message listeners
-    droneStatus.drone.clearAllMessageListeners()
+    subscriptions = droneStatus.telemetry_subscriptions
+    stream_rates = subscriptions.getStreamRates(DASHBOARD_STREAM_RATES)
+    message_types = subscriptions.getAllMessageTypes()
 
-    # Always setup position stream to get GLOBAL_POSITION_INT messages on
-    # non-dashboard pages
-    if droneStatus.state != "dashboard":
-        droneStatus.drone.sendDataStreamRequestMessage(
-            mavutil.mavlink.MAV_DATA_STREAM_POSITION, 1
-        )
+    if reset:
+        droneStatus.drone.stopAllDataStreams()
+        droneStatus.drone.clearAllMessageListeners()
+        _applied_stream_rates.clear()
 
-    for message in GLOBAL_MESSAGE_LISTENERS:
-        droneStatus.drone.addMessageListener(message, sendMessage)
+    for stream, rate in stream_rates.items():
+        if _applied_stream_rates.get(stream) != rate:
+            droneStatus.drone.sendDataStreamRequestMessage(stream, rate)
+    for stream in set(_applied_stream_rates) - set(stream_rates):
+        droneStatus.drone.sendDataStreamRequestMessage(stream, 0)
+    _applied_stream_rates.clear()
+    _applied_stream_rates.update(stream_rates)
 
-    if droneStatus.state == "dashboard":
-        apply_dashboard_stream_rates()
-        for message in STATES_MESSAGE_LISTENERS["dashboard"]:
-            droneStatus.drone.addMessageListener(message, sendMessage)
+    for message_type in message_types:
+        droneStatus.drone.addMessageListener(message_type, sendMessage)
+    for message_type, func in list(droneStatus.drone.message_listeners.items()):
+        if func is sendMessage and message_type not in message_types:
+            droneStatus.drone.removeMessageListener(message_type)
 
-    elif droneStatus.state == "missions":
-        droneStatus.drone.sendDataStreamRequestMessage(
-            mavutil.mavlink.MAV_DATA_STREAM_EXTENDED_STATUS, 1
-        )
-        for message in STATES_MESSAGE_LISTENERS["missions"]:
-            droneStatus.drone.addMessageListener(message, sendMessage)
-    elif droneStatus.state == "graphs":
-        droneStatus.drone.sendDataStreamRequestMessage(
-            mavutil.mavlink.MAV_DATA_STREAM_EXTENDED_STATUS, 1
-        )
-        droneStatus.drone.sendDataStreamRequestMessage(
-            mavutil.mavlink.MAV_DATA_STREAM_EXTRA1, 4
-        )
-        droneStatus.drone.sendDataStreamRequestMessage(
-            mavutil.mavlink.MAV_DATA_STREAM_EXTRA2, 3
-        )
 
-        for message in STATES_MESSAGE_LISTENERS["graphs"]:
-            droneStatus.drone.addMessageListener(message, sendMessage)
-    elif droneStatus.state == "config.flight_modes":
-        droneStatus.drone.sendDataStreamRequestMessage(
-            mavutil.mavlink.MAV_DATA_STREAM_RC_CHANNELS, 2
-        )
+@socketio.on("set_state")
+def set_state(data: SetStateType) -> None:
+    """
+    Set the state of the client based on the current page it is on, the
+    client is then sent the telemetry needed by that page
 
-        for message in STATES_MESSAGE_LISTENERS["config.flight_modes"]:
-            droneStatus.drone.addMessageListener(message, sendMessage)
-    elif droneStatus.state == "config.rc":
-        droneStatus.drone.sendDataStreamRequestMessage(
-            mavutil.mavlink.MAV_DATA_STREAM_RC_CHANNELS, 4
-        )
+    Args:
+        data: The form data passed in from the frontend, this contains the state we wish to change to
+    """
+    # Ensure that a state was actually sent
+    if (newState := data.get("state", None)) is None:
+        return missingParameterError("set_state", "state")
 
-        for message in STATES_MESSAGE_LISTENERS["config.rc"]:
-            droneStatus.drone.addMessageListener(message, sendMessage)
-    elif droneStatus.state == "config.servo":
-        droneStatus.drone.sendDataStreamRequestMessage(
-            mavutil.mavlink.MAV_DATA_STREAM_RC_CHANNELS, 4
-        )
+    logger.info(f"Changing state to {newState}")
+
+    droneStatus.state = newState
+
+    client_id = getClientId()
+    droneStatus.telemetry_subscriptions.setState(client_id, newState)
+    syncTelemetryRooms(client_id)
 
-        for message in STATES_MESSAGE_LISTENERS["config.servo"]:
-            droneStatus.drone.addMessageListener(message, sendMessage)
+    # Only the streams and listeners which changed are updated, so the
+    # telemetry of other clients is not interrupted
+    applyTelemetrySubscriptions()
 
 
 @socketio.on("set_stream_rate")
@@ -168,7 +172,8 @@ def set_stream_rate(data: SetStreamRateType):
 
     DASHBOARD_STREAM_RATES[stream] = rate
 
-    # Dashboard-only behavior: only apply immediately while dashboard is active.
-    if droneStatus.state == "dashboard":
+    # Dashboard-only behavior: only apply immediately while a client is on the
+    # dashboard, the highest rate needed by any client is used.
+    if "dashboard" in droneStatus.telemetry_subscriptions.getStates():
         logger.info(f"Setting dashboard data stream {stream} rate to {rate}")
-        droneStatus.drone.sendDataStreamRequestMessage(stream, rate)
+        applyTelemetrySubscriptions()
@@ -1,6 +1,21 @@
-from flask_socketio import Namespace
+from typing import Any, List, Optional
 
+from flask_socketio import Namespace, emit
+
+import app.droneStatus as droneStatus
 from app import logger
+from app.customTypes import TelemetryHistory, TelemetrySnapshot
+from app.endpoints.states import (
+    applyTelemetrySubscriptions,
+    getClientId,
+    syncTelemetryRooms,
+)
+from app.telemetryHistory import HISTORY_DEFAULT_BUCKETS
+from app.telemetrySubscriptions import (
+    SUBSCRIPTION_DEFAULT_RATE,
+    SUBSCRIPTION_MAX_RATE,
+    TELEMETRY_NAMESPACE,
+)
 
 
 class TelemetryNamespace(Namespace):
@@ -9,7 +24,169 @@ class TelemetryNamespace(Namespace):
     def on_connect(self):
         """Handle client connection to telemetry namespace"""
         logger.info("Client connected to telemetry namespace")
+        client_id = getClientId(TELEMETRY_NAMESPACE)
+        droneStatus.telemetry_subscriptions.addClient(client_id)
+        syncTelemetryRooms(client_id)
 
     def on_disconnect(self):
         """Handle client disconnection from telemetry namespace"""
         logger.info("Client disconnected from telemetry namespace")
+        if droneStatus.telemetry_subscriptions.removeClient(
+            getClientId(TELEMETRY_NAMESPACE)
+        ):
+            applyTelemetrySubscriptions()
+
+    @staticmethod
+    def _isMessageTypeList(message_types: Any) -> bool:
+        return isinstance(message_types, list) and all(
+            isinstance(message_type, str) for message_type in message_types
+        )
+
+    def _getSubscriptionMessageTypes(self, data: Any) -> Optional[List[str]]:
+        """Get the message types of a subscription request, None if invalid."""
+        if not isinstance(data, dict):
+            return None
+        message_types = data.get("message_types")
+        if not self._isMessageTypeList(message_types):
+            return None
+        return message_types
+
+    def _emitSubscriptions(self, client_id: str) -> None:
+        emit(
+            "subscriptions",
+            sorted(droneStatus.telemetry_subscriptions.getMessageTypes(client_id)),
+        )
+
+    def on_subscribe(self, data: Any) -> None:
+        """
+        Subscribes the client to extra message types on top of those needed by
+        its current page. The data streams of the message types are requested
+        at the highest rate any client has subscribed at.
+
+        Args:
+            data: Contains a list of message_types and optionally the rate in hertz
+        """
+        if (message_types := self._getSubscriptionMessageTypes(data)) is None:
+            emit("subscription_error", {"message": "Invalid message_types"})
+            return
+
+        rate = data.get("rate", SUBSCRIPTION_DEFAULT_RATE)
+        if (
+            not isinstance(rate, int)
+            or isinstance(rate, bool)
+            or not 0 < rate <= SUBSCRIPTION_MAX_RATE
+        ):
+            emit("subscription_error", {"message": "Invalid rate"})
+            return
+
+        client_id = getClientId(TELEMETRY_NAMESPACE)
+        droneStatus.telemetry_subscriptions.subscribe(client_id, message_types, rate)
+        syncTelemetryRooms(client_id)
+        applyTelemetrySubscriptions()
+        self._emitSubscriptions(client_id)
+
+    def on_unsubscribe(self, data: Any) -> None:
+        """
+        Unsubscribes the client from message types it subscribed to, message
+        types needed by its current page are still sent.
+
+        Args:
+            data: Contains a list of message_types
+        """
+        if (message_types := self._getSubscriptionMessageTypes(data)) is None:
+            emit("subscription_error", {"message": "Invalid message_types"})
+            return
+
+        client_id = getClientId(TELEMETRY_NAMESPACE)
+        droneStatus.telemetry_subscriptions.unsubscribe(client_id, message_types)
+        syncTelemetryRooms(client_id)
+        applyTelemetrySubscriptions()
+        self._emitSubscriptions(client_id)
+
+    def on_get_snapshot(self, data: Optional[Any] = None) -> None:
+        """
+        Sends the latest message of each type to the client which asked for it.
+        If since_version is given then only the fields which have changed since
+        that version are sent.
+
+        Args:
+            data: Optionally contains since_version and a list of message_types
+        """
+        if data is None:
+            data = {}
+        if not isinstance(data, dict):
+            emit("snapshot_error", {"message": "Invalid snapshot request"})
+            return
+
+        since_version = data.get("since_version", 0)
+        message_types = data.get("message_types")
+
+        if (
+            not isinstance(since_version, int)
+            or isinstance(since_version, bool)
+            or since_version < 0
+        ):
+            emit("snapshot_error", {"message": "Invalid since_version"})
+            return
+        if message_types is not None and not self._isMessageTypeList(message_types):
+            emit("snapshot_error", {"message": "Invalid message_types"})
+            return
+
+        if not droneStatus.drone:
+            snapshot: TelemetrySnapshot = {"version": 0, "messages": {}}
+        else:
+            snapshot = droneStatus.drone.telemetry_cache.getChangesSince(
+                since_version, message_types
+            )
+
+        emit("snapshot", snapshot)
+
+    def on_get_history_keys(self) -> None:
+        """Sends the keys of every field which has history to the client."""
+        keys = (
+            droneStatus.drone.telemetry_history.getKeys() if droneStatus.drone else []
+        )
+        emit("history_keys", keys)
+
+    def on_get_history(self, data: Any) -> None:
+        """
+        Sends the downsampled history of a set of fields to the client which
+        asked for it, so a graph can be filled in when it is opened.
+
+        Args:
+            data: Contains a list of keys, e.g. "ATTITUDE.roll", and optionally
+                duration_secs and the number of buckets
+        """
+        if (
+            not isinstance(data, dict)
+            or not isinstance(data.get("keys"), list)
+            or not all(isinstance(key, str) for key in data["keys"])
+        ):
+            emit("history_error", {"message": "Invalid history request"})
+            return
+
+        duration_secs = data.get("duration_secs")
+        buckets = data.get("buckets", HISTORY_DEFAULT_BUCKETS)
+
+        if duration_secs is not None and (
+            not isinstance(duration_secs, (int, float)) or duration_secs <= 0
+        ):
+            emit("history_error", {"message": "Invalid duration_secs"})
+            return
+        if not isinstance(buckets, int) or buckets < 1:
+            emit("history_error", {"message": "Invalid buckets"})
+            return
+
+        if not droneStatus.drone:
+            history: TelemetryHistory = {
+                "start": 0.0,
+                "end": 0.0,
+                "bucket_secs": 0.0,
+                "series": {},
+            }
+        else:
+            history = droneStatus.drone.telemetry_history.getHistory(
+                data["keys"], duration_secs, buckets
+            )
+
+        emit("history", history)
@@ -0,0 +1,878 @@
+import gzip
+import json
+import lzma
+import os
+import zlib
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from app.customTypes import FTLogIndexBlock, FTLogIndexType, FTLogMessage
+
+FTLOG_VERSION = 2
+FTLOG_INDEX_SUFFIX = ".ftidx"
+# Number of lines in each indexed block, a reader only has to read the blocks
+# which overlap the time range and contain the message types it wants
+FTLOG_INDEX_BLOCK_LINES = 1000
+FTLOG_SUFFIX = ".ftlog"
+
+# Compressed logs are written as one independent frame per block, so a reader
+# can decompress any block on its own and a crash only loses the block being
+# written. Concatenated gzip members and xz streams are still valid files, so
+# compressed logs can be decompressed with the standard tools.
+FTLOG_COMPRESSION_SUFFIXES = {"gzip": ".gz", "xz": ".xz"}
+FTLOG_GZIP_LEVEL = 6
+FTLOG_XZ_PRESET = 1
+FTLOG_READ_CHUNK_SIZE = 1024 * 1024
+FTLOG_TAIL_CHUNK_SIZE = 4096
+
+
+def getIndexPath(log_file: Path) -> Path:
+    """
+    Args:
+        log_file (Path): The FTLog file
+
+    Returns:
+        Path: The path of the sidecar index of the log file
+    """
+    return log_file.with_name(log_file.name + FTLOG_INDEX_SUFFIX)
+
+
+def getLogSuffix(compression: Optional[str] = None) -> str:
+    """
+    Args:
+        compression (Optional[str], optional): The compression of the log. Defaults to None.
+
+    Returns:
+        str: The file suffix of a log with the compression, e.g. ".ftlog.gz"
+    """
+    if compression is None:
+        return FTLOG_SUFFIX
+    return FTLOG_SUFFIX + FTLOG_COMPRESSION_SUFFIXES[compression]
+
+
+def getCompression(log_file: Path) -> Optional[str]:
+    """
+    Args:
+        log_file (Path): The FTLog file
+
+    Returns:
+        Optional[str]: The compression of the log file from its suffix, None if it is not compressed
+    """
+    for compression, suffix in FTLOG_COMPRESSION_SUFFIXES.items():
+        if log_file.name.endswith(FTLOG_SUFFIX + suffix):
+            return compression
+    return None
+
+
+def isLogFile(log_file: Path) -> bool:
+    """
+    Args:
+        log_file (Path): Any file
+
+    Returns:
+        bool: True if the file is an FTLog file, compressed or not
+    """
+    return log_file.name.endswith(FTLOG_SUFFIX) or getCompression(log_file) is not None
+
+
+def compressFrame(data: bytes, compression: str) -> bytes:
+    """
+    Compress a block of a log into an independent frame.
+
+    Args:
+        data (bytes): The lines of the block
+        compression (str): The compression to use
+
+    Returns:
+        bytes: The compressed frame
+    """
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=FTLOG_GZIP_LEVEL, mtime=0)
+    return lzma.compress(data, format=lzma.FORMAT_XZ, preset=FTLOG_XZ_PRESET)
+
+
+def decompressFrame(data: bytes, compression: str) -> bytes:
+    """
+    Args:
+        data (bytes): A single compressed frame
+        compression (str): The compression of the frame
+
+    Returns:
+        bytes: The lines of the block
+    """
+    if compression == "gzip":
+        return gzip.decompress(data)
+    return lzma.decompress(data, format=lzma.FORMAT_XZ)
+
+
+def _createDecompressor(compression: str) -> Any:
+    if compression == "gzip":
+        # Only decode a single gzip member, so the end of each frame can be found
+        return zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+    return lzma.LZMADecompressor(format=lzma.FORMAT_XZ)
+
+
+def iterFrames(
+    log_file: Path, compression: str, start_offset: int = 0
+) -> Iterator[Tuple[int, int, bytes]]:
+    """
+    Iterate over the frames of a compressed log without using its index. This
+    stops at the first frame which is incomplete or corrupt, such as the frame
+    which was being written when the GCS crashed.
+
+    Args:
+        log_file (Path): The compressed FTLog file
+        compression (str): The compression of the log file
+        start_offset (int, optional): The offset of the first frame to read. Defaults to 0.
+
+    Yields:
+        Tuple[int, int, bytes]: The offset and length of each frame in the file, and its decompressed lines
+    """
+    with open(log_file, "rb") as log_file_handle:
+        log_file_handle.seek(start_offset)
+        offset = start_offset
+        pending = b""
+
+        while True:
+            decompressor = _createDecompressor(compression)
+            output = []
+            length = 0
+
+            while not decompressor.eof:
+                if not pending:
+                    pending = log_file_handle.read(FTLOG_READ_CHUNK_SIZE)
+                    if not pending:
+                        return
+
+                try:
+                    output.append(decompressor.decompress(pending))
+                except (EOFError, lzma.LZMAError, zlib.error):
+                    return
+
+                unused_data = decompressor.unused_data
+                length += len(pending) - len(unused_data)
+                pending = unused_data
+
+            yield offset, length, b"".join(output)
+            offset += length
+
+
+def readLines(log_file: Path) -> List[str]:
+    """
+    Read every complete line of a log file, compressed or not.
+
+    Args:
+        log_file (Path): The FTLog file
+
+    Returns:
+        List[str]: The lines, including their newlines
+    """
+    compression = getCompression(log_file)
+    if compression is None:
+        with open(log_file) as log_file_handle:
+            return log_file_handle.readlines()
+
+    lines: List[str] = []
+    for _, _, data in iterFrames(log_file, compression):
+        lines.extend(data.decode(errors="replace").splitlines(keepends=True))
+    return lines
+
+
+def readFirstLine(log_file: Path) -> str:
+    """
+    Read the first line of a log file, compressed or not, without reading the
+    rest of it.
+
+    Args:
+        log_file (Path): The FTLog file
+
+    Returns:
+        str: The first line, an empty string if the file has no complete lines
+    """
+    compression = getCompression(log_file)
+    if compression is None:
+        with open(log_file, "rb") as log_file_handle:
+            return log_file_handle.readline().decode(errors="replace")
+
+    for _, _, data in iterFrames(log_file, compression):
+        lines = data.splitlines(keepends=True)
+        if lines:
+            return lines[0].decode(errors="replace")
+    return ""
+
+
+def readLastLine(log_file: Path) -> str:
+    """
+    Read the last line of a log file, compressed or not. Uncompressed files are
+    read backwards from the end. Compressed files are read from their last
+    indexed block if they have an index, otherwise every frame is decompressed.
+
+    Args:
+        log_file (Path): The FTLog file
+
+    Returns:
+        str: The last line, an empty string if the file has no complete lines
+    """
+    compression = getCompression(log_file)
+    if compression is None:
+        with open(log_file, "rb") as log_file_handle:
+            end = log_file_handle.seek(0, os.SEEK_END)
+            position = end
+            tail = b""
+            # Read backwards until the start of the last line has been found
+            while position > 0 and tail.rstrip(b"\n").count(b"\n") == 0:
+                position = max(0, position - FTLOG_TAIL_CHUNK_SIZE)
+                log_file_handle.seek(position)
+                tail = log_file_handle.read(end - position)
+        lines = tail.splitlines(keepends=True)
+        return lines[-1].decode(errors="replace") if lines else ""
+
+    index = loadIndex(log_file)
+    start_offset = index["blocks"][-1]["offset"] if index and index["blocks"] else 0
+    last_line = b""
+    for _, _, data in iterFrames(log_file, compression, start_offset):
+        lines = data.splitlines(keepends=True)
+        if lines:
+            last_line = lines[-1]
+    return last_line.decode(errors="replace")
+
+
+def getNextLogFile(line: str) -> Optional[str]:
+    """
+    Args:
+        line (str): The last line of a log file
+
+    Returns:
+        Optional[str]: The next log file in the chain from a NEXT_FILE marker, None if the line is not a marker
+    """
+    if not line.startswith("==NEXT_FILE=="):
+        return None
+    return line.split("==NEXT_FILE==")[-1].split("==END==")[0]
+
+
+def findLogChains(log_files: Iterable[Path]) -> Tuple[List[List[Path]], List[str]]:
+    """
+    Find the chains of temp log files linked by their NEXT_FILE markers, each
+    chain starts with a "tmp_first_" file. Only the last line of each file is
+    read.
+
+    Args:
+        log_files (Iterable[Path]): The temp log files
+
+    Returns:
+        Tuple[List[List[Path]], List[str]]: The log files of each chain in order, and the names of any next log files which could not be found
+    """
+    log_files_by_name = {log_file.name: log_file for log_file in log_files}
+    chains: List[List[Path]] = []
+    missing_log_files: List[str] = []
+
+    for log_file in log_files_by_name.values():
+        if not log_file.name.startswith("tmp_first_"):
+            continue
+
+        chain = [log_file]
+        seen = {log_file.name}
+        while True:
+            next_log_file_name = getNextLogFile(readLastLine(chain[-1]))
+            if next_log_file_name is None:
+                break
+
+            next_log_file = log_files_by_name.get(Path(next_log_file_name).name)
+            if next_log_file is None or next_log_file.name in seen:
+                missing_log_files.append(next_log_file_name)
+                break
+
+            chain.append(next_log_file)
+            seen.add(next_log_file.name)
+
+        chains.append(chain)
+
+    return chains, missing_log_files
+
+
+def renameLog(log_file: Path, destination: Path) -> None:
+    """
+    Rename a log file and its sidecar index if it has one.
+
+    Args:
+        log_file (Path): The FTLog file
+        destination (Path): The new path of the log file
+    """
+    os.rename(log_file, destination)
+    if getIndexPath(log_file).is_file():
+        os.rename(getIndexPath(log_file), getIndexPath(destination))
+
+
+def removeLog(log_file: Path) -> None:
+    """
+    Remove a log file and its sidecar index if it has one.
+
+    Args:
+        log_file (Path): The FTLog file
+    """
+    os.remove(log_file)
+    if getIndexPath(log_file).is_file():
+        os.remove(getIndexPath(log_file))
+
+
+def startTimeLine(start_time: str) -> str:
+    return f"==START_TIME=={start_time}==END==\n"
+
+
+def versionLine() -> str:
+    return f"==FTLOG_VERSION=={FTLOG_VERSION}==END==\n"
+
+
+def parseLine(line: str) -> Optional[FTLogMessage]:
+    """
+    Parse a message line of an FTLog file.
+
+    Args:
+        line (str): A line in the form "timestamp,MESSAGE_TYPE,field:value,..."
+
+    Returns:
+        Optional[FTLogMessage]: The message, None if the line is not a message
+    """
+    if "==" in line:
+        return None
+
+    parts = line.rstrip("\r\n").split(",", 2)
+    if len(parts) < 2:
+        return None
+
+    try:
+        timestamp = float(parts[0])
+    except ValueError:
+        return None
+
+    return {
+        "timestamp": timestamp,
+        "message_type": parts[1].strip(),
+        "data": parts[2] if len(parts) > 2 else "",
+    }
+
+
+class FTLogIndexBuilder:
+    def __init__(self, block_lines: int = FTLOG_INDEX_BLOCK_LINES) -> None:
+        """
+        Builds the index of an FTLog file from the lines written to it. The file
+        is split into blocks of lines, and for each block the byte range, time
+        range and number of each message type is stored.
+
+        Args:
+            block_lines (int, optional): The number of lines in each block. Defaults to FTLOG_INDEX_BLOCK_LINES.
+        """
+        self.block_lines = block_lines
+        self.blocks: List[FTLogIndexBlock] = []
+        self.size = 0
+        self._block: Optional[FTLogIndexBlock] = None
+        self._block_line_count = 0
+
+    def addLine(self, line: str, length: int) -> bool:
+        """
+        Add a line to the index.
+
+        Args:
+            line (str): The line written to the file
+            length (int): The length of the line in bytes
+
+        Returns:
+            bool: True if the line finished a block
+        """
+        offset = self.size
+        self.size += length
+
+        message = parseLine(line)
+        if message is None:
+            # Markers are included in the byte range of a block but not indexed
+            if self._block is not None:
+                self._block["length"] += length
+            return False
+
+        if self._block is None:
+            self._block = {
+                "offset": offset,
+                "length": 0,
+                "start_time": message["timestamp"],
+                "end_time": message["timestamp"],
+                "counts": {},
+            }
+
+        block = self._block
+        block["length"] = self.size - block["offset"]
+        block["start_time"] = min(block["start_time"], message["timestamp"])
+        block["end_time"] = max(block["end_time"], message["timestamp"])
+        block["counts"][message["message_type"]] = (
+            block["counts"].get(message["message_type"], 0) + 1
+        )
+
+        self._block_line_count += 1
+        if self._block_line_count >= self.block_lines:
+            self.finishBlock()
+            return True
+        return False
+
+    def finishBlock(self) -> None:
+        """Finish the current block, the next message line will start a new one."""
+        if self._block is not None:
+            self.blocks.append(self._block)
+        self._block = None
+        self._block_line_count = 0
+
+    def build(self, compression: Optional[str] = None) -> FTLogIndexType:
+        """
+        Args:
+            compression (Optional[str], optional): The compression of the log. Defaults to None.
+
+        Returns:
+            FTLogIndexType: The index of every line added
+        """
+        self.finishBlock()
+        return {
+            "version": FTLOG_VERSION,
+            "compression": compression,
+            "size": self.size,
+            "blocks": self.blocks,
+        }
+
+
+def saveIndex(log_file: Path, index: FTLogIndexType) -> None:
+    """
+    Write the sidecar index of a log file.
+
+    Args:
+        log_file (Path): The FTLog file
+        index (FTLogIndexType): The index of the file
+    """
+    with open(getIndexPath(log_file), "w") as index_file:
+        json.dump(index, index_file, separators=(",", ":"))
+
+
+def loadIndex(log_file: Path) -> Optional[FTLogIndexType]:
+    """
+    Load the sidecar index of a log file.
+
+    Args:
+        log_file (Path): The FTLog file
+
+    Returns:
+        Optional[FTLogIndexType]: The index, None if it is missing or does not match the file
+    """
+    try:
+        with open(getIndexPath(log_file)) as index_file:
+            index: FTLogIndexType = json.load(index_file)
+    except (OSError, ValueError):
+        return None
+
+    if index.get("version") != FTLOG_VERSION or index.get("size") != (
+        log_file.stat().st_size
+    ):
+        return None
+    return index
+
+
+def buildIndex(
+    log_file: Path, block_lines: int = FTLOG_INDEX_BLOCK_LINES
+) -> FTLogIndexType:
+    """
+    Build the index of a log file by reading all of it. This works for v1 files
+    and for compressed files, where each frame is one block.
+
+    Args:
+        log_file (Path): The FTLog file
+        block_lines (int, optional): The number of lines in each block of an uncompressed file. Defaults to FTLOG_INDEX_BLOCK_LINES.
+
+    Returns:
+        FTLogIndexType: The index of the file
+    """
+    compression = getCompression(log_file)
+    if compression is None:
+        builder = FTLogIndexBuilder(block_lines)
+        with open(log_file, "rb") as log_file_handle:
+            for raw_line in log_file_handle:
+                builder.addLine(raw_line.decode(errors="replace"), len(raw_line))
+        return builder.build()
+
+    blocks: List[FTLogIndexBlock] = []
+    size = 0
+    for offset, length, data in iterFrames(log_file, compression):
+        blocks.extend(_indexFrame(data, offset, length))
+        size = offset + length
+    return {
+        "version": FTLOG_VERSION,
+        "compression": compression,
+        "size": size,
+        "blocks": blocks,
+    }
+
+
+def _indexFrame(data: bytes, offset: int, length: int) -> List[FTLogIndexBlock]:
+    """Index the lines of a compressed frame as a single block."""
+    builder = FTLogIndexBuilder(block_lines=len(data) + 1)
+    for raw_line in data.splitlines(keepends=True):
+        builder.addLine(raw_line.decode(errors="replace"), len(raw_line))
+
+    blocks = builder.build()["blocks"]
+    for block in blocks:
+        block["offset"] = offset
+        block["length"] = length
+    return blocks
+
+
+class FTLogWriter:
+    def __init__(
+        self,
+        log_file: Path,
+        start_time: Optional[str],
+        block_lines: int = FTLOG_INDEX_BLOCK_LINES,
+        compression: Optional[str] = None,
+    ) -> None:
+        """
+        Writes a v2 FTLog file and its sidecar index. The lines are the same as
+        a v1 file so existing readers can still read it once decompressed.
+
+        Args:
+            log_file (Path): The file to write to, this is overwritten
+            start_time (Optional[str]): The time the log started, None to not write the header lines
+            block_lines (int, optional): The number of lines in each indexed block. Defaults to FTLOG_INDEX_BLOCK_LINES.
+            compression (Optional[str], optional): Compress each block with "gzip" or "xz". Defaults to None.
+        """
+        if compression is not None and compression not in FTLOG_COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown FTLog compression {compression}")
+
+        self.log_file = log_file
+        self.compression = compression
+        self.line_count = 0
+        self._index_builder = FTLogIndexBuilder(block_lines)
+        self._file: Optional[IO[bytes]] = open(log_file, "wb")
+
+        # Lines of the block which is yet to be compressed
+        self._frame = bytearray()
+        self._frame_blocks: List[FTLogIndexBlock] = []
+        self._size = 0
+
+        if start_time is not None:
+            self._write(startTimeLine(start_time))
+            self._write(versionLine())
+            # Write the header straight away so the start time can be recovered
+            self._writeFrame()
+
+    def _write(self, line: str) -> bool:
+        if self._file is None:
+            raise ValueError(f"FTLog file {self.log_file} has been closed")
+
+        encoded = line.encode()
+        if self.compression is None:
+            self._file.write(encoded)
+        else:
+            self._frame += encoded
+        return self._index_builder.addLine(line, len(encoded))
+
+    def _writeFrame(self) -> None:
+        """Compress the lines written since the last frame and write them."""
+        if self.compression is None or self._file is None:
+            return
+
+        self._index_builder.finishBlock()
+        if not self._frame:
+            return
+
+        frame = compressFrame(bytes(self._frame), self.compression)
+        self._file.write(frame)
+        self._file.flush()
+
+        # The lines of the frame are indexed as a single block of the compressed file
+        for block in self._index_builder.blocks:
+            block["offset"] = self._size
+            block["length"] = len(frame)
+            self._frame_blocks.append(block)
+        self._index_builder.blocks = []
+
+        self._size += len(frame)
+        self._frame = bytearray()
+
+    def writeLine(self, line: str) -> None:
+        """
+        Write a line to the log as it is, this is used to copy lines from
+        another log.
+
+        Args:
+            line (str): The line, including its newline
+        """
+        if self._write(line):
+            self._endBlock()
+
+    def writeMessage(self, line: str) -> None:
+        """
+        Write a message line to the log.
+
+        Args:
+            line (str): The line in the form "timestamp,MESSAGE_TYPE,field:value,...", without a newline
+        """
+        if self._write(line + "\n"):
+            self._endBlock()
+        self.line_count += 1
+
+    def _endBlock(self) -> None:
+        if self.compression is None:
+            # Flush at the end of each block so little is lost if the GCS crashes
+            self.flush()
+        else:
+            self._writeFrame()
+
+    def writeNextFile(self, next_log_file: Path) -> None:
+        """
+        Write the marker which links this log file to the next one.
+
+        Args:
+            next_log_file (Path): The next log file in the chain
+        """
+        self._write(f"==NEXT_FILE=={str(next_log_file)}==END==\n")
+
+    def flush(self) -> None:
+        """
+        Flush the lines written to the file. Compressed lines are only written
+        at the end of each block.
+        """
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        """Close the log file and write its index."""
+        if self._file is None:
+            return
+
+        if self.compression is None:
+            index = self._index_builder.build()
+        else:
+            self._writeFrame()
+            index = {
+                "version": FTLOG_VERSION,
+                "compression": self.compression,
+                "size": self._size,
+                "blocks": self._frame_blocks,
+            }
+
+        self._file.close()
+        self._file = None
+        saveIndex(self.log_file, index)
+
+
+def mergeLogs(
+    log_files: Iterable[Path],
+    destination: Path,
+    progress_callback: Optional[Callable[[int], None]] = None,
+) -> None:
+    """
+    Join a chain of log files into one file, the index of each log file is
+    shifted and joined into the index of the destination. Files without a valid
+    index are indexed first, and any incomplete frame at the end of a
+    compressed file is dropped. The files are copied in chunks so they are
+    never read fully into memory. Once the destination is complete the log
+    files and their indexes are removed.
+
+    The log files must all have the same compression as the destination.
+
+    Args:
+        log_files (Iterable[Path]): The log files in the order they were written
+        destination (Path): The file to write the joined logs to, this is overwritten
+        progress_callback (Optional[Callable[[int], None]], optional): Called with the number of bytes of each chunk copied. Defaults to None.
+    """
+    log_files = list(log_files)
+    blocks: List[FTLogIndexBlock] = []
+    size = 0
+
+    with open(destination, "wb") as destination_handle:
+        for log_file in log_files:
+            index = loadIndex(log_file) or buildIndex(log_file)
+            for block in index["blocks"]:
+                blocks.append({**block, "offset": block["offset"] + size})
+
+            with open(log_file, "rb") as log_file_handle:
+                remaining = index["size"]
+                while remaining > 0:
+                    data = log_file_handle.read(min(remaining, FTLOG_READ_CHUNK_SIZE))
+                    if not data:
+                        break
+                    destination_handle.write(data)
+                    remaining -= len(data)
+                    if progress_callback is not None:
+                        progress_callback(len(data))
+            size += index["size"] - remaining
+
+    saveIndex(
+        destination,
+        {
+            "version": FTLOG_VERSION,
+            "compression": getCompression(destination),
+            "size": size,
+            "blocks": blocks,
+        },
+    )
+
+    for log_file in log_files:
+        removeLog(log_file)
+
+
+def compressLog(log_file: Path, compression: str) -> Path:
+    """
+    Compress an uncompressed log file, the lines are streamed so the log is
+    never read fully into memory. The uncompressed file and its index are
+    removed once the compressed file is complete.
+
+    Args:
+        log_file (Path): The uncompressed FTLog file
+        compression (str): The compression to use
+
+    Returns:
+        Path: The compressed log file
+    """
+    compressed_log_file = log_file.with_name(
+        log_file.name + FTLOG_COMPRESSION_SUFFIXES[compression]
+    )
+
+    writer = FTLogWriter(compressed_log_file, None, compression=compression)
+    try:
+        with open(log_file, "rb") as log_file_handle:
+            for raw_line in log_file_handle:
+                writer.writeLine(raw_line.decode(errors="replace"))
+        writer.close()
+    except Exception:
+        # Keep the uncompressed log if it could not be compressed
+        writer.close()
+        removeLog(compressed_log_file)
+        raise
+
+    removeLog(log_file)
+    return compressed_log_file
+
+
+def convertToV2(log_file: Path, destination: Optional[Path] = None) -> Path:
+    """
+    Convert a v1 log file into a v2 log file with an index. The lines are kept
+    the same, with the version marker added after the start time.
+
+    Args:
+        log_file (Path): The uncompressed v1 log file
+        destination (Optional[Path], optional): Where to write the v2 file. Defaults to replacing the v1 file.
+
+    Returns:
+        Path: The v2 log file
+    """
+    target = destination if destination is not None else log_file
+    temporary_file = target.with_name(target.name + ".converting")
+    builder = FTLogIndexBuilder()
+
+    def write(raw_line: bytes) -> None:
+        converted.write(raw_line)
+        builder.addLine(raw_line.decode(errors="replace"), len(raw_line))
+
+    with open(log_file, "rb") as source, open(temporary_file, "wb") as converted:
+        for line_number, raw_line in enumerate(source):
+            if raw_line.startswith(b"==FTLOG_VERSION=="):
+                continue
+            write(raw_line)
+            if line_number == 0 and raw_line.startswith(b"==START_TIME=="):
+                write(versionLine().encode())
+
+    os.replace(temporary_file, target)
+    saveIndex(target, builder.build())
+    return target
+
+
+class FTLogReader:
+    def __init__(self, log_file: Path) -> None:
+        """
+        Reads an FTLog file using its index to skip the parts which are not
+        needed. If the file has no valid index, such as a v1 file, one is built
+        in memory.
+
+        Args:
+            log_file (Path): The FTLog file
+        """
+        self.log_file = log_file
+        self.index = loadIndex(log_file) or buildIndex(log_file)
+
+    @property
+    def start_time(self) -> Optional[float]:
+        return min(
+            (block["start_time"] for block in self.index["blocks"]), default=None
+        )
+
+    @property
+    def end_time(self) -> Optional[float]:
+        return max((block["end_time"] for block in self.index["blocks"]), default=None)
+
+    def getMessageCounts(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict[str, int]: The number of messages of each type in the log
+        """
+        counts: Dict[str, int] = {}
+        for block in self.index["blocks"]:
+            for message_type, count in block["counts"].items():
+                counts[message_type] = counts.get(message_type, 0) + count
+        return counts
+
+    def iterMessages(
+        self,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+        message_types: Optional[Iterable[str]] = None,
+    ) -> Iterator[FTLogMessage]:
+        """
+        Iterate over the messages in the log in the order they were written.
+
+        Args:
+            start_time (Optional[float], optional): Skip messages before this time. Defaults to None.
+            end_time (Optional[float], optional): Skip messages after this time. Defaults to None.
+            message_types (Optional[Iterable[str]], optional): Only include these message types. Defaults to every type.
+
+        Yields:
+            FTLogMessage: Each message which matches
+        """
+        wanted_types: Optional[Set[str]] = (
+            set(message_types) if message_types is not None else None
+        )
+
+        with open(self.log_file, "rb") as log_file_handle:
+            for block in self.index["blocks"]:
+                if start_time is not None and block["end_time"] < start_time:
+                    continue
+                if end_time is not None and block["start_time"] > end_time:
+                    continue
+                if wanted_types is not None and wanted_types.isdisjoint(
+                    block["counts"]
+                ):
+                    continue
+
+                log_file_handle.seek(block["offset"])
+                data = log_file_handle.read(block["length"])
+                if self.index["compression"] is not None:
+                    data = decompressFrame(data, self.index["compression"])
+
+                for raw_line in data.splitlines():
+                    message = parseLine(raw_line.decode(errors="replace"))
+                    if message is None:
+                        continue
+                    if start_time is not None and message["timestamp"] < start_time:
+                        continue
+                    if end_time is not None and message["timestamp"] > end_time:
+                        continue
+                    if (
+                        wanted_types is not None
+                        and message["message_type"] not in wanted_types
+                    ):
+                        continue
+                    yield message
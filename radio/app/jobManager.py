@@ -0,0 +1,374 @@
+import time
+from collections import OrderedDict, deque
+from logging import Logger
+from threading import Condition, Event, Thread
+from typing import Any, Callable, Deque, Dict, List, Optional
+from uuid import uuid4
+
+from app.customTypes import JobInfo
+from app.progressReporter import ProgressReporter
+
+# Jobs which use the same resource run one at a time in the order they were
+# submitted, jobs on different resources run at the same time
+JOB_RESOURCES = ["link", "ftp", "mission"]
+
+JOB_STATE_QUEUED = "queued"
+JOB_STATE_RUNNING = "running"
+JOB_STATE_SUCCEEDED = "succeeded"
+JOB_STATE_FAILED = "failed"
+JOB_STATE_CANCELLED = "cancelled"
+JOB_FINISHED_STATES = {JOB_STATE_SUCCEEDED, JOB_STATE_FAILED, JOB_STATE_CANCELLED}
+
+# The number of finished jobs kept so their results can be retrieved
+JOB_HISTORY_SIZE = 50
+# How long a socket.io event waits for its job to start before giving up, so
+# its handler thread is not held up behind every queued job on the resource
+JOB_RUN_QUEUE_TIMEOUT_SECS = 30.0
+
+
+class Job:
+    def __init__(
+        self,
+        job_type: str,
+        resource: str,
+        func: Callable[["Job"], Any],
+        progress_callback: Optional[Callable[[Any, Optional[float]], None]] = None,
+        notify: bool = True,
+        cancellable: bool = False,
+    ) -> None:
+        """
+        A long running operation which is run by the JobManager.
+
+        Args:
+            job_type (str): The name of the operation, e.g. "read_file"
+            resource (str): The resource the job uses, one of JOB_RESOURCES
+            func (Callable[[Job], Any]): Runs the operation and returns its result, it is given the job to report progress and check for cancellation
+            progress_callback (Optional[Callable[[Any, Optional[float]], None]], optional): Called with every progress update. Defaults to None.
+            notify (bool, optional): Send job events to the clients. Defaults to True.
+            cancellable (bool, optional): The operation stops when Job.isCancelled is set, so it can be cancelled whilst running. Defaults to False.
+        """
+        self.id = uuid4().hex
+        self.type = job_type
+        self.resource = resource
+        self.func = func
+        self.progress_callback = progress_callback
+        self.notify = notify
+        self.cancellable = cancellable
+
+        self.state = JOB_STATE_QUEUED
+        self.progress: Optional[float] = None
+        self.result: Optional[Any] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+        self.progress_reporter: Optional[ProgressReporter] = None
+        self._cancel_event = Event()
+        self._started_event = Event()
+        self._finished_event = Event()
+
+    def updateProgress(self, data: Any, percent: Optional[float] = None) -> None:
+        """
+        Report the progress of the job, updates are throttled before being sent.
+
+        Args:
+            data (Any): The progress data
+            percent (Optional[float], optional): How complete the job is, from 0 to 100. Defaults to None.
+        """
+        if percent is not None:
+            self.progress = percent
+        if self.progress_callback is not None:
+            self.progress_callback(data, percent)
+        if self.progress_reporter is not None:
+            self.progress_reporter.update(
+                {"id": self.id, "progress": percent, "data": data}, percent=percent
+            )
+
+    def isCancelled(self) -> bool:
+        """
+        Returns:
+            bool: True if the job has been asked to stop
+        """
+        return self._cancel_event.is_set()
+
+    def isFinished(self) -> bool:
+        return self._finished_event.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the job to finish.
+
+        Args:
+            timeout (Optional[float], optional): How long to wait, None to wait forever. Defaults to None.
+
+        Returns:
+            bool: True if the job finished before the timeout
+        """
+        return self._finished_event.wait(timeout)
+
+    def toDict(self) -> JobInfo:
+        return {
+            "id": self.id,
+            "type": self.type,
+            "resource": self.resource,
+            "state": self.state,
+            "progress": self.progress,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+        }
+
+
+class JobManager:
+    def __init__(
+        self,
+        logger: Logger,
+        emit_func: Optional[Callable[[str, Any], None]] = None,
+        history_size: int = JOB_HISTORY_SIZE,
+    ) -> None:
+        """
+        Runs long operations such as parameter refreshes, mission transfers
+        and FTP downloads in the background, so they do not hold up the
+        socket.io handler which started them.
+
+        Each resource has its own queue and worker thread, so jobs which would
+        conflict, e.g. two FTP downloads, are queued instead of being rejected.
+        Jobs can be cancelled whilst queued, and whilst running if they were
+        submitted as cancellable, meaning their operation checks
+        Job.isCancelled. The result of a job can be retrieved once it has
+        finished.
+
+        Clients are sent a "job_update" event whenever a job changes state and
+        throttled "job_progress" events whilst it is running.
+
+        Args:
+            logger (Logger): The logger to use
+            emit_func (Optional[Callable[[str, Any], None]], optional): Sends an event to the clients, e.g. socketio.emit. Defaults to None.
+            history_size (int, optional): The number of finished jobs to keep. Defaults to JOB_HISTORY_SIZE.
+        """
+        self.logger = logger
+        self.emit_func = emit_func
+        self.history_size = history_size
+
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queues: Dict[str, Deque[Job]] = {
+            resource: deque() for resource in JOB_RESOURCES
+        }
+        self._workers: Dict[str, Thread] = {}
+        self._condition = Condition()
+
+    def _emit(self, job: Job, event: str, data: Any) -> None:
+        if job.notify and self.emit_func is not None:
+            self.emit_func(event, data)
+
+    def submit(
+        self,
+        job_type: str,
+        resource: str,
+        func: Callable[[Job], Any],
+        progress_callback: Optional[Callable[[Any, Optional[float]], None]] = None,
+        notify: bool = True,
+        cancellable: bool = False,
+    ) -> Job:
+        """
+        Queue a job to run once every earlier job on its resource has finished.
+
+        Args:
+            job_type (str): The name of the operation, e.g. "read_file"
+            resource (str): The resource the job uses, one of JOB_RESOURCES
+            func (Callable[[Job], Any]): Runs the operation and returns its result
+            progress_callback (Optional[Callable[[Any, Optional[float]], None]], optional): Called with every progress update. Defaults to None.
+            notify (bool, optional): Send job events to the clients. Defaults to True.
+            cancellable (bool, optional): The operation stops when Job.isCancelled is set. Defaults to False.
+
+        Raises:
+            ValueError: If the resource is not one of JOB_RESOURCES
+
+        Returns:
+            Job: The queued job
+        """
+        if resource not in self._queues:
+            raise ValueError(f"Unknown job resource: {resource}")
+
+        job = Job(job_type, resource, func, progress_callback, notify, cancellable)
+        # Sent before the job is queued so it always arrives before the job starts
+        self._emit(job, "job_update", job.toDict())
+        with self._condition:
+            self.jobs[job.id] = job
+            self._queues[resource].append(job)
+            if resource not in self._workers:
+                worker = Thread(target=self._runJobs, args=(resource,), daemon=True)
+                self._workers[resource] = worker
+                worker.start()
+            self._condition.notify_all()
+
+        self.logger.debug(f"Queued {job_type} job {job.id} on {resource}")
+        return job
+
+    def run(
+        self,
+        job_type: str,
+        resource: str,
+        func: Callable[[Job], Any],
+        progress_callback: Optional[Callable[[Any, Optional[float]], None]] = None,
+        cancellable: bool = False,
+        queue_timeout: float = JOB_RUN_QUEUE_TIMEOUT_SECS,
+    ) -> Any:
+        """
+        Queue a job without sending job events and wait for its result, this is
+        used by the socket.io events which reply with the result directly.
+
+        If the job has not started within queue_timeout it is removed from the
+        queue, the operations themselves time out if the drone stops answering.
+
+        Args:
+            job_type (str): The name of the operation, e.g. "read_file"
+            resource (str): The resource the job uses, one of JOB_RESOURCES
+            func (Callable[[Job], Any]): Runs the operation and returns its result
+            progress_callback (Optional[Callable[[Any, Optional[float]], None]], optional): Called with every progress update. Defaults to None.
+            cancellable (bool, optional): The operation stops when Job.isCancelled is set. Defaults to False.
+            queue_timeout (float, optional): How long to wait for the job to start. Defaults to JOB_RUN_QUEUE_TIMEOUT_SECS.
+
+        Returns:
+            Any: The result of the job
+        """
+        job = self.submit(
+            job_type,
+            resource,
+            func,
+            progress_callback,
+            notify=False,
+            cancellable=cancellable,
+        )
+        if not job._started_event.wait(queue_timeout) and self._cancelIfQueued(job):
+            return {
+                "success": False,
+                "message": f"Timed out waiting for other {resource} operations to finish",
+            }
+
+        job.wait()
+        return job.result
+
+    def _runJobs(self, resource: str) -> None:
+        """Run the jobs on a resource one at a time."""
+        queue = self._queues[resource]
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: len(queue) > 0)
+                job = queue.popleft()
+                job.state = JOB_STATE_RUNNING
+                job.started_at = time.time()
+                job._started_event.set()
+
+            self._runJob(job)
+
+    def _runJob(self, job: Job) -> None:
+        if job.notify and self.emit_func is not None:
+            emit_func = self.emit_func
+            job.progress_reporter = ProgressReporter(
+                lambda data: emit_func("job_progress", data)
+            )
+        self._emit(job, "job_update", job.toDict())
+
+        try:
+            result = job.func(job)
+            state = (
+                JOB_STATE_FAILED
+                if isinstance(result, dict) and result.get("success") is False
+                else JOB_STATE_SUCCEEDED
+            )
+        except Exception as e:
+            self.logger.error(f"{job.type} job {job.id} failed: {e}", exc_info=True)
+            result = {"success": False, "message": f"{job.type} failed: {e}"}
+            state = JOB_STATE_FAILED
+
+        if job.progress_reporter is not None:
+            job.progress_reporter.flush()
+        self._finishJob(
+            job, JOB_STATE_CANCELLED if job.isCancelled() else state, result
+        )
+
+    def _finishJob(self, job: Job, state: str, result: Optional[Any]) -> None:
+        with self._condition:
+            job.state = state
+            job.result = result
+            job.finished_at = time.time()
+            self._trimHistory()
+
+        self.logger.debug(f"{job.type} job {job.id} {state}")
+        self._emit(job, "job_update", job.toDict())
+        job._finished_event.set()
+
+    def _trimHistory(self) -> None:
+        finished_ids = [
+            job_id
+            for job_id, job in self.jobs.items()
+            if job.state in JOB_FINISHED_STATES
+        ]
+        for job_id in finished_ids[: max(len(finished_ids) - self.history_size, 0)]:
+            del self.jobs[job_id]
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job, a queued job is removed from its queue and a running job
+        is asked to stop if it is cancellable.
+
+        Args:
+            job_id (str): The id of the job to cancel
+
+        Returns:
+            bool: True if the job was queued, or running and cancellable
+        """
+        with self._condition:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return False
+            if job.state == JOB_STATE_RUNNING and job.cancellable:
+                job._cancel_event.set()
+                self.logger.info(f"Cancelling {job.type} job {job.id}")
+                return True
+
+        return self._cancelIfQueued(job)
+
+    def _cancelIfQueued(self, job: Job) -> bool:
+        """Remove a job from its queue, returns False if it has already started."""
+        with self._condition:
+            if job.state != JOB_STATE_QUEUED:
+                return False
+            job._cancel_event.set()
+            self._queues[job.resource].remove(job)
+
+        self.logger.info(f"Cancelling {job.type} job {job.id}")
+        self._finishJob(
+            job,
+            JOB_STATE_CANCELLED,
+            {"success": False, "message": f"{job.type} was cancelled"},
+        )
+        return True
+
+    def cancelAll(self) -> None:
+        """Cancel every queued and running job, e.g. when the drone disconnects."""
+        with self._condition:
+            job_ids = list(self.jobs)
+        for job_id in job_ids:
+            self.cancel(job_id)
+
+    def getJob(self, job_id: str) -> Optional[Job]:
+        """
+        Args:
+            job_id (str): The id of the job
+
+        Returns:
+            Optional[Job]: The job, None if it does not exist or has been forgotten
+        """
+        with self._condition:
+            return self.jobs.get(job_id)
+
+    def getJobs(self) -> List[JobInfo]:
+        """
+        Returns:
+            List[JobInfo]: Every job which is queued, running or recently finished, oldest first
+        """
+        with self._condition:
+            return [job.toDict() for job in self.jobs.values()]
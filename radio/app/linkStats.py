@@ -0,0 +1,327 @@
+import time
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from app.customTypes import LinkStatsSource, LinkStatsWindow
+
+DEFAULT_LINK_STATS_WINDOWS_SECS = [1, 10, 60]
+TIMESYNC_REQUEST_TIMEOUT_SECS = 5.0
+MAVLINK_SEQUENCE_MODULO = 256
+
+
+class RingBuffer:
+    def __init__(self, capacity: int) -> None:
+        """
+        A fixed size buffer of numbers which keeps a running total, so the sum and
+        mean of the values in the buffer can be read without iterating over it.
+
+        Args:
+            capacity (int): The maximum number of values held in the buffer
+        """
+        if capacity < 1:
+            raise ValueError(f"Ring buffer capacity must be at least 1, got {capacity}")
+
+        self.capacity = capacity
+        self._values: List[float] = [0.0] * capacity
+        self._index = 0
+        self.count = 0
+        self.total = 0.0
+
+    def push(self, value: float) -> None:
+        """
+        Add a value to the buffer, overwriting the oldest value once full.
+
+        Args:
+            value (float): The value to add
+        """
+        if self.count == self.capacity:
+            self.total -= self._values[self._index]
+        else:
+            self.count += 1
+
+        self._values[self._index] = value
+        self.total += value
+        self._index = (self._index + 1) % self.capacity
+
+    def mean(self) -> Optional[float]:
+        """
+        Returns:
+            Optional[float]: The mean of the values in the buffer, None if it is empty
+        """
+        if self.count == 0:
+            return None
+        return self.total / self.count
+
+
+class LinkStatsEngine:
+    COUNTERS = [
+        "elapsed_secs",
+        "packets_sent",
+        "bytes_sent",
+        "packets_received",
+        "bytes_received",
+        "packets_sequenced",
+        "packets_lost",
+        "rtt_total_ms",
+        "rtt_count",
+        "jitter_total_ms",
+        "jitter_count",
+    ]
+
+    def __init__(
+        self,
+        sample_interval_secs: float = 0.5,
+        windows_secs: Optional[List[int]] = None,
+    ) -> None:
+        """
+        Computes link quality statistics over a set of sliding windows.
+
+        Each call to update adds one sample per counter to a ring buffer for every
+        window. The windows keep running totals so computing the statistics is
+        constant time regardless of the window length. Packet loss is worked out
+        from gaps in the MAVLink sequence numbers of each sysid/compid pair and
+        latency and jitter from the round trip time of TIMESYNC requests.
+
+        Args:
+            sample_interval_secs (float, optional): How often update is called. Defaults to 0.5.
+            windows_secs (Optional[List[int]], optional): The window lengths to report, in seconds. Defaults to DEFAULT_LINK_STATS_WINDOWS_SECS.
+        """
+        self.sample_interval_secs = sample_interval_secs
+        self.windows_secs = windows_secs or DEFAULT_LINK_STATS_WINDOWS_SECS
+
+        self._windows: Dict[int, Dict[str, RingBuffer]] = {}
+        for window_secs in self.windows_secs:
+            capacity = max(round(window_secs / sample_interval_secs), 1)
+            self._windows[window_secs] = {
+                counter: RingBuffer(capacity) for counter in self.COUNTERS
+            }
+
+        self._lock = Lock()
+        self._last_totals: Optional[Dict[str, int]] = None
+        self._last_sample_time: Optional[float] = None
+
+        # Per source (sysid, compid) sequence tracking
+        self._last_sequence: Dict[Tuple[int, int], int] = {}
+        self._source_received: Dict[Tuple[int, int], int] = {}
+        self._source_lost: Dict[Tuple[int, int], int] = {}
+        self._sequenced_since_sample = 0
+        self._lost_since_sample = 0
+
+        # TIMESYNC round trip tracking, keyed by the ts1 value sent in the request
+        self._pending_timesyncs: Dict[int, float] = {}
+        self._last_rtt_ms: Optional[float] = None
+        self._rtt_total_since_sample = 0.0
+        self._rtt_count_since_sample = 0
+        self._jitter_total_since_sample = 0.0
+        self._jitter_count_since_sample = 0
+
+    def recordSequence(self, sysid: int, compid: int, seq: int) -> None:
+        """
+        Record the sequence number of a received message. Any gap between this and
+        the previous sequence number from the same source is counted as lost packets.
+
+        Args:
+            sysid (int): The system ID of the sender
+            compid (int): The component ID of the sender
+            seq (int): The MAVLink sequence number of the message
+        """
+        source = (sysid, compid)
+
+        with self._lock:
+            last_seq = self._last_sequence.get(source)
+            self._last_sequence[source] = seq
+            self._source_received[source] = self._source_received.get(source, 0) + 1
+            self._sequenced_since_sample += 1
+
+            if last_seq is None:
+                return
+
+            lost = (seq - last_seq - 1) % MAVLINK_SEQUENCE_MODULO
+            # A jump of more than half the sequence space is far more likely to be
+            # a duplicate, reordered packet or a rebooted sender than real loss
+            if lost >= MAVLINK_SEQUENCE_MODULO // 2:
+                return
+
+            if lost:
+                self._source_lost[source] = self._source_lost.get(source, 0) + lost
+                self._lost_since_sample += lost
+
+    def createTimesyncRequest(self) -> int:
+        """
+        Create the ts1 value for an outgoing TIMESYNC request and start timing it.
+
+        Returns:
+            int: The ts1 value to send, the response echoes this value back
+        """
+        now = time.monotonic()
+        ts1 = time.monotonic_ns()
+
+        with self._lock:
+            # Forget requests which were never answered
+            for pending_ts1, sent_at in list(self._pending_timesyncs.items()):
+                if now - sent_at > TIMESYNC_REQUEST_TIMEOUT_SECS:
+                    del self._pending_timesyncs[pending_ts1]
+
+            self._pending_timesyncs[ts1] = now
+
+        return ts1
+
+    def recordTimesyncResponse(self, ts1: int) -> bool:
+        """
+        Record the response to a TIMESYNC request sent by this engine.
+
+        Args:
+            ts1 (int): The ts1 value echoed back in the TIMESYNC response
+
+        Returns:
+            bool: True if the response matched an outstanding request, False otherwise
+        """
+        received_at = time.monotonic()
+
+        with self._lock:
+            sent_at = self._pending_timesyncs.pop(ts1, None)
+            if sent_at is None:
+                return False
+
+            rtt_ms = (received_at - sent_at) * 1000
+            self._rtt_total_since_sample += rtt_ms
+            self._rtt_count_since_sample += 1
+
+            if self._last_rtt_ms is not None:
+                self._jitter_total_since_sample += abs(rtt_ms - self._last_rtt_ms)
+                self._jitter_count_since_sample += 1
+
+            self._last_rtt_ms = rtt_ms
+
+        return True
+
+    def update(self, totals: Dict[str, int]) -> None:
+        """
+        Add a sample to every window using the difference between these totals and
+        the totals from the previous update.
+
+        Args:
+            totals (Dict[str, int]): The total_packets_sent, total_bytes_sent,
+                total_packets_received and total_bytes_received link counters
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            if self._last_totals is None or self._last_sample_time is None:
+                self._last_totals = dict(totals)
+                self._last_sample_time = now
+                return
+
+            sample = {
+                "elapsed_secs": now - self._last_sample_time,
+                "packets_sent": totals["total_packets_sent"]
+                - self._last_totals["total_packets_sent"],
+                "bytes_sent": totals["total_bytes_sent"]
+                - self._last_totals["total_bytes_sent"],
+                "packets_received": totals["total_packets_received"]
+                - self._last_totals["total_packets_received"],
+                "bytes_received": totals["total_bytes_received"]
+                - self._last_totals["total_bytes_received"],
+                "packets_sequenced": self._sequenced_since_sample,
+                "packets_lost": self._lost_since_sample,
+                "rtt_total_ms": self._rtt_total_since_sample,
+                "rtt_count": self._rtt_count_since_sample,
+                "jitter_total_ms": self._jitter_total_since_sample,
+                "jitter_count": self._jitter_count_since_sample,
+            }
+
+            self._last_totals = dict(totals)
+            self._last_sample_time = now
+            self._sequenced_since_sample = 0
+            self._lost_since_sample = 0
+            self._rtt_total_since_sample = 0.0
+            self._rtt_count_since_sample = 0
+            self._jitter_total_since_sample = 0.0
+            self._jitter_count_since_sample = 0
+
+            for buffers in self._windows.values():
+                for counter, value in sample.items():
+                    buffers[counter].push(value)
+
+    def getWindowStats(self, window_secs: int) -> LinkStatsWindow:
+        """
+        Get the statistics for a single window.
+
+        Args:
+            window_secs (int): The window length, must be one of windows_secs
+
+        Returns:
+            LinkStatsWindow: The statistics for the window
+        """
+        with self._lock:
+            totals = {
+                counter: buffer.total
+                for counter, buffer in self._windows[window_secs].items()
+            }
+
+        elapsed_secs = totals["elapsed_secs"]
+        packets_lost = totals["packets_lost"]
+        expected_packets = totals["packets_sequenced"] + packets_lost
+
+        def perSecond(value: float) -> float:
+            return value / elapsed_secs if elapsed_secs > 0 else 0.0
+
+        return {
+            "packets_sent_per_sec": perSecond(totals["packets_sent"]),
+            "bytes_sent_per_sec": perSecond(totals["bytes_sent"]),
+            "packets_received_per_sec": perSecond(totals["packets_received"]),
+            "bytes_received_per_sec": perSecond(totals["bytes_received"]),
+            "packets_lost": int(packets_lost),
+            "packet_loss_percent": (
+                packets_lost / expected_packets * 100 if expected_packets > 0 else 0.0
+            ),
+            "rtt_ms": (
+                totals["rtt_total_ms"] / totals["rtt_count"]
+                if totals["rtt_count"] > 0
+                else None
+            ),
+            "jitter_ms": (
+                totals["jitter_total_ms"] / totals["jitter_count"]
+                if totals["jitter_count"] > 0
+                else None
+            ),
+        }
+
+    def getSourceStats(self) -> List[LinkStatsSource]:
+        """
+        Get the packet loss for each sysid/compid pair heard on the link since it
+        was opened.
+
+        Returns:
+            List[LinkStatsSource]: The statistics for each source
+        """
+        with self._lock:
+            sources: List[LinkStatsSource] = []
+            for source, received in self._source_received.items():
+                lost = self._source_lost.get(source, 0)
+                sources.append(
+                    {
+                        "sysid": source[0],
+                        "compid": source[1],
+                        "packets_received": received,
+                        "packets_lost": lost,
+                        "packet_loss_percent": lost / (received + lost) * 100,
+                    }
+                )
+
+        return sources
+
+    def getStats(self) -> Dict[str, LinkStatsWindow]:
+        """
+        Returns:
+            Dict[str, LinkStatsWindow]: The statistics for each window, keyed by the
+                window length e.g. "10s"
+        """
+        return {
+            f"{window_secs}s": self.getWindowStats(window_secs)
+            for window_secs in self.windows_secs
+        }
+
+    @property
+    def last_rtt_ms(self) -> Optional[float]:
+        return self._last_rtt_ms
@@ -0,0 +1,220 @@
+import time
+from logging import Logger
+from threading import Event, Thread, current_thread
+from typing import Callable, Optional
+
+from app.customTypes import LinkResyncResult, LinkStatus
+
+# The link is treated as lost once no heartbeat has been received for this long
+LINK_LOST_TIMEOUT_SECS = 3.0
+# How long to wait for a heartbeat after the link has been reopened
+LINK_HEARTBEAT_WAIT_SECS = 3.0
+LINK_REOPEN_INTERVAL_SECS = 1.0
+# The drone is disconnected if the link has not been recovered in this time
+LINK_RECOVERY_TIMEOUT_SECS = 60.0
+LINK_WATCHDOG_INTERVAL_SECS = 0.25
+
+LINK_STATE_CONNECTED = "connected"
+LINK_STATE_LOST = "lost"
+LINK_STATE_RECONNECTING = "reconnecting"
+LINK_STATE_RESYNCING = "resyncing"
+LINK_STATE_FAILED = "failed"
+
+
+class LinkWatchdog:
+    def __init__(
+        self,
+        logger: Logger,
+        get_heartbeat_age: Callable[[], float],
+        reopen_func: Callable[[], bool],
+        resync_func: Callable[[], LinkResyncResult],
+        status_callback: Optional[Callable[[LinkStatus], None]] = None,
+        failed_callback: Optional[Callable[[], None]] = None,
+        lost_timeout_secs: float = LINK_LOST_TIMEOUT_SECS,
+        recovery_timeout_secs: float = LINK_RECOVERY_TIMEOUT_SECS,
+    ) -> None:
+        """
+        Watches the age of the last heartbeat from the drone and recovers the
+        link in place when it is lost, e.g. when a telemetry radio briefly
+        drops out in flight.
+
+        The link is lost when no heartbeat has been received for the timeout
+        or when a link error, such as a serial exception, is reported. The
+        link is then reopened until a heartbeat is received on it, after
+        which only the state which may have changed whilst it was down is
+        resynced. If the link cannot be recovered in time the failed callback
+        is called so the drone can be disconnected as before.
+
+        Args:
+            logger (Logger): The logger to use
+            get_heartbeat_age (Callable[[], float]): Returns the seconds since the last heartbeat from the drone
+            reopen_func (Callable[[], bool]): Closes and reopens the port or socket, returns True if it was opened
+            resync_func (Callable[[], LinkResyncResult]): Checks what changed whilst the link was down
+            status_callback (Optional[Callable[[LinkStatus], None]], optional): Called whenever the state of the link changes. Defaults to None.
+            failed_callback (Optional[Callable[[], None]], optional): Called if the link could not be recovered. Defaults to None.
+            lost_timeout_secs (float, optional): How long without a heartbeat before the link is lost. Defaults to LINK_LOST_TIMEOUT_SECS.
+            recovery_timeout_secs (float, optional): How long to try to recover the link for. Defaults to LINK_RECOVERY_TIMEOUT_SECS.
+        """
+        self.logger = logger
+        self.get_heartbeat_age = get_heartbeat_age
+        self.reopen_func = reopen_func
+        self.resync_func = resync_func
+        self.status_callback = status_callback
+        self.failed_callback = failed_callback
+        self.lost_timeout_secs = lost_timeout_secs
+        self.recovery_timeout_secs = recovery_timeout_secs
+
+        self.state = LINK_STATE_CONNECTED
+        self.reason: Optional[str] = None
+        self.losses = 0
+        self.reopen_attempts = 0
+        self.last_recovery_secs: Optional[float] = None
+        self.last_resync: Optional[LinkResyncResult] = None
+
+        self._link_error: Optional[str] = None
+        self._wake_event = Event()
+        self._stop_event = Event()
+        self._thread: Optional[Thread] = None
+
+    def start(self) -> None:
+        """Start watching the link."""
+        if self._thread is not None:
+            return
+
+        self._stop_event.clear()
+        self._thread = Thread(target=self._watchLink, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching the link, any recovery in progress is abandoned."""
+        self._stop_event.set()
+        self._wake_event.set()
+
+        thread = self._thread
+        self._thread = None
+        if thread is not None and thread is not current_thread():
+            thread.join(timeout=3)
+
+    def isRecovering(self) -> bool:
+        return self.state in (
+            LINK_STATE_LOST,
+            LINK_STATE_RECONNECTING,
+            LINK_STATE_RESYNCING,
+        )
+
+    def reportLinkError(self, reason: str) -> None:
+        """
+        Report that the link failed, e.g. the serial port was unplugged, so it
+        is recovered without waiting for the heartbeat timeout.
+
+        Args:
+            reason (str): What went wrong
+        """
+        if self._link_error is None:
+            self._link_error = reason
+        self._wake_event.set()
+
+    def getStatus(self) -> LinkStatus:
+        """
+        Returns:
+            LinkStatus: The state of the link and how often it has been recovered
+        """
+        return {
+            "state": self.state,
+            "reason": self.reason,
+            "heartbeat_age_secs": round(self.get_heartbeat_age(), 2),
+            "losses": self.losses,
+            "reopen_attempts": self.reopen_attempts,
+            "last_recovery_secs": self.last_recovery_secs,
+            "resync": self.last_resync,
+        }
+
+    def _setState(self, state: str, reason: Optional[str] = None) -> None:
+        self.state = state
+        self.reason = reason
+        if self.status_callback is not None:
+            try:
+                self.status_callback(self.getStatus())
+            except Exception as e:
+                self.logger.error(f"Failed to send link status: {e}", exc_info=True)
+
+    def _watchLink(self) -> None:
+        while not self._stop_event.is_set():
+            self._wake_event.wait(LINK_WATCHDOG_INTERVAL_SECS)
+            self._wake_event.clear()
+            if self._stop_event.is_set():
+                return
+
+            heartbeat_age = self.get_heartbeat_age()
+            if self._link_error is not None:
+                reason = self._link_error
+            elif heartbeat_age > self.lost_timeout_secs:
+                reason = f"No heartbeat for {heartbeat_age:.1f}s"
+            else:
+                continue
+
+            if not self._recoverLink(reason):
+                return
+
+    def _recoverLink(self, reason: str) -> bool:
+        """
+        Reopen the link until a heartbeat is received, then resync.
+
+        Returns:
+            bool: True if the link was recovered, False if recovery failed or was stopped
+        """
+        lost_time = time.monotonic()
+        deadline = lost_time + self.recovery_timeout_secs
+        self.losses += 1
+        self.logger.warning(f"Link lost: {reason}")
+        self._setState(LINK_STATE_LOST, reason)
+
+        while not self._stop_event.is_set():
+            if time.monotonic() > deadline:
+                self.logger.error(
+                    f"Link not recovered after {self.recovery_timeout_secs:.0f}s"
+                )
+                self._setState(LINK_STATE_FAILED, reason)
+                if self.failed_callback is not None:
+                    self.failed_callback()
+                return False
+
+            self._setState(LINK_STATE_RECONNECTING, reason)
+            self.reopen_attempts += 1
+            self._link_error = None
+            reopen_time = time.monotonic()
+
+            try:
+                reopened = self.reopen_func()
+            except Exception as e:
+                self.logger.warning(f"Failed to reopen the link: {e}", exc_info=True)
+                reopened = False
+
+            if reopened and self._waitForHeartbeat(reopen_time, deadline):
+                break
+            self._stop_event.wait(LINK_REOPEN_INTERVAL_SECS)
+        else:
+            return False
+
+        self._setState(LINK_STATE_RESYNCING, reason)
+        try:
+            self.last_resync = self.resync_func()
+        except Exception as e:
+            self.logger.error(f"Failed to resync after link loss: {e}", exc_info=True)
+            self.last_resync = None
+
+        self.last_recovery_secs = round(time.monotonic() - lost_time, 2)
+        self.logger.info(f"Link recovered in {self.last_recovery_secs}s")
+        self._setState(LINK_STATE_CONNECTED)
+        return True
+
+    def _waitForHeartbeat(self, reopen_time: float, deadline: float) -> bool:
+        """Wait for a heartbeat received after the link was reopened."""
+        wait_until = min(reopen_time + LINK_HEARTBEAT_WAIT_SECS, deadline)
+        while time.monotonic() < wait_until:
+            if self._stop_event.is_set() or self._link_error is not None:
+                return False
+            if self.get_heartbeat_age() < time.monotonic() - reopen_time:
+                return True
+            self._stop_event.wait(0.05)
+        return False
@@ -0,0 +1,415 @@
+import json
+import os
+import shutil
+import time
+from logging import Logger
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional
+
+from app.customTypes import LogManifestEntry
+from app.ftlog import (
+    buildIndex,
+    compressLog,
+    getCompression,
+    getIndexPath,
+    isLogFile,
+    loadIndex,
+    removeLog,
+    saveIndex,
+)
+
+LOG_MANIFEST_FILE_NAME = "manifest.json"
+LOG_MANIFEST_VERSION = 1
+
+# Logs are kept for as long as they fit in the budget, the oldest logs are
+# removed first once the budget is exceeded. Every policy is opt-in so saved
+# logs are never removed without the user choosing a budget. Low free space
+# only gives a warning as other applications may have filled the disk, and
+# compression is opt-in as the log analyser only opens uncompressed logs
+LOG_RETENTION_MAX_AGE_DAYS: Optional[float] = None
+LOG_RETENTION_MAX_TOTAL_BYTES: Optional[int] = None
+LOG_RETENTION_MIN_FREE_BYTES: Optional[int] = None
+LOG_COMPRESS_AFTER_DAYS: Optional[float] = None
+LOG_COMPRESSION = "gzip"
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+class LogStorageManager:
+    def __init__(
+        self,
+        log_directory: Path,
+        logger: Logger,
+        max_age_days: Optional[float] = LOG_RETENTION_MAX_AGE_DAYS,
+        max_total_bytes: Optional[int] = LOG_RETENTION_MAX_TOTAL_BYTES,
+        min_free_bytes: Optional[int] = LOG_RETENTION_MIN_FREE_BYTES,
+        compress_after_days: Optional[float] = LOG_COMPRESS_AFTER_DAYS,
+        compression: str = LOG_COMPRESSION,
+    ) -> None:
+        """
+        Keeps a manifest of the logs in the log directory so they can be looked
+        up without listing the directory, and removes or compresses old logs so
+        the logs stay within their budget.
+
+        The manifest also lists the temp log files of sessions which are still
+        being written, so crashed sessions can be found without listing the
+        directory. If the manifest is missing or cannot be read then it is
+        rebuilt from the files in the directory, which reads every log. The
+        manifest is only loaded when it is first needed, or by load, so
+        creating the manager never waits for it.
+
+        Args:
+            log_directory (Path): The directory the logs are saved in
+            logger (Logger): The logger to use
+            max_age_days (Optional[float], optional): Remove logs older than this. Defaults to LOG_RETENTION_MAX_AGE_DAYS.
+            max_total_bytes (Optional[int], optional): Remove the oldest logs once the logs use more than this. Defaults to LOG_RETENTION_MAX_TOTAL_BYTES.
+            min_free_bytes (Optional[int], optional): Warn when the disk has less than this free, logs are never removed for this. Defaults to LOG_RETENTION_MIN_FREE_BYTES.
+            compress_after_days (Optional[float], optional): Compress uncompressed logs older than this. Defaults to LOG_COMPRESS_AFTER_DAYS.
+            compression (str, optional): The compression used for old logs. Defaults to LOG_COMPRESSION.
+        """
+        self.log_directory = log_directory
+        self.logger = logger
+        self.max_age_days = max_age_days
+        self.max_total_bytes = max_total_bytes
+        self.min_free_bytes = min_free_bytes
+        self.compress_after_days = compress_after_days
+        self.compression = compression
+
+        self.manifest_file = log_directory.joinpath(LOG_MANIFEST_FILE_NAME)
+        self._lock = Lock()
+        self._logs: Dict[str, LogManifestEntry] = {}
+        self._temp_logs: List[str] = []
+        # Temp logs added before the manifest was loaded
+        self._pending_temp_logs: List[str] = []
+        self._is_loaded = False
+        self._load_lock = Lock()
+
+    def load(self) -> None:
+        """
+        Load the manifest if it has not been loaded yet, rebuilding it if it
+        cannot be read. This can read every log, so it is run in the
+        background.
+        """
+        with self._load_lock:
+            if self._is_loaded:
+                return
+
+            try:
+                with open(self.manifest_file) as manifest_file_handle:
+                    manifest = json.load(manifest_file_handle)
+                if manifest.get("version") != LOG_MANIFEST_VERSION:
+                    raise ValueError(
+                        f"Unknown manifest version {manifest.get('version')}"
+                    )
+                with self._lock:
+                    self._logs = manifest["logs"]
+                    self._temp_logs = manifest["temp_logs"]
+                    self._addPendingTempLogs()
+            except (OSError, ValueError, KeyError):
+                self.rebuild()
+
+    def _save(self) -> None:
+        """Write the manifest, replacing the old one in a single step."""
+        temporary_file = self.manifest_file.with_name(self.manifest_file.name + ".tmp")
+        with open(temporary_file, "w") as manifest_file_handle:
+            json.dump(
+                {
+                    "version": LOG_MANIFEST_VERSION,
+                    "logs": self._logs,
+                    "temp_logs": self._temp_logs,
+                },
+                manifest_file_handle,
+            )
+        os.replace(temporary_file, self.manifest_file)
+
+    def _addPendingTempLogs(self) -> None:
+        """Add the temp logs recorded before loading, this marks the manifest as loaded."""
+        self._is_loaded = True
+        for name in self._pending_temp_logs:
+            if name not in self._temp_logs:
+                self._temp_logs.append(name)
+        if self._pending_temp_logs:
+            self._pending_temp_logs = []
+            self._save()
+
+    def rebuild(self) -> None:
+        """Rebuild the manifest from the files in the log directory."""
+        with self._lock:
+            self._logs = {}
+            self._temp_logs = []
+
+            for file in self.log_directory.iterdir():
+                if not file.is_file() or not isLogFile(file):
+                    continue
+
+                if file.name.startswith("tmp_"):
+                    self._temp_logs.append(file.name)
+                    continue
+
+                try:
+                    self._logs[file.name] = self._createEntry(file)
+                except (OSError, ValueError):
+                    self.logger.error(f"Could not read log {file}", exc_info=True)
+
+            self._addPendingTempLogs()
+            self._save()
+
+        self.logger.info(f"Rebuilt log manifest with {len(self._logs)} logs")
+
+    def _createEntry(
+        self,
+        log_file: Path,
+        vehicle_type: Optional[int] = None,
+        system_id: Optional[int] = None,
+    ) -> LogManifestEntry:
+        """Create the manifest entry of a log from its index."""
+        index = loadIndex(log_file)
+        if index is None:
+            index = buildIndex(log_file)
+            saveIndex(log_file, index)
+
+        start_time = min(
+            (block["start_time"] for block in index["blocks"]), default=None
+        )
+        end_time = max((block["end_time"] for block in index["blocks"]), default=None)
+        stat = log_file.stat()
+
+        return {
+            "name": log_file.name,
+            "start_time": start_time,
+            "end_time": end_time,
+            "duration_secs": (
+                end_time - start_time
+                if start_time is not None and end_time is not None
+                else 0.0
+            ),
+            "size": stat.st_size + getIndexPath(log_file).stat().st_size,
+            "modified_time": stat.st_mtime,
+            "compression": getCompression(log_file),
+            "vehicle_type": vehicle_type,
+            "system_id": system_id,
+        }
+
+    def addLog(
+        self,
+        log_file: Path,
+        vehicle_type: Optional[int] = None,
+        system_id: Optional[int] = None,
+    ) -> LogManifestEntry:
+        """
+        Add a complete log to the manifest.
+
+        Args:
+            log_file (Path): The log file, this must be in the log directory
+            vehicle_type (Optional[int], optional): The type of vehicle the log is from. Defaults to None.
+            system_id (Optional[int], optional): The system id of the vehicle. Defaults to None.
+
+        Returns:
+            LogManifestEntry: The entry of the log
+        """
+        self.load()
+        entry = self._createEntry(log_file, vehicle_type, system_id)
+        with self._lock:
+            self._logs[log_file.name] = entry
+            self._save()
+        return entry
+
+    def getLog(self, name: str) -> Optional[LogManifestEntry]:
+        """
+        Args:
+            name (str): The file name of the log
+
+        Returns:
+            Optional[LogManifestEntry]: The entry of the log, None if it is not in the manifest
+        """
+        self.load()
+        with self._lock:
+            return self._logs.get(name)
+
+    def getLogs(self) -> List[LogManifestEntry]:
+        """
+        Returns:
+            List[LogManifestEntry]: The entry of every log, oldest first
+        """
+        self.load()
+        with self._lock:
+            return sorted(self._logs.values(), key=self._getLogTime)
+
+    def getTotalSize(self) -> int:
+        """
+        Returns:
+            int: The total size of the logs in bytes, including their indexes
+        """
+        self.load()
+        with self._lock:
+            return sum(entry["size"] for entry in self._logs.values())
+
+    def addTempLog(self, log_file: Path) -> None:
+        """
+        Record a temp log file which is being written. If the manifest has not
+        been loaded yet it is recorded once it has, so this never waits for it.
+
+        Args:
+            log_file (Path): The temp log file
+        """
+        with self._lock:
+            if not self._is_loaded:
+                if log_file.name not in self._pending_temp_logs:
+                    self._pending_temp_logs.append(log_file.name)
+            elif log_file.name not in self._temp_logs:
+                self._temp_logs.append(log_file.name)
+                self._save()
+
+    def removeTempLogs(self, log_files: List[Path]) -> None:
+        """
+        Stop recording temp log files once they have been joined into a log.
+
+        Args:
+            log_files (List[Path]): The temp log files
+        """
+        self.load()
+        names = {log_file.name for log_file in log_files}
+        with self._lock:
+            self._temp_logs = [name for name in self._temp_logs if name not in names]
+            self._save()
+
+    def getTempLogs(self) -> List[Path]:
+        """
+        Returns:
+            List[Path]: The temp log files which exist
+        """
+        self.load()
+        with self._lock:
+            temp_logs = [self.log_directory.joinpath(name) for name in self._temp_logs]
+        return [log_file for log_file in temp_logs if log_file.is_file()]
+
+    def removeLog(self, name: str) -> None:
+        """
+        Remove a log and its manifest entry.
+
+        Args:
+            name (str): The file name of the log
+        """
+        self.load()
+        with self._lock:
+            self._removeLog(name)
+            self._save()
+
+    def _removeLog(self, name: str) -> None:
+        try:
+            removeLog(self.log_directory.joinpath(name))
+        except FileNotFoundError:
+            pass
+        self._logs.pop(name, None)
+
+    @staticmethod
+    def _getLogTime(entry: LogManifestEntry) -> float:
+        if entry["end_time"] is not None:
+            return entry["end_time"]
+        return entry["modified_time"]
+
+    def _getFreeBytes(self) -> Optional[int]:
+        try:
+            return shutil.disk_usage(self.log_directory).free
+        except OSError:
+            return None
+
+    def enforceRetention(self, now: Optional[float] = None) -> None:
+        """
+        Compress logs older than compress_after_days, then remove logs older
+        than max_age_days. Whilst the logs use more than max_total_bytes the
+        oldest logs are removed. A warning is logged if the disk has less than
+        min_free_bytes free.
+
+        Args:
+            now (Optional[float], optional): The current time. Defaults to the time now.
+        """
+        if now is None:
+            now = time.time()
+        self.load()
+
+        if self.compress_after_days is not None:
+            compress_before = now - self.compress_after_days * SECONDS_PER_DAY
+            for entry in self.getLogs():
+                if entry["compression"] is None and self._getLogTime(entry) < (
+                    compress_before
+                ):
+                    self._compressLog(entry)
+
+        with self._lock:
+            logs = sorted(self._logs.values(), key=self._getLogTime)
+            removed = []
+
+            if self.max_age_days is not None:
+                remove_before = now - self.max_age_days * SECONDS_PER_DAY
+                while logs and self._getLogTime(logs[0]) < remove_before:
+                    removed.append(logs.pop(0))
+
+            total_bytes = sum(entry["size"] for entry in logs)
+            while logs and (
+                self.max_total_bytes is not None and total_bytes > self.max_total_bytes
+            ):
+                total_bytes -= logs[0]["size"]
+                removed.append(logs.pop(0))
+
+            for entry in removed:
+                self._removeLog(entry["name"])
+
+            if removed:
+                self._save()
+
+        for entry in removed:
+            self.logger.info(f"Removed old log {entry['name']}")
+
+        if self.min_free_bytes is not None:
+            free_bytes = self._getFreeBytes()
+            if free_bytes is not None and free_bytes < self.min_free_bytes:
+                self.logger.warning(
+                    f"Only {free_bytes / 1024**2:.0f} MiB free in {self.log_directory}, "
+                    "new logs may fail to save"
+                )
+
+    def _compressLog(self, entry: LogManifestEntry) -> None:
+        """Compress a log, keeping its manifest entry apart from its name and size."""
+        try:
+            compressed_log_file = compressLog(
+                self.log_directory.joinpath(entry["name"]), self.compression
+            )
+            compressed_entry = self._createEntry(
+                compressed_log_file, entry["vehicle_type"], entry["system_id"]
+            )
+        except (OSError, ValueError):
+            self.logger.error(f"Could not compress log {entry['name']}", exc_info=True)
+            return
+
+        with self._lock:
+            self._logs.pop(entry["name"], None)
+            self._logs[compressed_entry["name"]] = compressed_entry
+            self._save()
+
+        self.logger.info(f"Compressed old log {entry['name']}")
+
+
+_log_storage_managers: Dict[Path, LogStorageManager] = {}
+_log_storage_managers_lock = Lock()
+
+
+def getLogStorageManager(log_directory: Path, logger: Logger) -> LogStorageManager:
+    """
+    Get the storage manager of a log directory, there is only one manager for
+    each directory so the manifest is never written by two managers.
+
+    Args:
+        log_directory (Path): The directory the logs are saved in
+        logger (Logger): The logger to use if the manager is created
+
+    Returns:
+        LogStorageManager: The storage manager of the directory
+    """
+    with _log_storage_managers_lock:
+        log_storage = _log_storage_managers.get(log_directory)
+        if log_storage is None:
+            log_storage = LogStorageManager(log_directory, logger)
+            _log_storage_managers[log_directory] = log_storage
+        return log_storage
@@ -0,0 +1,217 @@
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Keyed by (message class, view name), None being the view with every field
+ConverterKey = Tuple[type, Optional[str]]
+
+
+def _decodeChar(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return value.decode(errors="backslashreplace").rstrip("\x00")
+    return value
+
+
+class MessageConverter:
+    def __init__(
+        self,
+        message_type: str,
+        field_names: List[str],
+        char_field_names: List[str],
+    ) -> None:
+        """
+        Converts MAVLink messages of a single type into dicts and FTLog lines.
+
+        The conversion functions are generated once from the message's field list
+        when the converter is created, so converting a message is a single call
+        which reads each field directly, with no per-field lookups of the message
+        schema. The output matches pymavlink's to_dict, char fields are decoded
+        to strings.
+
+        Args:
+            message_type (str): The MAVLink message type, e.g. "ATTITUDE"
+            field_names (List[str]): The fields to include, in order
+            char_field_names (List[str]): The fields which are char arrays
+        """
+        self.message_type = message_type
+        self.field_names = field_names
+
+        char_field_name_set = set(char_field_names)
+        if all(name.isidentifier() for name in field_names):
+            field_values = [
+                f"_decodeChar(msg.{name})"
+                if name in char_field_name_set
+                else f"msg.{name}"
+                for name in field_names
+            ]
+            namespace = {"_decodeChar": _decodeChar, "message_type": message_type}
+
+            dict_items = "".join(
+                f"{name!r}: {value}, " for name, value in zip(field_names, field_values)
+            )
+            self.toDict: Callable[[Any], Dict[str, Any]] = eval(
+                f"lambda msg: {{'mavpackettype': message_type, {dict_items}}}",
+                namespace,
+            )
+
+            log_line = ",".join(
+                f"{name}:{{{value}}}" for name, value in zip(field_names, field_values)
+            )
+            self.toLogLine: Callable[[Any], str] = eval(
+                f"lambda msg: f{log_line!r}", namespace
+            )
+        else:
+            self.toDict = self._toDictFallback
+            self.toLogLine = self._toLogLineFallback
+
+    def _toDictFallback(self, msg: Any) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"mavpackettype": self.message_type}
+        for name in self.field_names:
+            data[name] = _decodeChar(getattr(msg, name))
+        return data
+
+    def _toLogLineFallback(self, msg: Any) -> str:
+        return ",".join(
+            [f"{name}:{_decodeChar(getattr(msg, name))}" for name in self.field_names]
+        )
+
+
+class MessageConverterRegistry:
+    def __init__(self) -> None:
+        """
+        Creates and caches a MessageConverter for each MAVLink message type the
+        first time a message of that type is converted.
+
+        Views can be registered to only include some of the fields of a message
+        type, for example when the frontend only uses a few fields of a large
+        message. Message types which are not part of a view are converted with
+        all of their fields.
+        """
+        self._converters: Dict[ConverterKey, MessageConverter] = {}
+        # Converters with every field, keyed by message class for a faster lookup
+        self._full_converters: Dict[type, MessageConverter] = {}
+        self._views: Dict[str, Dict[str, List[str]]] = {}
+        self._lock = Lock()
+
+    def registerView(self, view: str, fields_by_type: Dict[str, List[str]]) -> None:
+        """
+        Register a view which only includes the given fields for each message type.
+
+        Args:
+            view (str): The name of the view
+            fields_by_type (Dict[str, List[str]]): The fields to include, keyed by message type
+        """
+        with self._lock:
+            self._views[view] = {
+                message_type: list(fields)
+                for message_type, fields in fields_by_type.items()
+            }
+            self._converters = {
+                key: converter
+                for key, converter in self._converters.items()
+                if key[1] != view
+            }
+
+    def getConverter(self, msg: Any, view: Optional[str] = None) -> MessageConverter:
+        """
+        Get the converter for a message, creating it if this is the first message
+        of its type.
+
+        Args:
+            msg: A MAVLink message
+            view (Optional[str], optional): The view to use. Defaults to None.
+
+        Returns:
+            MessageConverter: The converter for the message type and view
+        """
+        if view is None:
+            converter = self._full_converters.get(type(msg))
+            if converter is not None:
+                return converter
+
+        key = (type(msg), view)
+        converter = self._converters.get(key)
+        if converter is not None:
+            return converter
+
+        with self._lock:
+            converter = self._converters.get(key)
+            if converter is None:
+                converter = self._createConverter(msg, view)
+                self._converters[key] = converter
+                if view is None:
+                    self._full_converters[type(msg)] = converter
+
+        return converter
+
+    def _createConverter(self, msg: Any, view: Optional[str]) -> MessageConverter:
+        message_type = msg.get_type()
+        field_names = list(msg.get_fieldnames())
+        field_types = getattr(msg, "fieldtypes", None) or []
+        # pymavlink decodes any bytes value, not only char arrays
+        char_field_names = [
+            name
+            for name, field_type in zip(field_names, field_types)
+            if field_type == "char" or isinstance(getattr(msg, name, None), bytes)
+        ]
+
+        if view is not None:
+            view_fields = self._views.get(view, {}).get(message_type)
+            if view_fields is not None:
+                field_names = [name for name in field_names if name in view_fields]
+
+        return MessageConverter(message_type, field_names, char_field_names)
+
+    def toDict(self, msg: Any, view: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Convert a MAVLink message into a dict, falling back to the message's own
+        to_dict if it cannot be converted.
+
+        Args:
+            msg: The MAVLink message to convert
+            view (Optional[str], optional): The view to use. Defaults to None.
+
+        Returns:
+            Dict[str, Any]: The message as a dict
+        """
+        try:
+            return self.getConverter(msg, view).toDict(msg)
+        except (AttributeError, TypeError):
+            return msg.to_dict()
+
+    def toLogLine(self, msg: Any) -> str:
+        """
+        Convert a MAVLink message into the field:value pairs written to FTLog files.
+
+        Args:
+            msg: The MAVLink message to convert
+
+        Returns:
+            str: The comma separated field:value pairs
+        """
+        try:
+            return self.getConverter(msg).toLogLine(msg)
+        except (AttributeError, TypeError):
+            return ",".join(
+                [
+                    f"{name}:{value}"
+                    for name, value in msg.to_dict().items()
+                    if name != "mavpackettype"
+                ]
+            )
+
+
+message_converters = MessageConverterRegistry()
+
+
+def messageToDict(msg: Any, view: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Convert a MAVLink message into a dict using the shared converter registry.
+
+    Args:
+        msg: The MAVLink message to convert
+        view (Optional[str], optional): The view to use. Defaults to None.
+
+    Returns:
+        Dict[str, Any]: The message as a dict
+    """
+    return message_converters.toDict(msg, view)
@@ -0,0 +1,410 @@
+import time
+from collections import deque
+from logging import Logger, getLogger
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from pymavlink import mavutil
+
+from app.customTypes import PhysicalLinkStats
+from app.linkStats import MAVLINK_SEQUENCE_MODULO, RingBuffer
+
+MULTI_LINK_SEND_MODES = ["best", "all"]
+# A link which has not received anything for this long is not sent on
+MULTI_LINK_STALE_SECS = 2.0
+# Loss is measured over MULTI_LINK_HEALTH_SAMPLES samples of this length
+MULTI_LINK_HEALTH_INTERVAL_SECS = 1.0
+MULTI_LINK_HEALTH_SAMPLES = 5
+MULTI_LINK_PROBE_INTERVAL_SECS = 1.0
+# Every this much round trip time counts the same as 1% loss when scoring links
+MULTI_LINK_LATENCY_MS_PER_LOSS_PERCENT = 20.0
+# The best link is only changed if another is better by this score, so the
+# link sent on does not flap between two similar links
+MULTI_LINK_SWITCH_MARGIN = 10.0
+# A packet seen on another link within this time is a duplicate, this is
+# well under the time for the sequence number of one component to wrap
+MULTI_LINK_DEDUP_WINDOW_SECS = 1.0
+
+PacketKey = Tuple[int, int, int, int, int]
+
+
+class PhysicalLink:
+    def __init__(self, connection_string: str, connection: Any) -> None:
+        """
+        One of the physical links of a MultiLinkConnection, with the health
+        of the link measured from the packets received on it.
+
+        Args:
+            connection_string (str): The port or address of the link
+            connection (mavutil.mavfile): The MAVLink connection of the link
+        """
+        self.connection_string = connection_string
+        self.connection = connection
+
+        self.packets_received = 0
+        self.packets_lost = 0
+        self.duplicates = 0
+        self.packets_sent = 0
+        self.send_errors = 0
+        self.receive_errors = 0
+        self.last_error: Optional[str] = None
+        self.last_received_time: Optional[float] = None
+
+        self._last_seq: Dict[Tuple[int, int], int] = {}
+        self._interval_received = 0
+        self._interval_lost = 0
+        self._received_samples = RingBuffer(MULTI_LINK_HEALTH_SAMPLES)
+        self._lost_samples = RingBuffer(MULTI_LINK_HEALTH_SAMPLES)
+        self._rtt_samples = RingBuffer(MULTI_LINK_HEALTH_SAMPLES)
+        self._pending_probe: Optional[int] = None
+
+    def recordPacket(self, msg: Any, now: float) -> None:
+        """Count a packet received on this link and any gap before it."""
+        self.packets_received += 1
+        self._interval_received += 1
+        self.last_received_time = now
+
+        source = (msg.get_srcSystem(), msg.get_srcComponent())
+        last_seq = self._last_seq.get(source)
+        if last_seq is not None:
+            lost = (msg.get_seq() - last_seq - 1) % MAVLINK_SEQUENCE_MODULO
+            # A jump of more than half the sequence space is far more likely to be
+            # a duplicate, reordered packet or a rebooted sender than real loss
+            if lost < MAVLINK_SEQUENCE_MODULO // 2:
+                self.packets_lost += lost
+                self._interval_lost += lost
+        self._last_seq[source] = msg.get_seq()
+
+    def sampleHealth(self) -> None:
+        """Move the counts for the last interval into the loss window."""
+        self._received_samples.push(self._interval_received)
+        self._lost_samples.push(self._interval_lost)
+        self._interval_received = 0
+        self._interval_lost = 0
+
+    def sendProbe(self) -> None:
+        """Send a TIMESYNC request on this link only, to measure its latency."""
+        self._pending_probe = time.monotonic_ns()
+        self.connection.mav.timesync_send(0, self._pending_probe)
+
+    def recordProbeResponse(self, msg: Any) -> bool:
+        """
+        Returns:
+            bool: True if the message was the response to the last probe on this link
+        """
+        if (
+            self._pending_probe is None
+            or msg.tc1 == 0
+            or msg.ts1 != self._pending_probe
+        ):
+            return False
+
+        self._pending_probe = None
+        self._rtt_samples.push((time.monotonic_ns() - msg.ts1) / 1e6)
+        return True
+
+    def isStale(self, now: float) -> bool:
+        return (
+            self.last_received_time is None
+            or now - self.last_received_time > MULTI_LINK_STALE_SECS
+        )
+
+    @property
+    def loss_percent(self) -> float:
+        total = self._received_samples.total + self._lost_samples.total
+        if total == 0:
+            return 0.0
+        return 100 * self._lost_samples.total / total
+
+    @property
+    def rtt_ms(self) -> Optional[float]:
+        return self._rtt_samples.mean()
+
+    def getScore(self) -> float:
+        """
+        Returns:
+            float: How poor the link is from its loss and latency, lower is better
+        """
+        return self.loss_percent + (self.rtt_ms or 0) / (
+            MULTI_LINK_LATENCY_MS_PER_LOSS_PERCENT
+        )
+
+
+class MultiLinkConnection(mavutil.mavfile):
+    def __init__(
+        self,
+        connection_strings: List[str],
+        baud: int = 57600,
+        source_system: int = 255,
+        source_component: int = 0,
+        send_mode: str = "best",
+        logger: Logger = getLogger("fgcs"),
+    ) -> None:
+        """
+        A single logical MAVLink connection made of two or more physical links
+        to the same vehicle, e.g. a telemetry radio and an LTE modem.
+
+        Packets received on every link are merged, a packet already received
+        on another link is dropped as a duplicate using its system, component
+        and sequence number along with its message id and checksum. Packets
+        are sent on the link with the lowest loss and latency, or on every
+        link. Each link is probed with its own TIMESYNC requests to measure
+        its latency, these are never seen by the rest of the backend.
+
+        Args:
+            connection_strings (List[str]): The port or address of each link
+            baud (int, optional): The baud rate for links which are serial ports. Defaults to 57600.
+            source_system (int, optional): The system id to send from. Defaults to 255.
+            source_component (int, optional): The component id to send from. Defaults to 0.
+            send_mode (str, optional): Either "best" to send on the healthiest link, or "all". Defaults to "best".
+            logger (Logger, optional): The logger to use. Defaults to getLogger("fgcs").
+
+        Raises:
+            ValueError: If fewer than two links are given or the send mode is invalid
+            ConnectionError: If none of the links could be opened
+        """
+        if len(connection_strings) < 2:
+            raise ValueError(
+                "At least two links are needed for a multi link connection"
+            )
+        if send_mode not in MULTI_LINK_SEND_MODES:
+            raise ValueError(f"Invalid link send mode: {send_mode}")
+
+        self.logger = logger
+        self.send_mode = send_mode
+        self.links: List[PhysicalLink] = []
+
+        for connection_string in connection_strings:
+            try:
+                connection = mavutil.mavlink_connection(
+                    connection_string,
+                    baud=baud,
+                    source_system=source_system,
+                    source_component=source_component,
+                )
+            except Exception as e:
+                self.logger.warning(f"Could not open link {connection_string}: {e}")
+                continue
+            self.links.append(PhysicalLink(connection_string, connection))
+
+        if not self.links:
+            raise ConnectionError(
+                f"Could not open any of the links {', '.join(connection_strings)}"
+            )
+
+        super().__init__(
+            None,
+            ",".join(connection_strings),
+            source_system=source_system,
+            source_component=source_component,
+            input=False,
+        )
+
+        self.best_link: Optional[PhysicalLink] = self.links[0]
+        self.duplicates = 0
+        self._seen_packets: Dict[PacketKey, float] = {}
+        self._seen_order: Deque[Tuple[float, PacketKey]] = deque()
+        self._next_link_index = 0
+        self._next_sample_time = time.monotonic() + MULTI_LINK_HEALTH_INTERVAL_SECS
+        self._next_probe_time = time.monotonic()
+
+    def setSendMode(self, send_mode: str) -> None:
+        """
+        Args:
+            send_mode (str): Either "best" to send on the healthiest link, or "all"
+
+        Raises:
+            ValueError: If the send mode is invalid
+        """
+        if send_mode not in MULTI_LINK_SEND_MODES:
+            raise ValueError(f"Invalid link send mode: {send_mode}")
+        self.send_mode = send_mode
+
+    def recv_msg(self) -> Any:
+        """
+        Get the next packet received on any link which is not a duplicate.
+
+        Returns:
+            Optional[MAVLink_message]: The packet, None if there is nothing waiting
+
+        Raises:
+            Exception: The error from the last link if every link failed to read
+        """
+        now = time.monotonic()
+        self._updateHealth(now)
+
+        failed_links = 0
+        last_error: Optional[Exception] = None
+        for _ in range(len(self.links)):
+            link = self.links[self._next_link_index % len(self.links)]
+            self._next_link_index += 1
+
+            while True:
+                try:
+                    msg = link.connection.recv_msg()
+                except Exception as e:
+                    if link.last_error is None:
+                        self.logger.warning(
+                            f"Failed to read from link {link.connection_string}: {e}"
+                        )
+                    link.receive_errors += 1
+                    link.last_error = str(e)
+                    failed_links += 1
+                    last_error = e
+                    break
+
+                if msg is None:
+                    break
+                link.last_error = None
+                if msg.get_type() == "BAD_DATA":
+                    link.receive_errors += 1
+                    continue
+
+                link.recordPacket(msg, now)
+                if msg.get_type() == "TIMESYNC" and link.recordProbeResponse(msg):
+                    continue
+                if self._isDuplicate(msg, now):
+                    link.duplicates += 1
+                    self.duplicates += 1
+                    continue
+
+                self._acceptMessage(msg)
+                return msg
+
+        if failed_links == len(self.links) and last_error is not None:
+            raise last_error
+        return None
+
+    def _isDuplicate(self, msg: Any, now: float) -> bool:
+        while self._seen_order and (
+            now - self._seen_order[0][0] > MULTI_LINK_DEDUP_WINDOW_SECS
+        ):
+            seen_time, key = self._seen_order.popleft()
+            if self._seen_packets.get(key) == seen_time:
+                del self._seen_packets[key]
+
+        key = (
+            msg.get_srcSystem(),
+            msg.get_srcComponent(),
+            msg.get_seq(),
+            msg.get_msgId(),
+            msg.get_crc(),
+        )
+        if key in self._seen_packets:
+            return True
+
+        self._seen_packets[key] = now
+        self._seen_order.append((now, key))
+        return False
+
+    def _acceptMessage(self, msg: Any) -> None:
+        """Update the state of the logical connection as if it had parsed the packet."""
+        msg_buf = msg.get_msgbuf()
+        if self.first_byte:
+            self.auto_mavlink_version(msg_buf)
+
+        self.mav.total_packets_received += 1
+        self.mav.total_bytes_received += len(msg_buf)
+        self.mav.total_receive_errors = sum(link.receive_errors for link in self.links)
+
+        # The physical link has already posted the message to itself
+        msg.__dict__.pop("_posted", None)
+        self.post_message(msg)
+
+        if self.mav.callback:
+            self.mav.callback(msg, *self.mav.callback_args, **self.mav.callback_kwargs)
+
+    def _updateHealth(self, now: float) -> None:
+        if now >= self._next_probe_time:
+            self._next_probe_time = now + MULTI_LINK_PROBE_INTERVAL_SECS
+            for link in self.links:
+                try:
+                    link.sendProbe()
+                except Exception as e:
+                    link.send_errors += 1
+                    link.last_error = str(e)
+
+        if now < self._next_sample_time:
+            return
+        self._next_sample_time = now + MULTI_LINK_HEALTH_INTERVAL_SECS
+        for link in self.links:
+            link.sampleHealth()
+        self._chooseBestLink(now)
+
+    def _chooseBestLink(self, now: float) -> None:
+        live_links = [link for link in self.links if not link.isStale(now)]
+        if not live_links:
+            return
+
+        candidate = min(live_links, key=lambda link: link.getScore())
+        current = self.best_link
+        if (
+            current is None
+            or current not in live_links
+            or candidate.getScore() + MULTI_LINK_SWITCH_MARGIN < current.getScore()
+        ):
+            if candidate is not current:
+                self.logger.info(
+                    f"Sending on link {candidate.connection_string}, "
+                    f"{candidate.loss_percent:.0f}% loss and {candidate.rtt_ms or 0:.0f}ms latency"
+                )
+            self.best_link = candidate
+
+    def write(self, buf: bytes) -> None:
+        """Send a packet on the best link, or every link, depending on the send mode."""
+        if self.send_mode == "all":
+            links = self.links
+        else:
+            # Fall back to the other links if the best link cannot be written to
+            links = sorted(self.links, key=lambda link: link is not self.best_link)
+
+        sent = False
+        for link in links:
+            try:
+                link.connection.write(buf)
+            except Exception as e:
+                link.send_errors += 1
+                link.last_error = str(e)
+                continue
+
+            link.packets_sent += 1
+            sent = True
+            if self.send_mode != "all":
+                break
+
+        if not sent:
+            raise ConnectionError("Could not send on any link")
+
+    def select(self, timeout: float) -> bool:
+        time.sleep(min(timeout, 0.01))
+        return True
+
+    def close(self) -> None:
+        for link in self.links:
+            try:
+                link.connection.close()
+            except Exception as e:
+                self.logger.debug(f"Failed to close link {link.connection_string}: {e}")
+
+    def getLinkStats(self) -> List[PhysicalLinkStats]:
+        """
+        Returns:
+            List[PhysicalLinkStats]: The health of each physical link
+        """
+        now = time.monotonic()
+        return [
+            {
+                "connection_string": link.connection_string,
+                "active": link is self.best_link or self.send_mode == "all",
+                "stale": link.isStale(now),
+                "packets_received": link.packets_received,
+                "packets_lost": link.packets_lost,
+                "duplicates": link.duplicates,
+                "packets_sent": link.packets_sent,
+                "send_errors": link.send_errors,
+                "receive_errors": link.receive_errors,
+                "loss_percent": round(link.loss_percent, 2),
+                "rtt_ms": None if link.rtt_ms is None else round(link.rtt_ms, 2),
+                "last_error": link.last_error,
+            }
+            for link in self.links
+        ]
@@ -0,0 +1,358 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+from logging import Logger
+from threading import Condition, Thread, local
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Tuple
+
+from pymavlink import mavutil
+
+from app.customTypes import OutboundClassStats
+from app.linkStats import RingBuffer
+
+# The priority classes in the order they are sent, a message is only sent once
+# every class before it has nothing waiting
+OUTBOUND_PRIORITY_CLASSES = ["safety", "heartbeat", "interactive", "bulk"]
+OUTBOUND_DEFAULT_CLASS = "interactive"
+
+OUTBOUND_MESSAGE_CLASSES = {
+    "SET_MODE": "safety",
+    # Pilot input is felt as control latency if it waits behind anything else
+    "MANUAL_CONTROL": "safety",
+    "RC_CHANNELS_OVERRIDE": "safety",
+    "HEARTBEAT": "heartbeat",
+    "TIMESYNC": "heartbeat",
+    "PARAM_REQUEST_LIST": "bulk",
+    "PARAM_REQUEST_READ": "bulk",
+    # A single parameter write is interactive, batches of writes are sent
+    # inside OutboundScheduler.priorityClass("bulk")
+    "PARAM_SET": "interactive",
+    "FILE_TRANSFER_PROTOCOL": "bulk",
+    "MISSION_COUNT": "bulk",
+    "MISSION_ITEM": "bulk",
+    "MISSION_ITEM_INT": "bulk",
+    "MISSION_REQUEST_LIST": "bulk",
+    "MISSION_REQUEST_INT": "bulk",
+    "MISSION_CLEAR_ALL": "bulk",
+    "REQUEST_DATA_STREAM": "bulk",
+}
+
+# Commands which change what the vehicle is doing are sent before anything else
+OUTBOUND_SAFETY_COMMANDS = {
+    mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM,
+    mavutil.mavlink.MAV_CMD_DO_SET_MODE,
+    mavutil.mavlink.MAV_CMD_NAV_RETURN_TO_LAUNCH,
+    mavutil.mavlink.MAV_CMD_NAV_LAND,
+    mavutil.mavlink.MAV_CMD_DO_FLIGHTTERMINATION,
+    mavutil.mavlink.MAV_CMD_DO_PARACHUTE,
+}
+
+# The number of bytes which can be sent at once after the link has been idle
+OUTBOUND_BURST_BYTES = 1024
+OUTBOUND_LATENCY_SAMPLES = 100
+OUTBOUND_CLOSE_TIMEOUT_SECS = 1.0
+
+
+class OutboundClassQueue:
+    def __init__(self) -> None:
+        """The messages waiting to be sent in a priority class and their metrics."""
+        self.messages: Deque[Tuple[float, Any, bool]] = deque()
+        self.max_queued = 0
+        self.packets_sent = 0
+        self.bytes_sent = 0
+        self.latencies_ms = RingBuffer(OUTBOUND_LATENCY_SAMPLES)
+        self.max_latency_ms = 0.0
+
+    def toDict(self) -> OutboundClassStats:
+        return {
+            "queued": len(self.messages),
+            "max_queued": self.max_queued,
+            "packets_sent": self.packets_sent,
+            "bytes_sent": self.bytes_sent,
+            "mean_latency_ms": self.latencies_ms.mean(),
+            "max_latency_ms": self.max_latency_ms if self.packets_sent else None,
+        }
+
+
+class OutboundScheduler:
+    def __init__(
+        self,
+        logger: Logger,
+        bandwidth_bytes_per_sec: Optional[float] = None,
+        burst_bytes: int = OUTBOUND_BURST_BYTES,
+    ) -> None:
+        """
+        Sends every outgoing MAVLink message from a single thread, in order of
+        priority and within the bandwidth of the link.
+
+        Each message is put into a priority class. Safety commands such as
+        arming or changing mode are sent first, then heartbeats, then
+        interactive messages and finally bulk transfers such as parameters,
+        missions and FTP. Messages in the same class are sent in the order
+        they were queued. Sending from a single thread also means sequence
+        numbers are always sent in order.
+
+        If the connection fails whilst sending then every later message
+        raises the same error when it is queued, as sending directly would,
+        until the scheduler is reattached to a new connection.
+
+        If a bandwidth is given then sending is shaped with a token bucket, so
+        bulk transfers cannot fill the radio buffer and delay safety commands.
+
+        Args:
+            logger (Logger): The logger to use
+            bandwidth_bytes_per_sec (Optional[float], optional): The bandwidth of the link, None to not limit sending. Defaults to None.
+            burst_bytes (int, optional): The number of bytes which can be sent at once after the link has been idle. Defaults to OUTBOUND_BURST_BYTES.
+        """
+        self.logger = logger
+        self.bandwidth_bytes_per_sec = bandwidth_bytes_per_sec
+        self.burst_bytes = burst_bytes
+
+        self.queues: Dict[str, OutboundClassQueue] = {
+            priority_class: OutboundClassQueue()
+            for priority_class in OUTBOUND_PRIORITY_CLASSES
+        }
+        self.mav: Optional[Any] = None
+        self._send: Optional[Callable[..., None]] = None
+        self._condition = Condition()
+        self._is_active = False
+        self._is_suspended = False
+        self.dropped_while_suspended = 0
+        self._send_error: Optional[OSError] = None
+        self._local = local()
+        self._thread: Optional[Thread] = None
+        self._tokens = float(burst_bytes)
+        self._last_refill_time = time.monotonic()
+
+    def attach(self, mav: Any) -> None:
+        """
+        Send every message of a MAVLink connection through the scheduler.
+
+        Args:
+            mav (MAVLink): The MAVLink protocol object of the connection, master.mav
+        """
+        self.mav = mav
+        self._send = mav.send
+        # The generated *_send methods all call self.send, so replacing it on
+        # the instance routes every message through the scheduler
+        mav.send = self.send
+
+        self._is_active = True
+        self._thread = Thread(target=self._sendMessages, daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def getPriorityClass(mavmsg: Any) -> str:
+        """
+        Args:
+            mavmsg (MAVLink_message): The message to send
+
+        Returns:
+            str: The priority class of the message
+        """
+        message_type = mavmsg.get_type()
+        if message_type in ("COMMAND_LONG", "COMMAND_INT"):
+            if mavmsg.command in OUTBOUND_SAFETY_COMMANDS:
+                return "safety"
+            return OUTBOUND_DEFAULT_CLASS
+        return OUTBOUND_MESSAGE_CLASSES.get(message_type, OUTBOUND_DEFAULT_CLASS)
+
+    @contextmanager
+    def priorityClass(self, priority_class: str) -> Iterator[None]:
+        """
+        Put every message sent by this thread inside the block into a priority
+        class, e.g. so a batch of parameter writes is sent as bulk.
+
+        Args:
+            priority_class (str): The priority class, one of OUTBOUND_PRIORITY_CLASSES
+
+        Raises:
+            ValueError: If the priority class is not one of OUTBOUND_PRIORITY_CLASSES
+        """
+        if priority_class not in self.queues:
+            raise ValueError(f"Unknown priority class: {priority_class}")
+
+        previous_class = getattr(self._local, "priority_class", None)
+        self._local.priority_class = priority_class
+        try:
+            yield
+        finally:
+            self._local.priority_class = previous_class
+
+    def send(self, mavmsg: Any, force_mavlink1: bool = False) -> None:
+        """
+        Queue a message to be sent, this has the same signature as MAVLink.send.
+
+        Args:
+            mavmsg (MAVLink_message): The message to send
+            force_mavlink1 (bool, optional): Send the message as MAVLink 1. Defaults to False.
+
+        Raises:
+            OSError: If the connection failed whilst sending an earlier message, e.g. a SerialException
+        """
+        with self._condition:
+            if not self._is_active:
+                send = self._send
+            elif self._is_suspended:
+                self.dropped_while_suspended += 1
+                return
+            elif self._send_error is not None:
+                raise self._send_error
+            else:
+                priority_class = getattr(
+                    self._local, "priority_class", None
+                ) or self.getPriorityClass(mavmsg)
+                queue = self.queues[priority_class]
+                queue.messages.append((time.monotonic(), mavmsg, force_mavlink1))
+                queue.max_queued = max(queue.max_queued, len(queue.messages))
+                self._condition.notify()
+                return
+
+        # The scheduler has been closed, send the message straight away
+        if send is not None:
+            send(mavmsg, force_mavlink1=force_mavlink1)
+
+    def suspend(self) -> None:
+        """
+        Drop every waiting message and any message sent until reattach is
+        called, whilst the link is down. Messages are dropped instead of kept
+        so a stale command is never sent once the link comes back.
+        """
+        with self._condition:
+            self._is_suspended = True
+            for queue in self.queues.values():
+                self.dropped_while_suspended += len(queue.messages)
+                queue.messages.clear()
+
+    def reattach(self, mav: Any) -> None:
+        """
+        Send through a new connection, e.g. once a lost link has been
+        reopened, and stop dropping messages.
+
+        Args:
+            mav (MAVLink): The MAVLink protocol object of the new connection, master.mav
+        """
+        with self._condition:
+            if self.mav is not None and self.mav.send == self.send:
+                del self.mav.send
+            self.mav = mav
+            self._send = mav.send
+            mav.send = self.send
+            self._is_suspended = False
+            self._send_error = None
+            self._condition.notify()
+
+    def setBandwidth(self, bandwidth_bytes_per_sec: Optional[float]) -> None:
+        """
+        Args:
+            bandwidth_bytes_per_sec (Optional[float]): The bandwidth of the link, None to not limit sending
+        """
+        with self._condition:
+            self.bandwidth_bytes_per_sec = bandwidth_bytes_per_sec
+            self._condition.notify()
+
+    def getStats(self) -> Dict[str, OutboundClassStats]:
+        """
+        Returns:
+            Dict[str, OutboundClassStats]: The queue depth and latency of each priority class
+        """
+        with self._condition:
+            return {
+                priority_class: queue.toDict()
+                for priority_class, queue in self.queues.items()
+            }
+
+    def _refillTokens(self) -> None:
+        now = time.monotonic()
+        if self.bandwidth_bytes_per_sec is not None:
+            self._tokens = min(
+                self.burst_bytes,
+                self._tokens
+                + (now - self._last_refill_time) * self.bandwidth_bytes_per_sec,
+            )
+        self._last_refill_time = now
+
+    def _nextMessage(self) -> Optional[Tuple[OutboundClassQueue, float, Any, bool]]:
+        """Wait for the next message which can be sent, None once closed."""
+        with self._condition:
+            while True:
+                queue = next(
+                    (queue for queue in self.queues.values() if queue.messages),
+                    None,
+                )
+                if queue is None:
+                    if not self._is_active:
+                        return None
+                    self._condition.wait()
+                    continue
+
+                self._refillTokens()
+                # Messages waiting when the scheduler is closed are sent
+                # without waiting for tokens
+                if (
+                    self._is_active
+                    and self.bandwidth_bytes_per_sec is not None
+                    and self._tokens < 0
+                ):
+                    self._condition.wait(-self._tokens / self.bandwidth_bytes_per_sec)
+                    continue
+
+                queued_time, mavmsg, force_mavlink1 = queue.messages.popleft()
+                return queue, queued_time, mavmsg, force_mavlink1
+
+    def _sendMessages(self) -> None:
+        """Send the queued messages until the scheduler is closed."""
+        while (next_message := self._nextMessage()) is not None:
+            queue, queued_time, mavmsg, force_mavlink1 = next_message
+            assert self.mav is not None and self._send is not None
+
+            bytes_sent_before = self.mav.total_bytes_sent
+            try:
+                self._send(mavmsg, force_mavlink1=force_mavlink1)
+            except Exception as e:
+                self.logger.error(
+                    f"Failed to send {mavmsg.get_type()} message: {e}", exc_info=True
+                )
+                if isinstance(e, OSError):
+                    # The connection has failed, SerialException is an OSError
+                    with self._condition:
+                        self._send_error = e
+                continue
+            message_bytes = self.mav.total_bytes_sent - bytes_sent_before
+            latency_ms = (time.monotonic() - queued_time) * 1000
+
+            with self._condition:
+                # The tokens can go negative, the next message then waits until
+                # the link has had time to send this one
+                self._tokens -= message_bytes
+                queue.packets_sent += 1
+                queue.bytes_sent += message_bytes
+                queue.latencies_ms.push(latency_ms)
+                queue.max_latency_ms = max(queue.max_latency_ms, latency_ms)
+
+    def close(self, timeout_secs: float = OUTBOUND_CLOSE_TIMEOUT_SECS) -> None:
+        """
+        Send any messages which are waiting, then send messages directly again.
+
+        Args:
+            timeout_secs (float, optional): How long to wait for waiting messages to be sent. Defaults to OUTBOUND_CLOSE_TIMEOUT_SECS.
+        """
+        with self._condition:
+            self._is_active = False
+            self._condition.notify()
+
+        if self._thread is not None:
+            self._thread.join(timeout=timeout_secs)
+            self._thread = None
+
+        with self._condition:
+            dropped = sum(len(queue.messages) for queue in self.queues.values())
+            for queue in self.queues.values():
+                queue.messages.clear()
+
+        if self.mav is not None and self.mav.send == self.send:
+            del self.mav.send
+        self.mav = None
+
+        if dropped:
+            self.logger.warning(f"Dropped {dropped} messages which were not sent")
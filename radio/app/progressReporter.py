@@ -0,0 +1,171 @@
+import time
+from threading import Lock
+from typing import Any, Callable, Optional
+
+from . import socketio
+
+PROGRESS_MIN_INTERVAL_SECS = 0.2
+PROGRESS_MIN_PERCENT_STEP = 1.0
+
+# If any client has more than this many packets waiting to be sent to it then
+# progress updates are held back, up to PROGRESS_MAX_BACKPRESSURE_DELAY_SECS
+PROGRESS_BACKPRESSURE_QUEUE_SIZE = 50
+PROGRESS_MAX_BACKPRESSURE_DELAY_SECS = 2.0
+
+
+def getMaxClientQueueSize() -> int:
+    """
+    Get the largest number of packets waiting to be sent to any connected
+    socket.io client. This is used as a measure of how far behind the slowest
+    client is.
+
+    Returns:
+        int: The largest outgoing queue size, 0 if it cannot be determined
+    """
+    try:
+        eio_sockets = socketio.server.eio.sockets
+        return max(
+            (eio_socket.queue.qsize() for eio_socket in list(eio_sockets.values())),
+            default=0,
+        )
+    except Exception:
+        return 0
+
+
+def socketioEmitter(
+    event: str, namespace: Optional[str] = None
+) -> Callable[[Any], None]:
+    """
+    Create an emit function for a socket.io event, to be used with a ProgressReporter.
+
+    Args:
+        event (str): The name of the socket.io event to emit
+        namespace (Optional[str], optional): The namespace to emit on. Defaults to None.
+
+    Returns:
+        Callable[[Any], None]: A function which emits its argument as the event data
+    """
+
+    def emit(data: Any) -> None:
+        socketio.emit(event, data, namespace=namespace)
+
+    return emit
+
+
+class ProgressReporter:
+    def __init__(
+        self,
+        emit_func: Callable[[Any], None],
+        min_interval_secs: float = PROGRESS_MIN_INTERVAL_SECS,
+        min_percent_step: float = PROGRESS_MIN_PERCENT_STEP,
+        check_backpressure: bool = True,
+    ) -> None:
+        """
+        Throttles progress updates for a single operation so bulk transfers do not
+        send an event for every message received.
+
+        The first update is always sent straight away. After that an update is
+        only sent once at least min_interval_secs have passed and the progress has
+        moved on by at least min_percent_step, either of which can be set to 0 to
+        throttle by only the other. Updates which are not sent are merged, so the
+        next update sent is always the latest one. Updates at 100% are always
+        sent, and flush must be called before the result of the operation is sent
+        so the final progress is never lost.
+
+        If a socket.io client is falling behind then updates are held back until
+        its queue drains, or until PROGRESS_MAX_BACKPRESSURE_DELAY_SECS has passed.
+
+        Args:
+            emit_func (Callable[[Any], None]): The function used to send an update
+            min_interval_secs (float, optional): The minimum time between updates. Defaults to PROGRESS_MIN_INTERVAL_SECS.
+            min_percent_step (float, optional): The minimum progress change between updates. Defaults to PROGRESS_MIN_PERCENT_STEP.
+            check_backpressure (bool, optional): Hold back updates whilst clients are behind. Defaults to True.
+        """
+        self.emit_func = emit_func
+        self.min_interval_secs = min_interval_secs
+        self.min_percent_step = min_percent_step
+        self.check_backpressure = check_backpressure
+
+        self._lock = Lock()
+        self._pending: Optional[Any] = None
+        self._pending_percent: Optional[float] = None
+        self._last_emit_time: Optional[float] = None
+        self._last_emit_percent: Optional[float] = None
+
+        self.updates_received = 0
+        self.updates_emitted = 0
+
+    def update(self, data: Any, percent: Optional[float] = None) -> None:
+        """
+        Report the progress of the operation.
+
+        Args:
+            data (Any): The data to send as the update
+            percent (Optional[float], optional): How complete the operation is, from 0 to 100. Defaults to None.
+        """
+        with self._lock:
+            self.updates_received += 1
+
+            # Never go backwards, e.g. a retransmission of an earlier item
+            if (
+                percent is not None
+                and self._last_emit_percent is not None
+                and percent < self._last_emit_percent
+            ):
+                return
+
+            self._pending = data
+            self._pending_percent = percent
+
+            if self._shouldEmit():
+                self._emitPending()
+
+    def flush(self) -> None:
+        """Send the latest update if it has not been sent yet."""
+        with self._lock:
+            if self._pending is not None:
+                self._emitPending()
+
+    def _shouldEmit(self) -> bool:
+        if self._last_emit_time is None:
+            return True
+
+        percent = self._pending_percent
+        if percent is not None and percent >= 100:
+            return True
+
+        since_last_emit = time.monotonic() - self._last_emit_time
+        if since_last_emit < self.min_interval_secs:
+            return False
+
+        if (
+            percent is not None
+            and self._last_emit_percent is not None
+            and percent - self._last_emit_percent < self.min_percent_step
+        ):
+            return False
+
+        if (
+            self.check_backpressure
+            and since_last_emit < PROGRESS_MAX_BACKPRESSURE_DELAY_SECS
+            and getMaxClientQueueSize() > PROGRESS_BACKPRESSURE_QUEUE_SIZE
+        ):
+            return False
+
+        return True
+
+    def _emitPending(self) -> None:
+        data = self._pending
+        self._pending = None
+        self._last_emit_time = time.monotonic()
+        if self._pending_percent is not None:
+            self._last_emit_percent = self._pending_percent
+
+        self.emit_func(data)
+        self.updates_emitted += 1
+
+    def __enter__(self) -> "ProgressReporter":
+        return self
+
+    def __exit__(self, type, value, traceback) -> None:
+        self.flush()
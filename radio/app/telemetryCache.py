@@ -0,0 +1,128 @@
+from threading import Lock
+from typing import Any, Dict, Iterable, Optional
+
+from app.customTypes import TelemetrySnapshot
+from app.messageConverter import messageToDict
+
+# Fields which are added to every cached message, these are never compared to
+# find what changed
+CACHE_METADATA_FIELDS = {"mavpackettype", "timestamp"}
+
+
+class CachedMessage:
+    def __init__(self) -> None:
+        """The latest value of each field of a single message type."""
+        self.fields: Dict[str, Any] = {}
+        self.field_versions: Dict[str, int] = {}
+        self.version = 0
+
+
+class TelemetryCache:
+    def __init__(self) -> None:
+        """
+        Stores the latest message received of each type, so a client can get the
+        current state of the vehicle straight away instead of waiting for each
+        message to be sent again.
+
+        Every update increments a global version. Each field stores the version
+        it last changed in, so a client can ask for only the fields which have
+        changed since the last version it has seen.
+        """
+        self._lock = Lock()
+        self._messages: Dict[str, CachedMessage] = {}
+        self.version = 0
+
+    def update(self, msg: Any) -> None:
+        """
+        Store a message received from the drone.
+
+        Args:
+            msg: The MAVLink message
+        """
+        data = messageToDict(msg)
+        data["timestamp"] = msg._timestamp
+        message_type = data["mavpackettype"]
+
+        with self._lock:
+            self.version += 1
+
+            cached = self._messages.get(message_type)
+            if cached is None:
+                cached = CachedMessage()
+                self._messages[message_type] = cached
+
+            for name, value in data.items():
+                if name not in cached.fields or cached.fields[name] != value:
+                    cached.field_versions[name] = self.version
+            cached.fields = data
+            cached.version = self.version
+
+    def get(self, message_type: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the latest message of a type.
+
+        Args:
+            message_type (str): The message type, e.g. "ATTITUDE"
+
+        Returns:
+            Optional[Dict[str, Any]]: The message as sent in incoming_msg, None if no message of the type has been received
+        """
+        with self._lock:
+            cached = self._messages.get(message_type)
+            return dict(cached.fields) if cached is not None else None
+
+    def getSnapshot(
+        self, message_types: Optional[Iterable[str]] = None
+    ) -> TelemetrySnapshot:
+        """
+        Get the latest message of each type.
+
+        Args:
+            message_types (Optional[Iterable[str]], optional): Only include these message types. Defaults to every type.
+
+        Returns:
+            TelemetrySnapshot: The current version and the latest message of each type
+        """
+        return self.getChangesSince(0, message_types)
+
+    def getChangesSince(
+        self, since_version: int, message_types: Optional[Iterable[str]] = None
+    ) -> TelemetrySnapshot:
+        """
+        Get the fields which have changed since a version. The message type and
+        timestamp are always included for each message which has changed.
+
+        Args:
+            since_version (int): The version the client already has, 0 for everything
+            message_types (Optional[Iterable[str]], optional): Only include these message types. Defaults to every type.
+
+        Returns:
+            TelemetrySnapshot: The current version and the changed fields of each message
+        """
+        wanted_types = set(message_types) if message_types is not None else None
+
+        with self._lock:
+            messages: Dict[str, Dict[str, Any]] = {}
+            for message_type, cached in self._messages.items():
+                if cached.version <= since_version:
+                    continue
+                if wanted_types is not None and message_type not in wanted_types:
+                    continue
+
+                if since_version <= 0:
+                    messages[message_type] = dict(cached.fields)
+                    continue
+
+                messages[message_type] = {
+                    name: value
+                    for name, value in cached.fields.items()
+                    if name in CACHE_METADATA_FIELDS
+                    or cached.field_versions[name] > since_version
+                }
+
+            return {"version": self.version, "messages": messages}
+
+    def clear(self) -> None:
+        """Remove every cached message, the version keeps counting up."""
+        with self._lock:
+            self._messages.clear()
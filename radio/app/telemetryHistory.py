@@ -0,0 +1,261 @@
+from array import array
+from math import isfinite
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.customTypes import TelemetryHistory, TelemetryHistorySeries
+
+# Message types which are stored, these are the messages shown in the graphs,
+# EKF status and vibration status windows
+HISTORY_MESSAGE_TYPES = [
+    "ATTITUDE",
+    "BATTERY_STATUS",
+    "EKF_STATUS_REPORT",
+    "GLOBAL_POSITION_INT",
+    "GPS_RAW_INT",
+    "NAV_CONTROLLER_OUTPUT",
+    "SYS_STATUS",
+    "VFR_HUD",
+    "VIBRATION",
+]
+HISTORY_DURATION_SECS = 300
+# Samples arriving faster than this are dropped so each buffer always covers
+# the full history duration
+HISTORY_MAX_RATE_HZ = 10
+HISTORY_DEFAULT_BUCKETS = 300
+HISTORY_MAX_BUCKETS = 2000
+
+
+class TimeSeriesBuffer:
+    def __init__(self, capacity: int) -> None:
+        """
+        A preallocated ring buffer of (time, value) samples. Samples must be added
+        in time order.
+
+        Args:
+            capacity (int): The maximum number of samples held in the buffer
+        """
+        if capacity < 1:
+            raise ValueError(
+                f"Time series buffer capacity must be at least 1, got {capacity}"
+            )
+
+        self.capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._start = 0
+        self.count = 0
+
+    def push(self, timestamp: float, value: float) -> None:
+        """
+        Add a sample to the buffer, overwriting the oldest sample once full.
+
+        Args:
+            timestamp (float): The time of the sample in seconds
+            value (float): The value of the sample
+        """
+        index = (self._start + self.count) % self.capacity
+        self._times[index] = timestamp
+        self._values[index] = value
+
+        if self.count == self.capacity:
+            self._start = (self._start + 1) % self.capacity
+        else:
+            self.count += 1
+
+    def lastTime(self) -> Optional[float]:
+        """
+        Returns:
+            Optional[float]: The time of the newest sample, None if the buffer is empty
+        """
+        if self.count == 0:
+            return None
+        return self._times[(self._start + self.count - 1) % self.capacity]
+
+    def _firstIndexAtOrAfter(self, timestamp: float) -> int:
+        """Binary search for the position of the first sample at or after a time."""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._times[(self._start + middle) % self.capacity] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def downsample(
+        self, start: float, end: float, buckets: int
+    ) -> TelemetryHistorySeries:
+        """
+        Split the samples between two times into equal width buckets and find
+        the min, max and mean of each one. Buckets without any samples are left
+        out.
+
+        Args:
+            start (float): The start of the first bucket
+            end (float): The end of the last bucket
+            buckets (int): The number of buckets
+
+        Returns:
+            TelemetryHistorySeries: The start time, min, max and mean of each bucket
+        """
+        series: TelemetryHistorySeries = {"time": [], "min": [], "max": [], "mean": []}
+        if end <= start:
+            return series
+
+        bucket_secs = (end - start) / buckets
+        current_bucket = -1
+        bucket_min = bucket_max = bucket_total = 0.0
+        bucket_count = 0
+
+        def addBucket() -> None:
+            series["time"].append(start + current_bucket * bucket_secs)
+            series["min"].append(bucket_min)
+            series["max"].append(bucket_max)
+            series["mean"].append(bucket_total / bucket_count)
+
+        for position in range(self._firstIndexAtOrAfter(start), self.count):
+            index = (self._start + position) % self.capacity
+            timestamp = self._times[index]
+            if timestamp > end:
+                break
+
+            value = self._values[index]
+            bucket = min(int((timestamp - start) / bucket_secs), buckets - 1)
+            if bucket != current_bucket:
+                if bucket_count:
+                    addBucket()
+                current_bucket = bucket
+                bucket_min = bucket_max = bucket_total = value
+                bucket_count = 1
+                continue
+
+            bucket_min = min(bucket_min, value)
+            bucket_max = max(bucket_max, value)
+            bucket_total += value
+            bucket_count += 1
+
+        if bucket_count:
+            addBucket()
+
+        return series
+
+
+class TelemetryHistoryStore:
+    def __init__(
+        self,
+        message_types: Optional[Iterable[str]] = None,
+        duration_secs: float = HISTORY_DURATION_SECS,
+        max_rate_hz: float = HISTORY_MAX_RATE_HZ,
+    ) -> None:
+        """
+        Keeps a history of every numeric field of the stored message types, so
+        a graph can show data from before it was opened. Each field has its own
+        fixed size buffer, so memory use is bounded by the number of fields.
+
+        Fields are stored with keys in the form "MESSAGE.field", the same as the
+        graph keys used by the frontend.
+
+        Args:
+            message_types (Optional[Iterable[str]], optional): The message types to store. Defaults to HISTORY_MESSAGE_TYPES.
+            duration_secs (float, optional): How long samples are kept for. Defaults to HISTORY_DURATION_SECS.
+            max_rate_hz (float, optional): The highest rate samples are stored at. Defaults to HISTORY_MAX_RATE_HZ.
+        """
+        self.message_types = set(
+            message_types if message_types is not None else HISTORY_MESSAGE_TYPES
+        )
+        self.duration_secs = duration_secs
+        self.max_rate_hz = max_rate_hz
+        self.capacity = max(1, int(duration_secs * max_rate_hz))
+
+        self._lock = Lock()
+        self._series: Dict[str, TimeSeriesBuffer] = {}
+        self._last_sample_slots: Dict[str, int] = {}
+
+    def update(self, msg: Any) -> None:
+        """
+        Store the numeric fields of a message if its type is being stored.
+
+        Args:
+            msg: The MAVLink message
+        """
+        message_type = msg.get_type()
+        if message_type not in self.message_types:
+            return
+
+        timestamp = msg._timestamp
+        with self._lock:
+            # Only one sample is stored in each slot of time, so messages sent
+            # at the max rate are not dropped due to jitter
+            slot = int(timestamp * self.max_rate_hz)
+            if self._last_sample_slots.get(message_type) == slot:
+                return
+            self._last_sample_slots[message_type] = slot
+
+            for field in msg.get_fieldnames():
+                value = getattr(msg, field)
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+
+                key = f"{message_type}.{field}"
+                series = self._series.get(key)
+                if series is None:
+                    series = TimeSeriesBuffer(self.capacity)
+                    self._series[key] = series
+                series.push(timestamp, float(value) if isfinite(value) else 0.0)
+
+    def getKeys(self) -> List[str]:
+        """
+        Returns:
+            List[str]: The keys of every field with history, sorted alphabetically
+        """
+        with self._lock:
+            return sorted(self._series)
+
+    def getHistory(
+        self,
+        keys: Iterable[str],
+        duration_secs: Optional[float] = None,
+        buckets: int = HISTORY_DEFAULT_BUCKETS,
+    ) -> TelemetryHistory:
+        """
+        Get the downsampled history of a set of fields, ending at the newest
+        sample received.
+
+        Args:
+            keys (Iterable[str]): The fields to get, e.g. "ATTITUDE.roll"
+            duration_secs (Optional[float], optional): How far back to go. Defaults to the full history.
+            buckets (int, optional): The number of buckets to split the history into. Defaults to HISTORY_DEFAULT_BUCKETS.
+
+        Returns:
+            TelemetryHistory: The time range, bucket width and the buckets of each field which has history
+        """
+        if duration_secs is None or duration_secs > self.duration_secs:
+            duration_secs = self.duration_secs
+        buckets = max(1, min(buckets, HISTORY_MAX_BUCKETS))
+
+        with self._lock:
+            requested = {key: self._series[key] for key in keys if key in self._series}
+            last_times = [
+                last_time
+                for series in requested.values()
+                if (last_time := series.lastTime()) is not None
+            ]
+            end = max(last_times, default=0.0)
+            start = end - duration_secs
+
+            return {
+                "start": start,
+                "end": end,
+                "bucket_secs": duration_secs / buckets,
+                "series": {
+                    key: series.downsample(start, end, buckets)
+                    for key, series in requested.items()
+                },
+            }
+
+    def clear(self) -> None:
+        """Remove all stored history."""
+        with self._lock:
+            self._series.clear()
+            self._last_sample_slots.clear()
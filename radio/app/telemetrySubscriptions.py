@@ -0,0 +1,258 @@
+from threading import Lock
+from typing import Dict, List, Optional, Set
+
+from pymavlink import mavutil
+
+TELEMETRY_NAMESPACE = "/telemetry"
+
+GLOBAL_MESSAGE_LISTENERS = ["HEARTBEAT", "STATUSTEXT", "GLOBAL_POSITION_INT", "VFR_HUD"]
+
+STATES_MESSAGE_LISTENERS = {
+    "dashboard": [
+        "BATTERY_STATUS",
+        "ATTITUDE",
+        "ALTITUDE",
+        "NAV_CONTROLLER_OUTPUT",
+        "SYS_STATUS",
+        "GPS_RAW_INT",
+        "GPS2_RAW",
+        "RC_CHANNELS",
+        "ESC_TELEMETRY_1_TO_4",
+        "ESC_TELEMETRY_5_TO_8",
+        "MISSION_CURRENT",
+        "EKF_STATUS_REPORT",
+        "VIBRATION",
+    ],
+    "missions": [
+        "NAV_CONTROLLER_OUTPUT",
+    ],
+    "graphs": ["ATTITUDE", "SYS_STATUS"],
+    "config.flight_modes": [
+        "RC_CHANNELS",
+    ],
+    "config.rc": ["RC_CHANNELS"],
+    "config.servo": ["SERVO_OUTPUT_RAW"],
+}
+
+# The data stream rates each state needs, the dashboard uses the configurable
+# dashboard stream rates instead. Every other state also needs the position
+# stream for GLOBAL_POSITION_INT
+STATES_STREAM_RATES: Dict[str, Dict[int, int]] = {
+    "missions": {mavutil.mavlink.MAV_DATA_STREAM_EXTENDED_STATUS: 1},
+    "graphs": {
+        mavutil.mavlink.MAV_DATA_STREAM_EXTENDED_STATUS: 1,
+        mavutil.mavlink.MAV_DATA_STREAM_EXTRA1: 4,
+        mavutil.mavlink.MAV_DATA_STREAM_EXTRA2: 3,
+    },
+    "config.flight_modes": {mavutil.mavlink.MAV_DATA_STREAM_RC_CHANNELS: 2},
+    "config.rc": {mavutil.mavlink.MAV_DATA_STREAM_RC_CHANNELS: 4},
+    "config.servo": {mavutil.mavlink.MAV_DATA_STREAM_RC_CHANNELS: 4},
+}
+NON_DASHBOARD_STREAM_RATES = {mavutil.mavlink.MAV_DATA_STREAM_POSITION: 1}
+
+# The data stream each message is sent in by ArduPilot, so subscribing to a
+# message can request its stream
+MESSAGE_DATA_STREAMS = {
+    "RAW_IMU": mavutil.mavlink.MAV_DATA_STREAM_RAW_SENSORS,
+    "SCALED_IMU2": mavutil.mavlink.MAV_DATA_STREAM_RAW_SENSORS,
+    "SCALED_IMU3": mavutil.mavlink.MAV_DATA_STREAM_RAW_SENSORS,
+    "SCALED_PRESSURE": mavutil.mavlink.MAV_DATA_STREAM_RAW_SENSORS,
+    "SCALED_PRESSURE2": mavutil.mavlink.MAV_DATA_STREAM_RAW_SENSORS,
+    "SYS_STATUS": mavutil.mavlink.MAV_DATA_STREAM_EXTENDED_STATUS,
+    "POWER_STATUS": mavutil.mavlink.MAV_DATA_STREAM_EXTENDED_STATUS,
+    "MEMINFO": mavutil.mavlink.MAV_DATA_STREAM_EXTENDED_STATUS,
+    "NAV_CONTROLLER_OUTPUT": mavutil.mavlink.MAV_DATA_STREAM_EXTENDED_STATUS,
+    "MISSION_CURRENT": mavutil.mavlink.MAV_DATA_STREAM_EXTENDED_STATUS,
+    "GPS_RAW_INT": mavutil.mavlink.MAV_DATA_STREAM_EXTENDED_STATUS,
+    "GPS2_RAW": mavutil.mavlink.MAV_DATA_STREAM_EXTENDED_STATUS,
+    "MCU_STATUS": mavutil.mavlink.MAV_DATA_STREAM_EXTENDED_STATUS,
+    "SERVO_OUTPUT_RAW": mavutil.mavlink.MAV_DATA_STREAM_RC_CHANNELS,
+    "RC_CHANNELS": mavutil.mavlink.MAV_DATA_STREAM_RC_CHANNELS,
+    "LOCAL_POSITION_NED": mavutil.mavlink.MAV_DATA_STREAM_POSITION,
+    "GLOBAL_POSITION_INT": mavutil.mavlink.MAV_DATA_STREAM_POSITION,
+    "ATTITUDE": mavutil.mavlink.MAV_DATA_STREAM_EXTRA1,
+    "ESC_TELEMETRY_1_TO_4": mavutil.mavlink.MAV_DATA_STREAM_EXTRA1,
+    "ESC_TELEMETRY_5_TO_8": mavutil.mavlink.MAV_DATA_STREAM_EXTRA1,
+    "VFR_HUD": mavutil.mavlink.MAV_DATA_STREAM_EXTRA2,
+    "BATTERY_STATUS": mavutil.mavlink.MAV_DATA_STREAM_EXTRA3,
+    "SYSTEM_TIME": mavutil.mavlink.MAV_DATA_STREAM_EXTRA3,
+    "VIBRATION": mavutil.mavlink.MAV_DATA_STREAM_EXTRA3,
+    "AHRS": mavutil.mavlink.MAV_DATA_STREAM_EXTRA3,
+    "WIND": mavutil.mavlink.MAV_DATA_STREAM_EXTRA3,
+    "TERRAIN_REPORT": mavutil.mavlink.MAV_DATA_STREAM_EXTRA3,
+    "EKF_STATUS_REPORT": mavutil.mavlink.MAV_DATA_STREAM_EXTRA3,
+}
+SUBSCRIPTION_DEFAULT_RATE = 1
+SUBSCRIPTION_MAX_RATE = 15
+
+
+def getTelemetryRoom(message_type: str) -> str:
+    """
+    Args:
+        message_type (str): The MAVLink message type
+
+    Returns:
+        str: The socket.io room of the clients subscribed to the message type
+    """
+    return f"telemetry:{message_type}"
+
+
+class ClientSubscription:
+    def __init__(self) -> None:
+        """The telemetry a single client has asked for."""
+        self.state: Optional[str] = None
+        self.message_rates: Dict[str, int] = {}
+
+    def getMessageTypes(self) -> Set[str]:
+        message_types = set(GLOBAL_MESSAGE_LISTENERS)
+        if self.state is not None:
+            message_types.update(STATES_MESSAGE_LISTENERS.get(self.state, []))
+        message_types.update(self.message_rates)
+        return message_types
+
+
+class TelemetrySubscriptionManager:
+    def __init__(self) -> None:
+        """
+        Keeps track of the telemetry each connected client is subscribed to.
+        A client subscribes by setting the state of the page it is showing and
+        can also subscribe to extra message types, e.g. for a popout window.
+
+        Clients are identified by their engine.io session, which is shared by
+        the default and telemetry namespaces of a socket.io connection.
+        """
+        self._clients: Dict[str, ClientSubscription] = {}
+        self._lock = Lock()
+
+    def _getClient(self, client_id: str) -> ClientSubscription:
+        if client_id not in self._clients:
+            self._clients[client_id] = ClientSubscription()
+        return self._clients[client_id]
+
+    def addClient(self, client_id: str) -> None:
+        """
+        Args:
+            client_id (str): The client which has connected
+        """
+        with self._lock:
+            self._getClient(client_id)
+
+    def removeClient(self, client_id: str) -> bool:
+        """
+        Args:
+            client_id (str): The client which has disconnected
+
+        Returns:
+            bool: True if the client had subscriptions which were removed
+        """
+        with self._lock:
+            return self._clients.pop(client_id, None) is not None
+
+    def setState(self, client_id: str, state: str) -> None:
+        """
+        Args:
+            client_id (str): The client which changed page
+            state (str): The state of the page the client is showing
+        """
+        with self._lock:
+            self._getClient(client_id).state = state
+
+    def subscribe(
+        self,
+        client_id: str,
+        message_types: List[str],
+        rate: int = SUBSCRIPTION_DEFAULT_RATE,
+    ) -> None:
+        """
+        Subscribe a client to extra message types, on top of those of its state.
+
+        Args:
+            client_id (str): The client subscribing
+            message_types (List[str]): The message types to subscribe to
+            rate (int, optional): The rate in hertz the message types are wanted at. Defaults to SUBSCRIPTION_DEFAULT_RATE.
+        """
+        with self._lock:
+            client = self._getClient(client_id)
+            for message_type in message_types:
+                client.message_rates[message_type] = rate
+
+    def unsubscribe(self, client_id: str, message_types: List[str]) -> None:
+        """
+        Args:
+            client_id (str): The client unsubscribing
+            message_types (List[str]): The extra message types to unsubscribe from
+        """
+        with self._lock:
+            client = self._getClient(client_id)
+            for message_type in message_types:
+                client.message_rates.pop(message_type, None)
+
+    def getMessageTypes(self, client_id: str) -> Set[str]:
+        """
+        Args:
+            client_id (str): The client
+
+        Returns:
+            Set[str]: The message types the client is subscribed to
+        """
+        with self._lock:
+            client = self._clients.get(client_id)
+            return client.getMessageTypes() if client is not None else set()
+
+    def getAllMessageTypes(self) -> Set[str]:
+        """
+        Returns:
+            Set[str]: The message types any client is subscribed to
+        """
+        with self._lock:
+            message_types: Set[str] = set()
+            for client in self._clients.values():
+                message_types.update(client.getMessageTypes())
+            return message_types
+
+    def getStates(self) -> Set[str]:
+        """
+        Returns:
+            Set[str]: The states of every client
+        """
+        with self._lock:
+            return {
+                client.state
+                for client in self._clients.values()
+                if client.state is not None
+            }
+
+    def getStreamRates(self, dashboard_stream_rates: Dict[int, int]) -> Dict[int, int]:
+        """
+        Get the rate of each data stream which is needed by every client, the
+        highest rate any client needs is used.
+
+        Args:
+            dashboard_stream_rates (Dict[int, int]): The stream rates of the dashboard
+
+        Returns:
+            Dict[int, int]: The rate of each data stream in hertz
+        """
+        stream_rates: Dict[int, int] = {}
+
+        def addRates(rates: Dict[int, int]) -> None:
+            for stream, rate in rates.items():
+                stream_rates[stream] = max(stream_rates.get(stream, 0), rate)
+
+        with self._lock:
+            for client in self._clients.values():
+                if client.state == "dashboard":
+                    addRates(dashboard_stream_rates)
+                elif client.state is not None:
+                    addRates(NON_DASHBOARD_STREAM_RATES)
+                    addRates(STATES_STREAM_RATES.get(client.state, {}))
+
+                addRates(
+                    {
+                        MESSAGE_DATA_STREAMS[message_type]: rate
+                        for message_type, rate in client.message_rates.items()
+                        if message_type in MESSAGE_DATA_STREAMS
+                    }
+                )
+
+        return stream_rates
@@ -0,0 +1,224 @@
+import gzip
+import lzma
+import struct
+import time
+from logging import Logger
+from pathlib import Path
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import IO, Any, List, Optional, Union
+
+from app.ftlog import FTLOG_COMPRESSION_SUFFIXES, FTLOG_GZIP_LEVEL, FTLOG_XZ_PRESET
+
+TLOG_SUFFIX = ".tlog"
+TLOG_ROTATE_BYTES = 256 * 1024 * 1024
+TLOG_QUEUE_SIZE = 20000
+TLOG_WRITE_BUFFER_SIZE = 64 * 1024
+TLOG_FLUSH_INTERVAL_SECS = 1.0
+
+
+def getTlogTimestamp() -> bytes:
+    """
+    Get the timestamp written before each frame of a tlog, the microseconds
+    since the epoch as a big endian 64 bit integer. This matches the
+    timestamps written by pymavlink.
+
+    Returns:
+        bytes: The packed timestamp
+    """
+    return struct.pack(">Q", int(time.time() * 1.0e6) & ~3)
+
+
+class TlogRecorder:
+    def __init__(
+        self,
+        log_directory: Path,
+        logger: Logger,
+        compression: Optional[str] = None,
+        rotate_bytes: Optional[int] = TLOG_ROTATE_BYTES,
+        queue_size: int = TLOG_QUEUE_SIZE,
+    ) -> None:
+        """
+        Records every MAVLink frame sent and received on a connection to a
+        standard .tlog file, which can be opened by any MAVLink analysis tool.
+
+        Frames are taken from the pymavlink receive and send callbacks as the
+        bytes which were on the wire, so nothing is decoded or converted to
+        record them. Frames which fail their checksum are not recorded, so the
+        tlog can be read by other tools. Frames are written in batches on a
+        separate thread. If the writer falls behind then frames are dropped
+        rather than blocking the connection.
+
+        Args:
+            log_directory (Path): The directory to save the tlogs in
+            logger (Logger): The logger to use
+            compression (Optional[str], optional): Compress the tlogs with "gzip" or "xz". Defaults to None.
+            rotate_bytes (Optional[int], optional): Start a new tlog once this many bytes have been written, None to never rotate. Defaults to TLOG_ROTATE_BYTES.
+            queue_size (int, optional): The number of frames which can wait to be written. Defaults to TLOG_QUEUE_SIZE.
+        """
+        if compression is not None and compression not in FTLOG_COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown tlog compression {compression}")
+
+        self.log_directory = log_directory
+        self.logger = logger
+        self.compression = compression
+        self.rotate_bytes = rotate_bytes
+
+        self.log_files: List[Path] = []
+        self.bytes_written = 0
+        self.dropped_frames = 0
+
+        self.master: Optional[Any] = None
+        self._session_name = time.strftime("%Y-%m-%d_%H-%M-%S", time.localtime())
+        self._queue: Queue = Queue(maxsize=queue_size)
+        self._is_active = Event()
+        self._thread: Optional[Thread] = None
+        self._file_handle: Optional[Union[IO[bytes], gzip.GzipFile, lzma.LZMAFile]] = (
+            None
+        )
+        self._file_bytes = 0
+
+    def attach(self, master: Any) -> None:
+        """
+        Start recording the frames sent and received on a connection.
+
+        Args:
+            master (mavutil.mavfile): The MAVLink connection to record
+        """
+        self.log_directory.mkdir(parents=True, exist_ok=True)
+        self.master = master
+        master.mav.set_callback(self.recordIncoming)
+        master.mav.set_send_callback(self.recordOutgoing)
+
+        self._is_active.set()
+        self._thread = Thread(target=self._writeFrames, daemon=True)
+        self._thread.start()
+
+    def reattach(self, master: Any) -> None:
+        """
+        Record a new connection instead, e.g. once a lost link has been
+        reopened, so the frames either side of the outage go into one tlog.
+
+        Args:
+            master (mavutil.mavfile): The new MAVLink connection to record
+        """
+        self._detach()
+        self.master = master
+        master.mav.set_callback(self.recordIncoming)
+        master.mav.set_send_callback(self.recordOutgoing)
+
+    def _detach(self) -> None:
+        if self.master is not None:
+            if self.master.mav.callback == self.recordIncoming:
+                self.master.mav.set_callback(None)
+            if self.master.mav.send_callback == self.recordOutgoing:
+                self.master.mav.set_send_callback(None)
+            self.master = None
+
+    def recordIncoming(self, msg: Any) -> None:
+        """
+        Record a received frame, called by pymavlink after each message is parsed.
+
+        Args:
+            msg (MAVLink_message): The message which was received
+        """
+        if msg.get_type() != "BAD_DATA":
+            self._put(getTlogTimestamp() + msg.get_msgbuf())
+
+    def recordOutgoing(self, msg: Any) -> None:
+        """
+        Record a sent frame, called by pymavlink after each message is sent.
+
+        Args:
+            msg (MAVLink_message): The message which was sent
+        """
+        self._put(getTlogTimestamp() + msg.get_msgbuf())
+
+    def _put(self, frame: bytes) -> None:
+        try:
+            self._queue.put_nowait(frame)
+        except Full:
+            self.dropped_frames += 1
+
+    def _openNextFile(self) -> None:
+        """Close the current tlog and open the next one."""
+        self._closeFile()
+
+        part = len(self.log_files) + 1
+        name = self._session_name if part == 1 else f"{self._session_name}_{part}"
+        suffix = TLOG_SUFFIX
+        if self.compression is not None:
+            suffix += FTLOG_COMPRESSION_SUFFIXES[self.compression]
+        log_file = self.log_directory.joinpath(f"{name}{suffix}")
+
+        if self.compression == "gzip":
+            self._file_handle = gzip.open(
+                log_file, "wb", compresslevel=FTLOG_GZIP_LEVEL
+            )
+        elif self.compression == "xz":
+            self._file_handle = lzma.open(log_file, "wb", preset=FTLOG_XZ_PRESET)
+        else:
+            self._file_handle = open(log_file, "wb", buffering=TLOG_WRITE_BUFFER_SIZE)
+
+        self.log_files.append(log_file)
+        self._file_bytes = 0
+        self.logger.info(f"Recording tlog to {log_file}")
+
+    def _closeFile(self) -> None:
+        if self._file_handle is not None:
+            self._file_handle.close()
+            self._file_handle = None
+
+    def _writeBatch(self, batch: bytearray) -> None:
+        if self._file_handle is None or (
+            self.rotate_bytes is not None and self._file_bytes >= self.rotate_bytes
+        ):
+            self._openNextFile()
+
+        assert self._file_handle is not None
+        self._file_handle.write(batch)
+        self._file_bytes += len(batch)
+        self.bytes_written += len(batch)
+
+    def _writeFrames(self) -> None:
+        """Write the queued frames in batches until the recorder is closed."""
+        next_flush_time = time.monotonic() + TLOG_FLUSH_INTERVAL_SECS
+
+        try:
+            while self._is_active.is_set() or not self._queue.empty():
+                try:
+                    batch = bytearray(self._queue.get(timeout=0.1))
+                except Empty:
+                    continue
+
+                while len(batch) < TLOG_WRITE_BUFFER_SIZE:
+                    try:
+                        batch += self._queue.get_nowait()
+                    except Empty:
+                        break
+
+                self._writeBatch(batch)
+
+                if time.monotonic() >= next_flush_time:
+                    next_flush_time = time.monotonic() + TLOG_FLUSH_INTERVAL_SECS
+                    if self._file_handle is not None:
+                        self._file_handle.flush()
+        except OSError:
+            self.logger.error("Failed to write tlog, stopping recording", exc_info=True)
+            self._is_active.clear()
+        finally:
+            self._closeFile()
+
+    def close(self) -> None:
+        """Stop recording and write any frames which are waiting."""
+        self._detach()
+
+        self._is_active.clear()
+        if self._thread is not None:
+            self._thread.join(timeout=3)
+            self._thread = None
+
+        if self.dropped_frames:
+            self.logger.warning(
+                f"Dropped {self.dropped_frames} frames from the tlog as it could not be written quickly enough"
+            )
@@ -6,7 +6,9 @@ from pymavlink import mavutil
 from serial.tools import list_ports
 from typing_extensions import NotRequired, TypedDict
 
-from app.customTypes import Number, VehicleType
+from app.customTypes import LogRecoveryProgress, Number, VehicleType
+from app.messageConverter import messageToDict
+from app.telemetrySubscriptions import TELEMETRY_NAMESPACE, getTelemetryRoom
 
 from . import socketio
 
@@ -192,6 +194,16 @@ def fetchingParameterCb(param_name: str) -> None:
     )
 
 
+def logRecoveryProgressCb(progress: LogRecoveryProgress) -> None:
+    """
+    Send the progress of recovering logs from a previous session to the socket.
+
+    Args:
+        progress (LogRecoveryProgress): The bytes recovered so far and the total to recover
+    """
+    socketio.emit("log_recovery_progress", progress)
+
+
 def missingParameterError(endpoint: str, params: Union[str, list[str]]) -> None:
     """ "
     Send error to the socket indicating that a request made to the server was missing required parameters
@@ -212,14 +224,19 @@ def missingParameterError(endpoint: str, params: Union[str, list[str]]) -> None:
 
 def sendMessage(msg: Any) -> None:
     """
-    Sends a message to the frontend with a timestamp
+    Sends a message with a timestamp to the clients subscribed to its type
 
     Args:
         msg: The message to send
     """
-    data = msg.to_dict()
+    data = messageToDict(msg)
     data["timestamp"] = msg._timestamp
-    socketio.emit("incoming_msg", data, namespace="/telemetry")
+    socketio.emit(
+        "incoming_msg",
+        data,
+        namespace=TELEMETRY_NAMESPACE,
+        to=getTelemetryRoom(msg.get_type()),
+    )
 
 
 FIXED_WING_TYPES = [
@@ -0,0 +1,76 @@
+import time
+from threading import Condition
+from typing import Any, Optional
+
+from pymavlink import mavutil
+
+
+class VehicleState:
+    def __init__(self) -> None:
+        """
+        The state of the vehicle as reported by its HEARTBEAT. Threads can wait
+        for the state to change instead of polling it.
+        """
+        self._condition = Condition()
+
+        self.armed = False
+        self.mode: Optional[int] = None
+        self.system_status: Optional[int] = None
+        self.last_heartbeat_time: Optional[float] = None
+
+    def updateFromHeartbeat(self, msg: Any) -> None:
+        """
+        Update the state from a HEARTBEAT sent by the vehicle and wake any
+        threads waiting for the state to change.
+
+        Args:
+            msg: The HEARTBEAT message
+        """
+        with self._condition:
+            self.armed = bool(
+                msg.base_mode & mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED
+            )
+            self.mode = msg.custom_mode
+            self.system_status = msg.system_status
+            self.last_heartbeat_time = time.monotonic()
+            self._condition.notify_all()
+
+    def waitUntil(
+        self,
+        timeout: float,
+        armed: Optional[bool] = None,
+        mode: Optional[int] = None,
+    ) -> bool:
+        """
+        Wait until the vehicle reports the given state. Only the states which
+        are passed are checked.
+
+        Args:
+            timeout (float): The longest time to wait in seconds
+            armed (Optional[bool], optional): The armed state to wait for. Defaults to None.
+            mode (Optional[int], optional): The custom flight mode to wait for. Defaults to None.
+
+        Returns:
+            bool: True if the vehicle reached the state, False if the wait timed out
+        """
+
+        def isReached() -> bool:
+            return (armed is None or self.armed == armed) and (
+                mode is None or self.mode == mode
+            )
+
+        with self._condition:
+            return self._condition.wait_for(isReached, timeout=timeout)
+
+    def waitForMode(self, mode: int, timeout: float) -> bool:
+        """
+        Wait until the vehicle reports that it is in a flight mode.
+
+        Args:
+            mode (int): The custom flight mode to wait for
+            timeout (float): The longest time to wait in seconds
+
+        Returns:
+            bool: True if the vehicle changed to the mode, False if the wait timed out
+        """
+        return self.waitUntil(timeout, mode=mode)
@@ -0,0 +1,245 @@
+"""
+Benchmark the CPU cost of compressing FTLog segments against the bytes saved.
+
+A flight is simulated by logging messages at the rates FGCS requests from the
+drone, with values that change over time the same as in a real flight.
+
+Run from the radio directory with:
+    python -m benchmarks.logCompression
+"""
+
+import argparse
+import math
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pymavlink.dialects.v20 import ardupilotmega as mavlink
+
+from app.ftlog import FTLogReader, FTLogWriter, getLogSuffix
+from app.messageConverter import MessageConverterRegistry
+
+mav = mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+
+
+def createMessageFactories() -> Dict[str, Tuple[float, Callable[[float], Any]]]:
+    """
+    The messages logged during a flight, with the rate they are received at in
+    Hz and a function to create the message at a time in seconds.
+    """
+
+    def wave(t: float, period: float, amplitude: float) -> float:
+        return amplitude * math.sin(2 * math.pi * t / period) + random.gauss(
+            0, amplitude * 0.02
+        )
+
+    return {
+        "HEARTBEAT": (1, lambda t: mav.heartbeat_encode(2, 3, 209, 5, 4, 3)),
+        "ATTITUDE": (
+            4,
+            lambda t: mav.attitude_encode(
+                int(t * 1000),
+                wave(t, 7, 0.2),
+                wave(t, 11, 0.1),
+                wave(t, 60, math.pi),
+                wave(t, 3, 0.05),
+                wave(t, 5, 0.05),
+                wave(t, 13, 0.02),
+            ),
+        ),
+        "VFR_HUD": (
+            3,
+            lambda t: mav.vfr_hud_encode(
+                12 + wave(t, 20, 2),
+                13 + wave(t, 20, 2),
+                int(180 + wave(t, 60, 179)),
+                45 + int(wave(t, 10, 5)),
+                50 + wave(t, 30, 5),
+                wave(t, 15, 1),
+            ),
+        ),
+        "GLOBAL_POSITION_INT": (
+            1,
+            lambda t: mav.global_position_int_encode(
+                int(t * 1000),
+                int(-353621474 + wave(t, 120, 20000)),
+                int(1491651746 + wave(t, 120, 20000)),
+                int(584000 + wave(t, 30, 5000)),
+                int(50000 + wave(t, 30, 5000)),
+                int(wave(t, 20, 1200)),
+                int(wave(t, 20, 1200)),
+                int(wave(t, 15, 100)),
+                int(18000 + wave(t, 60, 17999)) % 36000,
+            ),
+        ),
+        "SYS_STATUS": (
+            1,
+            lambda t: mav.sys_status_encode(
+                0x3FFFFF,
+                0x3FFFFF,
+                0x3FFFFF,
+                int(300 + wave(t, 10, 50)),
+                int(16000 - t / 10),
+                int(2400 + wave(t, 5, 300)),
+                int(90 - t / 100),
+                0,
+                0,
+                0,
+                0,
+                0,
+                0,
+            ),
+        ),
+        "GPS_RAW_INT": (
+            1,
+            lambda t: mav.gps_raw_int_encode(
+                int(t * 1e6),
+                3,
+                int(-353621474 + wave(t, 120, 20000)),
+                int(1491651746 + wave(t, 120, 20000)),
+                int(584000 + wave(t, 30, 5000)),
+                80,
+                120,
+                int(1200 + wave(t, 20, 200)),
+                int(18000 + wave(t, 60, 17999)) % 36000,
+                14,
+            ),
+        ),
+        "NAV_CONTROLLER_OUTPUT": (
+            1,
+            lambda t: mav.nav_controller_output_encode(
+                wave(t, 7, 5),
+                wave(t, 11, 5),
+                int(wave(t, 60, 180)),
+                int(wave(t, 60, 180)),
+                int(abs(wave(t, 90, 300))),
+                wave(t, 30, 2),
+                wave(t, 20, 1),
+                wave(t, 40, 0.5),
+            ),
+        ),
+        "BATTERY_STATUS": (
+            1,
+            lambda t: mav.battery_status_encode(
+                0,
+                1,
+                1,
+                250,
+                [4000, 4001, 3999, 4002] + [65535] * 6,
+                int(2400 + wave(t, 5, 300)),
+                int(t * 5),
+                -1,
+                int(90 - t / 100),
+            ),
+        ),
+        "VIBRATION": (
+            1,
+            lambda t: mav.vibration_encode(
+                int(t * 1e6),
+                abs(wave(t, 3, 10)),
+                abs(wave(t, 4, 10)),
+                abs(wave(t, 5, 15)),
+                0,
+                0,
+                0,
+            ),
+        ),
+        "EKF_STATUS_REPORT": (
+            1,
+            lambda t: mav.ekf_status_report_encode(
+                831,
+                abs(wave(t, 10, 0.1)),
+                abs(wave(t, 11, 0.1)),
+                abs(wave(t, 12, 0.1)),
+                abs(wave(t, 13, 0.1)),
+                abs(wave(t, 14, 0.1)),
+            ),
+        ),
+    }
+
+
+def createLogLines(duration_secs: int, rate_multiplier: float) -> List[str]:
+    """Create the log lines of a flight, the same as written by the drone."""
+    random.seed(0)
+    registry = MessageConverterRegistry()
+    parser = mavlink.MAVLink(None)
+    start_time = 1700000000.0
+
+    timed_messages: List[Tuple[float, Any]] = []
+    for rate, factory in createMessageFactories().values():
+        interval = 1 / (rate * rate_multiplier)
+        t = random.uniform(0, interval)
+        while t < duration_secs:
+            timed_messages.append((t, factory))
+            t += interval
+    timed_messages.sort(key=lambda timed_message: timed_message[0])
+
+    lines = []
+    for t, factory in timed_messages:
+        msg = parser.decode(bytearray(factory(t).pack(mav)))
+        msg._timestamp = start_time + t
+        lines.append(f"{msg._timestamp},{msg.get_type()},{registry.toLogLine(msg)}")
+    return lines
+
+
+def benchmarkCompression(
+    lines: List[str], compression: Optional[str], directory: Path
+) -> Tuple[float, int, float]:
+    """
+    Write the lines to a log and read them back.
+
+    Returns:
+        Tuple[float, int, float]: The CPU time to write, the size of the log and the CPU time to read
+    """
+    log_file = directory / f"benchmark{getLogSuffix(compression)}"
+
+    start = time.process_time()
+    writer = FTLogWriter(log_file, "2024-01-01_12-00-00", compression=compression)
+    for line in lines:
+        writer.writeMessage(line)
+    writer.close()
+    write_secs = time.process_time() - start
+
+    start = time.process_time()
+    read_count = sum(1 for _ in FTLogReader(log_file).iterMessages())
+    read_secs = time.process_time() - start
+    assert read_count == len(lines)
+
+    return write_secs, log_file.stat().st_size, read_secs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--duration", type=int, default=1800, help="Seconds of flight")
+    args = parser.parse_args()
+
+    for name, rate_multiplier in [("default rates", 1), ("full rates", 10)]:
+        lines = createLogLines(args.duration, rate_multiplier)
+        print(
+            f"{name}: {len(lines) / args.duration:.0f} msg/s, "
+            f"{args.duration / 60:.0f} minute flight"
+        )
+
+        uncompressed_size = None
+        with tempfile.TemporaryDirectory() as directory:
+            for compression in [None, "gzip", "xz"]:
+                write_secs, size, read_secs = benchmarkCompression(
+                    lines, compression, Path(directory)
+                )
+                if uncompressed_size is None:
+                    uncompressed_size = size
+
+                cpu_percent = write_secs / args.duration * 100
+                mb_per_hour = size / args.duration * 3600 / 1e6
+                print(
+                    f"  {compression or 'none':<5} {mb_per_hour:8.1f} MB/hour "
+                    f"({uncompressed_size / size:5.1f}x), "
+                    f"write {cpu_percent:6.3f}% of a core, "
+                    f"read {read_secs:6.3f}s"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark the cached message converters against pymavlink's to_dict.
+
+Run from the radio directory with:
+    python -m benchmarks.messageConversion
+"""
+
+import argparse
+import timeit
+from typing import Any, Callable, List, Tuple
+
+from pymavlink.dialects.v20 import ardupilotmega as mavlink
+
+from app.messageConverter import MessageConverterRegistry
+
+
+def createMessages() -> List[Any]:
+    """
+    Create decoded ATTITUDE, GLOBAL_POSITION_INT and ESC_TELEMETRY_1_TO_4 messages,
+    the same as would be received from the drone.
+    """
+    mav = mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+    messages = [
+        mav.attitude_encode(123456, 0.1, -0.2, 1.5, 0.01, 0.02, -0.03),
+        mav.global_position_int_encode(
+            123456, -353621474, 1491651746, 584000, 10000, 120, -35, 10, 27000
+        ),
+        mav.esc_telemetry_1_to_4_encode(
+            [30, 31, 32, 33],
+            [1610, 1605, 1612, 1608],
+            [520, 515, 530, 525],
+            [1200, 1190, 1210, 1205],
+            [9500, 9450, 9550, 9480],
+            [100, 100, 100, 100],
+        ),
+    ]
+
+    parser = mavlink.MAVLink(None)
+    decoded = []
+    for message in messages:
+        decoded_message = parser.decode(bytearray(message.pack(mav)))
+        decoded_message._timestamp = 1700000000.0
+        decoded.append(decoded_message)
+
+    return decoded
+
+
+def toDictLogLine(msg: Any) -> str:
+    """The FTLog line format as it was built before the converters were added."""
+    return f"{msg._timestamp},{msg.get_type()},{','.join([f'{message}:{msg.to_dict()[message]}' for message in msg.to_dict() if message != 'mavpackettype'])}"
+
+
+def runBenchmark(
+    name: str, func: Callable[[], Any], iterations: int, repeats: int
+) -> float:
+    best = min(timeit.repeat(func, number=iterations, repeat=repeats))
+    per_call_us = best / iterations * 1e6
+    print(f"  {name:<32} {per_call_us:8.3f} us/msg")
+    return per_call_us
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    registry = MessageConverterRegistry()
+    registry.registerView(
+        "position", {"GLOBAL_POSITION_INT": ["lat", "lon", "relative_alt", "hdg"]}
+    )
+
+    for msg in createMessages():
+        assert registry.toDict(msg) == msg.to_dict()
+        assert (
+            f"{msg._timestamp},{msg.get_type()},{registry.toLogLine(msg)}"
+            == toDictLogLine(msg)
+        )
+
+        print(f"{msg.get_type()} ({len(msg.get_fieldnames())} fields)")
+        results: List[Tuple[str, float]] = []
+        for name, func in [
+            ("to_dict", lambda: msg.to_dict()),
+            ("converter", lambda: registry.toDict(msg)),
+            ("converter (position view)", lambda: registry.toDict(msg, "position")),
+            ("to_dict log line", lambda: toDictLogLine(msg)),
+            (
+                "converter log line",
+                lambda: f"{msg._timestamp},{msg.get_type()},{registry.toLogLine(msg)}",
+            ),
+        ]:
+            results.append(
+                (name, runBenchmark(name, func, args.iterations, args.repeats))
+            )
+
+        timings = dict(results)
+        print(
+            f"  speedup: dict {timings['to_dict'] / timings['converter']:.2f}x, "
+            f"log line {timings['to_dict log line'] / timings['converter log line']:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+from .autopilot import (
+    MockAutopilot,
+    createDefaultParams,
+    loadParamFile,
+    loadTlogParams,
+)
+from .ftpServer import MockFtpServer
+from .link import ImpairedLink, LinkImpairment, PtyTransport, TcpServerTransport
+
+__all__ = [
+    "ImpairedLink",
+    "LinkImpairment",
+    "MockAutopilot",
+    "MockFtpServer",
+    "PtyTransport",
+    "TcpServerTransport",
+    "createDefaultParams",
+    "loadParamFile",
+    "loadTlogParams",
+]
@@ -0,0 +1,90 @@
+"""
+Run a mock autopilot which FGCS can connect to instead of SITL.
+
+Run from the radio directory with, for example:
+    python -m mockAutopilot --port 5760
+    python -m mockAutopilot --tlog flight.tlog --loss 0.05 --latency-ms 150 --bandwidth-bps 57600
+    python -m mockAutopilot --pty
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Dict
+
+from mockAutopilot import (
+    LinkImpairment,
+    MockAutopilot,
+    PtyTransport,
+    TcpServerTransport,
+    loadParamFile,
+)
+from mockAutopilot.link import Transport
+
+
+def loadFiles(directory: str) -> Dict[str, bytes]:
+    """Load every file in a directory to serve over MAVFtp, keyed by relative path."""
+    root = Path(directory)
+    return {
+        "/" + path.relative_to(root).as_posix(): path.read_bytes()
+        for path in root.rglob("*")
+        if path.is_file()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5760)
+    parser.add_argument(
+        "--pty", action="store_true", help="Serve over a pty instead of TCP"
+    )
+    parser.add_argument("--vehicle", choices=["copter", "plane"], default="copter")
+    parser.add_argument("--params", help="A .param/.parm file to load parameters from")
+    parser.add_argument("--tlog", help="A tlog to replay telemetry from")
+    parser.add_argument("--replay-speed", type=float, default=1.0)
+    parser.add_argument(
+        "--no-loop", action="store_true", help="Stop replaying at the end of the tlog"
+    )
+    parser.add_argument("--ftp-root", help="A directory to serve over MAVFtp")
+    parser.add_argument("--loss", type=float, default=0.0, help="From 0 to 1")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--bandwidth-bps", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    transport: Transport = (
+        PtyTransport() if args.pty else TcpServerTransport(args.host, args.port)
+    )
+
+    mock = MockAutopilot(
+        transport,
+        vehicle=args.vehicle,
+        params=loadParamFile(args.params) if args.params else None,
+        tlog_path=args.tlog,
+        replay_speed=args.replay_speed,
+        loop_replay=not args.no_loop,
+        files=loadFiles(args.ftp_root) if args.ftp_root else None,
+        impairment=LinkImpairment(
+            loss=args.loss,
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            bandwidth_bps=args.bandwidth_bps,
+            seed=args.seed,
+        ),
+    )
+
+    print(f"Mock {args.vehicle} listening on {mock.connection_string}")
+    with mock:
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,864 @@
+import math
+import struct
+import time
+import zlib
+from collections import OrderedDict
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pymavlink import mavftp, mavftp_op, mavutil
+from pymavlink.dialects.v20 import ardupilotmega as mavlink
+
+from .ftpServer import MockFtpServer
+from .link import ImpairedLink, LinkImpairment, Transport
+
+VEHICLE_TYPES = {
+    "copter": mavlink.MAV_TYPE_QUADROTOR,
+    "plane": mavlink.MAV_TYPE_FIXED_WING,
+}
+DEFAULT_FLIGHT_MODES = {
+    "copter": [0, 2, 5, 6, 3, 9],  # Stabilize, AltHold, Loiter, RTL, Auto, Land
+    "plane": [10, 5, 0, 11, 12, 2],  # Auto, FBWA, Manual, RTL, Loiter, Stabilize
+}
+DEFAULT_FLIGHT_SW_VERSION = (4, 5, 7)
+# Latitude and longitude in degE7 and altitude in metres, the same as the SITL setup
+DEFAULT_HOME = (527805691, -7079234, 0.19)
+DEFAULT_TELEMETRY_RATE_HZ = 4
+HEARTBEAT_INTERVAL_SECS = 1.0
+FORCE_ARM_MAGIC = 21196
+# Reading this parameter returns a hash of every parameter value, as PX4 does
+PARAM_HASH_CHECK_ID = "_HASH_CHECK"
+PARAM_HASH_CHECK_INDEX = 65535
+
+# Message types the mock generates itself, so are never replayed from a tlog
+ANSWERED_MESSAGE_TYPES = {
+    "HEARTBEAT",
+    "AUTOPILOT_VERSION",
+    "PARAM_VALUE",
+    "MISSION_COUNT",
+    "MISSION_ITEM",
+    "MISSION_ITEM_INT",
+    "MISSION_REQUEST",
+    "MISSION_REQUEST_INT",
+    "MISSION_ACK",
+    "MISSION_CURRENT",
+    "COMMAND_ACK",
+    "FILE_TRANSFER_PROTOCOL",
+    "TIMESYNC",
+    "BAD_DATA",
+}
+
+Params = Dict[str, Tuple[float, int]]
+MissionItem = Dict[str, Any]
+
+
+def createDefaultParams(vehicle: str = "copter") -> Params:
+    """
+    Create a small set of parameters, enough for every controller to find the
+    parameters it reads.
+
+    Args:
+        vehicle (str, optional): Either "copter" or "plane". Defaults to "copter".
+
+    Returns:
+        Params: The parameter values and types keyed by name
+    """
+    int32 = mavlink.MAV_PARAM_TYPE_INT32
+    real32 = mavlink.MAV_PARAM_TYPE_REAL32
+
+    params: Params = OrderedDict()
+    params["SYSID_THISMAV"] = (1, int32)
+    params["ARMING_CHECK"] = (1, int32)
+    params["BATT_MONITOR"] = (4, int32)
+    params["BATT_CAPACITY"] = (3300, int32)
+    params["FLTMODE_CH"] = (5, int32)
+    for index, mode in enumerate(DEFAULT_FLIGHT_MODES[vehicle]):
+        params[f"FLTMODE{index + 1}"] = (mode, int32)
+    if vehicle == "copter":
+        params["FRAME_CLASS"] = (1, int32)
+        params["FRAME_TYPE"] = (1, int32)
+
+    for channel in range(1, 17):
+        params[f"RC{channel}_MIN"] = (1100, int32)
+        params[f"RC{channel}_MAX"] = (1900, int32)
+        params[f"RC{channel}_TRIM"] = (1500, int32)
+        params[f"RC{channel}_REVERSED"] = (0, int32)
+        params[f"RC{channel}_OPTION"] = (0, int32)
+    for output in range(1, 17):
+        # Motors 1 to 4 on the first four outputs
+        params[f"SERVO{output}_FUNCTION"] = (32 + output if output <= 4 else 0, int32)
+        params[f"SERVO{output}_MIN"] = (1100, int32)
+        params[f"SERVO{output}_MAX"] = (1900, int32)
+        params[f"SERVO{output}_TRIM"] = (1500, int32)
+        params[f"SERVO{output}_REVERSED"] = (0, int32)
+
+    # Telemetry on serial 1 and 2, GPS on serial 3, the same as SITL
+    for port, (protocol, baud) in enumerate(
+        [(2, 115), (2, 57), (2, 57), (5, 230), (-1, 57), (-1, 57), (-1, 57)]
+    ):
+        params[f"SERIAL{port}_PROTOCOL"] = (protocol, int32)
+        params[f"SERIAL{port}_BAUD"] = (baud, int32)
+        params[f"SERIAL{port}_OPTIONS"] = (0, int32)
+
+    params["SIM_GPS_DISABLE"] = (0, int32)
+    params["SIM_GPS2_DISABLE"] = (0, int32)
+    params["GRIP_ENABLE"] = (0, int32)
+    params["WPNAV_SPEED"] = (1000.0, real32)
+    params["RTL_ALT"] = (1500.0, real32)
+
+    return params
+
+
+def loadParamFile(file_path: str) -> Params:
+    """
+    Load parameters from a Mission Planner/MAVProxy .param or .parm file, with
+    one "NAME VALUE" or "NAME,VALUE" pair per line.
+
+    Args:
+        file_path (str): The path of the file to load
+
+    Returns:
+        Params: The parameter values and types keyed by name
+    """
+    params: Params = OrderedDict()
+    with open(file_path, "r") as f:
+        for line in f:
+            line = line.split("#")[0].strip()
+            if not line:
+                continue
+
+            parts = line.replace(",", " ").split()
+            if len(parts) < 2:
+                continue
+
+            value = float(parts[1])
+            param_type = (
+                mavlink.MAV_PARAM_TYPE_INT32
+                if value.is_integer()
+                else mavlink.MAV_PARAM_TYPE_REAL32
+            )
+            params[parts[0]] = (value, param_type)
+
+    return params
+
+
+def loadTlogParams(tlog_path: str) -> Params:
+    """
+    Read the last value of each parameter sent by the vehicle in a tlog.
+
+    Args:
+        tlog_path (str): The path of the tlog
+
+    Returns:
+        Params: The parameter values and types keyed by name
+    """
+    params: Params = OrderedDict()
+    tlog = mavutil.mavlink_connection(tlog_path, robust_parsing=True)
+    try:
+        while True:
+            msg = tlog.recv_match(type="PARAM_VALUE")
+            if msg is None:
+                break
+            params[msg.param_id] = (msg.param_value, msg.param_type)
+    finally:
+        tlog.close()
+
+    return params
+
+
+class _LinkWriter:
+    """File-like object which pymavlink writes packed messages to."""
+
+    def __init__(self, link: ImpairedLink) -> None:
+        self.link = link
+
+    def write(self, data: bytes) -> None:
+        self.link.send(bytes(data))
+
+
+class MockAutopilot:
+    def __init__(
+        self,
+        transport: Transport,
+        vehicle: str = "copter",
+        params: Optional[Params] = None,
+        tlog_path: Optional[str] = None,
+        replay_speed: float = 1.0,
+        loop_replay: bool = True,
+        files: Optional[Dict[str, bytes]] = None,
+        impairment: Optional[LinkImpairment] = None,
+        system_id: int = 1,
+        component_id: int = mavlink.MAV_COMP_ID_AUTOPILOT1,
+        flight_sw_version: Tuple[int, int, int] = DEFAULT_FLIGHT_SW_VERSION,
+    ) -> None:
+        """
+        A mock ArduPilot autopilot which the GCS can connect to instead of SITL.
+
+        It answers the heartbeat, autopilot version, parameter, mission, command
+        and MAVFtp protocols, and sends telemetry either generated from a simple
+        model or replayed from a recorded tlog. Replies go through an ImpairedLink
+        so loss, latency and bandwidth limits can be applied to reproduce a poor
+        radio link.
+
+        Args:
+            transport (Transport): The transport the GCS connects over
+            vehicle (str, optional): Either "copter" or "plane". Defaults to "copter".
+            params (Optional[Params], optional): The parameters, defaults to those in the tlog if given, otherwise createDefaultParams.
+            tlog_path (Optional[str], optional): A tlog to replay telemetry from. Defaults to None.
+            replay_speed (float, optional): How fast to replay the tlog, 2 replays at double speed. Defaults to 1.0.
+            loop_replay (bool, optional): Start the tlog again once it ends. Defaults to True.
+            files (Optional[Dict[str, bytes]], optional): The files served over MAVFtp keyed by path. Defaults to None.
+            impairment (Optional[LinkImpairment], optional): The impairments to apply to sent packets. Defaults to None.
+            system_id (int, optional): The system ID of the mock. Defaults to 1.
+            component_id (int, optional): The component ID of the mock. Defaults to MAV_COMP_ID_AUTOPILOT1.
+            flight_sw_version (Tuple[int, int, int], optional): The reported firmware version. Defaults to DEFAULT_FLIGHT_SW_VERSION.
+        """
+        if vehicle not in VEHICLE_TYPES:
+            raise ValueError(
+                f"Unknown vehicle {vehicle}, must be one of {list(VEHICLE_TYPES)}"
+            )
+        if replay_speed <= 0:
+            raise ValueError(f"Replay speed must be positive, got {replay_speed}")
+
+        self.transport = transport
+        self.link = ImpairedLink(transport, impairment)
+        self.vehicle = vehicle
+        self.system_id = system_id
+        self.component_id = component_id
+        self.flight_sw_version = flight_sw_version
+
+        self.tlog_path = tlog_path
+        self.replay_speed = replay_speed
+        self.loop_replay = loop_replay
+
+        if params is None:
+            params = loadTlogParams(tlog_path) if tlog_path is not None else {}
+            if not params:
+                params = createDefaultParams(vehicle)
+        self.params: Params = OrderedDict(params)
+        self._params_lock = Lock()
+
+        # Mission items keyed by mission type, ArduPilot keeps home as item 0
+        self.missions: Dict[int, List[MissionItem]] = {
+            mavlink.MAV_MISSION_TYPE_MISSION: [self._createHomeItem()],
+            mavlink.MAV_MISSION_TYPE_FENCE: [],
+            mavlink.MAV_MISSION_TYPE_RALLY: [],
+        }
+        self._upload: Optional[Dict[str, Any]] = None
+
+        self.ftp_server = MockFtpServer(files)
+
+        self.armed = False
+        self.custom_mode = 0
+        self.prearm_checks_pass = True
+        # Results to send for specific commands instead of running them, e.g.
+        # {MAV_CMD_COMPONENT_ARM_DISARM: MAV_RESULT_DENIED}
+        self.command_results: Dict[int, int] = {}
+        self.telemetry_rate_hz: float = DEFAULT_TELEMETRY_RATE_HZ
+        self._stream_rates: Dict[int, float] = {}
+
+        self.received_message_counts: Dict[str, int] = {}
+
+        self._send_lock = Lock()
+        self.mav = mavlink.MAVLink(
+            _LinkWriter(self.link), srcSystem=system_id, srcComponent=component_id
+        )
+        self._parser = mavlink.MAVLink(None)
+        self._parser.robust_parsing = True
+
+        self._start_time = time.monotonic()
+        self._stop_event = Event()
+        self._threads: List[Thread] = []
+
+        self._message_handlers: Dict[str, Callable[[Any], None]] = {
+            "TIMESYNC": self._handleTimesync,
+            "REQUEST_DATA_STREAM": self._handleRequestDataStream,
+            "PARAM_REQUEST_LIST": self._handleParamRequestList,
+            "PARAM_REQUEST_READ": self._handleParamRequestRead,
+            "PARAM_SET": self._handleParamSet,
+            "MISSION_REQUEST_LIST": self._handleMissionRequestList,
+            "MISSION_REQUEST_INT": self._handleMissionRequest,
+            "MISSION_REQUEST": self._handleMissionRequest,
+            "MISSION_COUNT": self._handleMissionCount,
+            "MISSION_ITEM_INT": self._handleMissionItem,
+            "MISSION_ITEM": self._handleMissionItem,
+            "MISSION_CLEAR_ALL": self._handleMissionClearAll,
+            "MISSION_SET_CURRENT": self._handleMissionSetCurrent,
+            "COMMAND_LONG": self._handleCommand,
+            "COMMAND_INT": self._handleCommand,
+            "SET_MODE": self._handleSetMode,
+            "FILE_TRANSFER_PROTOCOL": self._handleFileTransferProtocol,
+        }
+
+    @property
+    def connection_string(self) -> str:
+        """The connection string the GCS should use to connect to the mock."""
+        return self.transport.connection_string
+
+    def start(self) -> None:
+        """Start answering the GCS and sending telemetry."""
+        telemetry_target = (
+            self._replayTlog if self.tlog_path is not None else self._sendTelemetry
+        )
+        for target in (self._receiveMessages, self._sendHeartbeats, telemetry_target):
+            thread = Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        """Stop all threads and close the link."""
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+        self.link.close()
+        self.transport.close()
+
+    def __enter__(self) -> "MockAutopilot":
+        self.start()
+        return self
+
+    def __exit__(self, type, value, traceback) -> None:
+        self.stop()
+
+    def _send(self, msg: Any) -> None:
+        with self._send_lock:
+            try:
+                self.mav.send(msg)
+            except Exception:
+                # Messages from a tlog may not pack with this dialect, skip them
+                pass
+
+    def _timeBootMs(self) -> int:
+        return int((time.monotonic() - self._start_time) * 1000)
+
+    def _receiveMessages(self) -> None:
+        while not self._stop_event.is_set():
+            if not self.transport.is_client_connected:
+                if not self.transport.waitForClient(self._stop_event):
+                    return
+                # Start afresh for each new GCS connection
+                self._parser = mavlink.MAVLink(None)
+                self._parser.robust_parsing = True
+
+            data = self.transport.read(0.1)
+            if not data:
+                continue
+
+            for msg in self._parser.parse_buffer(data) or []:
+                self.handleMessage(msg)
+
+    def handleMessage(self, msg: Any) -> None:
+        """
+        Handle a single message from the GCS.
+
+        Args:
+            msg: The MAVLink message received
+        """
+        msg_type = msg.get_type()
+        self.received_message_counts[msg_type] = (
+            self.received_message_counts.get(msg_type, 0) + 1
+        )
+
+        handler = self._message_handlers.get(msg_type)
+        if handler is not None:
+            handler(msg)
+
+    def _sendHeartbeats(self) -> None:
+        while not self._stop_event.is_set():
+            self.sendHeartbeat()
+            self._stop_event.wait(HEARTBEAT_INTERVAL_SECS)
+
+    def sendHeartbeat(self) -> None:
+        base_mode = mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED
+        if self.armed:
+            base_mode |= mavlink.MAV_MODE_FLAG_SAFETY_ARMED
+
+        self._send(
+            self.mav.heartbeat_encode(
+                VEHICLE_TYPES[self.vehicle],
+                mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA,
+                base_mode,
+                self.custom_mode,
+                mavlink.MAV_STATE_ACTIVE if self.armed else mavlink.MAV_STATE_STANDBY,
+            )
+        )
+
+    def _sendTelemetry(self) -> None:
+        lat, lon, alt = DEFAULT_HOME
+        while not self._stop_event.is_set():
+            if self.telemetry_rate_hz <= 0:
+                self._stop_event.wait(0.1)
+                continue
+
+            time_boot_ms = self._timeBootMs()
+            t = time_boot_ms / 1000
+            yaw = (t * 0.2) % (2 * math.pi) - math.pi
+            heading = int(math.degrees(yaw) % 360)
+
+            self._send(
+                self.mav.attitude_encode(
+                    time_boot_ms, 0.05 * math.sin(t), 0.05 * math.cos(t), yaw, 0, 0, 0.2
+                )
+            )
+            self._send(
+                self.mav.global_position_int_encode(
+                    time_boot_ms,
+                    lat,
+                    lon,
+                    int(alt * 1000),
+                    0,
+                    0,
+                    0,
+                    0,
+                    heading * 100,
+                )
+            )
+            self._send(self.mav.vfr_hud_encode(0, 0, heading, 0, alt, 0))
+            self._send(
+                self.mav.gps_raw_int_encode(
+                    time_boot_ms * 1000,
+                    mavlink.GPS_FIX_TYPE_3D_FIX,
+                    lat,
+                    lon,
+                    int(alt * 1000),
+                    120,
+                    200,
+                    0,
+                    0,
+                    12,
+                )
+            )
+            self._send(
+                self.mav.sys_status_encode(
+                    0, 0, 0, 250, 12600, 150, 87, 0, 0, 0, 0, 0, 0
+                )
+            )
+
+            self._stop_event.wait(1 / self.telemetry_rate_hz)
+
+    def _replayTlog(self) -> None:
+        assert self.tlog_path is not None
+
+        while not self._stop_event.is_set():
+            tlog = mavutil.mavlink_connection(self.tlog_path, robust_parsing=True)
+            try:
+                self._replayTlogOnce(tlog)
+            finally:
+                tlog.close()
+
+            if not self.loop_replay:
+                return
+
+    def _replayTlogOnce(self, tlog: Any) -> None:
+        vehicle_system_id: Optional[int] = None
+        first_timestamp: Optional[float] = None
+        replay_start = time.monotonic()
+
+        while not self._stop_event.is_set():
+            msg = tlog.recv_msg()
+            if msg is None:
+                return
+
+            msg_type = msg.get_type()
+            # Only replay messages sent by the vehicle, not by the GCS recording the tlog
+            if (
+                vehicle_system_id is None
+                and msg_type == "HEARTBEAT"
+                and msg.autopilot != mavlink.MAV_AUTOPILOT_INVALID
+            ):
+                vehicle_system_id = msg.get_srcSystem()
+            if (
+                vehicle_system_id is None
+                or msg.get_srcSystem() != vehicle_system_id
+                or msg_type in ANSWERED_MESSAGE_TYPES
+            ):
+                continue
+
+            timestamp = getattr(msg, "_timestamp", None)
+            if timestamp is not None:
+                if first_timestamp is None:
+                    first_timestamp = timestamp
+                send_at = (
+                    replay_start + (timestamp - first_timestamp) / self.replay_speed
+                )
+                delay = send_at - time.monotonic()
+                if delay > 0 and self._stop_event.wait(delay):
+                    return
+
+            self._send(msg)
+
+    def _handleTimesync(self, msg: Any) -> None:
+        if msg.tc1 == 0:
+            # Answer with the time since boot in nanoseconds, as ArduPilot does
+            self._send(self.mav.timesync_encode(self._timeBootMs() * 1000000, msg.ts1))
+
+    def _handleRequestDataStream(self, msg: Any) -> None:
+        if msg.start_stop:
+            self._stream_rates[msg.req_stream_id] = msg.req_message_rate
+        elif msg.req_stream_id == mavlink.MAV_DATA_STREAM_ALL:
+            self._stream_rates.clear()
+        else:
+            self._stream_rates.pop(msg.req_stream_id, None)
+
+        self.telemetry_rate_hz = max(self._stream_rates.values(), default=0)
+
+    def _sendParam(self, index: int) -> None:
+        with self._params_lock:
+            names = list(self.params)
+            name = names[index]
+            value, param_type = self.params[name]
+
+        self._send(
+            self.mav.param_value_encode(
+                name.encode("ascii"), value, param_type, len(names), index
+            )
+        )
+
+    def _sendParamHash(self) -> None:
+        crc = 0
+        with self._params_lock:
+            for name, (value, _) in self.params.items():
+                crc = zlib.crc32(name.encode("ascii"), crc)
+                crc = zlib.crc32(struct.pack("<f", value), crc)
+            param_count = len(self.params)
+
+        # The hash is sent as the bytes of the float value
+        (value,) = struct.unpack("<f", struct.pack("<I", crc))
+        self._send(
+            self.mav.param_value_encode(
+                PARAM_HASH_CHECK_ID.encode("ascii"),
+                value,
+                mavlink.MAV_PARAM_TYPE_UINT32,
+                param_count,
+                PARAM_HASH_CHECK_INDEX,
+            )
+        )
+
+    def _handleParamRequestList(self, msg: Any) -> None:
+        for index in range(len(self.params)):
+            if self._stop_event.is_set():
+                return
+            self._sendParam(index)
+
+    def _handleParamRequestRead(self, msg: Any) -> None:
+        index = msg.param_index
+        if index < 0 and msg.param_id == PARAM_HASH_CHECK_ID:
+            self._sendParamHash()
+            return
+        if index < 0:
+            try:
+                index = list(self.params).index(msg.param_id)
+            except ValueError:
+                return
+        if index < len(self.params):
+            self._sendParam(index)
+
+    def _handleParamSet(self, msg: Any) -> None:
+        with self._params_lock:
+            if msg.param_id not in self.params:
+                # ArduPilot ignores unknown parameters
+                return
+            _, param_type = self.params[msg.param_id]
+            self.params[msg.param_id] = (msg.param_value, param_type)
+            index = list(self.params).index(msg.param_id)
+
+        self._sendParam(index)
+
+    def _createHomeItem(self) -> MissionItem:
+        lat, lon, alt = DEFAULT_HOME
+        return {
+            "frame": mavlink.MAV_FRAME_GLOBAL,
+            "command": mavlink.MAV_CMD_NAV_WAYPOINT,
+            "current": 0,
+            "autocontinue": 1,
+            "params": [0.0, 0.0, 0.0, 0.0],
+            "x": lat,
+            "y": lon,
+            "z": alt,
+        }
+
+    def _sendMissionAck(self, msg: Any, result: int, mission_type: int) -> None:
+        self._send(
+            self.mav.mission_ack_encode(
+                msg.get_srcSystem(),
+                msg.get_srcComponent(),
+                result,
+                mission_type=mission_type,
+            )
+        )
+
+    def _handleMissionRequestList(self, msg: Any) -> None:
+        mission_type = msg.mission_type
+        items = self.missions.get(mission_type)
+        if items is None:
+            self._sendMissionAck(
+                msg, mavlink.MAV_MISSION_UNSUPPORTED, mission_type=mission_type
+            )
+            return
+
+        self._send(
+            self.mav.mission_count_encode(
+                msg.get_srcSystem(),
+                msg.get_srcComponent(),
+                len(items),
+                mission_type=mission_type,
+            )
+        )
+
+    def _handleMissionRequest(self, msg: Any) -> None:
+        mission_type = msg.mission_type
+        items = self.missions.get(mission_type, [])
+        if msg.seq >= len(items):
+            self._sendMissionAck(
+                msg, mavlink.MAV_MISSION_INVALID_SEQUENCE, mission_type=mission_type
+            )
+            return
+
+        item = items[msg.seq]
+        self._send(
+            self.mav.mission_item_int_encode(
+                msg.get_srcSystem(),
+                msg.get_srcComponent(),
+                msg.seq,
+                item["frame"],
+                item["command"],
+                item["current"],
+                item["autocontinue"],
+                *item["params"],
+                item["x"],
+                item["y"],
+                item["z"],
+                mission_type=mission_type,
+            )
+        )
+
+    def _requestMissionItem(self, msg: Any, seq: int, mission_type: int) -> None:
+        self._send(
+            self.mav.mission_request_encode(
+                msg.get_srcSystem(),
+                msg.get_srcComponent(),
+                seq,
+                mission_type=mission_type,
+            )
+        )
+
+    def _handleMissionCount(self, msg: Any) -> None:
+        mission_type = msg.mission_type
+        if mission_type not in self.missions:
+            self._sendMissionAck(
+                msg, mavlink.MAV_MISSION_UNSUPPORTED, mission_type=mission_type
+            )
+            return
+
+        if msg.count == 0:
+            self.missions[mission_type] = []
+            self._sendMissionAck(
+                msg, mavlink.MAV_MISSION_ACCEPTED, mission_type=mission_type
+            )
+            return
+
+        self._upload = {"mission_type": mission_type, "count": msg.count, "items": []}
+        self._requestMissionItem(msg, 0, mission_type)
+
+    def _handleMissionItem(self, msg: Any) -> None:
+        upload = self._upload
+        mission_type = msg.mission_type
+        if upload is None or upload["mission_type"] != mission_type:
+            return
+
+        items: List[MissionItem] = upload["items"]
+        if msg.seq != len(items):
+            # Out of order, ask again for the item we are waiting for
+            self._requestMissionItem(msg, len(items), mission_type)
+            return
+
+        if msg.get_type() == "MISSION_ITEM_INT":
+            x, y = msg.x, msg.y
+        else:
+            x, y = int(msg.x * 1e7), int(msg.y * 1e7)
+
+        item: MissionItem = {
+            "frame": msg.frame,
+            "command": msg.command,
+            # ArduPilot does not store which item was flagged as current
+            "current": 0,
+            "autocontinue": msg.autocontinue,
+            "params": [msg.param1, msg.param2, msg.param3, msg.param4],
+            "x": x,
+            "y": y,
+            "z": msg.z,
+        }
+
+        # Match how ArduPilot stores each type of item, so downloads return the
+        # same items as from SITL
+        if mission_type == mavlink.MAV_MISSION_TYPE_MISSION and msg.seq == 0:
+            # Home is always the vehicle's home, whatever is uploaded
+            item = self._createHomeItem()
+        elif msg.command == mavlink.MAV_CMD_NAV_LAND:
+            # Only the sign of the yaw is stored, so it is read back as 1 or -1
+            item["params"][3] = -1.0 if msg.param4 < 0 else 1.0
+        elif mission_type == mavlink.MAV_MISSION_TYPE_FENCE:
+            item.update(frame=mavlink.MAV_FRAME_GLOBAL, autocontinue=0, z=0.0)
+        elif mission_type == mavlink.MAV_MISSION_TYPE_RALLY:
+            item.update(frame=mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT, autocontinue=0)
+
+        items.append(item)
+
+        if len(items) < upload["count"]:
+            self._requestMissionItem(msg, len(items), mission_type)
+            return
+
+        self.missions[mission_type] = items
+        self._upload = None
+        self._sendMissionAck(
+            msg, mavlink.MAV_MISSION_ACCEPTED, mission_type=mission_type
+        )
+
+    def _handleMissionClearAll(self, msg: Any) -> None:
+        mission_type = msg.mission_type
+        if mission_type == mavlink.MAV_MISSION_TYPE_ALL:
+            cleared_types = list(self.missions)
+        elif mission_type in self.missions:
+            cleared_types = [mission_type]
+        else:
+            self._sendMissionAck(
+                msg, mavlink.MAV_MISSION_UNSUPPORTED, mission_type=mission_type
+            )
+            return
+
+        for cleared_type in cleared_types:
+            self.missions[cleared_type] = (
+                [self._createHomeItem()]
+                if cleared_type == mavlink.MAV_MISSION_TYPE_MISSION
+                else []
+            )
+
+        self._sendMissionAck(
+            msg, mavlink.MAV_MISSION_ACCEPTED, mission_type=mission_type
+        )
+
+    def _handleMissionSetCurrent(self, msg: Any) -> None:
+        self._send(self.mav.mission_current_encode(msg.seq))
+
+    def _handleSetMode(self, msg: Any) -> None:
+        self.custom_mode = msg.custom_mode
+        self.sendHeartbeat()
+
+    def _handleCommand(self, msg: Any) -> None:
+        command = msg.command
+        result = self.command_results.get(command)
+        if result is None:
+            result = self._runCommand(command, msg)
+
+        self._send(
+            self.mav.command_ack_encode(
+                command,
+                result,
+                target_system=msg.get_srcSystem(),
+                target_component=msg.get_srcComponent(),
+            )
+        )
+
+        if (
+            command == mavlink.MAV_CMD_REQUEST_MESSAGE
+            and result == mavlink.MAV_RESULT_ACCEPTED
+        ):
+            self._sendRequestedMessage(int(msg.param1))
+        elif command == mavlink.MAV_CMD_REQUEST_AUTOPILOT_CAPABILITIES:
+            self._sendAutopilotVersion()
+
+    def _runCommand(self, command: int, msg: Any) -> int:
+        if command == mavlink.MAV_CMD_COMPONENT_ARM_DISARM:
+            arm = msg.param1 == 1
+            force = msg.param2 == FORCE_ARM_MAGIC
+            if arm and not self.armed and not force and not self.prearm_checks_pass:
+                return mavlink.MAV_RESULT_FAILED
+            self.armed = arm
+            self.sendHeartbeat()
+        elif command == mavlink.MAV_CMD_DO_SET_MODE:
+            self.custom_mode = int(msg.param2)
+            self.sendHeartbeat()
+        elif command == mavlink.MAV_CMD_REQUEST_MESSAGE:
+            if int(msg.param1) not in (
+                mavlink.MAVLINK_MSG_ID_AUTOPILOT_VERSION,
+                mavlink.MAVLINK_MSG_ID_HEARTBEAT,
+            ):
+                return mavlink.MAV_RESULT_UNSUPPORTED
+
+        return mavlink.MAV_RESULT_ACCEPTED
+
+    def _sendRequestedMessage(self, message_id: int) -> None:
+        if message_id == mavlink.MAVLINK_MSG_ID_AUTOPILOT_VERSION:
+            self._sendAutopilotVersion()
+        elif message_id == mavlink.MAVLINK_MSG_ID_HEARTBEAT:
+            self.sendHeartbeat()
+
+    def _sendAutopilotVersion(self) -> None:
+        major, minor, patch = self.flight_sw_version
+        flight_sw_version = (
+            (major << 24)
+            | (minor << 16)
+            | (patch << 8)
+            | mavlink.FIRMWARE_VERSION_TYPE_OFFICIAL
+        )
+        capabilities = (
+            mavlink.MAV_PROTOCOL_CAPABILITY_MISSION_FLOAT
+            | mavlink.MAV_PROTOCOL_CAPABILITY_PARAM_FLOAT
+            | mavlink.MAV_PROTOCOL_CAPABILITY_MISSION_INT
+            | mavlink.MAV_PROTOCOL_CAPABILITY_COMMAND_INT
+            | mavlink.MAV_PROTOCOL_CAPABILITY_FTP
+            | mavlink.MAV_PROTOCOL_CAPABILITY_MAVLINK2
+            | mavlink.MAV_PROTOCOL_CAPABILITY_MISSION_FENCE
+            | mavlink.MAV_PROTOCOL_CAPABILITY_MISSION_RALLY
+        )
+
+        self._send(
+            self.mav.autopilot_version_encode(
+                capabilities,
+                flight_sw_version,
+                0,
+                0,
+                0,
+                [0] * 8,
+                [0] * 8,
+                [0] * 8,
+                0,
+                0,
+                0,
+            )
+        )
+
+    def _handleFileTransferProtocol(self, msg: Any) -> None:
+        payload = bytes(msg.payload)
+        (
+            seq,
+            session,
+            opcode,
+            size,
+            req_opcode,
+            burst_complete,
+            _padding,
+            offset,
+        ) = struct.unpack("<HBBBBBBI", payload[: mavftp.HDR_Len])
+        request = mavftp_op.FTP_OP(
+            seq,
+            session,
+            opcode,
+            size,
+            req_opcode,
+            burst_complete,
+            offset,
+            bytearray(payload[mavftp.HDR_Len :][:size]),
+        )
+
+        for response in self.ftp_server.handle(request):
+            response_payload = response.pack()
+            response_payload.extend(
+                bytearray(mavftp.HDR_Len + mavftp.MAX_Payload - len(response_payload))
+            )
+            self._send(
+                self.mav.file_transfer_protocol_encode(
+                    0, msg.get_srcSystem(), msg.get_srcComponent(), response_payload
+                )
+            )
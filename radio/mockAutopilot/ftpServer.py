@@ -0,0 +1,208 @@
+import struct
+from typing import Dict, List, Optional, Set
+
+from pymavlink import mavftp, mavftp_op
+
+# The number of packets sent in response to a single burst read request
+FTP_BURST_PACKETS = 32
+
+# The same layout as the filesystem of an ArduPilot SITL
+SITL_DIRECTORIES = ["/@ROMFS", "/@SYS", "/logs", "/terrain"]
+SITL_FILES = {
+    "/@ROMFS/locations.txt": (
+        b"# Additional locations for SITL\nFGCS=52.7805691,-0.7079235,136.35,270\n"
+    ),
+    "/@SYS/uarts.txt": b"UARTV1\nSERIAL0 TCP:5760\n",
+    "/terrain/N52W001.DAT": b"",
+}
+
+
+class MockFtpServer:
+    def __init__(
+        self,
+        files: Optional[Dict[str, bytes]] = None,
+        directories: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Answers MAVFtp requests from an in memory filesystem. Only reading is
+        supported, which is all the FTP controller uses.
+
+        Args:
+            files (Optional[Dict[str, bytes]], optional): The file contents keyed by absolute path. Defaults to SITL_FILES.
+            directories (Optional[List[str]], optional): Directories to create even if they are empty. Defaults to SITL_DIRECTORIES.
+        """
+        self.files: Dict[str, bytes] = {}
+        self.directories: Set[str] = {"/"}
+
+        if files is None:
+            files = SITL_FILES
+            if directories is None:
+                directories = SITL_DIRECTORIES
+
+        for directory in directories or []:
+            self.addDirectory(directory)
+        for path, data in files.items():
+            self.addFile(path, data)
+
+        self.open_files: Dict[int, str] = {}
+
+    def addFile(self, path: str, data: bytes) -> None:
+        """
+        Add or replace a file.
+
+        Args:
+            path (str): The absolute path of the file, e.g. "/APM/LOGS/00000001.BIN"
+            data (bytes): The contents of the file
+        """
+        path = "/" + path.strip("/")
+        self.files[path] = bytes(data)
+        self.addDirectory(path.rsplit("/", 1)[0])
+
+    def addDirectory(self, path: str) -> None:
+        """
+        Add a directory, along with any missing parent directories.
+
+        Args:
+            path (str): The absolute path of the directory
+        """
+        parts = [part for part in path.split("/") if part]
+        for index in range(len(parts) + 1):
+            self.directories.add("/" + "/".join(parts[:index]))
+
+    def _listDirectory(self, path: str) -> Optional[List[bytes]]:
+        directory = "/" + path.strip("/")
+        if directory not in self.directories:
+            return None
+
+        prefix = "/" if directory == "/" else directory + "/"
+
+        # ArduPilot lists the current and parent directories first
+        entries: Dict[str, bytes] = {".": b"D.", "..": b"D.."}
+        for child in sorted(self.directories):
+            if child.startswith(prefix) and "/" not in child[len(prefix) :]:
+                name = child[len(prefix) :]
+                if name:
+                    entries[name] = b"D" + name.encode("ascii")
+        for file_path, data in sorted(self.files.items()):
+            if file_path.startswith(prefix) and "/" not in file_path[len(prefix) :]:
+                name = file_path[len(prefix) :]
+                entries[name] = b"F" + f"{name}\t{len(data)}".encode("ascii")
+
+        return list(entries.values())
+
+    def handle(self, request: mavftp_op.FTP_OP) -> List[mavftp_op.FTP_OP]:
+        """
+        Handle a single request from the GCS.
+
+        Args:
+            request (mavftp_op.FTP_OP): The request to handle
+
+        Returns:
+            List[mavftp_op.FTP_OP]: The responses to send, in order
+        """
+        opcode = request.opcode
+
+        if opcode in (mavftp_op.OP_ResetSessions, mavftp_op.OP_TerminateSession):
+            if opcode == mavftp_op.OP_ResetSessions:
+                self.open_files.clear()
+            else:
+                self.open_files.pop(request.session, None)
+            return [self._ack(request)]
+
+        if opcode == mavftp_op.OP_ListDirectory:
+            return [self._handleListDirectory(request)]
+
+        if opcode == mavftp_op.OP_OpenFileRO:
+            path = "/" + self._decodePath(request).strip("/")
+            if path not in self.files:
+                return [self._nack(request, mavftp.FtpError.FileNotFound)]
+
+            self.open_files[request.session] = path
+            return [self._ack(request, struct.pack("<I", len(self.files[path])))]
+
+        if opcode in (mavftp_op.OP_ReadFile, mavftp_op.OP_BurstReadFile):
+            open_path = self.open_files.get(request.session)
+            if open_path is None:
+                return [self._nack(request, mavftp.FtpError.InvalidSession)]
+
+            return self._handleRead(request, self.files[open_path])
+
+        return [self._nack(request, mavftp.FtpError.UnknownCommand)]
+
+    def _handleListDirectory(self, request: mavftp_op.FTP_OP) -> mavftp_op.FTP_OP:
+        entries = self._listDirectory(self._decodePath(request))
+        if entries is None:
+            return self._nack(request, mavftp.FtpError.FileNotFound)
+
+        payload = bytearray()
+        for entry in entries[request.offset :]:
+            if len(payload) + len(entry) + 1 > mavftp.MAX_Payload:
+                break
+            payload += entry + b"\x00"
+
+        if not payload:
+            return self._nack(request, mavftp.FtpError.EndOfFile)
+
+        return self._ack(request, bytes(payload))
+
+    def _handleRead(
+        self, request: mavftp_op.FTP_OP, data: bytes
+    ) -> List[mavftp_op.FTP_OP]:
+        read_size = min(request.size or mavftp.MAX_Payload, mavftp.MAX_Payload)
+        packet_count = (
+            FTP_BURST_PACKETS if request.opcode == mavftp_op.OP_BurstReadFile else 1
+        )
+
+        responses = []
+        offset = request.offset
+        for _ in range(packet_count):
+            if offset >= len(data):
+                break
+
+            chunk = data[offset : offset + read_size]
+            response = self._ack(request, chunk)
+            response.offset = offset
+            responses.append(response)
+            offset += len(chunk)
+
+            if len(chunk) < read_size:
+                break
+
+        if not responses:
+            responses.append(self._nack(request, mavftp.FtpError.EndOfFile))
+
+        if request.opcode == mavftp_op.OP_BurstReadFile:
+            responses[-1].burst_complete = 1
+
+        return responses
+
+    @staticmethod
+    def _decodePath(request: mavftp_op.FTP_OP) -> str:
+        payload = bytes(request.payload or b"")[: request.size]
+        return payload.split(b"\x00")[0].decode("ascii", errors="replace")
+
+    @staticmethod
+    def _ack(request: mavftp_op.FTP_OP, payload: bytes = b"") -> mavftp_op.FTP_OP:
+        return mavftp_op.FTP_OP(
+            (request.seq + 1) % 65536,
+            request.session,
+            mavftp_op.OP_Ack,
+            len(payload),
+            request.opcode,
+            0,
+            request.offset,
+            bytearray(payload),
+        )
+
+    @staticmethod
+    def _nack(request: mavftp_op.FTP_OP, error: mavftp.FtpError) -> mavftp_op.FTP_OP:
+        return mavftp_op.FTP_OP(
+            (request.seq + 1) % 65536,
+            request.session,
+            mavftp_op.OP_Nack,
+            1,
+            request.opcode,
+            0,
+            request.offset,
+            bytearray([error.value]),
+        )
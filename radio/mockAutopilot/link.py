@@ -0,0 +1,319 @@
+import heapq
+import os
+import random
+import select
+import socket
+import time
+from threading import Condition, Event, Thread
+from typing import List, Optional, Tuple
+
+
+class LinkImpairment:
+    def __init__(
+        self,
+        loss: float = 0.0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        bandwidth_bps: Optional[int] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        The impairments applied to packets sent by the mock autopilot, used to
+        simulate a lossy or slow telemetry radio.
+
+        Args:
+            loss (float, optional): The chance of each packet being dropped, from 0 to 1. Defaults to 0.0.
+            latency_ms (float, optional): The delay added to every packet. Defaults to 0.0.
+            jitter_ms (float, optional): The maximum random delay added on top of the latency. Defaults to 0.0.
+            bandwidth_bps (Optional[int], optional): The link speed in bits per second, None for unlimited. Defaults to None.
+            seed (Optional[int], optional): The seed for the random number generator, so runs can be repeated. Defaults to None.
+        """
+        if not 0 <= loss <= 1:
+            raise ValueError(f"Packet loss must be between 0 and 1, got {loss}")
+        if latency_ms < 0 or jitter_ms < 0:
+            raise ValueError("Latency and jitter cannot be negative")
+        if bandwidth_bps is not None and bandwidth_bps <= 0:
+            raise ValueError(f"Bandwidth must be positive, got {bandwidth_bps}")
+
+        self.loss = loss
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.bandwidth_bps = bandwidth_bps
+        self.random = random.Random(seed)
+
+    @property
+    def is_perfect(self) -> bool:
+        return (
+            self.loss == 0
+            and self.latency_ms == 0
+            and self.jitter_ms == 0
+            and self.bandwidth_bps is None
+        )
+
+
+class Transport:
+    """The byte stream between the mock autopilot and the GCS."""
+
+    def waitForClient(self, stop_event: Event) -> bool:
+        """
+        Block until a GCS is connected.
+
+        Returns:
+            bool: True if a GCS connected, False if stop_event was set first
+        """
+        return True
+
+    def read(self, timeout: float) -> bytes:
+        """Read any available bytes, returns an empty bytes object if none arrived."""
+        raise NotImplementedError
+
+    def write(self, data: bytes) -> None:
+        raise NotImplementedError
+
+    def disconnectClient(self) -> None:
+        """Drop the current GCS connection, if the transport supports it."""
+
+    @property
+    def is_client_connected(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+    @property
+    def connection_string(self) -> str:
+        """The connection string the GCS should use to connect."""
+        raise NotImplementedError
+
+
+class TcpServerTransport(Transport):
+    def __init__(self, host: str = "127.0.0.1", port: int = 5760) -> None:
+        """
+        Listens for a single GCS connection over TCP, the same as SITL does.
+        Use port 0 to pick a free port.
+
+        Args:
+            host (str, optional): The address to listen on. Defaults to "127.0.0.1".
+            port (int, optional): The port to listen on. Defaults to 5760.
+        """
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((host, port))
+        self.server.listen(1)
+        self.server.settimeout(0.2)
+        self.host, self.port = self.server.getsockname()[:2]
+        self.client: Optional[socket.socket] = None
+
+    def waitForClient(self, stop_event: Event) -> bool:
+        while not stop_event.is_set():
+            try:
+                client, _ = self.server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return False
+
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client.settimeout(0.2)
+            self.client = client
+            return True
+        return False
+
+    def read(self, timeout: float) -> bytes:
+        client = self.client
+        if client is None:
+            time.sleep(timeout)
+            return b""
+
+        try:
+            client.settimeout(timeout)
+            data = client.recv(4096)
+        except socket.timeout:
+            return b""
+        except OSError:
+            self.disconnectClient()
+            return b""
+
+        if not data:
+            # The GCS closed the connection
+            self.disconnectClient()
+        return data
+
+    def write(self, data: bytes) -> None:
+        client = self.client
+        if client is None:
+            return
+
+        try:
+            client.sendall(data)
+        except OSError:
+            self.disconnectClient()
+
+    def disconnectClient(self) -> None:
+        client = self.client
+        self.client = None
+        if client is not None:
+            try:
+                client.close()
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        self.disconnectClient()
+        self.server.close()
+
+    @property
+    def is_client_connected(self) -> bool:
+        return self.client is not None
+
+    @property
+    def connection_string(self) -> str:
+        return f"tcp:{self.host}:{self.port}"
+
+
+class PtyTransport(Transport):
+    def __init__(self) -> None:
+        """
+        Creates a pseudo-terminal which the GCS can open as if it were a serial port
+        connected to a flight controller. Only available on POSIX systems.
+        """
+        import tty
+
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.master_fd)
+        tty.setraw(self.slave_fd)
+        self.device_path = os.ttyname(self.slave_fd)
+        self.closed = False
+
+    def read(self, timeout: float) -> bytes:
+        if self.closed:
+            return b""
+
+        readable, _, _ = select.select([self.master_fd], [], [], timeout)
+        if not readable:
+            return b""
+
+        try:
+            return os.read(self.master_fd, 4096)
+        except OSError:
+            return b""
+
+    def write(self, data: bytes) -> None:
+        if self.closed:
+            return
+
+        try:
+            os.write(self.master_fd, data)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        if self.closed:
+            return
+
+        self.closed = True
+        for fd in (self.master_fd, self.slave_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    @property
+    def connection_string(self) -> str:
+        return self.device_path
+
+
+class ImpairedLink:
+    def __init__(
+        self, transport: Transport, impairment: Optional[LinkImpairment] = None
+    ) -> None:
+        """
+        Sends packets over a transport after applying the loss, latency and
+        bandwidth limits of a LinkImpairment. Packets are dropped whole, so the
+        GCS sees gaps in the MAVLink sequence numbers the same as with a real radio.
+
+        Args:
+            transport (Transport): The transport to send packets over
+            impairment (Optional[LinkImpairment], optional): The impairments to apply. Defaults to no impairment.
+        """
+        self.transport = transport
+        self.impairment = impairment or LinkImpairment()
+
+        self.packets_sent = 0
+        self.packets_dropped = 0
+        self.bytes_sent = 0
+
+        # Packets waiting to be delivered, as (delivery time, order, data)
+        self._queue: List[Tuple[float, int, bytes]] = []
+        self._order = 0
+        self._link_free_at = 0.0
+        self._condition = Condition()
+        self._stop_event = Event()
+        self._sender_thread: Optional[Thread] = None
+
+        if not self.impairment.is_perfect:
+            self._sender_thread = Thread(target=self._sendQueuedPackets, daemon=True)
+            self._sender_thread.start()
+
+    def send(self, packet: bytes) -> None:
+        """
+        Send a single packet, or queue it to be sent later if the link is impaired.
+
+        Args:
+            packet (bytes): The packet to send
+        """
+        impairment = self.impairment
+
+        if impairment.is_perfect:
+            self.transport.write(packet)
+            self.packets_sent += 1
+            self.bytes_sent += len(packet)
+            return
+
+        with self._condition:
+            if impairment.loss > 0 and impairment.random.random() < impairment.loss:
+                self.packets_dropped += 1
+                return
+
+            now = time.monotonic()
+            send_at = now
+            if impairment.bandwidth_bps is not None:
+                # Packets queue up behind each other when the link is saturated
+                start = max(now, self._link_free_at)
+                self._link_free_at = start + len(packet) * 8 / impairment.bandwidth_bps
+                send_at = self._link_free_at
+
+            delay_ms = impairment.latency_ms
+            if impairment.jitter_ms > 0:
+                delay_ms += impairment.random.uniform(0, impairment.jitter_ms)
+            send_at += delay_ms / 1000
+
+            heapq.heappush(self._queue, (send_at, self._order, packet))
+            self._order += 1
+            self._condition.notify()
+
+    def _sendQueuedPackets(self) -> None:
+        while not self._stop_event.is_set():
+            with self._condition:
+                if not self._queue:
+                    self._condition.wait(0.1)
+                    continue
+
+                send_at, _, packet = self._queue[0]
+                wait_secs = send_at - time.monotonic()
+                if wait_secs > 0:
+                    self._condition.wait(min(wait_secs, 0.1))
+                    continue
+
+                heapq.heappop(self._queue)
+
+            self.transport.write(packet)
+            self.packets_sent += 1
+            self.bytes_sent += len(packet)
+
+    def close(self) -> None:
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._sender_thread is not None:
+            self._sender_thread.join(timeout=1)
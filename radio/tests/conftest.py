@@ -1,9 +1,16 @@
+import os
+
 import app.droneStatus as _droneStatus_module
 import pytest
 from app.drone import Drone
 
 from tests import socketio_client as _socketio_client
 
+# Set to "copter" or "plane" to run the tests against a mock autopilot instead of SITL
+MOCK_AUTOPILOT_ENV_VAR = "FGCS_MOCK_AUTOPILOT"
+
+_mock_autopilot = None
+
 
 def pytest_configure(config):
     """Register custom markers"""
@@ -31,20 +38,71 @@ def setupDrone(connectionString: str) -> bool:
     return True
 
 
+def startMockAutopilot(vehicle: str) -> str:
+    """
+    Start a mock autopilot to run the tests against
+
+    Args:
+        vehicle (str): Either "copter" or "plane"
+
+    Returns:
+        str: The connection string for the mock autopilot
+    """
+    global _mock_autopilot
+
+    from mockAutopilot import (
+        MockAutopilot,
+        TcpServerTransport,
+        createDefaultParams,
+        loadParamFile,
+    )
+
+    # The tests use parameters from the full SITL parameter list
+    params = createDefaultParams(vehicle)
+    params.update(
+        loadParamFile(
+            os.path.join(
+                os.path.dirname(__file__), "param_test_files", "inject_params.parm"
+            )
+        )
+    )
+
+    _mock_autopilot = MockAutopilot(
+        TcpServerTransport(port=0), vehicle=vehicle, params=params
+    )
+    _mock_autopilot.start()
+    return _mock_autopilot.connection_string
+
+
 def pytest_sessionstart(session):
     """
     Called after the Session object has been created and
     before performing collection and entering the run test loop.
     """
-    print("\033[1;31;40mRUNNING TESTS WITH A SIMULATOR \033[0m")
+    mock_vehicle = os.environ.get(MOCK_AUTOPILOT_ENV_VAR)
+
+    if mock_vehicle:
+        print(
+            f"\033[1;31;40mRUNNING TESTS WITH A MOCK AUTOPILOT ({mock_vehicle}) \033[0m"
+        )
+        connection_string = startMockAutopilot(mock_vehicle)
+    else:
+        print("\033[1;31;40mRUNNING TESTS WITH A SIMULATOR \033[0m")
+        connection_string = "tcp:127.0.0.1:5760"
 
-    success = setupDrone("tcp:127.0.0.1:5760")
+    success = setupDrone(connection_string)
 
     if not success:
         print("\033[1;31;40mFAILED TO CONNECT TO DRONE, EXITING TESTS\033[0m")
         pytest.exit(1)
 
 
+def pytest_sessionfinish(session, exitstatus):
+    """Stop the mock autopilot, if the tests were run against one"""
+    if _mock_autopilot is not None:
+        _mock_autopilot.stop()
+
+
 @pytest.fixture
 def droneStatus():
     """Fixture providing the droneStatus module"""
@@ -1,4 +1,5 @@
 import time
+from concurrent.futures import Future
 from typing import List, Optional, Union
 
 import pytest
@@ -8,6 +9,9 @@ from serial.serialutil import SerialException
 
 from . import socketio_client
 
+# How long to wait for replies to messages sent whilst waits returned None
+LATE_REPLY_SECS = 0.3
+
 
 class FakeTCP:
     """
@@ -74,18 +78,37 @@ class ParamRefreshTimeout:
 
 
 class WaitForMessageReturnsNone:
+    """Context manager that makes waiting for any message, including command ACKs, return None"""
+
     @staticmethod
     def returns_none(*args, **kwargs) -> None:
         return None
 
+    @staticmethod
+    def returns_none_future(*args, **kwargs) -> Future:
+        future: Future = Future()
+        future.set_result(None)
+        return future
+
     def __enter__(self) -> None:
         if droneStatus.drone is not None:
             self.wait_for_message = droneStatus.drone.wait_for_message
             droneStatus.drone.wait_for_message = WaitForMessageReturnsNone.returns_none  # type: ignore[method-assign]
+            command_transactions = droneStatus.drone.command_transactions
+            self.submit_command = command_transactions.submit
+            command_transactions.submit = WaitForMessageReturnsNone.returns_none_future  # type: ignore[method-assign]
 
     def __exit__(self, type, value, traceback) -> None:
         if droneStatus.drone is not None:
             droneStatus.drone.wait_for_message = self.wait_for_message  # type: ignore[method-assign]
+            droneStatus.drone.command_transactions.submit = self.submit_command  # type: ignore[method-assign]
+
+            # The drone still answers what was sent, drain those replies so
+            # they are not read by the next test waiting for the same message
+            time.sleep(LATE_REPLY_SECS)
+            with droneStatus.drone.reservation_lock:
+                for queue in droneStatus.drone.controller_queues.values():
+                    queue.clear()
 
 
 def send_and_receive(endpoint: str, args: Optional[Union[dict, str]] = None) -> dict:
@@ -1,4 +1,5 @@
 import pytest
+from app import droneStatus
 from flask_socketio.test_client import SocketIOTestClient
 
 
@@ -7,6 +8,15 @@ def test_reboot_success(socketio_client: SocketIOTestClient):
     """
     Tests if the autopilot has been rebooted
     """
+    # The link settings are kept by the new connection
+    assert droneStatus.drone is not None
+    droneStatus.drone.link_send_mode = "all"
+
+    def linkStatusCb(status) -> None:
+        pass
+
+    droneStatus.drone.linkStatusCb = linkStatusCb
+
     socketio_client.emit("reboot_autopilot")
     socketio_result = socketio_client.get_received()
 
@@ -15,3 +25,8 @@ def test_reboot_success(socketio_client: SocketIOTestClient):
 
     assert socketio_result[-1]["name"] == "reboot_autopilot"
     assert socketio_result[-1]["args"][0]["success"]
+    assert droneStatus.drone is not None
+    assert droneStatus.drone.link_send_mode == "all"
+    assert droneStatus.drone.link_recovery
+    assert droneStatus.drone.linkStatusCb is linkStatusCb
+    droneStatus.drone.link_send_mode = "best"
@@ -0,0 +1,97 @@
+from pathlib import Path
+from queue import Empty
+
+import pytest
+from app.boundedQueues import (
+    SPILL_FILE_SUFFIX,
+    BoundedQueue,
+    SpillQueue,
+    removeSpillFiles,
+)
+
+
+def test_boundedQueueDropsOldest() -> None:
+    queue = BoundedQueue(3)
+    for index in range(5):
+        queue.put(index)
+
+    assert [queue.get(timeout=0) for _ in range(3)] == [2, 3, 4]
+    assert queue.getStats() == {
+        "size": 0,
+        "capacity": 3,
+        "high_water": 3,
+        "dropped": 2,
+        "spilled": 0,
+    }
+    with pytest.raises(Empty):
+        queue.get(timeout=0.01)
+
+
+def test_boundedQueueNeverDropsEssentialItems() -> None:
+    queue = BoundedQueue(2, is_essential=lambda item: item[0] == "COMMAND_ACK")
+    queue.put(("COMMAND_ACK", 1))
+    queue.put(("PARAM_VALUE", 2))
+    queue.put(("COMMAND_ACK", 3))
+    queue.put(("COMMAND_ACK", 4))
+
+    # The only item which could be dropped was, then the queue grew
+    assert [queue.get(timeout=0)[1] for _ in range(3)] == [1, 3, 4]
+    assert queue.dropped == 1
+    assert queue.high_water == 3
+
+
+def test_boundedQueueCapsEssentialItems() -> None:
+    queue = BoundedQueue(2, is_essential=lambda item: True, max_size=3)
+    for index in range(5):
+        queue.put(index)
+
+    # Essential items grow the queue up to its max size, then the oldest go
+    assert [queue.get(timeout=0) for _ in range(3)] == [2, 3, 4]
+    assert queue.dropped == 2
+    assert queue.high_water == 3
+
+    with pytest.raises(ValueError):
+        BoundedQueue(2, max_size=1)
+
+
+def test_removeSpillFiles(tmp_path: Path) -> None:
+    stale_file = tmp_path / f"log_queue_1{SPILL_FILE_SUFFIX}"
+    stale_file.write_text("line\n")
+    log_file = tmp_path / "log.ftlog"
+    log_file.write_text("line\n")
+
+    assert removeSpillFiles(tmp_path) == [stale_file]
+    assert not stale_file.exists()
+    assert log_file.exists()
+
+
+def test_spillQueueKeepsOrderThroughDisk(tmp_path: Path) -> None:
+    spill_file = tmp_path / "queue.spill"
+    queue = SpillQueue(10, spill_file)
+    for index in range(25):
+        queue.put(f"line {index}")
+
+    assert spill_file.exists()
+    assert queue.qsize() == 25
+    assert queue.getStats()["spilled"] == 15
+
+    lines = [queue.get(timeout=0) for _ in range(12)]
+    # Lines added whilst spilled lines are waiting go after them
+    queue.put("line 25")
+    while not queue.empty():
+        lines.append(queue.get(timeout=0))
+
+    assert lines == [f"line {index}" for index in range(26)]
+    assert not spill_file.exists()
+    assert queue.getStats()["high_water"] == 10
+    assert queue.getStats()["dropped"] == 0
+
+    queue.put("line 26")
+    assert queue.get(timeout=0) == "line 26"
+
+
+def test_droneReportsQueueStats(droneStatus) -> None:
+    queue_stats = droneStatus.drone.getQueueStats()
+    assert queue_stats["message"]["capacity"] == 1000
+    assert queue_stats["log"]["spilled"] == 0
+    assert any(name.startswith("controller/") for name in queue_stats)
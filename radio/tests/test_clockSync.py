@@ -0,0 +1,154 @@
+import random
+import time
+
+from app.clockSync import ClockSync
+from pymavlink import mavutil
+
+from tests import conftest
+
+# The autopilot booted at this time on our clock, and its clock runs fast
+BOOT_TIME = 1_700_000_000.0
+DRIFT = 100e-6
+
+
+def toAutopilotTime(wall_time: float) -> float:
+    return (wall_time - BOOT_TIME) * (1 + DRIFT)
+
+
+def createAttitude(time_boot_ms: int, receive_time: float):
+    msg = mavutil.mavlink.MAVLink_attitude_message(time_boot_ms, 0, 0, 0, 0, 0, 0)
+    msg._timestamp = receive_time
+    return msg
+
+
+def test_estimatesOffsetAndDrift() -> None:
+    clock_sync = ClockSync()
+    rng = random.Random(1)
+
+    for i in range(60):
+        send_time = BOOT_TIME + 10 + i
+        # Radio buffering delays some round trips far more than others
+        outbound = 0.02 + (rng.uniform(0.2, 0.5) if i % 4 == 0 else 0)
+        inbound = 0.02 + rng.uniform(0, 0.002)
+        boot_secs = toAutopilotTime(send_time + outbound)
+        clock_sync.addRoundTrip(send_time, boot_secs, send_time + outbound + inbound)
+
+    stats = clock_sync.getStats()
+    assert stats["synced"]
+    assert stats["source"] == "timesync"
+    assert abs(stats["drift_ppm"] + 100) < 5
+    assert stats["uncertainty_ms"] is not None and stats["uncertainty_ms"] < 25
+
+    # A message sent at a known time is timestamped with when it was sent,
+    # not when it was received after being buffered
+    sent_time = BOOT_TIME + 75
+    msg = createAttitude(int(toAutopilotTime(sent_time) * 1000), sent_time + 0.4)
+    assert clock_sync.retimestamp(msg)
+    assert abs(msg._timestamp - sent_time) < 0.003
+    assert msg._receive_timestamp == sent_time + 0.4
+
+
+def test_messagesWithoutBootTimeAreNotChanged() -> None:
+    clock_sync = ClockSync()
+    msg = createAttitude(1000, BOOT_TIME + 1)
+    # Nothing can be aligned until there is an estimate
+    assert not clock_sync.retimestamp(msg)
+
+    clock_sync.addRoundTrip(BOOT_TIME + 1, 1.01, BOOT_TIME + 1.02)
+    assert clock_sync.retimestamp(msg)
+
+    heartbeat = mavutil.mavlink.MAVLink_heartbeat_message(2, 3, 0, 0, 4, 3)
+    heartbeat._timestamp = BOOT_TIME + 2
+    assert not clock_sync.retimestamp(heartbeat)
+    assert heartbeat._timestamp == BOOT_TIME + 2
+
+    # time_usec which is already unix time is not time since boot
+    gps = mavutil.mavlink.MAVLink_gps_raw_int_message(
+        int((BOOT_TIME + 2) * 1e6), 3, 0, 0, 0, 0, 0, 0, 0, 10
+    )
+    assert clock_sync.getMessageTime(gps) is None
+
+    # A message which would move by seconds is from a stale estimate
+    stale = createAttitude(1000, BOOT_TIME + 30)
+    assert not clock_sync.retimestamp(stale)
+    assert clock_sync.getStats()["messages_aligned"] == 1
+
+
+def test_rebootResetsEstimate() -> None:
+    clock_sync = ClockSync()
+    clock_sync.addRoundTrip(BOOT_TIME + 100, 100.01, BOOT_TIME + 100.02)
+    assert clock_sync.getStats()["synced"]
+
+    # The autopilot rebooted 5s ago
+    clock_sync.addRoundTrip(BOOT_TIME + 200, 5.01, BOOT_TIME + 200.02)
+    stats = clock_sync.getStats()
+    assert stats["resets"] == 1
+    assert stats["samples"] == 1
+    wall_time = clock_sync.toWallTime(5.01)
+    assert wall_time is not None and abs(wall_time - (BOOT_TIME + 200.01)) < 0.001
+
+
+def test_timestampsNeverGoBack() -> None:
+    clock_sync = ClockSync()
+    # Received before there is an estimate, so it keeps its receive time
+    first = createAttitude(1000, BOOT_TIME + 1.5)
+    assert not clock_sync.retimestamp(first)
+
+    # Once synced the next message is aligned to before the first was received
+    clock_sync.addRoundTrip(BOOT_TIME + 1, 1.01, BOOT_TIME + 1.02)
+    second = createAttitude(1100, BOOT_TIME + 1.6)
+    assert clock_sync.retimestamp(second)
+    assert second._timestamp == first._timestamp
+    assert second._receive_timestamp == BOOT_TIME + 1.6
+
+    # Each message type is ordered separately
+    other = mavutil.mavlink.MAVLink_global_position_int_message(
+        1100, 0, 0, 0, 0, 0, 0, 0, 0
+    )
+    other._timestamp = BOOT_TIME + 1.6
+    assert clock_sync.retimestamp(other)
+    assert abs(other._timestamp - (BOOT_TIME + 1.1)) < 0.001
+
+
+def test_systemTimeFallbackAndGpsOffset() -> None:
+    clock_sync = ClockSync()
+    # The least delayed message gives the offset
+    for delay in [0.3, 0.05, 0.2]:
+        msg = mavutil.mavlink.MAVLink_system_time_message(0, 10000)
+        msg._timestamp = BOOT_TIME + 10 + delay
+        clock_sync.addSystemTime(msg)
+
+    stats = clock_sync.getStats()
+    assert stats["source"] == "system_time"
+    offset_secs = stats["offset_secs"]
+    assert offset_secs is not None and abs(offset_secs - (BOOT_TIME + 0.05)) < 1e-6
+
+    # The GPS clock of the autopilot is 1.5s ahead of ours
+    msg = mavutil.mavlink.MAVLink_system_time_message(
+        int((BOOT_TIME + 21.55) * 1e6), 20000
+    )
+    msg._timestamp = BOOT_TIME + 20.1
+    clock_sync.addSystemTime(msg)
+    gps_offset_ms = clock_sync.getStats()["gps_offset_ms"]
+    assert gps_offset_ms is not None and abs(gps_offset_ms - 1500) < 1
+
+
+def test_droneAlignsTelemetry(droneStatus) -> None:
+    clock_sync = droneStatus.drone.clock_sync
+    end_time = time.monotonic() + 5
+    while not clock_sync.getStats()["synced"] and time.monotonic() < end_time:
+        time.sleep(0.1)
+
+    stats = clock_sync.getStats()
+    assert stats["synced"]
+    assert stats["source"] == "timesync"
+
+    mock_autopilot = conftest._mock_autopilot
+    if mock_autopilot is None:
+        return
+
+    # The boot time of the autopilot right now lines up with our clock, to
+    # within how often the drone polls for messages
+    aligned_time = clock_sync.toWallTime(mock_autopilot._timeBootMs() / 1e3)
+    assert aligned_time is not None
+    assert abs(aligned_time - time.time()) < 0.06
@@ -0,0 +1,231 @@
+import logging
+import time
+from threading import Thread
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import pytest
+from app.commandTransactions import CommandTransactionManager
+from pymavlink import mavutil
+from serial.serialutil import SerialException
+
+logger = logging.getLogger("fgcs")
+
+
+def create_ack(
+    command: int, result: int = mavutil.mavlink.MAV_RESULT_ACCEPTED, progress: int = 0
+) -> Any:
+    return SimpleNamespace(command=command, result=result, progress=progress)
+
+
+def test_acksRoutedToTheirOwnCommand() -> None:
+    manager = CommandTransactionManager(logger)
+    results: Dict[int, Any] = {}
+    sent: List[int] = []
+
+    def run(command: int) -> None:
+        results[command] = manager.execute(
+            command, lambda _: sent.append(command), timeout=2, retries=0
+        )
+
+    threads = [
+        Thread(target=run, args=(command,))
+        for command in (
+            mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM,
+            mavutil.mavlink.MAV_CMD_DO_SET_MODE,
+        )
+    ]
+    for thread in threads:
+        thread.start()
+
+    # Both commands are outstanding at the same time
+    while len(sent) < 2:
+        time.sleep(0.01)
+
+    # Answer in the opposite order to which they were sent
+    for command in reversed(sent):
+        assert manager.handleAck(create_ack(command)) is True
+
+    for thread in threads:
+        thread.join()
+
+    assert results[mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM].command == (
+        mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM
+    )
+    assert results[mavutil.mavlink.MAV_CMD_DO_SET_MODE].command == (
+        mavutil.mavlink.MAV_CMD_DO_SET_MODE
+    )
+    assert manager.pending == {}
+
+
+def test_unexpectedAckNotHandled() -> None:
+    manager = CommandTransactionManager(logger)
+    assert manager.handleAck(create_ack(mavutil.mavlink.MAV_CMD_NAV_LAND)) is False
+
+
+def test_retriesWithIncrementedConfirmation() -> None:
+    manager = CommandTransactionManager(logger)
+    confirmations: List[int] = []
+
+    response = manager.execute(
+        mavutil.mavlink.MAV_CMD_NAV_LAND,
+        confirmations.append,
+        timeout=0.05,
+        retries=2,
+    )
+
+    assert response is None
+    assert confirmations == [0, 1, 2]
+
+
+def test_inProgressWaitsForFinalAckWithoutRetrying() -> None:
+    manager = CommandTransactionManager(logger)
+    command = mavutil.mavlink.MAV_CMD_PREFLIGHT_CALIBRATION
+    confirmations: List[int] = []
+    progress: List[int] = []
+
+    def answer() -> None:
+        while not confirmations:
+            time.sleep(0.01)
+        for percent in (10, 50):
+            manager.handleAck(
+                create_ack(command, mavutil.mavlink.MAV_RESULT_IN_PROGRESS, percent)
+            )
+            time.sleep(0.1)
+        manager.handleAck(create_ack(command))
+
+    answer_thread = Thread(target=answer)
+    answer_thread.start()
+
+    response = manager.execute(
+        command,
+        confirmations.append,
+        timeout=0.5,
+        retries=3,
+        progress_callback=progress.append,
+    )
+    answer_thread.join()
+
+    assert response is not None
+    assert response.result == mavutil.mavlink.MAV_RESULT_ACCEPTED
+    assert confirmations == [0]
+    assert progress == [10, 50]
+
+
+def test_failingProgressCallbackDoesNotRaise() -> None:
+    manager = CommandTransactionManager(logger)
+    command = mavutil.mavlink.MAV_CMD_PREFLIGHT_CALIBRATION
+
+    def onProgress(_: int) -> None:
+        raise ValueError("Client disconnected")
+
+    future = manager.submit(command, lambda _: None, progress_callback=onProgress)
+    # The thread receiving messages is not interrupted by the callback
+    assert manager.handleAck(
+        create_ack(command, mavutil.mavlink.MAV_RESULT_IN_PROGRESS, 10)
+    )
+    assert manager.handleAck(create_ack(command))
+    assert future.result(timeout=1).result == mavutil.mavlink.MAV_RESULT_ACCEPTED
+    manager.close()
+
+
+def test_cancelAllReturnsNone() -> None:
+    manager = CommandTransactionManager(logger)
+    results: List[Any] = []
+
+    thread = Thread(
+        target=lambda: results.append(
+            manager.execute(
+                mavutil.mavlink.MAV_CMD_NAV_LAND, lambda _: None, timeout=5, retries=0
+            )
+        )
+    )
+    thread.start()
+    while not manager.pending:
+        time.sleep(0.01)
+
+    start = time.monotonic()
+    manager.cancelAll()
+    thread.join()
+
+    assert results == [None]
+    assert time.monotonic() - start < 1
+
+
+def test_sameCommandQueuedUntilAcknowledged() -> None:
+    manager = CommandTransactionManager(logger)
+    command = mavutil.mavlink.MAV_CMD_DO_MOTOR_TEST
+    sent: List[str] = []
+
+    first = manager.submit(command, lambda _: sent.append("first"), timeout=2)
+    second = manager.submit(command, lambda _: sent.append("second"), timeout=2)
+    assert sent == ["first"]
+
+    manager.handleAck(create_ack(command))
+    assert first.result(timeout=1).command == command
+    assert sent == ["first", "second"]
+    assert not second.done()
+
+    manager.handleAck(create_ack(command, mavutil.mavlink.MAV_RESULT_DENIED))
+    assert second.result(timeout=1).result == mavutil.mavlink.MAV_RESULT_DENIED
+    manager.close()
+
+
+def test_sentOnceAcksMatchedInSendOrder() -> None:
+    manager = CommandTransactionManager(logger)
+    command = mavutil.mavlink.MAV_CMD_DO_SET_SERVO
+    sent: List[str] = []
+
+    # Live adjustments are sent without waiting, then the settled value is
+    # sent again and waited for
+    streamed = [
+        manager.sendOnce(command, lambda _: sent.append("first"), timeout=2),
+        manager.sendOnce(command, lambda _: sent.append("second"), timeout=2),
+    ]
+    time.sleep(0.01)
+    confirmed = manager.submit(command, lambda _: sent.append("confirm"), timeout=2)
+    assert sent == ["first", "second", "confirm"]
+
+    # The ACKs of the earlier sends do not complete the later command
+    manager.handleAck(create_ack(command))
+    manager.handleAck(create_ack(command))
+    assert all(future.result(timeout=1) is not None for future in streamed)
+    assert not confirmed.done()
+
+    manager.handleAck(create_ack(command, mavutil.mavlink.MAV_RESULT_DENIED))
+    assert confirmed.result(timeout=1).result == mavutil.mavlink.MAV_RESULT_DENIED
+    assert manager.unqueued == {}
+    manager.close()
+
+
+def test_sendExceptionRaisedFromFuture() -> None:
+    manager = CommandTransactionManager(logger)
+
+    def send(_: int) -> None:
+        raise SerialException("Disconnected")
+
+    future = manager.submit(mavutil.mavlink.MAV_CMD_NAV_LAND, send)
+    with pytest.raises(SerialException):
+        future.result(timeout=1)
+    assert manager.pending == {}
+    manager.close()
+
+
+def test_latencyStatsRecorded() -> None:
+    manager = CommandTransactionManager(logger)
+
+    future = manager.submit(mavutil.mavlink.MAV_CMD_NAV_LAND, lambda _: None)
+    manager.handleAck(create_ack(mavutil.mavlink.MAV_CMD_NAV_LAND))
+    future.result(timeout=1)
+    manager.execute(
+        mavutil.mavlink.MAV_CMD_NAV_TAKEOFF, lambda _: None, timeout=0.05, retries=0
+    )
+
+    stats = manager.getLatencyStats()
+    assert stats["MAV_CMD_NAV_LAND"]["count"] == 1
+    assert stats["MAV_CMD_NAV_LAND"]["bucket_counts"][0] == 1
+    assert stats["MAV_CMD_NAV_LAND"]["timeouts"] == 0
+    assert stats["MAV_CMD_NAV_TAKEOFF"]["count"] == 0
+    assert stats["MAV_CMD_NAV_TAKEOFF"]["timeouts"] == 1
+    assert stats["MAV_CMD_NAV_TAKEOFF"]["mean_ms"] is None
+    manager.close()
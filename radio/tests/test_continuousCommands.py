@@ -0,0 +1,181 @@
+import logging
+import time
+from concurrent.futures import Future
+from threading import Event
+from typing import Any, List, Tuple
+
+from app.continuousCommands import ContinuousCommandChannel
+from flask_socketio.test_client import SocketIOTestClient
+
+logger = logging.getLogger("fgcs")
+
+
+def test_onlyLatestTargetIsSent() -> None:
+    sent: List[Tuple[Any, Any]] = []
+    confirmed: List[Tuple[Any, Any]] = []
+    results: List[Tuple[Any, Any, Any]] = []
+    settled = Event()
+
+    def confirm(key: Any, value: Any) -> Future:
+        confirmed.append((key, value))
+        future: Future = Future()
+        future.set_result("ack")
+        return future
+
+    def onResult(key: Any, value: Any, ack: Any) -> None:
+        results.append((key, value, ack))
+        settled.set()
+
+    channel = ContinuousCommandChannel(
+        "test", logger, lambda key, value: sent.append((key, value)), confirm, 20
+    )
+    try:
+        # A burst of slider values between sends collapses to the newest one
+        for value in range(1000, 1100):
+            channel.setTarget(9, value, onResult)
+
+        assert settled.wait(5)
+        assert (9, 1099) in sent
+        assert len(sent) < 100
+        # Only the value the slider settled on is confirmed
+        assert confirmed == [(9, 1099)]
+        assert results == [(9, 1099, "ack")]
+
+        stats = channel.getStats()
+        assert stats["updates_received"] == 100
+        assert stats["updates_superseded"] == 100 - len(sent)
+        assert stats["updates_sent"] == len(sent)
+        assert stats["pending"] == 0
+    finally:
+        channel.close()
+
+
+def test_settledValueNotSentAgain() -> None:
+    sent: List[Tuple[Any, Any]] = []
+    acks: List[Future] = []
+    results: List[Tuple[Any, Any, Any]] = []
+    settled = Event()
+
+    def send(key: Any, value: Any) -> Future:
+        sent.append((key, value))
+        ack: Future = Future()
+        acks.append(ack)
+        return ack
+
+    def confirm(key: Any, value: Any) -> Future:
+        raise AssertionError("The settled value was sent again")
+
+    def onResult(key: Any, value: Any, ack: Any) -> None:
+        results.append((key, value, ack))
+        settled.set()
+
+    channel = ContinuousCommandChannel("test", logger, send, confirm, 20)
+    try:
+        channel.setTarget(9, 1000, onResult)
+        time.sleep(0.1)
+        channel.setTarget(9, 1100, onResult)
+        time.sleep(0.2)
+        assert sent == [(9, 1000), (9, 1100)]
+
+        # The result is the ACK of the settled value, not the earlier one
+        acks[0].set_result("ack 1000")
+        assert not settled.wait(0.1)
+        acks[1].set_result("ack 1100")
+        assert settled.wait(1)
+        assert results == [(9, 1100, "ack 1100")]
+    finally:
+        channel.close()
+
+
+def test_sendsAtFixedRate() -> None:
+    channel = ContinuousCommandChannel(
+        "test", logger, lambda key, value: None, None, 20
+    )
+    try:
+        end_time = time.monotonic() + 1
+        value = 0
+        while time.monotonic() < end_time:
+            value += 1
+            channel.setTarget("throttle", value)
+            time.sleep(0.002)
+
+        achieved_rate = channel.getAchievedRate()
+        assert achieved_rate is not None
+        assert 15 <= achieved_rate <= 25
+        assert channel.getStats()["updates_sent"] <= 25
+    finally:
+        channel.close()
+
+    # Targets are ignored once the channel has been closed
+    channel.setTarget("throttle", 1)
+    assert channel.getStats()["pending"] == 0
+
+
+def test_failedSendsAreCounted() -> None:
+    def failingSend(key: Any, value: Any) -> None:
+        raise ConnectionError("Link lost")
+
+    channel = ContinuousCommandChannel("test", logger, failingSend, None, 20)
+    try:
+        channel.setTarget(1, 1)
+        time.sleep(0.2)
+        assert channel.getStats()["send_errors"] == 1
+        assert channel.getStats()["updates_sent"] == 0
+    finally:
+        channel.close()
+
+
+def test_setServoTarget(socketio_client: SocketIOTestClient, droneStatus) -> None:
+    for pwm_value in range(1100, 1500, 20):
+        socketio_client.emit(
+            "set_servo_target", {"servo_instance": 9, "pwm_value": pwm_value}
+        )
+
+    results: List[dict] = []
+    end_time = time.monotonic() + 5
+    while not results and time.monotonic() < end_time:
+        time.sleep(0.1)
+        results = [
+            packet["args"][0]
+            for packet in socketio_client.get_received()
+            if packet["name"] == "servo_target_result"
+        ]
+
+    assert results == [{"success": True, "message": "Setting servo to 1480"}]
+    stats = droneStatus.drone.continuous_channels["servo"].getStats()
+    assert stats["updates_superseded"] > 0
+
+    socketio_client.emit("set_servo_target", {"servo_instance": 9})
+    assert socketio_client.get_received()[-1]["args"][0] == {
+        "success": False,
+        "message": "Servo instance and PWM value must be specified.",
+    }
+
+
+def test_setMotorThrottleTarget(socketio_client: SocketIOTestClient) -> None:
+    socketio_client.emit(
+        "set_motor_throttle_target",
+        {"motorInstance": 1, "throttle": 101, "duration": 1},
+    )
+    assert socketio_client.get_received()[-1]["args"][0] == {
+        "success": False,
+        "message": "Invalid value for throttle",
+    }
+
+    for throttle in range(0, 10):
+        socketio_client.emit(
+            "set_motor_throttle_target",
+            {"motorInstance": 1, "throttle": throttle, "duration": 1},
+        )
+
+    results: List[dict] = []
+    end_time = time.monotonic() + 5
+    while not results and time.monotonic() < end_time:
+        time.sleep(0.1)
+        results = [
+            packet["args"][0]
+            for packet in socketio_client.get_received()
+            if packet["name"] == "motor_throttle_target_result"
+        ]
+
+    assert results == [{"success": True, "message": "Motor A throttle set to 9%"}]
@@ -0,0 +1,42 @@
+from threading import Thread
+
+import pytest
+from app.controllers.frameController import FrameController
+
+
+def test_controllers_created_lazily_once(droneStatus) -> None:
+    drone = droneStatus.drone
+    original_controller = drone.__dict__.pop("frameController", None)
+
+    try:
+        controllers = []
+        threads = [
+            Thread(target=lambda: controllers.append(drone.frameController))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(controllers) == 8
+        assert isinstance(controllers[0], FrameController)
+        assert all(controller is controllers[0] for controller in controllers)
+        assert drone.__dict__["frameController"] is controllers[0]
+    finally:
+        if original_controller is not None:
+            drone.__dict__["frameController"] = original_controller
+
+
+def test_getController_unknown_controller(droneStatus) -> None:
+    with pytest.raises(AttributeError) as excinfo:
+        droneStatus.drone.getController("notAController")
+
+    assert str(excinfo.value) == "Drone has no controller called notAController"
+
+
+def test_connection_phase_timings_recorded(droneStatus) -> None:
+    timings = droneStatus.drone.connection_phase_timings
+
+    assert list(timings.keys()) == droneStatus.drone.connection_phases[:-1]
+    assert all(duration >= 0 for duration in timings.values())
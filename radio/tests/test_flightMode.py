@@ -131,6 +131,7 @@ def test_setFlightMode_wrongModeNumber(
     }
 
 
+@pytest.mark.copter_only
 def test_setFlightMode_successfullySet(
     socketio_client: SocketIOTestClient, droneStatus
 ):
@@ -147,6 +148,23 @@ def test_setFlightMode_successfullySet(
     assert droneStatus.drone.flightModesController.flight_modes == [7, 9, 6, 3, 5, 0]
 
 
+@pytest.mark.plane_only
+def test_setFlightMode_successfullySet_plane(
+    socketio_client: SocketIOTestClient, droneStatus
+):
+    droneStatus.state = "config.flight_modes"
+    socketio_client.emit("set_flight_mode", {"mode_number": 1, "flight_mode": 7})
+    socketio_result = socketio_client.get_received()[0]
+
+    assert socketio_result["name"] == "set_flight_mode_result"
+    assert socketio_result["args"][0] == {
+        "success": True,
+        "message": "Flight mode 1 set to PLANE_MODE_CRUISE",
+        "data": {"param_id": "FLTMODE1", "value": 7},
+    }
+    assert droneStatus.drone.flightModesController.flight_modes == [7, 9, 6, 3, 5, 0]
+
+
 def test_setFlightModeChannel_wrongState(
     socketio_client: SocketIOTestClient, droneStatus
 ):
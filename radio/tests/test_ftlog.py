@@ -0,0 +1,218 @@
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+from app.customTypes import LogRecoveryProgress
+from app.drone import Drone
+from app.ftlog import (
+    FTLogReader,
+    FTLogWriter,
+    convertToV2,
+    findLogChains,
+    getIndexPath,
+    getLogSuffix,
+    loadIndex,
+    mergeLogs,
+    readLines,
+)
+from app.logStorage import LogStorageManager
+
+MESSAGE_TYPES = ["ATTITUDE", "VFR_HUD", "GPS_RAW_INT"]
+
+
+def writeLog(
+    log_file: Path, start: int, count: int, compression: Optional[str] = None
+) -> None:
+    writer = FTLogWriter(
+        log_file, "2024-01-01_12-00-00", block_lines=10, compression=compression
+    )
+    for second in range(start, start + count):
+        message_type = MESSAGE_TYPES[second % len(MESSAGE_TYPES)]
+        writer.writeMessage(f"{second}.5,{message_type},value:{second},other:1")
+    writer.close()
+
+
+def test_writerCreatesCompatibleLinesAndIndex(tmp_path: Path) -> None:
+    log_file = tmp_path / "flight.ftlog"
+    writeLog(log_file, 0, 25)
+
+    lines = log_file.read_text().splitlines()
+    assert lines[0] == "==START_TIME==2024-01-01_12-00-00==END=="
+    assert lines[1] == "==FTLOG_VERSION==2==END=="
+    assert lines[2] == "0.5,ATTITUDE,value:0,other:1"
+
+    index = loadIndex(log_file)
+    assert index is not None
+    assert len(index["blocks"]) == 3
+    assert index["blocks"][0]["counts"] == {
+        "ATTITUDE": 4,
+        "VFR_HUD": 3,
+        "GPS_RAW_INT": 3,
+    }
+
+    # The index is ignored once the log file no longer matches it
+    with open(log_file, "a") as log_file_handle:
+        log_file_handle.write("25.5,ATTITUDE,value:25\n")
+    assert loadIndex(log_file) is None
+
+
+def test_readerFiltersByTimeAndType(tmp_path: Path) -> None:
+    log_file = tmp_path / "flight.ftlog"
+    writeLog(log_file, 0, 100)
+    reader = FTLogReader(log_file)
+
+    assert reader.start_time == 0.5
+    assert reader.end_time == 99.5
+    assert reader.getMessageCounts()["ATTITUDE"] == 34
+
+    messages = list(
+        reader.iterMessages(start_time=40, end_time=60, message_types=["VFR_HUD"])
+    )
+    assert [message["timestamp"] for message in messages] == [
+        40.5,
+        43.5,
+        46.5,
+        49.5,
+        52.5,
+        55.5,
+        58.5,
+    ]
+    assert messages[0] == {
+        "timestamp": 40.5,
+        "message_type": "VFR_HUD",
+        "data": "value:40,other:1",
+    }
+    assert len(list(reader.iterMessages())) == 100
+
+
+def test_mergeLogsShiftsIndexes(tmp_path: Path) -> None:
+    first_log_file = tmp_path / "tmp_first.ftlog"
+    second_log_file = tmp_path / "tmp_second.ftlog"
+    merged_log_file = tmp_path / "merged.ftlog"
+    writeLog(first_log_file, 0, 30)
+    writeLog(second_log_file, 30, 30)
+
+    mergeLogs([first_log_file, second_log_file], merged_log_file)
+
+    assert not first_log_file.exists()
+    assert not getIndexPath(second_log_file).exists()
+    assert loadIndex(merged_log_file) is not None
+
+    reader = FTLogReader(merged_log_file)
+    assert [
+        message["timestamp"]
+        for message in reader.iterMessages(start_time=28, end_time=32)
+    ] == [28.5, 29.5, 30.5, 31.5]
+
+
+def test_convertV1Log(tmp_path: Path) -> None:
+    log_file = tmp_path / "old.ftlog"
+    log_file.write_text(
+        "==START_TIME==2023-05-01_09-30-00==END==\n"
+        "1.0,ATTITUDE,roll:0.1\n"
+        "2.0,VFR_HUD,alt:10\n"
+        "Writing message failed! error\n"
+    )
+
+    # v1 files can be read without converting them
+    assert len(list(FTLogReader(log_file).iterMessages())) == 2
+
+    convertToV2(log_file)
+    assert log_file.read_text().splitlines()[:2] == [
+        "==START_TIME==2023-05-01_09-30-00==END==",
+        "==FTLOG_VERSION==2==END==",
+    ]
+    assert loadIndex(log_file) is not None
+    assert [
+        message["message_type"] for message in FTLogReader(log_file).iterMessages()
+    ] == ["ATTITUDE", "VFR_HUD"]
+
+
+@pytest.mark.parametrize("compression", ["gzip", "xz"])
+def test_compressedLogsReadByFrame(tmp_path: Path, compression: str) -> None:
+    log_file = tmp_path / f"flight{getLogSuffix(compression)}"
+    writeLog(log_file, 0, 100, compression)
+
+    index = loadIndex(log_file)
+    assert index is not None
+    assert index["compression"] == compression
+    assert len(index["blocks"]) == 10
+
+    reader = FTLogReader(log_file)
+    assert [
+        message["timestamp"]
+        for message in reader.iterMessages(start_time=50, end_time=53)
+    ] == [50.5, 51.5, 52.5]
+
+    # Without its index the frames are found by decompressing the file
+    getIndexPath(log_file).unlink()
+    assert FTLogReader(log_file).index["blocks"] == index["blocks"]
+
+
+def test_crashedCompressedLogRecovered(tmp_path: Path) -> None:
+    first_log_file = tmp_path / "tmp_first_0123456789abcdef.ftlog.gz"
+    second_log_file = tmp_path / "tmp_fedcba9876543210.ftlog.gz"
+
+    writer = FTLogWriter(
+        first_log_file, "2024-01-01_12-00-00", block_lines=10, compression="gzip"
+    )
+    for second in range(20):
+        writer.writeMessage(f"{second}.5,ATTITUDE,value:{second}")
+    writer.writeNextFile(second_log_file)
+    writer.close()
+
+    writer = FTLogWriter(
+        second_log_file, "2024-01-01_12-00-20", block_lines=10, compression="gzip"
+    )
+    for second in range(20, 35):
+        writer.writeMessage(f"{second}.5,ATTITUDE,value:{second}")
+    writer.flush()
+    # Simulate a crash part way through writing the last frame
+    with open(second_log_file, "ab") as second_log_file_handle:
+        second_log_file_handle.write(b"\x1f\x8b\x08\x00partial")
+    getIndexPath(first_log_file).unlink()
+
+    assert len(readLines(second_log_file)) == 12
+
+    progress: List[LogRecoveryProgress] = []
+    drone = Drone.__new__(Drone)
+    drone.log_directory = tmp_path
+    drone.logger = logging.getLogger("fgcs")
+    drone.logRecoveryProgressCb = progress.append
+    drone.log_storage = LogStorageManager(tmp_path, drone.logger)
+    drone.cleanTempLogs()
+
+    recovered_log_file = tmp_path / "2024-01-01_12-00-00_RECOVERED.ftlog.gz"
+    assert sorted(file.name for file in tmp_path.iterdir()) == [
+        recovered_log_file.name,
+        getIndexPath(recovered_log_file).name,
+        "manifest.json",
+    ]
+    assert drone.log_storage.getTempLogs() == []
+    assert drone.log_storage.getLog(recovered_log_file.name) is not None
+    assert loadIndex(recovered_log_file) is not None
+    assert [
+        message["timestamp"]
+        for message in FTLogReader(recovered_log_file).iterMessages()
+    ] == [second + 0.5 for second in range(30)]
+    assert progress[-1]["progress"] == 100
+    assert progress[-1]["recovered_bytes"] == progress[-1]["total_bytes"]
+
+
+def test_findLogChainsFollowsNextFileMarkers(tmp_path: Path) -> None:
+    log_files = [tmp_path / f"tmp_{name}.ftlog" for name in ["first_a", "b", "first_c"]]
+    for log_file, next_log_file in [
+        (log_files[0], log_files[1]),
+        (log_files[1], None),
+        (log_files[2], tmp_path / "tmp_missing.ftlog"),
+    ]:
+        writer = FTLogWriter(log_file, "2024-01-01_12-00-00")
+        writer.writeMessage("1.0,ATTITUDE,roll:0.1")
+        if next_log_file is not None:
+            writer.writeNextFile(next_log_file)
+        writer.close()
+
+    chains, missing_log_files = findLogChains(log_files)
+    assert sorted(chains) == [[log_files[0], log_files[1]], [log_files[2]]]
+    assert missing_log_files == [str(tmp_path / "tmp_missing.ftlog")]
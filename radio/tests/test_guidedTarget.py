@@ -0,0 +1,123 @@
+import time
+
+import pytest
+from app.controllers.guidedTargetController import getNedOffset
+from flask_socketio.test_client import SocketIOTestClient
+
+from .helpers import NoDrone
+
+
+def getResults(client: SocketIOTestClient, name: str) -> list:
+    return [
+        packet["args"][0] for packet in client.get_received() if packet["name"] == name
+    ]
+
+
+def test_getNedOffset() -> None:
+    north, east, down = getNedOffset((52.0, -1.0, 10), (52.001, -1.001, 15))
+    assert north == pytest.approx(111.3, abs=0.1)
+    assert east == pytest.approx(-68.5, abs=0.1)
+    assert down == -5
+
+
+@pytest.mark.copter_only
+def test_streamGuidedTargets(socketio_client: SocketIOTestClient, droneStatus) -> None:
+    socketio_client.emit("set_state", {"state": "dashboard"})
+    socketio_client.get_received()
+
+    socketio_client.emit("start_guided_target_stream", {"rate_hz": 10})
+    assert getResults(socketio_client, "guided_target_result") == [
+        {"success": True, "message": "Started guided target streaming at 10Hz"}
+    ]
+    controller = droneStatus.drone.guidedTargetController
+
+    try:
+        # The target is dragged north faster than it is streamed
+        for step in range(40):
+            socketio_client.emit(
+                "set_guided_target",
+                {"lat": 52.0 + step * 0.00001, "lon": -1.0, "alt": 10},
+            )
+            time.sleep(0.01)
+        time.sleep(0.3)
+        assert getResults(socketio_client, "guided_target_result") == []
+
+        socketio_client.emit("get_guided_target_stats")
+        stats = getResults(socketio_client, "guided_target_stats")[0]
+        assert stats["active"]
+        assert stats["targets_received"] == 40
+        assert stats["targets_coalesced"] > 0
+        assert 3 <= stats["messages_sent"] <= 10
+        assert stats["send_errors"] == 0
+
+        # A new target is moved towards over the time since the previous one
+        time.sleep(0.5)
+        socketio_client.emit(
+            "set_guided_target", {"lat": 52.001, "lon": -1.0, "alt": 10}
+        )
+        with controller._lock:
+            start_time = controller._segment_start_time
+            duration = controller._segment_duration
+            position, velocity = controller._getInterpolatedTarget(
+                start_time + duration / 2
+            )
+        assert 52.0004 < position[0] < 52.001
+        assert velocity[0] > 0
+        assert velocity[1] == pytest.approx(0)
+
+        socketio_client.emit("set_guided_target", {"lat": 95, "lon": 0, "alt": 10})
+        assert getResults(socketio_client, "guided_target_result") == [
+            {"success": False, "message": "Invalid target latitude or longitude"}
+        ]
+    finally:
+        socketio_client.emit("stop_guided_target_stream")
+
+    assert getResults(socketio_client, "guided_target_result") == [
+        {"success": True, "message": "Stopped guided target streaming"}
+    ]
+    assert not controller.isActive()
+
+
+@pytest.mark.copter_only
+def test_holdOnTimeout(socketio_client: SocketIOTestClient, droneStatus) -> None:
+    socketio_client.emit("set_state", {"state": "dashboard"})
+    socketio_client.emit(
+        "start_guided_target_stream", {"rate_hz": 5, "timeout_secs": 0.3}
+    )
+    socketio_client.emit("set_guided_target", {"lat": 52.0, "lon": -1.0, "alt": 10})
+    time.sleep(0.8)
+
+    assert getResults(socketio_client, "guided_target_hold") == [
+        {"message": "No guided target for 0.3s, holding position"}
+    ]
+    stats = droneStatus.drone.guidedTargetController.getStats()
+    assert not stats["active"]
+    assert stats["holds"] >= 1
+    assert stats["messages_sent"] > 0
+
+    socketio_client.emit("set_guided_target", {"lat": 52.0, "lon": -1.0, "alt": 10})
+    assert getResults(socketio_client, "guided_target_result") == [
+        {"success": False, "message": "Guided target streaming is not started"}
+    ]
+
+
+def test_invalidGuidedTargetStream(socketio_client: SocketIOTestClient) -> None:
+    socketio_client.emit("set_state", {"state": "dashboard"})
+    socketio_client.get_received()
+
+    socketio_client.emit("start_guided_target_stream", {"rate_hz": 50})
+    assert getResults(socketio_client, "guided_target_result")[0]["success"] is False
+
+    socketio_client.emit("set_guided_target", {"lat": 52.0})
+    assert getResults(socketio_client, "guided_target_result") == [
+        {
+            "success": False,
+            "message": "Target latitude, longitude and altitude must be specified.",
+        }
+    ]
+
+    with NoDrone():
+        socketio_client.emit("stop_guided_target_stream")
+        assert socketio_client.get_received()[-1]["args"][0] == {
+            "message": "Must be connected to the drone to stop streaming guided targets."
+        }
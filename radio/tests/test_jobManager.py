@@ -0,0 +1,179 @@
+import logging
+import time
+from threading import Event
+from typing import Any, List, Tuple
+
+from app.jobManager import JobManager
+from flask_socketio.test_client import SocketIOTestClient
+
+logger = logging.getLogger("fgcs")
+
+
+def createJobManager(**kwargs) -> Tuple[JobManager, List[Tuple[str, Any]]]:
+    events: List[Tuple[str, Any]] = []
+    job_manager = JobManager(
+        logger, lambda event, data: events.append((event, data)), **kwargs
+    )
+    return job_manager, events
+
+
+def test_jobsOnSameResourceRunInOrder() -> None:
+    job_manager, events = createJobManager()
+    release = Event()
+    order: List[str] = []
+
+    def blockingJob(job) -> dict:
+        release.wait(5)
+        order.append("first")
+        return {"success": True}
+
+    def secondJob(job) -> dict:
+        order.append("second")
+        return {"success": True}
+
+    first = job_manager.submit("first", "ftp", blockingJob)
+    second = job_manager.submit("second", "ftp", secondJob)
+    # A job on another resource is not held up by the FTP job
+    other = job_manager.submit("other", "mission", lambda job: 42)
+    assert other.wait(5)
+    assert other.state == "succeeded"
+    assert other.result == 42
+    assert second.state == "queued"
+
+    release.set()
+    assert second.wait(5)
+    assert order == ["first", "second"]
+    assert first.state == "succeeded"
+
+    first_states = [
+        data["state"]
+        for event, data in events
+        if event == "job_update" and data["id"] == first.id
+    ]
+    assert first_states == ["queued", "running", "succeeded"]
+
+
+def test_cancelQueuedAndRunningJobs() -> None:
+    job_manager, events = createJobManager()
+    started = Event()
+
+    def cancellableJob(job) -> dict:
+        started.set()
+        while not job.isCancelled():
+            time.sleep(0.01)
+        return {"success": False, "message": "Stopped"}
+
+    running = job_manager.submit("running", "link", cancellableJob, cancellable=True)
+    queued = job_manager.submit("queued", "link", lambda job: {"success": True})
+    assert started.wait(5)
+
+    assert job_manager.cancel(queued.id)
+    assert queued.state == "cancelled"
+    assert queued.result == {"success": False, "message": "queued was cancelled"}
+
+    assert job_manager.cancel(running.id)
+    assert running.wait(5)
+    assert running.state == "cancelled"
+    assert running.result == {"success": False, "message": "Stopped"}
+
+    # Finished jobs cannot be cancelled again
+    assert not job_manager.cancel(running.id)
+    assert not job_manager.cancel("unknown")
+
+
+def test_runningJobWhichCannotBeCancelled() -> None:
+    job_manager, events = createJobManager()
+    release = Event()
+
+    def uploadJob(job) -> dict:
+        release.wait(5)
+        return {"success": True}
+
+    running = job_manager.submit("write_current_mission", "mission", uploadJob)
+    while running.state != "running":
+        time.sleep(0.01)
+
+    # The upload finishes, so it is reported as succeeded and not cancelled
+    assert not job_manager.cancel(running.id)
+    release.set()
+    assert running.wait(5)
+    assert running.state == "succeeded"
+
+
+def test_runGivesUpWaitingInQueue() -> None:
+    job_manager, events = createJobManager()
+    release = Event()
+    blocking = job_manager.submit("blocking", "ftp", lambda job: release.wait(5))
+
+    result = job_manager.run("list_files", "ftp", lambda job: 1, queue_timeout=0.1)
+    assert result == {
+        "success": False,
+        "message": "Timed out waiting for other ftp operations to finish",
+    }
+    assert [job["state"] for job in job_manager.getJobs()] == ["running", "cancelled"]
+
+    release.set()
+    assert blocking.wait(5)
+    assert job_manager.run("list_files", "ftp", lambda job: 1) == 1
+
+
+def test_failedJobsAndProgress() -> None:
+    job_manager, events = createJobManager(history_size=1)
+    progress: List[Any] = []
+
+    def failingJob(job) -> None:
+        job.updateProgress({"step": 1}, 50)
+        raise RuntimeError("Link lost")
+
+    failed = job_manager.submit(
+        "failing",
+        "ftp",
+        failingJob,
+        progress_callback=lambda data, percent: progress.append((data, percent)),
+    )
+    assert failed.wait(5)
+    assert failed.state == "failed"
+    assert failed.progress == 50
+    assert failed.result == {"success": False, "message": "failing failed: Link lost"}
+    assert progress == [({"step": 1}, 50)]
+    assert ("job_progress", {"id": failed.id, "progress": 50, "data": {"step": 1}}) in (
+        events
+    )
+
+    assert job_manager.run("unsuccessful", "ftp", lambda job: {"success": False}) == {
+        "success": False
+    }
+    # Only the latest finished job is kept
+    assert job_manager.getJob(failed.id) is None
+    assert [job["type"] for job in job_manager.getJobs()] == ["unsuccessful"]
+    assert job_manager.getJobs()[0]["state"] == "failed"
+
+
+def test_startJobEndpoint(socketio_client: SocketIOTestClient, droneStatus) -> None:
+    socketio_client.emit("start_job", {"type": "list_files", "args": {"path": "/"}})
+    received = socketio_client.get_received()
+    start_result = next(
+        packet for packet in received if packet["name"] == "start_job_result"
+    )
+    assert start_result["args"][0]["success"]
+    job_id = start_result["args"][0]["data"]["id"]
+
+    job = droneStatus.job_manager.getJob(job_id)
+    assert job is not None and job.wait(10)
+
+    socketio_client.emit("get_job", {"id": job_id})
+    get_result = [
+        packet
+        for packet in socketio_client.get_received()
+        if packet["name"] == "get_job_result"
+    ][-1]["args"][0]
+    assert get_result["data"]["state"] == "succeeded"
+    assert get_result["data"]["result"]["message"] == (
+        "Directory listing retrieved successfully"
+    )
+
+    socketio_client.emit("start_job", {"type": "unknown"})
+    assert socketio_client.get_received()[-1]["args"][0] == {
+        "success": False,
+        "message": "Unknown job type: unknown",
+    }
@@ -0,0 +1,95 @@
+import time
+
+from app.linkStats import LinkStatsEngine, RingBuffer
+from pymavlink import mavutil
+
+from tests import conftest
+
+
+def test_ringBuffer_keeps_running_total() -> None:
+    buffer = RingBuffer(3)
+    assert buffer.mean() is None
+
+    for value in [1, 2, 3, 4]:
+        buffer.push(value)
+
+    assert buffer.count == 3
+    assert buffer.total == 9
+    assert buffer.mean() == 3
+
+
+def test_recordSequence_counts_gaps_per_source() -> None:
+    engine = LinkStatsEngine()
+
+    for seq in [250, 251, 254, 255, 0, 3]:
+        engine.recordSequence(1, 1, seq)
+    for seq in [10, 11, 12]:
+        engine.recordSequence(1, 2, seq)
+    # Duplicate and reordered packets are not counted as loss
+    engine.recordSequence(1, 1, 3)
+    engine.recordSequence(1, 1, 2)
+
+    sources = {
+        (source["sysid"], source["compid"]): source
+        for source in engine.getSourceStats()
+    }
+    assert sources[(1, 1)]["packets_received"] == 8
+    assert sources[(1, 1)]["packets_lost"] == 4
+    assert sources[(1, 2)]["packets_lost"] == 0
+
+
+def test_windows_include_loss_and_latency() -> None:
+    engine = LinkStatsEngine(sample_interval_secs=0.1, windows_secs=[1, 10])
+    totals = {
+        "total_packets_sent": 0,
+        "total_bytes_sent": 0,
+        "total_packets_received": 0,
+        "total_bytes_received": 0,
+    }
+    engine.update(totals)
+
+    for seq in [0, 1, 3]:
+        engine.recordSequence(1, 1, seq)
+
+    assert engine.recordTimesyncResponse(engine.createTimesyncRequest())
+    assert not engine.recordTimesyncResponse(12345)
+
+    time.sleep(0.1)
+    engine.update({key: 10 for key in totals})
+
+    stats = engine.getStats()
+    assert set(stats.keys()) == {"1s", "10s"}
+    assert stats["1s"]["packets_lost"] == 1
+    assert stats["1s"]["packet_loss_percent"] == 25
+    assert stats["1s"]["packets_received_per_sec"] > 0
+    assert stats["1s"]["rtt_ms"] is not None
+    assert stats["1s"]["jitter_ms"] is None
+
+
+def test_drone_link_stats_track_autopilot(droneStatus) -> None:
+    sources = droneStatus.drone.link_stats.getSourceStats()
+
+    assert any(
+        source["sysid"] == droneStatus.drone.target_system
+        and source["compid"] == droneStatus.drone.target_component
+        for source in sources
+    )
+
+
+def test_drone_link_stats_ignore_bad_data(droneStatus) -> None:
+    mock_autopilot = conftest._mock_autopilot
+    if mock_autopilot is None:
+        return
+
+    # A heartbeat whose checksum has been corrupted
+    mav = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+    packet = bytearray(
+        mavutil.mavlink.MAVLink_heartbeat_message(2, 3, 0, 0, 4, 3).pack(mav)
+    )
+    packet[-1] ^= 0xFF
+    for _ in range(5):
+        mock_autopilot.link.send(bytes(packet))
+    time.sleep(0.5)
+
+    sources = droneStatus.drone.link_stats.getSourceStats()
+    assert not any(source["sysid"] == 0 and source["compid"] == 0 for source in sources)
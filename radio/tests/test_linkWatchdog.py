@@ -0,0 +1,183 @@
+import logging
+import time
+from typing import List
+
+from app.customTypes import LinkResyncResult, LinkStatus
+from app.drone import Drone
+from app.linkWatchdog import LinkWatchdog
+from mockAutopilot import MockAutopilot, TcpServerTransport, createDefaultParams
+
+logger = logging.getLogger("fgcs")
+
+RESYNC_RESULT: LinkResyncResult = {
+    "param_count": 10,
+    "params_changed": False,
+    "mission_count": None,
+    "mission_changed": False,
+    "home": None,
+}
+
+
+class FakeLink:
+    def __init__(self, reopen_results: List[bool]) -> None:
+        self.last_heartbeat_time = time.monotonic()
+        self.reopen_results = reopen_results
+        self.reopen_count = 0
+        self.resync_count = 0
+        self.failed = False
+        self.statuses: List[LinkStatus] = []
+
+    def getHeartbeatAge(self) -> float:
+        return time.monotonic() - self.last_heartbeat_time
+
+    def reopen(self) -> bool:
+        self.reopen_count += 1
+        reopened = self.reopen_results.pop(0) if self.reopen_results else False
+        if reopened:
+            # The drone answers on the reopened link
+            self.last_heartbeat_time = time.monotonic()
+        return reopened
+
+    def resync(self) -> LinkResyncResult:
+        self.resync_count += 1
+        return RESYNC_RESULT
+
+    def onFailed(self) -> None:
+        self.failed = True
+
+    def createWatchdog(self, **kwargs) -> LinkWatchdog:
+        return LinkWatchdog(
+            logger,
+            self.getHeartbeatAge,
+            self.reopen,
+            self.resync,
+            status_callback=self.statuses.append,
+            failed_callback=self.onFailed,
+            **kwargs,
+        )
+
+
+def waitForState(watchdog: LinkWatchdog, state: str, timeout: float = 5) -> bool:
+    end_time = time.monotonic() + timeout
+    while time.monotonic() < end_time:
+        if watchdog.state == state and not watchdog.isRecovering():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_recoversAfterHeartbeatTimeout() -> None:
+    link = FakeLink([False, True])
+    link.last_heartbeat_time -= 1
+    watchdog = link.createWatchdog(lost_timeout_secs=0.5)
+    watchdog.start()
+    try:
+        time.sleep(0.5)
+        assert waitForState(watchdog, "connected")
+    finally:
+        watchdog.stop()
+
+    assert [status["state"] for status in link.statuses] == [
+        "lost",
+        "reconnecting",
+        "reconnecting",
+        "resyncing",
+        "connected",
+    ]
+    assert str(link.statuses[0]["reason"]).startswith("No heartbeat for")
+    assert link.reopen_count == 2
+    assert link.resync_count == 1
+    assert not link.failed
+
+    status = watchdog.getStatus()
+    assert status["losses"] == 1
+    assert status["reopen_attempts"] == 2
+    assert status["resync"] == RESYNC_RESULT
+    assert status["last_recovery_secs"] is not None
+
+
+def test_reportedLinkErrorStartsRecovery() -> None:
+    link = FakeLink([True])
+    watchdog = link.createWatchdog()
+    watchdog.start()
+    try:
+        watchdog.reportLinkError("Serial port unplugged")
+        time.sleep(0.2)
+        assert waitForState(watchdog, "connected")
+    finally:
+        watchdog.stop()
+
+    assert link.statuses[0]["state"] == "lost"
+    assert link.statuses[0]["reason"] == "Serial port unplugged"
+    assert link.reopen_count == 1
+    assert watchdog.getStatus()["losses"] == 1
+
+
+def test_failsAfterRecoveryTimeout() -> None:
+    link = FakeLink([])
+    watchdog = link.createWatchdog(recovery_timeout_secs=0.5)
+    watchdog.start()
+    try:
+        watchdog.reportLinkError("Serial port unplugged")
+        assert waitForState(watchdog, "failed")
+    finally:
+        watchdog.stop()
+
+    assert link.failed
+    assert link.resync_count == 0
+    assert link.statuses[-1]["state"] == "failed"
+
+
+def test_droneRecoversLinkInPlace() -> None:
+    with MockAutopilot(
+        TcpServerTransport(port=0), params=createDefaultParams("copter")
+    ) as mock:
+        statuses: List[LinkStatus] = []
+        drone = Drone(
+            mock.connection_string,
+            tlog_recording=False,
+            linkStatusCb=statuses.append,
+        )
+        assert drone.connectionError is None
+        assert drone.link_watchdog is not None
+
+        try:
+            params = drone.paramsController.params
+            end_time = time.monotonic() + 5
+            while (
+                drone.paramsController.param_hash is None
+                and time.monotonic() < end_time
+            ):
+                time.sleep(0.1)
+            assert drone.paramsController.param_hash is not None
+
+            # The radio drops out until the link has been reopened
+            mock.link.impairment.loss = 1.0
+            end_time = time.monotonic() + 10
+            while not statuses and time.monotonic() < end_time:
+                time.sleep(0.1)
+            mock.link.impairment.loss = 0.0
+
+            assert waitForState(drone.link_watchdog, "connected", timeout=15)
+            assert drone.is_active.is_set()
+
+            status = drone.link_watchdog.getStatus()
+            assert status["losses"] == 1
+            resync = status["resync"]
+            assert resync is not None
+            assert resync["param_count"] == len(params)
+            assert not resync["params_changed"]
+
+            # The same drone, controllers and caches are used after the outage
+            assert drone.paramsController.params is params
+            assert drone.getHeartbeatAge() < 3
+
+            # A param changed whilst the link was down keeps the same count
+            with mock._params_lock:
+                param_name, (param_value, param_type) = next(iter(mock.params.items()))
+                mock.params[param_name] = (param_value + 1, param_type)
+            resync = drone.resyncLink()
+            assert resync["param_count"] == len(params)
+            assert resync["params_changed"]
+        finally:
+            drone.close()
@@ -0,0 +1,149 @@
+import logging
+from pathlib import Path
+from typing import Any, Dict
+
+from app.ftlog import FTLogReader, FTLogWriter, getIndexPath
+from app.logStorage import SECONDS_PER_DAY, LogStorageManager
+
+logger = logging.getLogger("fgcs")
+
+NOW = 1700000000.0
+
+
+def writeLog(log_file: Path, end_time: float, count: int = 50) -> None:
+    writer = FTLogWriter(log_file, "2024-01-01_12-00-00", block_lines=10)
+    for index in range(count):
+        writer.writeMessage(f"{end_time - count + index + 1},ATTITUDE,roll:{index}")
+    writer.close()
+
+
+def createManager(log_directory: Path, **kwargs) -> LogStorageManager:
+    options: Dict[str, Any] = {
+        "max_age_days": None,
+        "max_total_bytes": None,
+        "min_free_bytes": None,
+        "compress_after_days": None,
+    }
+    options.update(kwargs)
+    return LogStorageManager(log_directory, logger, **options)
+
+
+def test_manifestRebuiltAndPersisted(tmp_path: Path) -> None:
+    writeLog(tmp_path / "first.ftlog", NOW)
+    writeLog(tmp_path / "tmp_first_0123.ftlog", NOW)
+    (tmp_path / "notes.txt").write_text("not a log")
+
+    log_storage = createManager(tmp_path)
+    entry = log_storage.getLog("first.ftlog")
+    assert entry is not None
+    assert entry["end_time"] == NOW
+    assert entry["duration_secs"] == 49
+    assert [log_file.name for log_file in log_storage.getTempLogs()] == [
+        "tmp_first_0123.ftlog"
+    ]
+
+    writeLog(tmp_path / "second.ftlog", NOW + 100)
+    log_storage.addLog(tmp_path / "second.ftlog", vehicle_type=2, system_id=1)
+
+    # The manifest is read instead of listing the directory
+    (tmp_path / "first.ftlog").unlink()
+    log_storage = createManager(tmp_path)
+    assert [entry["name"] for entry in log_storage.getLogs()] == [
+        "first.ftlog",
+        "second.ftlog",
+    ]
+    assert log_storage.getLog("second.ftlog")["system_id"] == 1  # type: ignore[index]
+
+    # An unreadable manifest is rebuilt from the directory
+    (tmp_path / "manifest.json").write_text("{")
+    log_storage = createManager(tmp_path)
+    assert [entry["name"] for entry in log_storage.getLogs()] == ["second.ftlog"]
+
+
+def test_retentionRemovesOldestLogs(tmp_path: Path) -> None:
+    for day in range(5):
+        writeLog(tmp_path / f"day{day}.ftlog", NOW - (4 - day) * SECONDS_PER_DAY)
+
+    log_storage = createManager(tmp_path, max_age_days=3.5)
+    log_storage.enforceRetention(now=NOW)
+    assert [entry["name"] for entry in log_storage.getLogs()] == [
+        "day1.ftlog",
+        "day2.ftlog",
+        "day3.ftlog",
+        "day4.ftlog",
+    ]
+    assert not (tmp_path / "day0.ftlog").exists()
+    assert not getIndexPath(tmp_path / "day0.ftlog").exists()
+
+    log_size = log_storage.getLogs()[0]["size"]
+    log_storage.max_total_bytes = log_size * 2
+    log_storage.enforceRetention(now=NOW)
+    assert [entry["name"] for entry in log_storage.getLogs()] == [
+        "day3.ftlog",
+        "day4.ftlog",
+    ]
+    assert log_storage.getTotalSize() == log_size * 2
+
+
+def test_lowFreeSpaceOnlyWarns(tmp_path: Path, monkeypatch, caplog) -> None:
+    writeLog(tmp_path / "first.ftlog", NOW)
+
+    log_storage = createManager(tmp_path, min_free_bytes=1024**3)
+    monkeypatch.setattr(log_storage, "_getFreeBytes", lambda: 1024**2)
+    with caplog.at_level(logging.WARNING, logger="fgcs"):
+        log_storage.enforceRetention(now=NOW)
+
+    # Other applications may have filled the disk, so no logs are removed
+    assert [entry["name"] for entry in log_storage.getLogs()] == ["first.ftlog"]
+    assert "Only 1 MiB free" in caplog.text
+
+
+def test_oldLogsCompressed(tmp_path: Path) -> None:
+    writeLog(tmp_path / "old.ftlog", NOW - 10 * SECONDS_PER_DAY)
+    writeLog(tmp_path / "new.ftlog", NOW)
+
+    log_storage = createManager(tmp_path, compress_after_days=7)
+    log_storage.addLog(tmp_path / "old.ftlog", vehicle_type=1)
+    log_storage.enforceRetention(now=NOW)
+
+    assert log_storage.getLog("old.ftlog") is None
+    entry = log_storage.getLog("old.ftlog.gz")
+    assert entry is not None
+    assert entry["compression"] == "gzip"
+    assert entry["vehicle_type"] == 1
+    assert not (tmp_path / "old.ftlog").exists()
+    assert len(list(FTLogReader(tmp_path / "old.ftlog.gz").iterMessages())) == 50
+
+    assert log_storage.getLog("new.ftlog")["compression"] is None  # type: ignore[index]
+
+
+def test_tempLogsTracked(tmp_path: Path) -> None:
+    log_storage = createManager(tmp_path)
+    first_log_file = tmp_path / "tmp_first_0123.ftlog"
+    second_log_file = tmp_path / "tmp_4567.ftlog"
+
+    log_storage.addTempLog(first_log_file)
+    log_storage.addTempLog(second_log_file)
+    # Only temp logs which exist are returned
+    writeLog(first_log_file, NOW)
+    assert log_storage.getTempLogs() == [first_log_file]
+
+    log_storage.removeTempLogs([first_log_file, second_log_file])
+    assert createManager(tmp_path).getTempLogs() == []
+
+
+def test_manifestLoadedInBackground(tmp_path: Path) -> None:
+    writeLog(tmp_path / "first.ftlog", NOW)
+    getIndexPath(tmp_path / "first.ftlog").unlink()
+    log_storage = createManager(tmp_path)
+    # Creating the manager and recording a temp log never reads the logs
+    temp_log_file = tmp_path / "tmp_first_0123.ftlog"
+    log_storage.addTempLog(temp_log_file)
+    assert not (tmp_path / "manifest.json").exists()
+    assert not getIndexPath(tmp_path / "first.ftlog").exists()
+
+    log_storage.load()
+    assert log_storage.getLog("first.ftlog") is not None
+    # The temp log is kept even though its file had not been written yet
+    writeLog(temp_log_file, NOW)
+    assert createManager(tmp_path).getTempLogs() == [temp_log_file]
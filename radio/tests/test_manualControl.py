@@ -0,0 +1,135 @@
+import time
+
+from flask_socketio.test_client import SocketIOTestClient
+
+from .helpers import NoDrone
+
+
+def getResults(client: SocketIOTestClient, name: str) -> list:
+    return [
+        packet["args"][0] for packet in client.get_received() if packet["name"] == name
+    ]
+
+
+def test_streamRcOverride(socketio_client: SocketIOTestClient, droneStatus) -> None:
+    socketio_client.emit("start_manual_control", {"mode": "rc_override", "rate_hz": 50})
+    assert getResults(socketio_client, "manual_control_result") == [
+        {
+            "success": True,
+            "message": "Started rc_override streaming at 50Hz",
+            "data": {"input_rate_hz": 20},
+        }
+    ]
+
+    try:
+        # The client sends input faster than the stream rate, the extra inputs
+        # are coalesced into the next send
+        end_time = time.monotonic() + 0.6
+        while time.monotonic() < end_time:
+            socketio_client.emit(
+                "manual_control_input", {"channels": {"1": 1500, "3": 1200}}
+            )
+            time.sleep(0.005)
+        assert getResults(socketio_client, "manual_control_result") == []
+
+        socketio_client.emit("get_manual_control_stats")
+        stats = getResults(socketio_client, "manual_control_stats")[0]
+        assert stats["active"]
+        assert stats["mode"] == "rc_override"
+        assert 15 <= stats["messages_sent"] <= 35
+        assert stats["inputs_coalesced"] > 0
+        assert stats["send_errors"] == 0
+        assert stats["jitter_mean_ms"] is not None
+        assert stats["jitter_max_ms"] >= stats["jitter_mean_ms"]
+
+        socketio_client.emit("manual_control_input", {"channels": {"19": 1500}})
+        assert getResults(socketio_client, "manual_control_result") == [
+            {"success": False, "message": "Invalid channel 19"}
+        ]
+    finally:
+        socketio_client.emit("stop_manual_control")
+
+    assert getResults(socketio_client, "manual_control_result") == [
+        {"success": True, "message": "Stopped rc_override streaming"}
+    ]
+    assert not droneStatus.drone.manualControlController.isActive()
+
+
+def test_failsafeStopsStream(socketio_client: SocketIOTestClient, droneStatus) -> None:
+    socketio_client.emit(
+        "start_manual_control",
+        {"mode": "manual_control", "rate_hz": 25, "failsafe_timeout_secs": 0.2},
+    )
+    socketio_client.emit("manual_control_input", {"x": 100, "z": 600})
+    time.sleep(0.6)
+
+    assert getResults(socketio_client, "manual_control_failsafe") == [
+        {"message": "No manual control input for 0.2s, releasing the sticks"}
+    ]
+    stats = droneStatus.drone.manualControlController.getStats()
+    assert not stats["active"]
+    assert stats["failsafes"] >= 1
+    assert stats["messages_sent"] > 0
+
+    socketio_client.emit("manual_control_input", {"x": 100})
+    assert getResults(socketio_client, "manual_control_result") == [
+        {"success": False, "message": "Manual control is not started"}
+    ]
+
+
+def test_keepAliveInputPreventsFailsafe(
+    socketio_client: SocketIOTestClient, droneStatus
+) -> None:
+    socketio_client.emit(
+        "start_manual_control",
+        {"mode": "manual_control", "rate_hz": 25, "failsafe_timeout_secs": 0.2},
+    )
+    socketio_client.emit("manual_control_input", {"x": 100, "z": 600})
+
+    try:
+        # The unchanged input is resent at the input rate
+        end_time = time.monotonic() + 0.6
+        while time.monotonic() < end_time:
+            time.sleep(1 / 20)
+            socketio_client.emit("manual_control_input", {})
+
+        assert getResults(socketio_client, "manual_control_failsafe") == []
+        controller = droneStatus.drone.manualControlController
+        assert controller.isActive()
+        assert controller._sticks["x"] == 100
+    finally:
+        socketio_client.emit("stop_manual_control")
+
+    assert getResults(socketio_client, "manual_control_result") == [
+        {"success": True, "message": "Stopped manual_control streaming"}
+    ]
+
+
+def test_invalidManualControl(socketio_client: SocketIOTestClient) -> None:
+    socketio_client.emit("start_manual_control", {"mode": "joystick"})
+    assert getResults(socketio_client, "manual_control_result") == [
+        {"success": False, "message": "Invalid manual control mode: joystick"}
+    ]
+
+    socketio_client.emit("start_manual_control", {"mode": "rc_override", "rate_hz": 5})
+    assert getResults(socketio_client, "manual_control_result") == [
+        {"success": False, "message": "Rate must be between 25 and 50Hz"}
+    ]
+
+    socketio_client.emit(
+        "start_manual_control", {"mode": "rc_override", "failsafe_timeout_secs": 0.1}
+    )
+    assert getResults(socketio_client, "manual_control_result") == [
+        {"success": False, "message": "Failsafe timeout must be at least 0.15s"}
+    ]
+
+    socketio_client.emit("stop_manual_control")
+    assert getResults(socketio_client, "manual_control_result") == [
+        {"success": False, "message": "Manual control is not started"}
+    ]
+
+    with NoDrone():
+        socketio_client.emit("start_manual_control", {"mode": "rc_override"})
+        assert socketio_client.get_received()[-1]["args"][0] == {
+            "message": "Must be connected to the drone to start manual control."
+        }
@@ -0,0 +1,66 @@
+from app.messageConverter import MessageConverterRegistry, messageToDict
+from pymavlink.dialects.v20 import ardupilotmega as mavlink
+
+mav = mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+
+
+def decode(msg):
+    return mavlink.MAVLink(None).decode(bytearray(msg.pack(mav)))
+
+
+def test_toDict_matches_pymavlink() -> None:
+    messages = [
+        decode(mav.attitude_encode(123456, 0.1, -0.2, 1.5, 0.01, 0.02, -0.03)),
+        decode(mav.statustext_encode(6, b"FGCS connected to aircraft")),
+        decode(
+            mav.esc_telemetry_1_to_4_encode(
+                [30, 31, 32, 33],
+                [1610, 1605, 1612, 1608],
+                [520, 515, 530, 525],
+                [1200, 1190, 1210, 1205],
+                [9500, 9450, 9550, 9480],
+                [100, 100, 100, 100],
+            )
+        ),
+    ]
+
+    for msg in messages:
+        assert messageToDict(msg) == msg.to_dict()
+        assert list(messageToDict(msg).keys()) == list(msg.to_dict().keys())
+
+
+def test_toLogLine_matches_to_dict_format() -> None:
+    registry = MessageConverterRegistry()
+    msg = decode(mav.statustext_encode(4, b"PreArm: Hardware safety switch"))
+
+    assert registry.toLogLine(msg) == ",".join(
+        f"{name}:{value}"
+        for name, value in msg.to_dict().items()
+        if name != "mavpackettype"
+    )
+
+
+def test_view_only_includes_selected_fields() -> None:
+    registry = MessageConverterRegistry()
+    registry.registerView("position", {"GLOBAL_POSITION_INT": ["lat", "lon"]})
+
+    position = decode(
+        mav.global_position_int_encode(1, -353621474, 1491651746, 584000, 0, 0, 0, 0, 0)
+    )
+    attitude = decode(mav.attitude_encode(1, 0.1, 0.2, 0.3, 0, 0, 0))
+
+    assert registry.toDict(position, "position") == {
+        "mavpackettype": "GLOBAL_POSITION_INT",
+        "lat": -353621474,
+        "lon": 1491651746,
+    }
+    assert registry.toDict(attitude, "position") == attitude.to_dict()
+    assert registry.toDict(position) == position.to_dict()
+
+
+def test_converters_are_cached() -> None:
+    registry = MessageConverterRegistry()
+    first = decode(mav.attitude_encode(1, 0.1, 0.2, 0.3, 0, 0, 0))
+    second = decode(mav.attitude_encode(2, 0.4, 0.5, 0.6, 0, 0, 0))
+
+    assert registry.getConverter(first) is registry.getConverter(second)
@@ -0,0 +1,140 @@
+import struct
+import time
+from typing import List, Tuple
+
+from mockAutopilot import (
+    LinkImpairment,
+    MockAutopilot,
+    MockFtpServer,
+    TcpServerTransport,
+    loadParamFile,
+)
+from mockAutopilot.link import ImpairedLink, Transport
+from pymavlink import mavftp, mavftp_op, mavutil
+
+
+class RecordingTransport(Transport):
+    def __init__(self) -> None:
+        self.written: List[Tuple[float, bytes]] = []
+
+    def read(self, timeout: float) -> bytes:
+        return b""
+
+    def write(self, data: bytes) -> None:
+        self.written.append((time.monotonic(), data))
+
+    def close(self) -> None:
+        pass
+
+
+def create_request(opcode: int, offset: int = 0, size: int = 0, payload=None):
+    return mavftp_op.FTP_OP(1, 0, opcode, size, 0, 0, offset, payload)
+
+
+def test_ftpServer_listsDirectoriesAndFiles() -> None:
+    server = MockFtpServer({"/APM/LOGS/1.BIN": b"abc", "/APM/test.txt": b"hello"})
+
+    path = bytearray(b"/APM")
+    response = server.handle(
+        create_request(mavftp_op.OP_ListDirectory, size=len(path), payload=path)
+    )[0]
+    assert response.opcode == mavftp_op.OP_Ack
+    assert response.payload == b"D.\x00D..\x00DLOGS\x00Ftest.txt\t5\x00"
+
+    response = server.handle(
+        create_request(mavftp_op.OP_ListDirectory, 4, len(path), path)
+    )[0]
+    assert response.opcode == mavftp_op.OP_Nack
+    assert response.payload[0] == mavftp.FtpError.EndOfFile.value
+
+
+def test_ftpServer_burstReadsUntilEndOfFile() -> None:
+    data = bytes(range(200))
+    server = MockFtpServer({"/file.bin": data})
+
+    path = bytearray(b"/file.bin")
+    response = server.handle(
+        create_request(mavftp_op.OP_OpenFileRO, size=len(path), payload=path)
+    )[0]
+    assert struct.unpack("<I", response.payload)[0] == len(data)
+
+    responses = server.handle(create_request(mavftp_op.OP_BurstReadFile, 0, 80))
+    assert [r.offset for r in responses] == [0, 80, 160]
+    assert b"".join(r.payload for r in responses) == data
+    assert [r.burst_complete for r in responses] == [0, 0, 1]
+
+    response = server.handle(create_request(mavftp_op.OP_BurstReadFile, 200, 80))[0]
+    assert response.opcode == mavftp_op.OP_Nack
+    assert response.payload[0] == mavftp.FtpError.EndOfFile.value
+
+
+def test_ftpServer_missingFileNotFound() -> None:
+    path = bytearray(b"/missing.bin")
+    response = MockFtpServer().handle(
+        create_request(mavftp_op.OP_OpenFileRO, size=len(path), payload=path)
+    )[0]
+    assert response.opcode == mavftp_op.OP_Nack
+    assert response.payload[0] == mavftp.FtpError.FileNotFound.value
+
+
+def test_impairedLink_dropsPacketsRepeatably() -> None:
+    dropped = []
+    for _ in range(2):
+        transport = RecordingTransport()
+        link = ImpairedLink(transport, LinkImpairment(loss=0.25, seed=42))
+        for index in range(200):
+            link.send(bytes([index]))
+        time.sleep(0.2)
+        link.close()
+
+        assert link.packets_sent + link.packets_dropped == 200
+        assert 20 < link.packets_dropped < 80
+        dropped.append(link.packets_dropped)
+
+    assert dropped[0] == dropped[1]
+
+
+def test_impairedLink_appliesLatencyAndBandwidth() -> None:
+    transport = RecordingTransport()
+    # 100 bytes at 8000 bps takes 0.1 seconds to send
+    link = ImpairedLink(transport, LinkImpairment(latency_ms=50, bandwidth_bps=8000))
+
+    start = time.monotonic()
+    link.send(bytes(100))
+    link.send(bytes(100))
+    time.sleep(0.5)
+    link.close()
+
+    assert len(transport.written) == 2
+    assert transport.written[0][0] - start >= 0.15
+    assert transport.written[1][0] - start >= 0.25
+
+
+def test_loadParamFile(tmp_path) -> None:
+    param_file = tmp_path / "test.parm"
+    param_file.write_text("# Comment\nGRIP_ENABLE 1\nWPNAV_SPEED,1250.5\n\n")
+
+    assert loadParamFile(str(param_file)) == {
+        "GRIP_ENABLE": (1.0, mavutil.mavlink.MAV_PARAM_TYPE_INT32),
+        "WPNAV_SPEED": (1250.5, mavutil.mavlink.MAV_PARAM_TYPE_REAL32),
+    }
+
+
+def test_mockAutopilot_answersHeartbeatAndParams() -> None:
+    with MockAutopilot(
+        TcpServerTransport(port=0), params={"RTL_ALT": (1500, 9)}
+    ) as mock:
+        client = mavutil.mavlink_connection(mock.connection_string)
+        try:
+            heartbeat = client.recv_match(type="HEARTBEAT", blocking=True, timeout=5)
+            assert heartbeat is not None
+            assert heartbeat.autopilot == mavutil.mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA
+
+            client.param_set_send("RTL_ALT", 2000)
+            param = client.recv_match(type="PARAM_VALUE", blocking=True, timeout=5)
+            assert param is not None
+            assert param.param_id == "RTL_ALT"
+            assert param.param_value == 2000
+            assert mock.params["RTL_ALT"] == (2000, 9)
+        finally:
+            client.close()
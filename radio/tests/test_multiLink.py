@@ -0,0 +1,182 @@
+import socket
+import time
+from typing import Any, List, Optional
+
+import pytest
+from app.multiLink import (
+    MULTI_LINK_HEALTH_INTERVAL_SECS,
+    MultiLinkConnection,
+    PhysicalLink,
+)
+from pymavlink import mavutil
+
+
+def getFreePort() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class VehicleLinks:
+    def __init__(self) -> None:
+        """Two links from a fake vehicle which send the same packet bytes."""
+        self.ports = [getFreePort(), getFreePort()]
+        self.vehicle = mavutil.mavlink_connection(
+            f"udpout:127.0.0.1:{self.ports[0]}", source_system=1, source_component=1
+        )
+        self.second_link = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.second_link.settimeout(0.5)
+
+    @property
+    def connection_strings(self) -> List[str]:
+        return [f"udpin:127.0.0.1:{port}" for port in self.ports]
+
+    def sendHeartbeat(self, on_first: bool = True, on_second: bool = True) -> None:
+        msg = self.vehicle.mav.heartbeat_encode(
+            mavutil.mavlink.MAV_TYPE_QUADROTOR,
+            mavutil.mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA,
+            0,
+            0,
+            mavutil.mavlink.MAV_STATE_ACTIVE,
+        )
+        if on_first:
+            self.vehicle.mav.send(msg)
+        else:
+            # Only increments the sequence number, as a lost packet would
+            msg.pack(self.vehicle.mav)
+            self.vehicle.mav.seq = (self.vehicle.mav.seq + 1) % 256
+        if on_second:
+            self.second_link.sendto(msg.get_msgbuf(), ("127.0.0.1", self.ports[1]))
+
+    def receiveOnFirst(self) -> Optional[Any]:
+        return self.vehicle.recv_match(type="HEARTBEAT", blocking=True, timeout=0.5)
+
+    def receiveOnSecond(self) -> Optional[bytes]:
+        try:
+            while True:
+                data, _ = self.second_link.recvfrom(1024)
+                # Skip the TIMESYNC probes
+                if data[7 if data[0] == 0xFD else 5] == 0:
+                    return data
+        except socket.timeout:
+            return None
+
+    def close(self) -> None:
+        self.vehicle.close()
+        self.second_link.close()
+
+
+def receiveAll(connection: MultiLinkConnection, duration: float) -> List[Any]:
+    received = []
+    end_time = time.monotonic() + duration
+    while time.monotonic() < end_time:
+        msg = connection.recv_msg()
+        if msg is None:
+            time.sleep(0.01)
+        else:
+            received.append(msg)
+    return received
+
+
+@pytest.fixture
+def vehicleLinks():
+    links = VehicleLinks()
+    yield links
+    links.close()
+
+
+def test_duplicatePacketsAreDropped(vehicleLinks: VehicleLinks) -> None:
+    connection = MultiLinkConnection(vehicleLinks.connection_strings)
+    try:
+        for _ in range(10):
+            vehicleLinks.sendHeartbeat()
+        # A packet which only arrived on one link is still received
+        vehicleLinks.sendHeartbeat(on_first=False)
+        vehicleLinks.sendHeartbeat(on_second=False)
+        vehicleLinks.sendHeartbeat()
+
+        received = receiveAll(connection, 0.5)
+        heartbeats = [msg for msg in received if msg.get_type() == "HEARTBEAT"]
+        # Packets from different links may be received out of order
+        assert sorted(msg.get_seq() for msg in heartbeats) == list(range(13))
+        assert connection.duplicates == 11
+
+        first, second = connection.getLinkStats()
+        assert first["packets_received"] == 12
+        assert second["packets_received"] == 12
+        assert first["duplicates"] + second["duplicates"] == 11
+        assert first["packets_lost"] == 1
+        assert second["packets_lost"] == 1
+
+        # The rest of the backend sees one connection
+        assert connection.mav.total_packets_received == len(received)
+        assert connection.target_system == 1
+    finally:
+        connection.close()
+
+
+def test_sendsOnHealthiestLink(vehicleLinks: VehicleLinks) -> None:
+    connection = MultiLinkConnection(vehicleLinks.connection_strings)
+    try:
+        vehicleLinks.sendHeartbeat()
+        receiveAll(connection, 0.2)
+        connection.mav.heartbeat_send(
+            mavutil.mavlink.MAV_TYPE_GCS, mavutil.mavlink.MAV_AUTOPILOT_INVALID, 0, 0, 0
+        )
+        assert vehicleLinks.receiveOnFirst() is not None
+        assert vehicleLinks.receiveOnSecond() is None
+
+        # Half of the packets on the first link are lost
+        end_time = time.monotonic() + MULTI_LINK_HEALTH_INTERVAL_SECS * 1.5
+        on_first = True
+        while time.monotonic() < end_time:
+            vehicleLinks.sendHeartbeat(on_first=on_first)
+            on_first = not on_first
+            receiveAll(connection, 0.02)
+
+        first, second = connection.getLinkStats()
+        assert first["loss_percent"] > 40
+        assert second["loss_percent"] == 0
+        assert not first["active"]
+        assert second["active"]
+
+        connection.mav.heartbeat_send(
+            mavutil.mavlink.MAV_TYPE_GCS, mavutil.mavlink.MAV_AUTOPILOT_INVALID, 0, 0, 0
+        )
+        assert vehicleLinks.receiveOnSecond() is not None
+        assert vehicleLinks.receiveOnFirst() is None
+
+        connection.setSendMode("all")
+        connection.mav.heartbeat_send(
+            mavutil.mavlink.MAV_TYPE_GCS, mavutil.mavlink.MAV_AUTOPILOT_INVALID, 0, 0, 0
+        )
+        assert vehicleLinks.receiveOnFirst() is not None
+        assert vehicleLinks.receiveOnSecond() is not None
+    finally:
+        connection.close()
+
+
+def test_reorderedPacketsAreNotCountedAsLost() -> None:
+    link = PhysicalLink("udpin:127.0.0.1:14550", None)
+    mav = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+
+    def receive(seq: int) -> None:
+        msg = mavutil.mavlink.MAVLink_heartbeat_message(2, 3, 0, 0, 4, 3)
+        mav.seq = seq
+        msg.pack(mav)
+        link.recordPacket(msg, time.monotonic())
+
+    for seq in [10, 12, 11, 12]:
+        receive(seq)
+    # Only the first gap is loss, the late and repeated packets are not
+    assert link.packets_lost == 1
+
+
+def test_invalidMultiLinkConnection() -> None:
+    with pytest.raises(ValueError, match="At least two links"):
+        MultiLinkConnection(["udpin:127.0.0.1:14550"])
+
+    with pytest.raises(ValueError, match="Invalid link send mode"):
+        MultiLinkConnection(
+            ["udpin:127.0.0.1:14550", "udpin:127.0.0.1:14551"], send_mode="any"
+        )
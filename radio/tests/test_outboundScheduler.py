@@ -0,0 +1,161 @@
+import logging
+import time
+from typing import List
+
+import pytest
+import serial
+from app.outboundScheduler import OutboundScheduler
+from pymavlink import mavutil
+from pymavlink.dialects.v20 import ardupilotmega as mavlink
+
+logger = logging.getLogger("fgcs")
+
+
+class WireRecorder:
+    """Collects the bytes written by a MAVLink object, as a link would."""
+
+    def __init__(self) -> None:
+        self.parser = mavlink.MAVLink(None)
+        self.message_types: List[str] = []
+        self.write_times: List[float] = []
+
+    def write(self, buf: bytes) -> None:
+        self.write_times.append(time.monotonic())
+        self.message_types.append(self.parser.decode(bytearray(buf)).get_type())
+
+
+def createScheduler(**kwargs):
+    wire = WireRecorder()
+    mav = mavlink.MAVLink(wire, srcSystem=255, srcComponent=190)
+    scheduler = OutboundScheduler(logger, **kwargs)
+    scheduler.attach(mav)
+    return wire, mav, scheduler
+
+
+def sendArm(mav) -> None:
+    mav.command_long_send(
+        1, 1, mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM, 0, 0, 0, 0, 0, 0, 0, 0
+    )
+
+
+def test_higherPriorityMessagesSentFirst() -> None:
+    wire, mav, scheduler = createScheduler(bandwidth_bytes_per_sec=500, burst_bytes=0)
+    try:
+        with scheduler.priorityClass("bulk"):
+            for index in range(5):
+                mav.param_set_send(1, 1, f"PARAM_{index}".encode(), 1.0, 9)
+                if index == 0:
+                    # Wait for the first message to use up the bandwidth
+                    while not wire.message_types:
+                        time.sleep(0.001)
+        mav.heartbeat_send(6, 8, 0, 0, 4)
+        sendArm(mav)
+
+        deadline = time.monotonic() + 3
+        while len(wire.message_types) < 7 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        scheduler.close()
+
+    assert wire.message_types == [
+        "PARAM_SET",
+        "COMMAND_LONG",
+        "HEARTBEAT",
+        "PARAM_SET",
+        "PARAM_SET",
+        "PARAM_SET",
+        "PARAM_SET",
+    ]
+
+    stats = scheduler.getStats()
+    assert stats["bulk"]["packets_sent"] == 5
+    assert stats["bulk"]["max_queued"] >= 4
+    assert stats["safety"]["packets_sent"] == 1
+    assert stats["safety"]["mean_latency_ms"] is not None
+    assert stats["interactive"]["max_latency_ms"] is None
+
+
+def test_sendingShapedToBandwidth() -> None:
+    wire, mav, scheduler = createScheduler(bandwidth_bytes_per_sec=2000, burst_bytes=0)
+    try:
+        for _ in range(20):
+            mav.heartbeat_send(6, 8, 0, 0, 4)
+        deadline = time.monotonic() + 3
+        while len(wire.message_types) < 20 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        scheduler.close()
+
+    # 20 heartbeats of 21 bytes at 2000 bytes per second take about 0.2 seconds
+    assert len(wire.write_times) == 20
+    assert wire.write_times[-1] - wire.write_times[0] > 0.15
+    assert scheduler.getStats()["heartbeat"]["bytes_sent"] == 20 * 21
+
+
+def test_closeSendsWaitingMessages() -> None:
+    wire, mav, scheduler = createScheduler(bandwidth_bytes_per_sec=10, burst_bytes=0)
+    for _ in range(3):
+        mav.heartbeat_send(6, 8, 0, 0, 4)
+    scheduler.close()
+
+    assert wire.message_types == ["HEARTBEAT"] * 3
+    assert "send" not in mav.__dict__
+
+    # Messages are sent directly once the scheduler is closed
+    sendArm(mav)
+    assert wire.message_types[-1] == "COMMAND_LONG"
+    assert scheduler.getStats()["safety"]["packets_sent"] == 0
+
+
+def test_singleParamSetIsInteractive() -> None:
+    wire, mav, scheduler = createScheduler()
+    try:
+        mav.param_set_send(1, 1, b"PARAM", 1.0, 9)
+        with scheduler.priorityClass("bulk"):
+            mav.param_set_send(1, 1, b"PARAM", 1.0, 9)
+    finally:
+        scheduler.close()
+
+    stats = scheduler.getStats()
+    assert stats["interactive"]["packets_sent"] == 1
+    assert stats["bulk"]["packets_sent"] == 1
+
+
+class FailingWire:
+    def write(self, buf: bytes) -> None:
+        raise serial.serialutil.SerialException("Device disconnected")
+
+
+def test_sendFailuresAreRaised() -> None:
+    mav = mavlink.MAVLink(FailingWire(), srcSystem=255, srcComponent=190)
+    scheduler = OutboundScheduler(logger)
+    scheduler.attach(mav)
+    try:
+        sendArm(mav)
+        deadline = time.monotonic() + 3
+        while scheduler._send_error is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        # Sends after the connection failed raise, as they would if sent directly
+        with pytest.raises(serial.serialutil.SerialException):
+            sendArm(mav)
+
+        scheduler.reattach(mavlink.MAVLink(WireRecorder()))
+        sendArm(scheduler.mav)
+    finally:
+        scheduler.close()
+
+
+def test_droneSendsThroughScheduler(droneStatus) -> None:
+    scheduler = droneStatus.drone.outbound_scheduler
+    assert scheduler is not None
+    assert droneStatus.drone.master.mav.send == scheduler.send
+
+    packets_sent = scheduler.getStats()["heartbeat"]["packets_sent"]
+    deadline = time.monotonic() + 3
+    while (
+        scheduler.getStats()["heartbeat"]["packets_sent"] == packets_sent
+        and time.monotonic() < deadline
+    ):
+        time.sleep(0.1)
+    assert scheduler.getStats()["heartbeat"]["packets_sent"] > packets_sent
@@ -459,13 +459,13 @@ def test_getParams_wrongState(socketio_client: SocketIOTestClient, droneStatus)
 
 
 def test_getParams_returnsCachedParams(
-    socketio_client: SocketIOTestClient, droneStatus
+    socketio_client: SocketIOTestClient, droneStatus, monkeypatch
 ) -> None:
     droneStatus.state = "params"
     expected_params = [
         {"param_id": "ACRO_BAL_ROLL", "param_value": 2.0, "param_type": 9}
     ]
-    droneStatus.drone.paramsController.params = expected_params
+    monkeypatch.setattr(droneStatus.drone.paramsController, "params", expected_params)
 
     socketio_result = send_and_receive_params(socketio_client, "get_params")
 
@@ -500,13 +500,17 @@ def test_refreshParams_alwaysFetchesAndEmitsProgress(
     socketio_client: SocketIOTestClient, droneStatus, monkeypatch
 ) -> None:
     droneStatus.state = "params"
-    droneStatus.drone.paramsController.params = [
-        {"param_id": "EXISTING_PARAM", "param_value": 1.0, "param_type": 9}
-    ]
+    monkeypatch.setattr(
+        droneStatus.drone.paramsController,
+        "params",
+        [{"param_id": "EXISTING_PARAM", "param_value": 1.0, "param_type": 9}],
+    )
 
     call_count = 0
 
-    def fake_fetch_all_params_blocking(timeout_secs=120, progress_update_callback=None):
+    def fake_fetch_all_params_blocking(
+        timeout_secs=120, progress_update_callback=None, should_cancel_callback=None
+    ):
         nonlocal call_count
         call_count += 1
 
@@ -0,0 +1,67 @@
+import time
+from typing import Any, List
+
+from app.progressReporter import ProgressReporter
+
+
+def test_first_and_final_updates_always_emitted() -> None:
+    emitted: List[Any] = []
+    reporter = ProgressReporter(emitted.append, min_interval_secs=10)
+
+    for i in range(1, 101):
+        reporter.update({"index": i}, percent=i)
+
+    assert emitted == [{"index": 1}, {"index": 100}]
+    assert reporter.updates_received == 100
+    assert reporter.updates_emitted == 2
+
+
+def test_flush_emits_latest_pending_update() -> None:
+    emitted: List[Any] = []
+    reporter = ProgressReporter(emitted.append, min_interval_secs=10)
+
+    reporter.update("first", percent=10)
+    reporter.update("second", percent=20)
+    reporter.update("third", percent=30)
+    reporter.flush()
+    reporter.flush()
+
+    assert emitted == ["first", "third"]
+
+
+def test_updates_throttled_by_time_and_percent() -> None:
+    emitted: List[Any] = []
+    reporter = ProgressReporter(
+        emitted.append, min_interval_secs=0.05, min_percent_step=5
+    )
+
+    reporter.update(1, percent=1)
+    time.sleep(0.06)
+    # Enough time has passed but not enough progress
+    reporter.update(2, percent=2)
+    reporter.update(3, percent=10)
+    # Enough progress but not enough time
+    reporter.update(4, percent=20)
+
+    assert emitted == [1, 3]
+
+
+def test_progress_never_goes_backwards() -> None:
+    emitted: List[Any] = []
+    reporter = ProgressReporter(emitted.append, min_interval_secs=0)
+
+    reporter.update("a", percent=50)
+    reporter.update("b", percent=40)
+    reporter.flush()
+
+    assert emitted == ["a"]
+
+
+def test_context_manager_flushes() -> None:
+    emitted: List[Any] = []
+
+    with ProgressReporter(emitted.append, min_interval_secs=10) as reporter:
+        reporter.update("a")
+        reporter.update("b")
+
+    assert emitted == ["a", "b"]
@@ -0,0 +1,78 @@
+import time
+
+from app.telemetryCache import TelemetryCache
+from pymavlink.dialects.v20 import ardupilotmega as mavlink
+
+from tests import app, socketio
+
+mav = mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+
+
+def decode(msg):
+    decoded = mavlink.MAVLink(None).decode(bytearray(msg.pack(mav)))
+    decoded._timestamp = time.time()
+    return decoded
+
+
+def attitude(roll: float, pitch: float):
+    return decode(mav.attitude_encode(1000, roll, pitch, 0.5, 0.0, 0.0, 0.0))
+
+
+def test_snapshotContainsLatestMessageOfEachType() -> None:
+    cache = TelemetryCache()
+    cache.update(attitude(0.1, 0.2))
+    cache.update(attitude(0.3, 0.2))
+    cache.update(decode(mav.vfr_hud_encode(10, 11, 90, 50, 12, 1)))
+
+    snapshot = cache.getSnapshot()
+    assert snapshot["version"] == 3
+    assert set(snapshot["messages"]) == {"ATTITUDE", "VFR_HUD"}
+    assert snapshot["messages"]["ATTITUDE"]["roll"] == attitude(0.3, 0.2).roll
+    assert "timestamp" in snapshot["messages"]["ATTITUDE"]
+
+    assert set(cache.getSnapshot(["VFR_HUD"])["messages"]) == {"VFR_HUD"}
+
+
+def test_changesSinceOnlyContainsChangedFields() -> None:
+    cache = TelemetryCache()
+    cache.update(attitude(0.1, 0.2))
+    cache.update(decode(mav.vfr_hud_encode(10, 11, 90, 50, 12, 1)))
+    version = cache.getSnapshot()["version"]
+
+    cache.update(attitude(0.3, 0.2))
+
+    changes = cache.getChangesSince(version)
+    assert changes["version"] == version + 1
+    assert set(changes["messages"]) == {"ATTITUDE"}
+    assert set(changes["messages"]["ATTITUDE"]) == {
+        "mavpackettype",
+        "timestamp",
+        "roll",
+    }
+
+    assert cache.getChangesSince(changes["version"])["messages"] == {}
+
+
+def test_getSnapshotEvent() -> None:
+    client = socketio.test_client(app, namespace="/telemetry")
+
+    client.emit("get_snapshot", {}, namespace="/telemetry")
+    received = client.get_received("/telemetry")
+    assert received[-1]["name"] == "snapshot"
+    assert set(received[-1]["args"][0]) == {"version", "messages"}
+
+    client.emit("get_snapshot", {"since_version": -1}, namespace="/telemetry")
+    received = client.get_received("/telemetry")
+    assert received[-1]["name"] == "snapshot_error"
+    assert received[-1]["args"][0] == {"message": "Invalid since_version"}
+
+    client.emit("get_snapshot", {"since_version": True}, namespace="/telemetry")
+    received = client.get_received("/telemetry")
+    assert received[-1]["args"][0] == {"message": "Invalid since_version"}
+
+    client.emit("get_snapshot", {"message_types": [["x"]]}, namespace="/telemetry")
+    received = client.get_received("/telemetry")
+    assert received[-1]["name"] == "snapshot_error"
+    assert received[-1]["args"][0] == {"message": "Invalid message_types"}
+
+    client.disconnect(namespace="/telemetry")
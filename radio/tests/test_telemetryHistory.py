@@ -0,0 +1,91 @@
+import pytest
+from app.telemetryHistory import TelemetryHistoryStore, TimeSeriesBuffer
+from pymavlink.dialects.v20 import ardupilotmega as mavlink
+
+from tests import app, socketio
+
+mav = mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+
+
+def attitude(timestamp: float, roll: float):
+    msg = mavlink.MAVLink(None).decode(
+        bytearray(mav.attitude_encode(1000, roll, 0.0, 0.0, 0.0, 0.0, 0.0).pack(mav))
+    )
+    msg._timestamp = timestamp
+    return msg
+
+
+def test_bufferOverwritesOldestSamples() -> None:
+    buffer = TimeSeriesBuffer(3)
+    for second in range(5):
+        buffer.push(second, second * 10)
+
+    assert buffer.count == 3
+    assert buffer.lastTime() == 4
+    series = buffer.downsample(0, 4, 4)
+    assert series["time"] == [2, 3]
+    assert series["mean"] == [20, 35]
+
+    with pytest.raises(ValueError):
+        TimeSeriesBuffer(0)
+
+
+def test_downsampleFindsMinMaxMeanOfEachBucket() -> None:
+    buffer = TimeSeriesBuffer(100)
+    for index, value in enumerate([1, 5, 3, 2, 8, 6]):
+        buffer.push(index, value)
+
+    series = buffer.downsample(0, 6, 2)
+    assert series == {
+        "time": [0, 3],
+        "min": [1, 2],
+        "max": [5, 8],
+        "mean": [3, pytest.approx(16 / 3)],
+    }
+
+
+def test_storeLimitsRateAndReturnsHistory() -> None:
+    store = TelemetryHistoryStore(["ATTITUDE"], duration_secs=10, max_rate_hz=10)
+    assert store.capacity == 100
+
+    for index in range(40):
+        # Messages arrive at 20 Hz, every other one is dropped
+        store.update(attitude(index * 0.05 + 0.01, index))
+
+    assert "ATTITUDE.roll" in store.getKeys()
+    assert "ATTITUDE.time_boot_ms" in store.getKeys()
+
+    history = store.getHistory(["ATTITUDE.roll", "VFR_HUD.alt"], buckets=1)
+    assert history["end"] == pytest.approx(1.91)
+    assert history["bucket_secs"] == 10
+    assert list(history["series"]) == ["ATTITUDE.roll"]
+    assert history["series"]["ATTITUDE.roll"]["min"] == [0]
+    assert history["series"]["ATTITUDE.roll"]["max"] == [38]
+    assert history["series"]["ATTITUDE.roll"]["mean"] == [19]
+
+
+def test_getHistoryEvent() -> None:
+    client = socketio.test_client(app, namespace="/telemetry")
+
+    client.emit(
+        "get_history",
+        {"keys": ["ATTITUDE.roll"], "duration_secs": 60, "buckets": 60},
+        namespace="/telemetry",
+    )
+    received = client.get_received("/telemetry")
+    assert received[-1]["name"] == "history"
+    assert set(received[-1]["args"][0]) == {"start", "end", "bucket_secs", "series"}
+
+    client.emit("get_history", {"keys": "ATTITUDE.roll"}, namespace="/telemetry")
+    received = client.get_received("/telemetry")
+    assert received[-1]["name"] == "history_error"
+    assert received[-1]["args"][0] == {"message": "Invalid history request"}
+
+    client.emit(
+        "get_history", {"keys": ["ATTITUDE.roll", ["x"]]}, namespace="/telemetry"
+    )
+    received = client.get_received("/telemetry")
+    assert received[-1]["name"] == "history_error"
+    assert received[-1]["args"][0] == {"message": "Invalid history request"}
+
+    client.disconnect(namespace="/telemetry")
@@ -0,0 +1,142 @@
+import time
+
+from app.telemetrySubscriptions import (
+    GLOBAL_MESSAGE_LISTENERS,
+    TelemetrySubscriptionManager,
+    getTelemetryRoom,
+)
+from flask_socketio import SocketIOTestClient
+from pymavlink import mavutil
+
+from . import app, socketio
+
+
+def test_streamRatesAreUnionOfClients() -> None:
+    subscriptions = TelemetrySubscriptionManager()
+    subscriptions.setState("a", "graphs")
+    subscriptions.setState("b", "config.rc")
+    subscriptions.subscribe("b", ["ATTITUDE", "UNKNOWN_MESSAGE"], 10)
+
+    assert subscriptions.getStreamRates({}) == {
+        mavutil.mavlink.MAV_DATA_STREAM_POSITION: 1,
+        mavutil.mavlink.MAV_DATA_STREAM_EXTENDED_STATUS: 1,
+        mavutil.mavlink.MAV_DATA_STREAM_EXTRA1: 10,
+        mavutil.mavlink.MAV_DATA_STREAM_EXTRA2: 3,
+        mavutil.mavlink.MAV_DATA_STREAM_RC_CHANNELS: 4,
+    }
+    assert subscriptions.getMessageTypes("a") == set(GLOBAL_MESSAGE_LISTENERS) | {
+        "ATTITUDE",
+        "SYS_STATUS",
+    }
+    assert "UNKNOWN_MESSAGE" in subscriptions.getAllMessageTypes()
+    assert subscriptions.getStates() == {"graphs", "config.rc"}
+
+
+def test_removedClientNoLongerCounted() -> None:
+    subscriptions = TelemetrySubscriptionManager()
+    subscriptions.setState("a", "dashboard")
+    subscriptions.setState("b", "missions")
+    assert subscriptions.getStreamRates({1: 5}) == {
+        1: 5,
+        mavutil.mavlink.MAV_DATA_STREAM_POSITION: 1,
+        mavutil.mavlink.MAV_DATA_STREAM_EXTENDED_STATUS: 1,
+    }
+
+    assert subscriptions.removeClient("a")
+    assert not subscriptions.removeClient("a")
+    assert "VIBRATION" not in subscriptions.getAllMessageTypes()
+    assert subscriptions.getStates() == {"missions"}
+
+
+def test_messagesOnlySentToSubscribedClients(
+    socketio_client: SocketIOTestClient, droneStatus
+) -> None:
+    # Move the main client to a page which does not need ATTITUDE messages
+    socketio_client.emit("set_state", {"state": "params"})
+    assert "ATTITUDE" not in droneStatus.drone.message_listeners
+
+    subscribed_client = socketio.test_client(app, namespace="/telemetry")
+    other_client = socketio.test_client(app, namespace="/telemetry")
+    try:
+        subscribed_client.emit(
+            "subscribe",
+            {"message_types": ["ATTITUDE"], "rate": 4},
+            namespace="/telemetry",
+        )
+        received = subscribed_client.get_received("/telemetry")
+        assert received[-1]["name"] == "subscriptions"
+        assert "ATTITUDE" in received[-1]["args"][0]
+        assert "ATTITUDE" in droneStatus.drone.message_listeners
+
+        sid = subscribed_client.eio_sid
+        assert droneStatus.telemetry_subscriptions.getMessageTypes(sid) >= {
+            "ATTITUDE",
+            "HEARTBEAT",
+        }
+        telemetry_sid = socketio.server.manager.sid_from_eio_sid(sid, "/telemetry")
+        assert getTelemetryRoom("ATTITUDE") in socketio.server.rooms(
+            telemetry_sid, namespace="/telemetry"
+        )
+
+        time.sleep(1)
+        messages = [
+            packet["args"][0]["mavpackettype"]
+            for packet in subscribed_client.get_received("/telemetry")
+            if packet["name"] == "incoming_msg"
+        ]
+        assert "ATTITUDE" in messages
+        assert not any(
+            packet["name"] == "incoming_msg"
+            and packet["args"][0]["mavpackettype"] == "ATTITUDE"
+            for packet in other_client.get_received("/telemetry")
+        )
+
+        subscribed_client.emit(
+            "unsubscribe", {"message_types": ["ATTITUDE"]}, namespace="/telemetry"
+        )
+        assert "ATTITUDE" not in droneStatus.drone.message_listeners
+
+        subscribed_client.emit("subscribe", {"rate": 4}, namespace="/telemetry")
+        assert subscribed_client.get_received("/telemetry")[-1] == {
+            "name": "subscription_error",
+            "args": [{"message": "Invalid message_types"}],
+            "namespace": "/telemetry",
+        }
+    finally:
+        subscribed_client.disconnect(namespace="/telemetry")
+        other_client.disconnect(namespace="/telemetry")
+
+    assert droneStatus.telemetry_subscriptions.getMessageTypes(sid) == set()
+
+
+def test_changingPageKeepsOtherClientsStreams(
+    socketio_client: SocketIOTestClient, droneStatus, monkeypatch
+) -> None:
+    socketio_client.emit("set_state", {"state": "params"})
+    other_client = socketio.test_client(app, namespace="/telemetry")
+    try:
+        other_client.emit(
+            "subscribe",
+            {"message_types": ["ATTITUDE"], "rate": 4},
+            namespace="/telemetry",
+        )
+
+        requests = []
+        monkeypatch.setattr(
+            droneStatus.drone,
+            "sendDataStreamRequestMessage",
+            lambda stream, rate: requests.append((stream, rate)),
+        )
+        monkeypatch.setattr(
+            droneStatus.drone,
+            "stopAllDataStreams",
+            lambda: requests.append(("all", 0)),
+        )
+
+        # Only the streams the new page needs are changed
+        socketio_client.emit("set_state", {"state": "config.rc"})
+        assert requests == [(mavutil.mavlink.MAV_DATA_STREAM_RC_CHANNELS, 4)]
+        assert "ATTITUDE" in droneStatus.drone.message_listeners
+    finally:
+        other_client.disconnect(namespace="/telemetry")
+        socketio_client.emit("set_state", {"state": "params"})
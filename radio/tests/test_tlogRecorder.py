@@ -0,0 +1,75 @@
+import gzip
+import logging
+import time
+from pathlib import Path
+from typing import Optional
+
+import pytest
+from app.tlogRecorder import TlogRecorder
+from pymavlink import mavutil
+
+
+def receiveHeartbeat(master) -> None:
+    msg = master.recv_match(type="HEARTBEAT", blocking=True, timeout=2)
+    assert msg is not None
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_recordsSentAndReceivedFrames(tmp_path: Path, compression: Optional[str]):
+    master = mavutil.mavlink_connection("udpin:127.0.0.1:14601", source_system=255)
+    vehicle = mavutil.mavlink_connection("udpout:127.0.0.1:14601", source_system=1)
+
+    recorder = TlogRecorder(
+        tmp_path, logging.getLogger("fgcs"), compression=compression, rotate_bytes=1
+    )
+    try:
+        recorder.attach(master)
+        vehicle.mav.heartbeat_send(2, 3, 0, 0, 4)
+        receiveHeartbeat(master)
+        # Wait so the received frame is written before the sent frame
+        time.sleep(0.3)
+        master.mav.heartbeat_send(6, 8, 0, 0, 4)
+        receiveHeartbeat(vehicle)
+    finally:
+        recorder.close()
+        master.close()
+        vehicle.close()
+
+    assert master.mav.callback is None
+    assert recorder.dropped_frames == 0
+    # Each batch starts a new file as the rotation size is so small
+    assert len(recorder.log_files) == 2
+
+    src_systems = []
+    for log_file in recorder.log_files:
+        if compression == "gzip":
+            plain_log_file = log_file.with_suffix("")
+            plain_log_file.write_bytes(gzip.decompress(log_file.read_bytes()))
+            log_file = plain_log_file
+
+        tlog = mavutil.mavlink_connection(str(log_file))
+        while (msg := tlog.recv_match(type="HEARTBEAT")) is not None:
+            src_systems.append(msg.get_srcSystem())
+            assert abs(msg._timestamp - time.time()) < 60
+        tlog.close()
+
+    assert src_systems == [1, 255]
+
+
+def test_droneRecordsTlog(droneStatus) -> None:
+    # Tlogs are only recorded when asked for
+    assert droneStatus.drone.tlog_recorder is None
+
+    droneStatus.drone.startTlogRecording()
+    try:
+        recorder = droneStatus.drone.tlog_recorder
+        assert recorder is not None
+        assert droneStatus.drone.master.mav.callback == recorder.recordIncoming
+
+        bytes_written = recorder.bytes_written
+        deadline = time.monotonic() + 5
+        while recorder.bytes_written == bytes_written and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert recorder.bytes_written > bytes_written
+    finally:
+        droneStatus.drone.stopTlogRecording()
@@ -0,0 +1,43 @@
+import time
+from threading import Timer
+from types import SimpleNamespace
+
+from app.vehicleState import VehicleState
+from pymavlink import mavutil
+
+
+def create_heartbeat(armed: bool, mode: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        base_mode=mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED if armed else 0,
+        custom_mode=mode,
+        system_status=mavutil.mavlink.MAV_STATE_STANDBY,
+    )
+
+
+def test_waitUntil_returnsWhenHeartbeatChangesState() -> None:
+    state = VehicleState()
+    Timer(0.1, state.updateFromHeartbeat, [create_heartbeat(True, 4)]).start()
+
+    start = time.monotonic()
+    assert state.waitUntil(5, armed=True) is True
+    assert time.monotonic() - start < 1
+    assert state.armed is True
+    assert state.mode == 4
+
+
+def test_waitUntil_alreadyInState() -> None:
+    state = VehicleState()
+    state.updateFromHeartbeat(create_heartbeat(False, 5))
+
+    assert state.waitUntil(0, armed=False, mode=5) is True
+    assert state.waitForMode(5, 0) is True
+
+
+def test_waitUntil_timesOut() -> None:
+    state = VehicleState()
+    state.updateFromHeartbeat(create_heartbeat(False, 0))
+
+    start = time.monotonic()
+    assert state.waitForMode(4, 0.1) is False
+    assert state.waitUntil(0.1, armed=True) is False
+    assert time.monotonic() - start >= 0.2